@@ -1,85 +1,217 @@
 import os
-import subprocess
-from flask import Flask, request, jsonify, send_from_directory
-import mimetypes
-import csv
-import json
+import threading
+import uuid
+from typing import Any, Dict, Iterator
+from flask import Flask, Response, request, jsonify, send_from_directory
+from flask.typing import ResponseReturnValue
 import sys
 
-# Füge das Verzeichnis mit `convert_csv_to_json` zu den Suchpfaden hinzu
+# Füge das Verzeichnis mit `convert_csv_to_json` und `invoice_renderer` zu den Suchpfaden hinzu
 sys.path.append(os.path.abspath("./data_extraction/scripts"))
 
-# Importiere die Funktion
-from convert_csv_to_json import convert_csv_to_json
+# Importiere die Job-Warteschlange
+from pdf_jobs import JOB_STATUS_DONE, MAX_PDF_PAGE_SIZE, PDF_PAGE_SIZE, JobQueue, JobStore, job_output_dir
+from zip_stream import StoredZipStream, ZipEntry, parse_range
 
 app = Flask(__name__)
 
 
 CUSTOMERS_DIR = "./data_extraction/data/customers"
 PDFS_DIR = "./data_extraction/data/output/customer_pdfs"
-PIPELINE_SCRIPT = os.path.abspath("./test_pipeline.sh")  # Absoluter Pfad zum Pipeline-Skript
+JOBS_DB = "./data_extraction/data/output/jobs.sqlite3"
+JOB_WORKERS = int(os.environ.get("PDF_JOB_WORKERS", 2))  # Anzahl paralleler Render-Jobs
+RENDER_CACHE_DIR = "./data_extraction/data/output/render_cache"  # Gemeinsamer Cache unveränderter Rechnungen
+RENDER_CACHE_MAX_MB = int(os.environ.get("PDF_RENDER_CACHE_MAX_MB", 1024))  # Maximale Cache-Größe in MB
 
 # Verzeichnisse erstellen, falls sie nicht existieren
 os.makedirs(CUSTOMERS_DIR, exist_ok=True)
 os.makedirs(PDFS_DIR, exist_ok=True)
 
+job_store = JobStore(JOBS_DB)
+# Jobs abgestürzter Server-Prozesse sofort beim Start als fehlgeschlagen markieren, nicht erst beim ersten Upload
+job_store.fail_unfinished("Job wurde durch einen Neustart des Servers abgebrochen.")
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Startet den Worker-Pool beim ersten Upload (nicht beim Import, damit Worker-Prozesse ihn nicht erneut starten).
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                job_store,
+                os.path.abspath(PDFS_DIR),
+                workers=JOB_WORKERS,
+                cache_dir=os.path.abspath(RENDER_CACHE_DIR),
+                cache_max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024,
+            )
+        return _job_queue
+
+
+def job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job["id"],
+        "filename": job["filename"],
+        "status": job["status"],
+        "total": job["total"],
+        "done": job["done"],
+        "pdf_count": job["pdf_count"],
+        "error_count": len(job["errors"]),
+        "message": job["message"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "status_url": f"http://127.0.0.1:5000/jobs/{job['id']}",
+        "pdfs_url": f"http://127.0.0.1:5000/jobs/{job['id']}/pdfs",
+        "archive_url": f"http://127.0.0.1:5000/jobs/{job['id']}/archive",
+    }
+
+
 @app.route("/upload", methods=["POST"])
-def upload_file():
+def upload_file() -> ResponseReturnValue:
     try:
         # Prüfe, ob eine Datei hochgeladen wurde
         if "file" not in request.files:
             return jsonify({"error": "Keine Datei hochgeladen"}), 400
 
         file = request.files["file"]
-        if file.filename == "":
+        if not file.filename:
             return jsonify({"error": "Leerer Dateiname"}), 400
 
-        # Datei im Kundenverzeichnis speichern
-        file_path = os.path.join(CUSTOMERS_DIR, file.filename)
+        # Datei unter der Job-ID im Kundenverzeichnis speichern, damit parallele Uploads sich nicht überschreiben
+        job_id = uuid.uuid4().hex
+        file_path = os.path.abspath(os.path.join(CUSTOMERS_DIR, f"{job_id}_{os.path.basename(file.filename)}"))
         file.save(file_path)
-        file_path = os.path.abspath(file_path)  # Absoluter Pfad zur Datei
         print(f"DEBUG: Datei gespeichert unter {file_path}")
 
-        # Prüfen, ob die Datei CSV ist, und konvertieren
-        if file.filename.endswith(".csv"):
-            json_file_path = file_path.replace(".csv", ".json")
-            convert_csv_to_json(file_path, json_file_path)
-            print(f"DEBUG: CSV-Datei erfolgreich zu JSON konvertiert: {json_file_path}")
-            file_path = json_file_path  # Weiterarbeiten mit der JSON-Datei
-
-        # Starte die Pipeline
-        result = subprocess.run(
-            ["bash", PIPELINE_SCRIPT, file_path],
-            capture_output=True,
-            text=True
-        )
-        print(f"DEBUG: Übergebener Dateipfad: {file_path}")
-        print(f"DEBUG: Pipeline stdout: {result.stdout}")
-        print(f"DEBUG: Pipeline stderr: {result.stderr}")
-
-        if result.returncode != 0:
-            return jsonify({"error": "Pipeline-Fehler", "details": result.stderr}), 500
-
-        # Liste der generierten PDFs erstellen
-        pdf_files = [f"http://127.0.0.1:5000/pdfs/{pdf}" for pdf in os.listdir(PDFS_DIR) if pdf.endswith(".pdf")]
-
-        return jsonify({
-            "message": "Pipeline erfolgreich abgeschlossen",
-            "pdf_links": pdf_files
-        }), 200
+        # Job einreihen; gerendert wird im Worker-Pool
+        get_job_queue().submit(file.filename, file_path, job_id=job_id)
+        print(f"DEBUG: Job {job_id} eingereiht")
+
+        job = job_store.get(job_id)
+        assert job is not None
+        response = job_response(job)
+        response["message"] = "Datei hochgeladen, Verarbeitung gestartet"
+        return jsonify(response), 202
 
     except Exception as e:
         print(f"DEBUG: Ein unerwarteter Fehler ist aufgetreten: {e}")
         return jsonify({"error": "Ein unerwarteter Fehler ist aufgetreten", "details": str(e)}), 500
 
 
-@app.route("/pdfs/<filename>", methods=["GET"])
-def download_pdf(filename):
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str) -> ResponseReturnValue:
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+    return jsonify(job_response(job)), 200
+
+
+@app.route("/jobs/<job_id>/pdfs", methods=["GET"])
+def get_job_pdfs(job_id: str) -> ResponseReturnValue:
+    """
+    Listet die PDFs eines Jobs seitenweise über den Index (`?after=<seq>&limit=<n>`), auch während er läuft.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+
     try:
-        return send_from_directory(PDFS_DIR, filename, as_attachment=True)
+        after = int(request.args.get("after", -1))
+        limit = min(max(int(request.args.get("limit", PDF_PAGE_SIZE)), 1), MAX_PDF_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "Ungültige Parameter für after/limit"}), 400
+
+    page = job_store.list_pdfs(job_id, after=after, limit=limit)
+    pdfs = [
+        {"seq": seq, "filename": filename, "url": f"http://127.0.0.1:5000/jobs/{job_id}/pdfs/{filename}"}
+        for seq, filename in page
+    ]
+    return jsonify({
+        "job_id": job["id"],
+        "status": job["status"],
+        "pdf_count": job["pdf_count"],
+        "pdfs": pdfs,
+        "pdf_links": [pdf["url"] for pdf in pdfs],
+        "next_after": page[-1][0] if len(page) == limit else None,
+        "errors": job["errors"]
+    }), 200
+
+
+@app.route("/jobs/<job_id>/pdfs/<filename>", methods=["GET"])
+def download_job_pdf(job_id: str, filename: str) -> ResponseReturnValue:
+    if job_store.get(job_id) is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+    try:
+        return send_from_directory(job_output_dir(os.path.abspath(PDFS_DIR), job_id), filename, as_attachment=True)
     except FileNotFoundError:
         return jsonify({"error": "Datei nicht gefunden"}), 404
 
 
+@app.route("/jobs/<job_id>/archive", methods=["GET"])
+def download_job_archive(job_id: str) -> ResponseReturnValue:
+    """
+    Streamt alle PDFs eines abgeschlossenen Jobs als ZIP-Archiv, ohne es auf der Platte oder im Speicher
+    aufzubauen. Unterstützt HTTP-Range-Anfragen (auch mit If-Range) zum Fortsetzen abgebrochener Downloads.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job nicht gefunden"}), 404
+    if job["status"] != JOB_STATUS_DONE:
+        return jsonify({"error": "Job ist noch nicht abgeschlossen", "status": job["status"]}), 409
+
+    stats = job_store.pdf_stats(job_id)
+    pdf_dir = job_output_dir(os.path.abspath(PDFS_DIR), job_id)
+
+    def entries() -> Iterator[ZipEntry]:
+        for filename, size, crc in job_store.iter_pdfs(job_id):
+            yield ZipEntry(filename, os.path.join(pdf_dir, filename), size, crc)
+
+    archive = StoredZipStream(
+        entries, stats["count"], stats["name_bytes"], stats["data_bytes"], timestamp=job["created_at"]
+    )
+    etag = f'"{job_id}-{stats["count"]}-{archive.total_size}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="{job_id}.zip"',
+    }
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range"), archive.total_size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{archive.total_size}"
+            return Response(status=416, headers=headers)
+
+    if byte_range is None:
+        start, end, status = 0, archive.total_size - 1, 200
+    else:
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{archive.total_size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return Response(
+        archive.iter_bytes(start, end), status=status, headers=headers, mimetype="application/zip",
+        direct_passthrough=True
+    )
+
+
+@app.route("/pdfs/<filename>", methods=["GET"])
+def download_pdf(filename: str) -> ResponseReturnValue:
+    """
+    Download-Adresse früherer Versionen ohne Job-ID; liefert die PDF aus dem neuesten Job mit diesem Dateinamen.
+    """
+    job_id = job_store.find_pdf_job(filename)
+    if job_id is None:
+        return jsonify({"error": "Datei nicht gefunden"}), 404
+    return download_job_pdf(job_id, filename)
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -91,6 +91,26 @@ def main() -> None:
         help='The amount of time to run the load test for. (default: %(default)s)',
     )
 
+    parser.add_argument(
+        '--arrival-rate',
+        type=float,
+        required=False,
+        default=None,
+        help="""Number of requests sent per second. If set, requests are sent in open loop at this rate whether or not
+            earlier requests finished, instead of back-to-back by `num-concurrent-requests` threads.
+            (default: %(default)s)""",
+    )
+
+    parser.add_argument(
+        '--arrival-schedule',
+        choices=['poisson', 'constant', 'ramp'],
+        required=False,
+        default='poisson',
+        help="""How requests are spread in time when `arrival-rate` is set: 'poisson' for random gaps like independent
+            users, 'constant' for evenly spaced requests, or 'ramp' for a rate growing linearly up to `arrival-rate`.
+            (default: %(default)s)""",
+    )
+
     parser.add_argument(
         '--metadata',
         type=str,
@@ -149,6 +169,8 @@ def main() -> None:
             results_dir=args.results_dir,
             num_concurrent_requests=args.num_concurrent_requests,
             timeout=args.timeout,
+            arrival_rate=args.arrival_rate,
+            arrival_schedule=args.arrival_schedule,
             user_metadata=user_metadata,
             input_file_path=args.input_file_path,
             save_response_texts=args.save_llm_responses,
@@ -203,6 +225,8 @@ def main() -> None:
                 results_dir=args.results_dir,
                 num_concurrent_requests=args.num_concurrent_requests,
                 timeout=args.timeout,
+                arrival_rate=args.arrival_rate,
+                arrival_schedule=args.arrival_schedule,
                 user_metadata=user_metadata,
                 llm_api=args.llm_api,
             )
@@ -11,10 +11,12 @@ REQ_START_TIME = 'start_time'
 REQ_END_TIME = 'end_time'
 BATCH_SIZE_USED = 'batch_size_used'
 QUEUE_TIME = 'queue_time'
+SCHEDULE_LAG = 'client_schedule_lag_s'
 
 # Client-side metrics
 TTFT = 'client_ttft_s'
 E2E_LAT = 'client_end_to_end_latency_s'
+TPOT = 'client_tpot_s'
 REQ_OUTPUT_THROUGHPUT = 'client_output_token_per_s_per_request'
 TOTAL_TOKEN_THROUGHPUT = 'client_total_tokens_per_sec_s_per_request'
 OUTPUT_THROUGHPUT = 'client_mean_output_token_per_s'
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+from typing import Callable, List, Optional
+
+import aiohttp
+from transformers import AutoTokenizer
+
+from benchmarking.src.llmperf import common_metrics
+from benchmarking.src.llmperf.models import LLMResponse, RequestConfig
+from benchmarking.src.llmperf.sambanova_client import allm_request
+
+logger = logging.getLogger(__name__)
+
+ARRIVAL_SCHEDULES = ('poisson', 'constant', 'ramp')
+STOP_POLL_INTERVAL = 0.5
+# send lags above this mean the client machine, not the endpoint, limits the load
+MAX_EXPECTED_SCHEDULE_LAG = 0.05
+
+
+def build_arrival_offsets(
+    num_requests: int, arrival_rate: float, schedule: str = 'poisson', seed: int = 11111
+) -> List[float]:
+    """Builds the times at which the requests of an open-loop run are sent, in seconds from the start of the run
+
+    Args:
+        num_requests (int): number of requests to schedule
+        arrival_rate (float): target number of requests sent per second. With the 'ramp' schedule it is the rate
+            reached at the end of the run.
+        schedule (str, optional): 'poisson' for exponentially distributed gaps between requests, like independent
+            users, 'constant' for evenly spaced requests, or 'ramp' for a rate growing linearly from zero to
+            `arrival_rate`, useful to find the rate where the endpoint saturates. Defaults to 'poisson'.
+        seed (int, optional): seed of the poisson gaps, so runs are reproducible. Defaults to 11111.
+
+    Raises:
+        ValueError: if the rate is not positive or the schedule is unknown
+
+    Returns:
+        list: sorted send times of the requests
+    """
+    if arrival_rate <= 0:
+        raise ValueError(f'arrival_rate must be positive. Got {arrival_rate}')
+
+    if schedule == 'poisson':
+        rng = random.Random(seed)
+        offsets = [0.0]
+        for _ in range(num_requests - 1):
+            offsets.append(offsets[-1] + rng.expovariate(arrival_rate))
+        return offsets[:num_requests]
+    if schedule == 'constant':
+        return [i / arrival_rate for i in range(num_requests)]
+    if schedule == 'ramp':
+        # the rate grows linearly up to arrival_rate at the last request, so i requests are sent by
+        # rate * t^2 / (2 * duration) = i with duration = 2 * num_requests / rate
+        return [2 * math.sqrt(i * num_requests) / arrival_rate for i in range(num_requests)]
+    raise ValueError(f'Unknown arrival schedule {schedule}. Available values are {", ".join(ARRIVAL_SCHEDULES)}')
+
+
+class OpenLoopLoadGenerator:
+    """Sends requests at scheduled times from an asyncio event loop, whether or not earlier requests finished.
+
+    Unlike sending requests back-to-back from a fixed number of threads (closed loop), the offered load does not
+    drop when the endpoint slows down, so latencies are measured the way real traffic sees them and the arrival
+    rate where the endpoint saturates shows up as growing TTFTs. All requests share one http session and stream
+    their responses without threads, so thousands of them can be in flight at once.
+
+    The delay between the scheduled and the actual send time of each request is recorded in the
+    `client_schedule_lag_s` metric; if it grows, the machine running the benchmark cannot keep up with the rate.
+    """
+
+    def __init__(
+        self,
+        tokenizer: AutoTokenizer,
+        timeout: float,
+        stop_event: Optional[threading.Event] = None,
+        on_response: Optional[Callable[[LLMResponse], None]] = None,
+    ) -> None:
+        """
+        Args:
+            tokenizer (AutoTokenizer): tokenizer for counting tokens
+            timeout (float): seconds after the start of the run after which no new requests are sent
+            stop_event (threading.Event, optional): event that cancels the run when set. Defaults to None.
+            on_response (callable, optional): called with each response as it completes, e.g. to update a progress
+                bar. Defaults to None.
+        """
+        self.tokenizer = tokenizer
+        self.timeout = timeout
+        self.stop_event = stop_event or threading.Event()
+        self.on_response = on_response
+
+    def run(self, request_configs: List[RequestConfig], arrival_offsets: List[float]) -> List[LLMResponse]:
+        """Sends each request at its offset from now and returns the responses in completion order
+
+        Args:
+            request_configs (list): request configs to send
+            arrival_offsets (list): send time of each request, in seconds from the start of the run
+
+        Returns:
+            list: responses of the requests sent before the timeout, in completion order
+        """
+        _raise_open_files_limit(len(request_configs))
+        return asyncio.run(self._run(request_configs, arrival_offsets))
+
+    async def _run(self, request_configs: List[RequestConfig], arrival_offsets: List[float]) -> List[LLMResponse]:
+        llm_responses: List[LLMResponse] = []
+        tasks: List[asyncio.Task[None]] = []
+        loop = asyncio.get_running_loop()
+
+        # no connection limit, the schedule alone sets the load; no total timeout, long generations are expected
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=None)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, read_bufsize=2**20) as session:
+            start_time = loop.time()
+            for request_config, offset in zip(request_configs, arrival_offsets):
+                if offset >= self.timeout:
+                    break
+                # sleep until the absolute send time, so the schedule does not drift when the loop is busy
+                while not self.stop_event.is_set() and loop.time() - start_time < offset:
+                    await asyncio.sleep(min(offset - (loop.time() - start_time), STOP_POLL_INTERVAL))
+                if self.stop_event.is_set():
+                    logger.info('Stopping request scheduling due to stop signal.')
+                    break
+                schedule_lag = loop.time() - start_time - offset
+                tasks.append(asyncio.create_task(self._send(session, request_config, schedule_lag, llm_responses)))
+
+            pending = set(tasks)
+            while pending:
+                _, pending = await asyncio.wait(pending, timeout=STOP_POLL_INTERVAL)
+                if pending and self.stop_event.is_set():
+                    logger.info(f'Cancelling {len(pending)} requests in flight due to stop signal.')
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    break
+
+        lags = sorted(response.metrics[common_metrics.SCHEDULE_LAG] for response in llm_responses)
+        if lags and lags[-1] > MAX_EXPECTED_SCHEDULE_LAG:
+            logger.warning(
+                f'Requests were sent up to {lags[-1]:.3f}s after their scheduled time '
+                f'(median {lags[len(lags) // 2]:.3f}s), the client may not sustain the requested arrival rate.'
+            )
+        return llm_responses
+
+    async def _send(
+        self,
+        session: aiohttp.ClientSession,
+        request_config: RequestConfig,
+        schedule_lag: float,
+        llm_responses: List[LLMResponse],
+    ) -> None:
+        req_metrics, response_text, request_config = await allm_request(session, request_config, self.tokenizer)
+        req_metrics[common_metrics.SCHEDULE_LAG] = schedule_lag
+
+        # Create response object containing metrics, generated text, and corresponding request config
+        response_object = LLMResponse(metrics=req_metrics, response_text=response_text, request_config=request_config)
+        llm_responses.append(response_object)
+        if self.on_response:
+            self.on_response(response_object)
+
+
+def _raise_open_files_limit(num_connections: int) -> None:
+    """Raises the soft limit of open files up to the hard limit when the run may open more connections than allowed"""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    # leave room for the files opened by the rest of the process
+    needed = num_connections + 256
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        new_soft = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (new_soft, hard))
+        except (ValueError, OSError) as e:
+            logger.warning(f'Could not raise the open files limit from {soft} to {new_soft}: {e}')
+            return
+        if new_soft < needed:
+            logger.warning(f'Open files limit is {new_soft}, requests above this concurrency will fail to connect.')
@@ -1,12 +1,14 @@
 import abc
+import asyncio
 import json
 import os
 import sys
 import time
 from datetime import datetime
 from math import isclose
-from typing import Any, Dict, List, Tuple
+from typing import Any, AsyncIterator, Dict, List, Tuple
 
+import aiohttp
 import requests
 import sseclient
 from requests import Response
@@ -155,6 +157,12 @@ class BaseAPIEndpoint(abc.ABC):
 
         metrics[common_metrics.E2E_LAT] = total_request_time
 
+        metrics[common_metrics.TPOT] = (
+            (total_request_time - ttft) / (metrics[common_metrics.NUM_OUTPUT_TOKENS] - 1)
+            if metrics[common_metrics.NUM_OUTPUT_TOKENS] > 1
+            else None
+        )
+
         if number_chunks_recieved == 1:
             metrics[common_metrics.REQ_OUTPUT_THROUGHPUT] = (
                 metrics[common_metrics.NUM_OUTPUT_TOKENS] / total_request_time
@@ -218,6 +226,98 @@ class BaseAPIEndpoint(abc.ABC):
 
         return metrics
 
+    def _build_metrics(
+        self,
+        metrics: Dict[str, Any],
+        chunks_received: List[str],
+        chunks_timings: List[int | float],
+        response_dict: Dict[str, Any],
+        generated_text: str,
+        total_request_time: int | float,
+    ) -> Dict[str, Any]:
+        """Populates `metrics` with the server and client metrics of a finished streaming request
+
+        Args:
+            metrics (dict): basic metrics dictionary
+            chunks_received (list): list of events having the streaming tokens
+            chunks_timings (list): list of timings for each event
+            response_dict (dict): dict data with the performance metrics sent by the server
+            generated_text (str): complete generated text
+            total_request_time (int): end-to-end latency
+
+        Returns:
+            dict: updated metrics dictionary
+        """
+        ttft = self._calculate_ttft_from_streams(chunks_received, chunks_timings, total_request_time)
+
+        # Populate server and client metrics
+        prompt_len = self.request_config.prompt_tuple[1]
+        number_chunks_recieved = len(chunks_received)
+
+        num_output_tokens = self._get_token_length(generated_text)
+        server_metrics = self._populate_server_metrics(response_dict, metrics)
+        return self._populate_client_metrics(
+            prompt_len,
+            num_output_tokens,
+            ttft,
+            total_request_time,
+            server_metrics,
+            number_chunks_recieved,
+        )
+
+    async def _abuild_metrics(self, *args: Any) -> Dict[str, Any]:
+        """Runs `_build_metrics` in a worker thread, so tokenizing does not delay the other streams of the event
+        loop and their timings"""
+        return await asyncio.get_running_loop().run_in_executor(None, self._build_metrics, *args)
+
+    @staticmethod
+    async def _aiter_sse_data(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+        """Yields the data of each server-sent event of a streaming response as soon as the event is complete"""
+        data_lines: List[str] = []
+        async for raw_line in response.content:
+            line = raw_line.decode('utf-8').rstrip('\r\n')
+            if not line:
+                if data_lines:
+                    yield '\n'.join(data_lines)
+                    data_lines = []
+            elif line.startswith('data:'):
+                data_lines.append(line[5:].removeprefix(' '))
+        if data_lines:
+            yield '\n'.join(data_lines)
+
+    async def _aparse_openai_compatible_response(
+        self, response: aiohttp.ClientResponse, event_start_time: float
+    ) -> Tuple[List[Any], List[Any], Dict[str, Any], str]:
+        # Set variables
+        generated_text = ''
+        events_received = []
+        events_timings = []
+        response_dict: Dict[str, Any] = {}
+
+        async for event_data in self._aiter_sse_data(response):
+            try:
+                # check streaming events before last stream returns DONE
+                if event_data != '[DONE]':
+                    data = json.loads(event_data)
+                    # if events don't contain "usage" key, which only shows up in stream returning
+                    # performance metrics
+                    if data.get('usage') is None:
+                        # if streams still don't hit a finish reason
+                        if data['choices'][0]['finish_reason'] is None:
+                            # log s timings
+                            events_timings.append(time.monotonic() - event_start_time)
+                            event_start_time = time.monotonic()
+                            # concatenate streaming text pieces
+                            stream_content = data['choices'][0]['delta']['content']
+                            events_received.append(stream_content)
+                            generated_text += stream_content
+                    # process streaming chunk when performance usage is provided
+                    else:
+                        response_dict = data['usage']
+            except Exception as e:
+                raise Exception(f'Error: {e} at streamed event: {event_data}')
+        return events_received, events_timings, response_dict, generated_text
+
 
 class SambaStudioAPI(BaseAPIEndpoint):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -373,21 +473,68 @@ class SambaStudioAPI(BaseAPIEndpoint):
         # End measuring time
         metrics[common_metrics.REQ_END_TIME] = datetime.now().strftime('%H:%M:%S.%f')
         total_request_time = time.monotonic() - start_time
-        ttft = self._calculate_ttft_from_streams(chunks_received, chunks_timings, total_request_time)
 
-        # Populate server and client metrics
-        prompt_len = self.request_config.prompt_tuple[1]
-        number_chunks_recieved = len(chunks_received)
+        metrics = self._build_metrics(
+            metrics, chunks_received, chunks_timings, response_dict, generated_text, total_request_time
+        )
 
-        num_output_tokens = self._get_token_length(generated_text)
-        server_metrics = self._populate_server_metrics(response_dict, metrics)
-        metrics = self._populate_client_metrics(
-            prompt_len,
-            num_output_tokens,
-            ttft,
-            total_request_time,
-            server_metrics,
-            number_chunks_recieved,
+        return metrics, generated_text
+
+    async def acompute_metrics(
+        self, session: aiohttp.ClientSession, metrics: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], str]:
+        """Computes metrics for SambaStudio API endpoint, streaming the response with an asyncio http session
+
+        Args:
+            session (aiohttp.ClientSession): http session shared by the concurrent requests
+            metrics (dict): basic metrics dictionary
+
+        Raises:
+            ValueError: raises when streaming is not selected
+
+        Returns:
+            tuple[dict, str]: tuple containing the metrics structure with server and client side values, and the
+            complete generated text
+        """
+        if not self.request_config.is_stream_mode:
+            # TODO: support non-streaming mode
+            raise ValueError('Streaming mode required')
+
+        # Get API request components
+        url = self._get_url()
+        headers = self._get_headers()
+        json_data = self._get_json_data(url)
+
+        # Start measuring time
+        metrics[common_metrics.REQ_START_TIME] = datetime.now().strftime('%H:%M:%S.%f')
+        start_time = time.monotonic()
+
+        async with session.post(url, headers=headers, json=json_data) as response:
+            if response.status != 200:
+                error_details = await response.text()
+                raise Exception(f'Error: {response.status}, Details: {error_details}')
+
+            if 'chat/completions' in self.base_url:  # SambaStudio compatible with OpenAI data payload
+                (
+                    chunks_received,
+                    chunks_timings,
+                    response_dict,
+                    generated_text,
+                ) = await self._aparse_openai_compatible_response(response, start_time)
+            else:  # Regular SambaStudio data payload
+                (
+                    chunks_received,
+                    chunks_timings,
+                    response_dict,
+                    generated_text,
+                ) = await self._aparse_regular_sambastudio_response(response, start_time, url)
+
+        # End measuring time
+        metrics[common_metrics.REQ_END_TIME] = datetime.now().strftime('%H:%M:%S.%f')
+        total_request_time = time.monotonic() - start_time
+
+        metrics = await self._abuild_metrics(
+            metrics, chunks_received, chunks_timings, response_dict, generated_text, total_request_time
         )
 
         return metrics, generated_text
@@ -468,6 +615,37 @@ class SambaStudioAPI(BaseAPIEndpoint):
                     break
         return chunks_received, chunks_timings, response_dict, generated_text
 
+    async def _aparse_regular_sambastudio_response(
+        self, response: aiohttp.ClientResponse, chunk_start_time: float, url: str
+    ) -> Tuple[List[Any], List[Any], Dict[str, Any], str]:
+        # Set variables
+        generated_text = ''
+        chunks_received = []
+        chunks_timings = []
+        response_dict: Dict[str, Any] = {}
+
+        async for chunk_orig in response.content:
+            chunk = chunk_orig.strip()
+            if not chunk:
+                continue
+            data = json.loads(chunk)
+
+            # fetch generated text and metrics for api v2, or api v1 otherwise
+            if '/api/v2' in url.lower().strip():
+                value = data['result']['items'][0]['value']
+            else:
+                value = data['result']['responses'][0]
+
+            chunks_timings.append(time.monotonic() - chunk_start_time)
+            chunk_start_time = time.monotonic()
+            if value['is_last_response'] is False:
+                chunks_received.append(value['stream_token'])
+            else:
+                generated_text = value['completion']
+                response_dict = value
+                break
+        return chunks_received, chunks_timings, response_dict, generated_text
+
 
 class SambaNovaCloudAPI(BaseAPIEndpoint):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -574,21 +752,51 @@ class SambaNovaCloudAPI(BaseAPIEndpoint):
         # End measuring time
         metrics[common_metrics.REQ_END_TIME] = datetime.now().strftime('%H:%M:%S.%f')
         total_request_time = time.monotonic() - start_time
-        ttft = self._calculate_ttft_from_streams(events_received, events_timings, total_request_time)
 
-        # Populate server and client metrics
-        prompt_len = self.request_config.prompt_tuple[1]
-        number_chunks_recieved = len(events_received)
+        metrics = self._build_metrics(
+            metrics, events_received, events_timings, response_dict, generated_text, total_request_time
+        )
 
-        num_output_tokens = self._get_token_length(generated_text)
-        server_metrics = self._populate_server_metrics(response_dict, metrics)
-        metrics = self._populate_client_metrics(
-            prompt_len,
-            num_output_tokens,
-            ttft,
-            total_request_time,
-            server_metrics,
-            number_chunks_recieved,
+        return metrics, generated_text
+
+    async def acompute_metrics(
+        self, session: aiohttp.ClientSession, metrics: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], str]:
+        """Computes metrics for SambaNovaCloud endpoint, streaming the response with an asyncio http session
+
+        Args:
+            session (aiohttp.ClientSession): http session shared by the concurrent requests
+            metrics (dict): basic metrics dictionary
+
+        Returns:
+            tuple[dict, str]: tuple containing the metrics structure with server and client side values, and the
+            complete generated text
+        """
+
+        # Get API request components
+        url = self._get_url()
+        headers = self._get_headers()
+        json_data = self._get_json_data()
+
+        # Start measuring time
+        metrics[common_metrics.REQ_START_TIME] = datetime.now().strftime('%H:%M:%S.%f')
+        start_time = time.monotonic()
+
+        async with session.post(url, headers=headers, json=json_data) as response:
+            response.raise_for_status()
+            (
+                events_received,
+                events_timings,
+                response_dict,
+                generated_text,
+            ) = await self._aparse_openai_compatible_response(response, start_time)
+
+        # End measuring time
+        metrics[common_metrics.REQ_END_TIME] = datetime.now().strftime('%H:%M:%S.%f')
+        total_request_time = time.monotonic() - start_time
+
+        metrics = await self._abuild_metrics(
+            metrics, events_received, events_timings, response_dict, generated_text, total_request_time
         )
 
         return metrics, generated_text
@@ -640,6 +848,55 @@ def llm_request(request_config: RequestConfig, tokenizer: AutoTokenizer) -> Tupl
         return metrics, '', request_config
 
 
+async def allm_request(
+    session: aiohttp.ClientSession, request_config: RequestConfig, tokenizer: AutoTokenizer
+) -> Tuple[Dict[str, Any], str, RequestConfig]:
+    """Makes a single streaming completion request to a LLM API without blocking the event loop, so thousands of
+    requests can be in flight at once
+
+    Args:
+        session (aiohttp.ClientSession): http session shared by the concurrent requests
+        request_config (RequestConfig): config options including user's prompt and LLM parameters
+        tokenizer (AutoTokenizer): tokenizer for counting tokens
+
+    Returns:
+        tuple: Metrics about the performance charateristics of the request.
+        The text generated by the request to the LLM API.
+        The request_config used to make the request. This is mainly for logging purposes.
+    """
+
+    generated_text = ''
+    metrics: Dict[str, Any] = {}
+    metrics[common_metrics.ERROR_CODE] = None
+    metrics[common_metrics.ERROR_MSG] = ''
+
+    try:
+        if request_config.llm_api == 'sncloud':
+            sncloud_client = SambaNovaCloudAPI(request_config, tokenizer)
+            metrics, generated_text = await sncloud_client.acompute_metrics(session, metrics)
+
+        elif request_config.llm_api == 'sambastudio':
+            sambastudio_client = SambaStudioAPI(request_config, tokenizer)
+            metrics, generated_text = await sambastudio_client.acompute_metrics(session, metrics)
+
+        else:
+            raise ValueError(f'llm_api parameter with value {request_config.llm_api} is not valid.')
+
+        return metrics, generated_text, request_config
+
+    except Exception as e:
+        error_code = getattr(
+            e,
+            'status',
+            """Error while running LLM API requests.
+            Check your model name, LLM API type, env variables and endpoint status.""",
+        )
+        metrics[common_metrics.ERROR_MSG] = str(e) or type(e).__name__
+        metrics[common_metrics.ERROR_CODE] = error_code
+
+        return metrics, '', request_config
+
+
 if __name__ == '__main__':
     # The call of this python file is more for debugging purposes
 
@@ -27,6 +27,7 @@ from tqdm import tqdm
 import benchmarking.src.llmperf.llmperf_utils as llmperf_utils
 from benchmarking.src.llmperf import common_metrics
 from benchmarking.src.llmperf.llmperf_utils import LLMPerfResults, flatten, get_tokenizer
+from benchmarking.src.llmperf.load_generator import ARRIVAL_SCHEDULES, OpenLoopLoadGenerator, build_arrival_offsets
 from benchmarking.src.llmperf.models import LLMResponse, RequestConfig
 from benchmarking.src.llmperf.sambanova_client import llm_request
 
@@ -54,7 +55,13 @@ class BasePerformanceEvaluator(abc.ABC):
         api_variables: Dict[str, str] = {},
         is_stream_mode: bool = True,
         timeout: int = 600,
+        arrival_rate: Optional[float] = None,
+        arrival_schedule: str = 'poisson',
     ) -> None:
+        if arrival_schedule not in ARRIVAL_SCHEDULES:
+            raise ValueError(
+                f'Unknown arrival schedule {arrival_schedule}. Available values are {", ".join(ARRIVAL_SCHEDULES)}'
+            )
         self.model_name = model_name
         self.results_dir = results_dir
         self.num_concurrent_requests = num_concurrent_requests
@@ -63,6 +70,10 @@ class BasePerformanceEvaluator(abc.ABC):
         self.api_variables = api_variables
         self.is_stream_mode = is_stream_mode
         self.timeout = timeout
+        # requests per second of the open-loop mode, requests are sent back-to-back by
+        # `num_concurrent_requests` threads (closed loop) when it is not set
+        self.arrival_rate = arrival_rate
+        self.arrival_schedule = arrival_schedule
         self.tokenizer = get_tokenizer(self.model_name)
         self.stop_event = threading.Event()
         self.ui_progress_bar = None
@@ -201,6 +212,134 @@ class BasePerformanceEvaluator(abc.ABC):
             if self.ui_progress_bar:
                 self.ui_progress_bar(progress, num_requests)
 
+    def run_requests(self, request_configs: List[RequestConfig], start_time: float) -> List[LLMResponse]:
+        """Sends the requests in open loop at `arrival_rate` if it is set, in closed loop otherwise
+
+        Args:
+            request_configs (list): list of request configs for LLM calls
+            start_time (float): start time of the process
+
+        Returns:
+            list: responses of the requests, in completion order
+        """
+        if self.arrival_rate is None:
+            return self.run_closed_loop(request_configs, start_time)
+        return self.run_open_loop(request_configs, start_time)
+
+    def run_closed_loop(self, request_configs: List[RequestConfig], start_time: float) -> List[LLMResponse]:
+        """Sends the requests back-to-back from `num_concurrent_requests` threads. It splits the total request count
+        evenly among the threads. If there is a remainder, it assigns one extra request to the first threads.
+
+        Args:
+            request_configs (list): list of request configs for LLM calls
+            start_time (float): start time of the process
+
+        Returns:
+            list: responses of the requests, in completion order
+        """
+        # Get the request counts in order to place them into threads to be executed in batches
+        total_request_count = len(request_configs)
+        requests_per_thread = (total_request_count) // self.num_concurrent_requests
+        remainder = (total_request_count) % self.num_concurrent_requests
+
+        # Set up empty batch array and index for a sliding window of request selection
+        request_config_batches = []
+        idx = 0
+
+        # Create batches of requests for each concurrent request
+        for concurrent_requests in range(self.num_concurrent_requests):
+            num_requests_for_thread = requests_per_thread + (1 if concurrent_requests < remainder else 0)
+            request_config_batch = request_configs[idx : idx + num_requests_for_thread].copy()
+            idx += num_requests_for_thread
+            request_config_batches.append(request_config_batch)
+
+        # Create empty `threads` and `completed_requests` arrays to be populated with execution threads and
+        # completed requests respectively
+        threads: List[threading.Thread] = []
+        llm_responses: List[LLMResponse] = []
+        progress = 0
+
+        # Send request threads and add to the threads array
+        for request_config_batch in request_config_batches:
+            if self.stop_event.is_set():
+                logger.info('Stopping thread creation due to stop signal.')
+                break
+
+            thread = threading.Thread(
+                target=self.send_requests,
+                args=(request_config_batch, llm_responses, progress, start_time, total_request_count),
+            )
+            threads.append(thread)
+            add_script_run_ctx(thread)  # Add Streamlit context to thread
+            thread.start()
+
+        # Wait for all threads to complete
+        for thread in threads:
+            add_script_run_ctx(thread)
+            thread.join()
+
+        return llm_responses
+
+    def run_open_loop(self, request_configs: List[RequestConfig], start_time: float) -> List[LLMResponse]:
+        """Sends the requests at `arrival_rate` following `arrival_schedule`, whether or not earlier requests
+        finished, so the endpoint is loaded the way real traffic hits it
+
+        Args:
+            request_configs (list): list of request configs for LLM calls
+            start_time (float): start time of the process
+
+        Returns:
+            list: responses of the requests, in completion order
+        """
+        assert self.arrival_rate is not None, 'arrival_rate must be set to run in open loop'
+        total_request_count = len(request_configs)
+        arrival_offsets = build_arrival_offsets(total_request_count, self.arrival_rate, self.arrival_schedule)
+        logger.info(
+            f'Sending {total_request_count} requests in open loop at {self.arrival_rate} requests/s '
+            f'({self.arrival_schedule} arrivals).'
+        )
+        progress = 0
+
+        def update_progress(response: LLMResponse) -> None:
+            nonlocal progress
+            progress += 1
+            if self.cli_progress_bar:
+                self.cli_progress_bar.update(1)
+            if self.ui_progress_bar:
+                self.ui_progress_bar(progress, total_request_count)
+
+        load_generator = OpenLoopLoadGenerator(
+            self.tokenizer,
+            timeout=self.timeout - (time.monotonic() - start_time),
+            stop_event=self.stop_event,
+            on_response=update_progress,
+        )
+
+        # The event loop runs in its own thread, so it works when the caller already runs one (e.g. notebooks)
+        llm_responses: List[LLMResponse] = []
+        thread = threading.Thread(
+            target=lambda: llm_responses.extend(load_generator.run(request_configs, arrival_offsets)),
+        )
+        add_script_run_ctx(thread)  # Add Streamlit context to thread
+        thread.start()
+        thread.join()
+
+        return llm_responses
+
+    def load_metadata(self) -> Dict[str, Any]:
+        """Returns how the requests were sent, to be added to the run metadata"""
+        return {
+            'num_concurrent_requests': self.num_concurrent_requests,
+            'arrival_rate': self.arrival_rate,
+            'arrival_schedule': self.arrival_schedule if self.arrival_rate is not None else None,
+        }
+
+    def load_file_suffix(self) -> str:
+        """Returns the output filename suffix of open-loop runs, empty for closed-loop runs"""
+        if self.arrival_rate is None:
+            return ''
+        return f'_{self.arrival_schedule}-{self.arrival_rate}rps'
+
     def build_metrics_summary(
         self,
         metrics: List[Dict[str, Any]],
@@ -234,6 +373,7 @@ class BasePerformanceEvaluator(abc.ABC):
         # Record descriptive statistics for the metrics in the following list
         for metric in [
             common_metrics.TTFT,
+            common_metrics.TPOT,
             common_metrics.E2E_LAT,
             common_metrics.REQ_OUTPUT_THROUGHPUT,
             common_metrics.NUM_INPUT_TOKENS,
@@ -399,7 +539,10 @@ class CustomPerformanceEvaluator(BasePerformanceEvaluator):
         if self.is_stream_mode:
             generation_mode = 'stream'
 
-        output_file_name = f'{self.model_name}_{self.file_name}_{self.num_concurrent_requests}_{generation_mode}'
+        output_file_name = (
+            f'{self.model_name}_{self.file_name}_{self.num_concurrent_requests}_{generation_mode}'
+            f'{self.load_file_suffix()}'
+        )
         return self.sanitize_file_prefix(output_file_name)
 
     def save_results(
@@ -502,8 +645,8 @@ class CustomPerformanceEvaluator(BasePerformanceEvaluator):
             Exception: If an unexpected error happens when executing requests.
 
         Note:
-            This function uses threading to send requests concurrently. It splits the total request count evenly among
-            the threads. If there is a remainder, it assigns one extra request to the first threads.
+            Requests are sent in open loop at `arrival_rate` if it is set, otherwise by `num_concurrent_requests`
+            threads, see `run_requests`.
         """
         random.seed(11111)
         start_time = time.monotonic()
@@ -512,39 +655,7 @@ class CustomPerformanceEvaluator(BasePerformanceEvaluator):
             sampling_params,
         )
 
-        # Get batch size details
-        total_request_count = len(request_configs)
-        requests_per_thread = total_request_count // self.num_concurrent_requests
-        remainder = total_request_count % self.num_concurrent_requests
-
-        request_config_batches = []
-        idx = 0
-        for concurrent_requests in range(self.num_concurrent_requests):
-            num_requests_for_thread = requests_per_thread + (1 if concurrent_requests < remainder else 0)
-            request_config_batch = request_configs[idx : idx + num_requests_for_thread].copy()
-            idx = idx + num_requests_for_thread
-            request_config_batches.append(request_config_batch)
-
-        threads = []
-        llm_responses: List[LLMResponse] = []
-        progress = 0
-
-        for request_config_batch in request_config_batches:
-            if self.stop_event.is_set():
-                logger.info('Stopping thread creation due to stop signal.')
-                break
-
-            thread = threading.Thread(
-                target=self.send_requests,
-                args=(request_config_batch, llm_responses, progress, start_time, total_request_count),
-            )
-            threads.append(thread)
-            add_script_run_ctx(thread)  # Give Streamlit context to thread
-            thread.start()
-
-        for thread in threads:
-            add_script_run_ctx(thread)
-            thread.join()
+        llm_responses = self.run_requests(request_configs, start_time)
 
         if self.stop_event.is_set():
             logger.info('Benchmarking process terminated early due to stop signal.')
@@ -567,7 +678,7 @@ class CustomPerformanceEvaluator(BasePerformanceEvaluator):
 
         metadata = {
             'model': self.model_name,
-            'num_concurrent_requests': self.num_concurrent_requests,
+            **self.load_metadata(),
             'results': results,
             'request_count': len(self.dataset),
             'sampling_params': sampling_params,
@@ -677,7 +788,7 @@ class SyntheticPerformanceEvaluator(BasePerformanceEvaluator):
 
         output_file_name = (
             f'{self.user_metadata["model_idx"]}_{self.model_name}_{num_input_tokens}'
-            f'_{num_output_tokens}_{self.num_concurrent_requests}_{generation_mode}'
+            f'_{num_output_tokens}_{self.num_concurrent_requests}_{generation_mode}{self.load_file_suffix()}'
         )
         return self.sanitize_file_prefix(output_file_name)
 
@@ -860,46 +971,8 @@ class SyntheticPerformanceEvaluator(BasePerformanceEvaluator):
         # Build the request config objects that are to be sent to the LLM API endpoint
         request_configs = self.build_request_configs(num_requests, num_input_tokens, num_output_tokens, sampling_params)
 
-        # Get the request counts in order to place them into threads to be executed in batches
-        total_request_count = len(request_configs)
-        requests_per_thread = (total_request_count) // self.num_concurrent_requests
-        remainder = (total_request_count) % self.num_concurrent_requests
-
-        # Set up empty batch array and index for a sliding window of request selection
-        request_config_batches = []
-        idx = 0
-
-        # Create batches of requests for each concurrent request
-        for concurrent_requests in range(self.num_concurrent_requests):
-            num_requests_for_thread = requests_per_thread + (1 if concurrent_requests < remainder else 0)
-            request_config_batch = request_configs[idx : idx + num_requests_for_thread].copy()
-            idx += num_requests_for_thread
-            request_config_batches.append(request_config_batch)
-
-        # Create empty `threads` and `completed_requests` arrays to be populated with execution threads and
-        # completed requests respectively
-        threads: List[threading.Thread] = []
-        llm_responses: List[LLMResponse] = []
-        progress = 0
-
-        # Send request threads and add to the threads array
-        for request_config_batch in request_config_batches:
-            if self.stop_event.is_set():
-                logger.info('Stopping thread creation due to stop signal.')
-                break
-
-            thread = threading.Thread(
-                target=self.send_requests,
-                args=(request_config_batch, llm_responses, progress, start_time, num_requests),
-            )
-            threads.append(thread)
-            add_script_run_ctx(thread)  # Add Streamlit context to thread
-            thread.start()
-
-        # Wait for all threads to complete
-        for thread in threads:
-            add_script_run_ctx(thread)
-            thread.join()
+        # Send the requests in open or closed loop and wait for them to complete
+        llm_responses = self.run_requests(request_configs, start_time)
 
         if self.stop_event.is_set():
             logger.info('Benchmarking process terminated early due to stop signal.')
@@ -951,7 +1024,7 @@ class SyntheticPerformanceEvaluator(BasePerformanceEvaluator):
         # Construct metadata payload to be returned
         metadata = {
             'model': self.model_name,
-            'num_concurrent_requests': self.num_concurrent_requests,
+            **self.load_metadata(),
             'results': results,
             'num_input_tokens': num_input_tokens,
             'num_output_tokens': num_output_tokens,
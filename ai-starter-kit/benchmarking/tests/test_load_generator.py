@@ -0,0 +1,63 @@
+"""
+Unit tests of the arrival schedules of the open-loop load generator.
+
+Usage:
+    python -m pytest benchmarking/tests/test_load_generator.py
+"""
+
+import os
+import sys
+import unittest
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+repo_dir = os.path.abspath(os.path.join(kit_dir, '..'))
+sys.path.append(kit_dir)
+sys.path.append(repo_dir)
+
+from benchmarking.src.llmperf.load_generator import ARRIVAL_SCHEDULES, build_arrival_offsets
+
+
+class TestBuildArrivalOffsets(unittest.TestCase):
+    def test_offsets_are_sorted_and_start_at_zero(self) -> None:
+        for schedule in ARRIVAL_SCHEDULES:
+            with self.subTest(schedule=schedule):
+                offsets = build_arrival_offsets(50, 5.0, schedule)
+                self.assertEqual(len(offsets), 50)
+                self.assertEqual(offsets[0], 0.0)
+                self.assertEqual(offsets, sorted(offsets))
+
+    def test_edge_counts(self) -> None:
+        for schedule in ARRIVAL_SCHEDULES:
+            with self.subTest(schedule=schedule):
+                self.assertEqual(build_arrival_offsets(0, 5.0, schedule), [])
+                self.assertEqual(build_arrival_offsets(1, 5.0, schedule), [0.0])
+
+    def test_constant_schedule(self) -> None:
+        self.assertEqual(build_arrival_offsets(5, 2.0, 'constant'), [0.0, 0.5, 1.0, 1.5, 2.0])
+
+    def test_poisson_schedule(self) -> None:
+        offsets = build_arrival_offsets(5000, 10.0)
+        self.assertEqual(offsets, build_arrival_offsets(5000, 10.0, seed=11111))
+        self.assertNotEqual(offsets, build_arrival_offsets(5000, 10.0, seed=1))
+        # the mean gap of exponential arrivals is 1 / rate
+        self.assertAlmostEqual(offsets[-1] / (len(offsets) - 1), 0.1, delta=0.01)
+
+    def test_ramp_schedule(self) -> None:
+        offsets = build_arrival_offsets(1000, 10.0, 'ramp')
+        # the rate grows linearly, so the run lasts twice as long as at a constant rate
+        self.assertAlmostEqual(offsets[-1], 2 * 1000 / 10.0, delta=1.0)
+        gaps = [later - earlier for earlier, later in zip(offsets, offsets[1:])]
+        self.assertTrue(all(earlier >= later for earlier, later in zip(gaps, gaps[1:])))
+        self.assertAlmostEqual(1 / gaps[-1], 10.0, delta=0.1)
+
+    def test_invalid_arguments(self) -> None:
+        for rate in (0.0, -1.0):
+            with self.assertRaises(ValueError):
+                build_arrival_offsets(10, rate)
+        with self.assertRaises(ValueError):
+            build_arrival_offsets(10, 1.0, 'burst')
+
+
+if __name__ == '__main__':
+    unittest.main()
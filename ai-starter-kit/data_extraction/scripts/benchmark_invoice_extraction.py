@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from itertools import cycle, islice
+from typing import Any, Dict, Iterator, List, Optional
+
+from create_pdf import INVOICE_MAX_PRODUCTS
+from invoice_extractor import extract_invoices
+from invoice_renderer import invoice_filename, load_customers, render_invoices_parallel
+
+# Verglichene Felder; `comments` wird nicht gedruckt, `payment_due` nur von der Vorlage
+COMPARED_FIELDS = [
+    "name",
+    "address",
+    "phone",
+    "email",
+    "invoice_number",
+    "invoice_date",
+    "products",
+    "total_amount",
+    "payment_due",
+]
+FPDF_FIELDS = [field for field in COMPARED_FIELDS if field != "payment_due"]
+# Erlaubte Abweichung beim Vergleich von Beträgen
+AMOUNT_TOLERANCE = 0.01
+# Anzahl der im Bericht aufgeführten Abweichungen
+MAX_REPORTED_MISMATCHES = 10
+
+
+def generate_customers(base_customers: List[Dict[str, Any]], count: int) -> Iterator[Dict[str, Any]]:
+    """
+    Erzeugt `count` Kunden aus den Beispieldaten, jeweils mit eigener Rechnungsnummer.
+    """
+    for i, customer in enumerate(islice(cycle(base_customers), count), start=1):
+        yield {
+            **customer,
+            "invoice_number": f"INV-BENCH-{i:06d}",
+            "products": customer["products"][:INVOICE_MAX_PRODUCTS],
+        }
+
+
+def field_matches(field: str, expected: Any, extracted: Any) -> bool:
+    """
+    Vergleicht einen Wert der Kundendaten mit dem ausgelesenen Wert.
+    """
+    if field == "products":
+        if len(expected) != len(extracted):
+            return False
+        return all(
+            str(a["product_name"]).strip() == b["product_name"]
+            and _amounts_match(a["quantity"], b["quantity"])
+            and _amounts_match(a["unit_price"], b["unit_price"])
+            for a, b in zip(expected, extracted)
+        )
+    if field == "total_amount":
+        return _amounts_match(expected, extracted)
+    return str(expected).strip() == str(extracted).strip()
+
+
+def compare_invoices(expected: Dict[str, Any], extracted: Dict[str, Any], fields: List[str]) -> Dict[str, bool]:
+    return {field: field_matches(field, expected.get(field, ""), extracted.get(field, "")) for field in fields}
+
+
+def run_benchmark(
+    customers_json: str,
+    count: int,
+    output_dir: str,
+    template_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    ocr_fallback: bool = True,
+) -> Dict[str, Any]:
+    """
+    Rendert `count` Rechnungen, liest sie wieder aus und vergleicht das Ergebnis mit den Kundendaten.
+
+    Rückgabe: Bericht mit Durchsatz (Dokumente/s) von Rendern und Auslesen, Genauigkeit pro Feld,
+    Anteil vollständig korrekter Rechnungen und den ersten Abweichungen.
+    """
+    customers = list(generate_customers(load_customers(customers_json), count))
+    expected = {invoice_filename(customer): customer for customer in customers}
+    fields = COMPARED_FIELDS if template_path is not None else FPDF_FIELDS
+
+    start = time.perf_counter()
+    rendered = render_invoices_parallel(
+        customers, output_dir, workers=workers or 1, chunk_size=chunk_size, verbose=False, template_path=template_path
+    )
+    render_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extracted = extract_invoices(
+        rendered["created"], workers=workers, chunk_size=chunk_size, ocr_fallback=ocr_fallback, verbose=False
+    )
+    extract_seconds = time.perf_counter() - start
+
+    field_hits = {field: 0 for field in fields}
+    exact = 0
+    mismatches: List[Dict[str, Any]] = []
+    for entry in extracted["invoices"]:
+        customer = expected[os.path.basename(entry["file"])]
+        matches = compare_invoices(customer, entry["invoice"], fields)
+        for field, match in matches.items():
+            field_hits[field] += match
+            if not match and len(mismatches) < MAX_REPORTED_MISMATCHES:
+                mismatches.append(
+                    {
+                        "file": os.path.basename(entry["file"]),
+                        "field": field,
+                        "expected": customer.get(field, ""),
+                        "extracted": entry["invoice"].get(field, ""),
+                    }
+                )
+        exact += all(matches.values())
+
+    # Nicht gerenderte oder nicht lesbare Rechnungen zählen als falsch
+    total = len(customers)
+    return {
+        "documents": total,
+        "layout": "template" if template_path is not None else "fpdf",
+        "workers": workers or 1,
+        "render_errors": len(rendered["errors"]),
+        "extract_errors": len(extracted["errors"]),
+        "ocr_count": extracted["ocr_count"],
+        "render_docs_per_second": round(len(rendered["created"]) / render_seconds, 1) if render_seconds else None,
+        "extract_docs_per_second": round(len(rendered["created"]) / extract_seconds, 1) if extract_seconds else None,
+        "field_accuracy": {field: round(hits / total, 4) for field, hits in field_hits.items()},
+        "document_accuracy": round(exact / total, 4),
+        "mismatches": mismatches,
+    }
+
+
+def _amounts_match(expected: Any, extracted: Any) -> bool:
+    a, b = _amount(expected), _amount(extracted)
+    if a is None or b is None:
+        return str(expected).strip() == str(extracted).strip()
+    return abs(a - b) <= AMOUNT_TOLERANCE
+
+
+def _amount(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if text.endswith("EUR"):
+        text = text[: -len("EUR")].strip()
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rendert Rechnungen, liest sie wieder aus und misst Durchsatz und Feldgenauigkeit."
+    )
+    parser.add_argument(
+        "--customers",
+        default="../data/customers/customers.json",
+        help="Beispiel-Kundendaten (JSON), werden vervielfältigt",
+    )
+    parser.add_argument("--count", type=int, default=1000, help="Anzahl der Rechnungen")
+    parser.add_argument(
+        "--template",
+        default=None,
+        help="Rechnungsvorlage aus create_pdf.py (z. B. ../data/templates/invoice_template.pdf); "
+        "ohne Vorlage wird das FPDF-Layout verwendet",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Anzahl paralleler Prozesse (Standard: seriell, 0 = alle Kerne)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=64, help="Rechnungen pro Arbeitspaket im Prozesspool")
+    parser.add_argument("--no-ocr", action="store_true", help="Keine OCR für PDFs ohne brauchbare Textebene")
+    parser.add_argument(
+        "--output-dir", default=None, help="Ordner für die PDFs (Standard: temporärer Ordner, wird danach gelöscht)"
+    )
+    parser.add_argument("--report", default=None, help="Bericht zusätzlich als JSON-Datei speichern")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.customers):
+        print(f"❌ Fehler: Kundendaten nicht gefunden: {args.customers}")
+        sys.exit(1)
+
+    workers = (os.cpu_count() or 1) if args.workers == 0 else args.workers
+    template_path = os.path.abspath(args.template) if args.template else None
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="invoice_benchmark_")
+    try:
+        report = run_benchmark(
+            args.customers,
+            args.count,
+            output_dir,
+            template_path=template_path,
+            workers=workers,
+            chunk_size=args.chunk_size,
+            ocr_fallback=not args.no_ocr,
+        )
+    finally:
+        if args.output_dir is None:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=4, ensure_ascii=False, default=str))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4, ensure_ascii=False, default=str)
@@ -1,47 +1,285 @@
 import csv
 import json
-from collections import defaultdict
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set
 
-def convert_csv_to_json(csv_file, json_file):
+import numpy as np
+import pandas as pd
+
+# Zeilen pro Block beim spaltenweisen Einlesen
+CSV_CHUNK_SIZE = 50_000
+# Erlaubte Abweichung zwischen "Total Amount" und der Summe der "Product Total"-Werte
+TOTAL_TOLERANCE = 0.01
+# Erste Zahl eines Betrags wie "975 EUR", "1.234,56 EUR" oder "1,234.56", mit Tausender- und Dezimaltrennzeichen
+_AMOUNT_PATTERN = re.compile(r"-?\d+(?:[.,]\d+)*")
+
+_TEXT_COLUMNS = [
+    "Name",
+    "Address",
+    "Phone",
+    "Email",
+    "Invoice Number",
+    "Invoice Date",
+    "Product Name",
+    "Total Amount",
+    "Payment Due",
+    "Comments",
+]
+_HEADER_COLUMNS = [column for column in _TEXT_COLUMNS if column != "Product Name"]
+_CSV_DTYPES = {
+    **{column: object for column in _TEXT_COLUMNS},
+    "Quantity": "int64",
+    "Unit Price": "float64",
+    "Product Total": "float64",
+}
+
+
+class InvoicesNotPresorted(ValueError):
     """
-    Konvertiert eine CSV-Datei in eine JSON-Datei und gruppiert Einträge basierend auf der Rechnungsnummer.
+    Die Zeilen einer Rechnung folgen nicht direkt aufeinander; mit `presorted=False` erneut einlesen.
     """
-    try:
-        grouped_data = defaultdict(lambda: {
-            "name": "",
-            "address": "",
-            "phone": "",
-            "email": "",
-            "invoice_number": "",
-            "invoice_date": "",
-            "products": [],
-            "total_amount": "",
-            "payment_due": "",
-            "comments": ""
-        })
-
-        with open(csv_file, mode="r", encoding="utf-8") as file:
-            csv_reader = csv.DictReader(file)
+
+    def __init__(self, invoice_number: str) -> None:
+        super().__init__(
+            f"Rechnungsnummer {invoice_number} ist nicht zusammenhängend sortiert (presorted=False verwenden)."
+        )
+        self.invoice_number = invoice_number
+
+
+def _empty_invoice() -> Dict[str, Any]:
+    return {
+        "name": "",
+        "address": "",
+        "phone": "",
+        "email": "",
+        "invoice_number": "",
+        "invoice_date": "",
+        "products": [],
+        "total_amount": "",
+        "payment_due": "",
+        "comments": ""
+    }
+
+
+def _apply_row(invoice: Dict[str, Any], row: Dict[str, str]) -> None:
+    """
+    Überträgt die Kopf- und Produktdaten einer CSV-Zeile in die Rechnung.
+    """
+    invoice["name"] = row["Name"]
+    invoice["address"] = row["Address"]
+    invoice["phone"] = row["Phone"]
+    invoice["email"] = row["Email"]
+    invoice["invoice_number"] = row["Invoice Number"]
+    invoice["invoice_date"] = row["Invoice Date"]
+    invoice["total_amount"] = row["Total Amount"]
+    invoice["payment_due"] = row["Payment Due"]
+    invoice["comments"] = row["Comments"]
+    invoice["products"].append({
+        "product_name": row["Product Name"],
+        "quantity": int(row["Quantity"]),
+        "unit_price": float(row["Unit Price"]),
+        "total": float(row["Product Total"])
+    })
+
+
+def iter_invoices_from_csv(csv_file: str, presorted: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Liest eine CSV-Datei zeilenweise und liefert die Rechnungen gruppiert nach Rechnungsnummer.
+
+    Mit `presorted=True` (Standard) müssen die Zeilen einer Rechnung direkt aufeinander folgen;
+    jede Rechnung wird ausgegeben, sobald die nächste Rechnungsnummer erscheint, und im Speicher
+    liegt immer nur eine Rechnung. Für die Prüfung der Sortierung werden zusätzlich die bereits
+    ausgegebenen Rechnungsnummern gemerkt (O(Anzahl Rechnungen), nur die Nummern); taucht eine
+    davon erneut auf, wird `InvoicesNotPresorted` ausgelöst. Mit `presorted=False` werden alle
+    Rechnungen wie bei `convert_csv_to_json` im Speicher gesammelt und am Ende in Reihenfolge des
+    ersten Auftretens ausgegeben.
+    """
+    with open(csv_file, mode="r", encoding="utf-8", newline="") as file:
+        csv_reader = csv.DictReader(file)
+
+        if not presorted:
+            grouped_data: Dict[str, Dict[str, Any]] = {}
             for row in csv_reader:
                 invoice_number = row["Invoice Number"]
-                grouped_data[invoice_number]["name"] = row["Name"]
-                grouped_data[invoice_number]["address"] = row["Address"]
-                grouped_data[invoice_number]["phone"] = row["Phone"]
-                grouped_data[invoice_number]["email"] = row["Email"]
-                grouped_data[invoice_number]["invoice_number"] = row["Invoice Number"]
-                grouped_data[invoice_number]["invoice_date"] = row["Invoice Date"]
-                grouped_data[invoice_number]["total_amount"] = row["Total Amount"]
-                grouped_data[invoice_number]["payment_due"] = row["Payment Due"]
-                grouped_data[invoice_number]["comments"] = row["Comments"]
-                grouped_data[invoice_number]["products"].append({
-                    "product_name": row["Product Name"],
-                    "quantity": int(row["Quantity"]),
-                    "unit_price": float(row["Unit Price"]),
-                    "total": float(row["Product Total"])
-                })
-
-        # Konvertiere defaultdict zu einer Liste
-        data = list(grouped_data.values())
+                if invoice_number not in grouped_data:
+                    grouped_data[invoice_number] = _empty_invoice()
+                _apply_row(grouped_data[invoice_number], row)
+            yield from grouped_data.values()
+            return
+
+        emitted: Set[str] = set()
+        current: Optional[Dict[str, Any]] = None
+        for row in csv_reader:
+            invoice_number = row["Invoice Number"]
+            if current is None or current["invoice_number"] != invoice_number:
+                if invoice_number in emitted:
+                    raise InvoicesNotPresorted(invoice_number)
+                if current is not None:
+                    yield current
+                emitted.add(invoice_number)
+                current = _empty_invoice()
+            _apply_row(current, row)
+
+        if current is not None:
+            yield current
+
+
+def iter_invoices_from_csv_columnar(
+    csv_file: str, presorted: bool = True, chunk_size: int = CSV_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Spaltenweise Variante von `iter_invoices_from_csv` mit pandas; liefert dieselben Rechnungen.
+
+    Die CSV wird in Blöcken von `chunk_size` Zeilen gelesen, Zahlen werden vektorisiert umgewandelt
+    und die Zeilen blockweise nach Rechnungsnummer gruppiert. Die letzte Rechnung eines Blocks wird
+    zurückgehalten, bis feststeht, dass sie im nächsten Block nicht weitergeht. `presorted` verhält
+    sich wie bei `iter_invoices_from_csv` (im Speicher liegen ein Block und die Menge der bereits
+    ausgegebenen Rechnungsnummern). Die Gesamtbeträge prüft `find_total_mismatches` vor dem Rendern.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size muss mindestens 1 sein.")
+    with pd.read_csv(
+        csv_file, dtype=_CSV_DTYPES, keep_default_na=False, encoding="utf-8", chunksize=chunk_size
+    ) as reader:
+        if not presorted:
+            frame = pd.concat(list(reader), ignore_index=True)
+            # Stabil nach erstem Auftreten der Rechnungsnummer sortieren, damit jede Rechnung zusammenhängt
+            codes, _ = pd.factorize(frame["Invoice Number"])
+            frame = frame.take(np.argsort(codes, kind="stable"))
+            yield from _invoices_from_frame(frame, set())
+            return
+
+        emitted: Set[str] = set()
+        carry: Optional[pd.DataFrame] = None
+        for chunk in reader:
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            numbers = chunk["Invoice Number"].to_numpy()
+            # Beginn der letzten zusammenhängenden Rechnung im Block
+            changes = np.flatnonzero(numbers[1:] != numbers[:-1])
+            tail_start = int(changes[-1]) + 1 if len(changes) else 0
+            carry = chunk.iloc[tail_start:]
+            yield from _invoices_from_frame(chunk.iloc[:tail_start], emitted)
+
+        if carry is not None:
+            yield from _invoices_from_frame(carry, emitted)
+
+
+def _invoices_from_frame(frame: pd.DataFrame, emitted: Set[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Baut die Rechnungen aus Zeilen, in denen jede Rechnungsnummer zusammenhängend vorkommt.
+    """
+    if frame.empty:
+        return
+    numbers = frame["Invoice Number"].to_numpy()
+    starts = np.concatenate(([0], np.flatnonzero(numbers[1:] != numbers[:-1]) + 1))
+
+    run_numbers = numbers[starts].tolist()
+    block_numbers = set(run_numbers)
+    if len(block_numbers) != len(run_numbers) or not emitted.isdisjoint(block_numbers):
+        seen: Set[str] = set()
+        for number in run_numbers:
+            if number in emitted or number in seen:
+                raise InvoicesNotPresorted(number)
+            seen.add(number)
+    emitted.update(block_numbers)
+
+    # Alle Produkte in einem Durchlauf anlegen und danach pro Rechnung nur noch die Liste schneiden
+    products = [
+        {"product_name": name, "quantity": quantity, "unit_price": unit_price, "total": total}
+        for name, quantity, unit_price, total in zip(
+            frame["Product Name"].tolist(),
+            frame["Quantity"].tolist(),
+            frame["Unit Price"].tolist(),
+            frame["Product Total"].tolist(),
+        )
+    ]
+
+    # Kopfdaten stammen wie bei `_apply_row` aus der letzten Zeile der Rechnung
+    ends = np.append(starts[1:], len(frame))
+    header = frame.iloc[ends - 1]
+    for start, end, name, address, phone, email, number, date, total_amount, payment_due, comments in zip(
+        starts.tolist(),
+        ends.tolist(),
+        *(header[column].tolist() for column in _HEADER_COLUMNS),
+    ):
+        yield {
+            "name": name,
+            "address": address,
+            "phone": phone,
+            "email": email,
+            "invoice_number": number,
+            "invoice_date": date,
+            "products": products[start:end],
+            "total_amount": total_amount,
+            "payment_due": payment_due,
+            "comments": comments,
+        }
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """
+    Liest einen Betrag wie "975 EUR", "1.234,56 EUR" oder "1,234.56" als Zahl, None wenn er keine enthält.
+
+    Kommen Punkt und Komma vor, ist das letzte Zeichen davon das Dezimaltrennzeichen. Kommt nur eines vor,
+    gilt es als Tausendertrennzeichen, wenn es mehrfach steht oder genau drei Ziffern folgen ("1.234"),
+    sonst als Dezimaltrennzeichen ("975,50").
+    """
+    match = _AMOUNT_PATTERN.search(text)
+    if match is None:
+        return None
+    number = match.group()
+    separators = [char for char in number if char in ".,"]
+    if separators:
+        integer, _, fraction = number.rpartition(separators[-1])
+        if len(set(separators)) == 1 and (len(separators) > 1 or len(fraction) == 3):
+            integer, fraction = number, ""
+        number = re.sub(r"[.,]", "", integer) + (f".{fraction}" if fraction else "")
+    return float(number)
+
+
+def find_total_mismatches(csv_file: str, chunk_size: int = CSV_CHUNK_SIZE) -> List[str]:
+    """
+    Prüft vor dem Rendern, ob "Total Amount" jeder Rechnung zur Summe ihrer "Product Total"-Werte passt.
+
+    Die CSV wird dafür einmal zusätzlich blockweise gelesen, nur mit den drei benötigten Spalten. Je Rechnung
+    werden Produktsumme und Gesamtbetrag gemerkt (O(Anzahl Rechnungen)), die Zeilen müssen also nicht
+    sortiert sein. Wie bei `_apply_row` zählt der Gesamtbetrag der letzten Zeile einer Rechnung.
+    Rückgabe: Rechnungsnummern mit abweichendem oder unlesbarem Gesamtbetrag, in Reihenfolge des ersten Auftretens.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size muss mindestens 1 sein.")
+    product_sums: Dict[str, float] = {}
+    amounts: Dict[str, str] = {}
+    with pd.read_csv(
+        csv_file,
+        usecols=["Invoice Number", "Total Amount", "Product Total"],
+        dtype={"Invoice Number": object, "Total Amount": object, "Product Total": "float64"},
+        keep_default_na=False,
+        encoding="utf-8",
+        chunksize=chunk_size,
+    ) as reader:
+        for chunk in reader:
+            groups = chunk.groupby("Invoice Number", sort=False)
+            for number, total in groups["Product Total"].sum().items():
+                product_sums[number] = product_sums.get(number, 0.0) + total
+            amounts.update(groups["Total Amount"].last().items())
+
+    mismatches = []
+    for number, product_sum in product_sums.items():
+        expected = parse_amount(amounts[number])
+        if expected is None or abs(expected - product_sum) > TOTAL_TOLERANCE:
+            mismatches.append(number)
+    return mismatches
+
+
+def convert_csv_to_json(csv_file: str, json_file: str) -> str:
+    """
+    Konvertiert eine CSV-Datei in eine JSON-Datei und gruppiert Einträge basierend auf der Rechnungsnummer.
+    """
+    try:
+        # Konvertiere die gruppierten Rechnungen zu einer Liste
+        data = list(iter_invoices_from_csv_columnar(csv_file, presorted=False))
 
         with open(json_file, mode="w", encoding="utf-8") as file:
             json.dump(data, file, indent=4, ensure_ascii=False)
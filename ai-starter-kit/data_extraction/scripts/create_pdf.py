@@ -1,51 +1,65 @@
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 import os
+from typing import List, Tuple
 
 output_folder = "../data/templates/"
 
+# Layout der Rechnungsvorlage, wird auch beim Ausfüllen der Vorlage verwendet (invoice_template.py)
+# (Feld, Beschriftung, x-Position des Werts, Abstand vom oberen Seitenrand)
+INVOICE_LABEL_X = 50
+INVOICE_BLANK = "_________________________"
+INVOICE_HEADER_FIELDS: List[Tuple[str, str, float, float]] = [
+    ("name", "Name:", 150, 100),
+    ("address", "Adresse:", 150, 120),
+    ("phone", "Telefon:", 150, 140),
+    ("email", "E-Mail:", 150, 160),
+    ("invoice_number", "Rechnungsnummer:", 200, 180),
+    ("invoice_date", "Rechnungsdatum:", 200, 200),
+]
+INVOICE_PRODUCTS_LABEL_TOP = 220
+INVOICE_PRODUCTS_TOP = 240
+INVOICE_PRODUCT_ROW_HEIGHT = 20
+INVOICE_MAX_PRODUCTS = 5
+INVOICE_PRODUCT_NAME_BLANK = "_____________________"
+INVOICE_QUANTITY_BLANK = "____"
+INVOICE_PRICE_BLANK = "____"
+INVOICE_FOOTER_FIELDS: List[Tuple[str, str, float]] = [
+    ("total_amount", "Gesamtbetrag:", 200),
+    ("payment_due", "Zahlungsziel:", 200),
+]
+
+
+def invoice_product_line(index: int) -> str:
+    return f"{index}. {INVOICE_PRODUCT_NAME_BLANK} Menge: {INVOICE_QUANTITY_BLANK} Preis: {INVOICE_PRICE_BLANK} EUR"
+
+
 # Templates-Definitionen
-def create_invoice_template(c):
+def create_invoice_template(c: canvas.Canvas) -> None:
     width, height = A4
     c.setFont("Helvetica-Bold", 16)
     c.drawString(50, height - 50, "Rechnung")
 
     c.setFont("Helvetica", 12)
-    c.drawString(50, height - 100, "Name:")
-    c.drawString(150, height - 100, "_________________________")
-
-    c.drawString(50, height - 120, "Adresse:")
-    c.drawString(150, height - 120, "_________________________")
-
-    c.drawString(50, height - 140, "Telefon:")
-    c.drawString(150, height - 140, "_________________________")
-
-    c.drawString(50, height - 160, "E-Mail:")
-    c.drawString(150, height - 160, "_________________________")
-
-    c.drawString(50, height - 180, "Rechnungsnummer:")
-    c.drawString(200, height - 180, "_________________________")
-
-    c.drawString(50, height - 200, "Rechnungsdatum:")
-    c.drawString(200, height - 200, "_________________________")
-
-    c.drawString(50, height - 220, "Produkte:")
-    y = height - 240
-    for i in range(1, 6):  # Bis zu 5 Produkte
-        c.drawString(50, y, f"{i}. _____________________ Menge: ____ Preis: ____ EUR")
-        y -= 20
+    for _, label, value_x, top in INVOICE_HEADER_FIELDS:
+        c.drawString(INVOICE_LABEL_X, height - top, label)
+        c.drawString(value_x, height - top, INVOICE_BLANK)
 
-    c.drawString(50, y, "Gesamtbetrag:")
-    c.drawString(200, y, "_________________________")
-    y -= 20
+    c.drawString(INVOICE_LABEL_X, height - INVOICE_PRODUCTS_LABEL_TOP, "Produkte:")
+    y = height - INVOICE_PRODUCTS_TOP
+    for i in range(1, INVOICE_MAX_PRODUCTS + 1):  # Bis zu 5 Produkte
+        c.drawString(INVOICE_LABEL_X, y, invoice_product_line(i))
+        y -= INVOICE_PRODUCT_ROW_HEIGHT
 
-    c.drawString(50, y, "Zahlungsziel:")
-    c.drawString(200, y, "_________________________")
+    for _, label, value_x in INVOICE_FOOTER_FIELDS:
+        c.drawString(INVOICE_LABEL_X, y, label)
+        c.drawString(value_x, y, INVOICE_BLANK)
+        y -= INVOICE_PRODUCT_ROW_HEIGHT
 
 
 
 
-def create_contract_template(c):
+def create_contract_template(c: canvas.Canvas) -> None:
     width, height = A4
     c.setFont("Helvetica-Bold", 16)
     c.drawString(50, height - 50, "Vertrag")
@@ -69,7 +83,7 @@ def create_contract_template(c):
     c.drawString(200, height - 260, "_________________________")
 
 # Hauptlogik
-def create_pdf_template(template_type, output_path):
+def create_pdf_template(template_type: str, output_path: str) -> None:
     c = canvas.Canvas(output_path, pagesize=A4)
 
     if template_type == "invoice":
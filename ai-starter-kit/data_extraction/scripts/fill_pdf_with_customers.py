@@ -1,73 +1,149 @@
-import json
+import argparse
 import os
 import sys
-from fpdf import FPDF
+from typing import Any, Dict, Iterable, Optional
 
-if len(sys.argv) < 3:
-    print("❌ Fehler: Bitte den Pfad zur Eingabedatei und den Ausgabepfad angeben.")
-    sys.exit(1)
+from convert_csv_to_json import find_total_mismatches, iter_invoices_from_csv_columnar
+from invoice_renderer import load_customers, render_invoices, render_invoices_parallel
+from render_cache import DEFAULT_MAX_BYTES
 
-CUSTOMER_DATA_JSON = os.path.abspath(sys.argv[1])  # Absoluter Pfad
-OUTPUT_DIR = os.path.abspath(sys.argv[2])  # Absoluter Pfad
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def safe_get(data, key, default="Nicht angegeben"):
-    return data.get(key, default)
+def create_customer_pdfs(
+    customer_data_json: str,
+    output_dir: str,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    presorted: bool = True,
+    template_path: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    validate_totals: bool = False,
+) -> None:
+    """
+    Erstellt die Rechnungs-PDFs. Mit `workers` > 1 wird im Prozesspool gerendert.
 
-def create_customer_pdfs():
-    print(f"DEBUG: Eingabedatei ist {CUSTOMER_DATA_JSON}")
-    print(f"DEBUG: PDF-Ausgabeordner ist {OUTPUT_DIR}")
+    CSV-Dateien werden ohne JSON-Zwischendatei blockweise gestreamt (siehe `iter_invoices_from_csv_columnar`);
+    mit `validate_totals` werden vorher die Gesamtbeträge gegen die Produktsummen geprüft und bei Abweichungen
+    wird nichts gerendert.
+    Mit `template_path` werden nur die Feldwerte auf die vorkompilierte Vorlage gelegt.
+    Mit `cache_dir` werden unveränderte Rechnungen aus dem Render-Cache übernommen.
+    """
+    print(f"DEBUG: Eingabedatei ist {customer_data_json}")
+    print(f"DEBUG: PDF-Ausgabeordner ist {output_dir}")
 
-    if not os.path.exists(CUSTOMER_DATA_JSON):
-        print(f"❌ Fehler: Kundendaten nicht gefunden: {CUSTOMER_DATA_JSON}")
+    if not os.path.exists(customer_data_json):
+        print(f"❌ Fehler: Kundendaten nicht gefunden: {customer_data_json}")
         sys.exit(1)
 
+    if customer_data_json.endswith(".csv"):
+        if validate_totals:
+            mismatches = find_total_mismatches(customer_data_json)
+            if mismatches:
+                print(
+                    f"❌ Fehler: Gesamtbetrag passt nicht zur Summe der Produkte bei {len(mismatches)} Rechnung(en): "
+                    f"{', '.join(mismatches[:5])}"
+                )
+                sys.exit(1)
+        # CSV wird gestreamt; Lesefehler treten daher erst beim Rendern auf
+        customers: Iterable[Dict[str, Any]] = iter_invoices_from_csv_columnar(customer_data_json, presorted=presorted)
+    else:
+        try:
+            customers = load_customers(customer_data_json)
+        except ValueError as e:
+            print(f"❌ Fehler: {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"❌ Fehler beim Lesen der Kundendaten: {e}")
+            sys.exit(1)
+
     try:
-        with open(CUSTOMER_DATA_JSON, "r", encoding="utf-8") as file:
-            customers = json.load(file)
-    except Exception as e:
+        if workers is not None and workers > 1:
+            result = render_invoices_parallel(
+                customers,
+                output_dir,
+                workers=workers,
+                chunk_size=chunk_size,
+                progress=print_progress,
+                template_path=template_path,
+                cache_dir=cache_dir,
+                cache_max_bytes=cache_max_bytes,
+            )
+        else:
+            result = render_invoices(
+                customers, output_dir, template_path=template_path, cache_dir=cache_dir, cache_max_bytes=cache_max_bytes
+            )
+    except (ValueError, KeyError) as e:
         print(f"❌ Fehler beim Lesen der Kundendaten: {e}")
         sys.exit(1)
 
-    if not isinstance(customers, list):
-        print("❌ Fehler: JSON-Daten sind nicht im Listenformat.")
-        sys.exit(1)
+    print(
+        f"DEBUG: {len(result['created'])} PDFs erstellt ({result['cache_hits']} aus dem Cache), "
+        f"{len(result['errors'])} Fehler"
+    )
+    for error in result["errors"]:
+        print(f"❌ {error['name']}: {error['error']}")
 
-    for customer in customers:
-        try:
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
 
-            # Kundeninformationen hinzufügen
-            pdf.cell(200, 10, txt=f"Name: {safe_get(customer, 'name')}", ln=True)
-            pdf.cell(200, 10, txt=f"Adresse: {safe_get(customer, 'address')}", ln=True)
-            pdf.cell(200, 10, txt=f"Telefon: {safe_get(customer, 'phone')}", ln=True)
-            pdf.cell(200, 10, txt=f"E-Mail: {safe_get(customer, 'email')}", ln=True)
-            pdf.cell(200, 10, txt=f"Rechnungsnummer: {safe_get(customer, 'invoice_number')}", ln=True)
-            pdf.cell(200, 10, txt=f"Rechnungsdatum: {safe_get(customer, 'invoice_date')}", ln=True)
+def print_progress(done: int, total: Optional[int]) -> None:
+    print(f"DEBUG: Fortschritt {done}/{total if total is not None else '?'}")
 
-            # Produkte hinzufügen
-            pdf.cell(200, 10, txt="Produkte:", ln=True)
-            products = safe_get(customer, 'products', [])
-            if isinstance(products, list) and products:
-                for idx, product in enumerate(products, start=1):
-                    product_name = safe_get(product, 'name', 'Unbekannt')
-                    quantity = safe_get(product, 'quantity', 'N/A')
-                    price = safe_get(product, 'price', 'N/A')
-                    pdf.cell(200, 10, txt=f"{idx}. {product_name} - Menge: {quantity} - Preis: {price} EUR", ln=True)
-            else:
-                pdf.cell(200, 10, txt="Keine Produkte angegeben.", ln=True)
 
-            # Gesamtbetrag
-            pdf.cell(200, 10, txt=f"Gesamtbetrag: {safe_get(customer, 'total_amount', 'Nicht angegeben')} EUR", ln=True)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Erstellt Rechnungs-PDFs aus Kundendaten.")
+    parser.add_argument("customer_data", help="Pfad zur JSON- oder CSV-Datei mit den Kundendaten")
+    parser.add_argument("output_dir", help="Ausgabeordner für die PDFs")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Anzahl paralleler Prozesse (Standard: seriell, 0 = alle Kerne)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=64, help="Kunden pro Arbeitspaket im Prozesspool")
+    parser.add_argument(
+        "--unsorted",
+        action="store_true",
+        help="CSV ist nicht nach Rechnungsnummer sortiert (Rechnungen werden im Speicher gesammelt)",
+    )
+    parser.add_argument(
+        "--validate-totals",
+        action="store_true",
+        help="CSV: Gesamtbetrag jeder Rechnung gegen die Summe der Produktpreise prüfen",
+    )
+    parser.add_argument(
+        "--template",
+        default=None,
+        help="Rechnungsvorlage aus create_pdf.py (z. B. ../data/templates/invoice_template.pdf); "
+        "es werden nur die Feldwerte eingefügt",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Ordner für den Render-Cache; unveränderte Rechnungen werden nicht neu gerendert",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Maximale Größe des Render-Caches in MB (älteste Einträge werden entfernt)",
+    )
 
-            # PDF speichern
-            output_file = os.path.join(OUTPUT_DIR, f"{safe_get(customer, 'name').replace('/', '_')}_invoice.pdf")
-            pdf.output(output_file)
-            print(f"✅ PDF erstellt: {os.path.abspath(output_file)}")
-        except Exception as e:
-            print(f"❌ Fehler beim Erstellen des PDFs für {safe_get(customer, 'name', 'Unbekannt')}: {e}")
+    if len(sys.argv) < 3:
+        print("❌ Fehler: Bitte den Pfad zur Eingabedatei und den Ausgabepfad angeben.")
+        sys.exit(1)
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    create_customer_pdfs()
+    CUSTOMER_DATA_JSON = os.path.abspath(args.customer_data)  # Absoluter Pfad
+    OUTPUT_DIR = os.path.abspath(args.output_dir)  # Absoluter Pfad
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    workers = (os.cpu_count() or 1) if args.workers == 0 else args.workers
+    template_path = os.path.abspath(args.template) if args.template else None
+    cache_dir = os.path.abspath(args.cache_dir) if args.cache_dir else None
+    create_customer_pdfs(
+        CUSTOMER_DATA_JSON,
+        OUTPUT_DIR,
+        workers=workers,
+        chunk_size=args.chunk_size,
+        presorted=not args.unsorted,
+        validate_totals=args.validate_totals,
+        template_path=template_path,
+        cache_dir=cache_dir,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+    )
@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sized, Tuple
+
+import fitz
+
+from create_pdf import INVOICE_FOOTER_FIELDS, INVOICE_HEADER_FIELDS
+
+# Beschriftung -> Feld; das FPDF-Layout (`build_invoice_pdf`) und die Vorlage (`create_pdf.py`) nutzen dieselben
+LABEL_FIELDS = {label: field for field, label, *_ in INVOICE_HEADER_FIELDS + INVOICE_FOOTER_FIELDS}
+# Platzhalter des FPDF-Layouts für fehlende Werte
+MISSING_VALUES = {"", "Nicht angegeben", "Unbekannt", "N/A"}
+# Überschrift der Vorlage; fehlt sie, stammt die Rechnung aus dem FPDF-Layout
+TEMPLATE_TITLE = "Rechnung"
+# Wörter, deren Unterkante höchstens so weit (pt) auseinanderliegt, stehen in derselben Zeile.
+# Die Werte der Vorlage stehen 2 pt über der Grundlinie der Beschriftungen (`OVERLAY_BASELINE_OFFSET`)
+LINE_TOLERANCE = 5
+# Auflösung der Seitenbilder für die OCR
+OCR_DPI = 300
+# Werden weniger Beschriftungen gefunden, hat die PDF keine (brauchbare) Textebene und wird per OCR gelesen
+MIN_LABELS_FOUND = len(LABEL_FIELDS) // 2
+
+# Felder, deren Werte ein festes Format haben; passt ein Wert nicht, ist die Textebene vermutlich fehlerhaft
+FIELD_PATTERNS = {
+    "email": re.compile(r"[^@\s]+@[^@\s]+\.\w+"),
+    "invoice_date": re.compile(r"\d{4}-\d{2}-\d{2}"),
+    "payment_due": re.compile(r"\d{4}-\d{2}-\d{2}"),
+    "total_amount": re.compile(r"-?\d+(?:[.,]\d+)?(?: EUR)?"),
+}
+_PRODUCT_LINE = re.compile(r"^(\d+)\.\s*(.*?)\s*-?\s*Menge:\s*(.*?)\s*-?\s*Preis:\s*(.*?)\s*EUR$")
+_BLANK = re.compile(r"_+")
+
+# Ergebnis einer einzelnen PDF: (PDF-Pfad, Rechnung, Fehler, per OCR gelesen)
+ExtractResult = Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, str]], bool]
+
+
+def page_lines(page: fitz.Page) -> List[str]:
+    """
+    Liefert die Textzeilen einer Seite von oben nach unten, ohne die Unterstriche der Vorlage.
+
+    Die Wörter werden über ihre Position zu Zeilen zusammengesetzt, damit die Werte der Vorlage,
+    die als eigener Inhaltsstrom über den Unterstrichen liegen, hinter ihrer Beschriftung landen.
+    """
+    rows: List[Tuple[float, List[Tuple[float, str]]]] = []
+    for x0, _, _, y1, word, *_ in sorted(page.get_text("words"), key=lambda word: (word[3], word[0])):
+        if _BLANK.fullmatch(word):
+            continue
+        if rows and y1 - rows[-1][0] <= LINE_TOLERANCE:
+            rows[-1][1].append((x0, word))
+        else:
+            rows.append((y1, [(x0, word)]))
+    return [" ".join(word for _, word in sorted(words)) for _, words in rows]
+
+
+def parse_invoice_lines(lines: Iterable[str]) -> Tuple[Dict[str, Any], int]:
+    """
+    Liest die Felder einer Rechnung aus ihren Textzeilen (Textebene oder OCR).
+
+    Gibt die Rechnung im Format der Kundendaten und die Anzahl gefundener Beschriftungen zurück.
+    Nicht angegebene Werte bleiben leer, `comments` wird nicht gedruckt und bleibt immer leer.
+    """
+    invoice: Dict[str, Any] = {field: "" for field in LABEL_FIELDS.values()}
+    invoice["products"] = []
+    invoice["comments"] = ""
+    labels_found = 0
+    template_layout = False
+
+    for line in lines:
+        line = _BLANK.sub(" ", line).strip()
+        if line == TEMPLATE_TITLE:
+            template_layout = True
+            continue
+
+        label, _, value = line.partition(" ")
+        if label in LABEL_FIELDS:
+            labels_found += 1
+            value = value.strip()
+            invoice[LABEL_FIELDS[label]] = "" if value in MISSING_VALUES else value
+            continue
+
+        match = _PRODUCT_LINE.match(line)
+        if match:
+            _, name, quantity, price = match.groups()
+            if name or quantity or price:
+                invoice["products"].append(_product(name, quantity, price))
+
+    # Das FPDF-Layout hängt selbst " EUR" an den Gesamtbetrag an
+    if not template_layout and invoice["total_amount"].endswith(" EUR"):
+        invoice["total_amount"] = invoice["total_amount"][: -len(" EUR")]
+    return invoice, labels_found
+
+
+def invalid_fields(invoice: Dict[str, Any]) -> List[str]:
+    """
+    Liefert die Felder, deren Werte nicht dem erwarteten Format entsprechen (leere Werte gelten als gültig).
+    """
+    invalid = [
+        field
+        for field, pattern in FIELD_PATTERNS.items()
+        if invoice.get(field) and not pattern.fullmatch(invoice[field])
+    ]
+    for product in invoice.get("products", []):
+        if not isinstance(product["quantity"], int) or not isinstance(product["unit_price"], (int, float)):
+            invalid.append("products")
+            break
+    return invalid
+
+
+def ocr_lines(doc: fitz.Document, dpi: int = OCR_DPI) -> List[str]:
+    """
+    Liest alle Seiten per Tesseract-OCR (über `unstructured_pytesseract`, siehe requirements.txt).
+    """
+    import unstructured_pytesseract
+    from PIL import Image
+
+    lines: List[str] = []
+    for page in doc:
+        pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+        text = unstructured_pytesseract.image_to_string(image, lang="deu", config="--psm 6")
+        lines.extend(line for line in text.splitlines() if line.strip())
+    return lines
+
+
+def extract_invoice(pdf_path: str, ocr_fallback: bool = True) -> Tuple[Dict[str, Any], bool]:
+    """
+    Liest eine ausgefüllte Rechnung (Vorlage oder FPDF-Layout) zurück in das Format der Kundendaten.
+
+    Die Felder werden über ihre Beschriftungen auf der Textebene gefunden. Nur wenn die PDF keine
+    brauchbare Textebene hat (z. B. ein Scan) oder Werte nicht dem erwarteten Format entsprechen,
+    wird mit `ocr_fallback` per OCR gelesen. Rückgabe: (Rechnung, per OCR gelesen)
+    """
+    with fitz.open(pdf_path) as doc:
+        invoice, labels_found = parse_invoice_lines(line for page in doc for line in page_lines(page))
+        if not ocr_fallback or (labels_found >= MIN_LABELS_FOUND and not invalid_fields(invoice)):
+            return invoice, False
+
+        ocr_invoice, ocr_labels_found = parse_invoice_lines(ocr_lines(doc))
+
+    # Die OCR nur übernehmen, wenn sie mehr erkennt als die Textebene
+    if (ocr_labels_found, -len(invalid_fields(ocr_invoice))) > (labels_found, -len(invalid_fields(invoice))):
+        return ocr_invoice, True
+    return invoice, False
+
+
+def iter_invoice_paths(input_dir: str) -> Iterator[str]:
+    """
+    Liefert die PDFs eines Ordners sortiert nach Dateinamen.
+    """
+    for file_name in sorted(os.listdir(input_dir)):
+        if file_name.lower().endswith(".pdf"):
+            yield os.path.join(input_dir, file_name)
+
+
+def extract_invoices(
+    pdf_paths: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    ocr_fallback: bool = True,
+    verbose: bool = True,
+    progress: Optional[Callable[[int, Optional[int]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Liest die Rechnungen aus; mit `workers` > 1 in einem Prozesspool.
+
+    Wie beim Rendern (`render_invoices_parallel`) werden die PDFs in Blöcken von `chunk_size` verteilt,
+    höchstens zwei Blöcke pro Prozess sind gleichzeitig unterwegs und die Ergebnisse kommen in
+    Eingabereihenfolge. Fehler einzelner PDFs brechen den Lauf nicht ab, sondern werden gesammelt.
+    Rückgabe: {"invoices": [{"file": ..., "invoice": ..., "ocr": ...}], "errors": [{"file": ..., "error": ...}],
+    "ocr_count": Anzahl per OCR gelesener PDFs}
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size muss mindestens 1 sein.")
+
+    total = len(pdf_paths) if isinstance(pdf_paths, Sized) else None
+    invoices: List[Dict[str, Any]] = []
+    errors: List[Dict[str, str]] = []
+    ocr_count = 0
+    done = 0
+
+    def collect(results: List[ExtractResult]) -> None:
+        nonlocal ocr_count, done
+        for pdf_path, invoice, error, used_ocr in results:
+            if error is not None:
+                errors.append(error)
+                if verbose:
+                    print(f"❌ Fehler beim Lesen von {pdf_path}: {error['error']}")
+            elif invoice is not None:
+                invoices.append({"file": pdf_path, "invoice": invoice, "ocr": used_ocr})
+                ocr_count += used_ocr
+        done += len(results)
+        if progress is not None:
+            progress(done, total)
+
+    chunks = _chunked(iter(pdf_paths), chunk_size)
+    if workers is None or workers <= 1:
+        for chunk in chunks:
+            collect(_extract_chunk(chunk, ocr_fallback))
+    else:
+        pending: Deque[Future[List[ExtractResult]]] = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in islice(chunks, workers * 2):
+                pending.append(executor.submit(_extract_chunk, chunk, ocr_fallback))
+
+            while pending:
+                results = pending.popleft().result()
+                # Sobald der älteste Block fertig ist, den nächsten nachreichen
+                for chunk in islice(chunks, 1):
+                    pending.append(executor.submit(_extract_chunk, chunk, ocr_fallback))
+                collect(results)
+
+    return {"invoices": invoices, "errors": errors, "ocr_count": ocr_count}
+
+
+def _product(name: str, quantity: str, price: str) -> Dict[str, Any]:
+    product: Dict[str, Any] = {
+        "product_name": "" if name in MISSING_VALUES else name,
+        "quantity": _number(quantity),
+        "unit_price": _number(price),
+    }
+    if isinstance(product["quantity"], int) and isinstance(product["unit_price"], (int, float)):
+        product["total"] = round(product["quantity"] * product["unit_price"], 2)
+    else:
+        product["total"] = ""
+    return product
+
+
+def _number(text: str) -> Any:
+    """
+    Wandelt gedruckte Zahlen zurück ("5" -> 5, "19.99" -> 19.99); andere Werte bleiben Text.
+    """
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        return "" if text in MISSING_VALUES else text
+
+
+def _extract_one(pdf_path: str, ocr_fallback: bool) -> ExtractResult:
+    try:
+        invoice, used_ocr = extract_invoice(pdf_path, ocr_fallback)
+        return pdf_path, invoice, None, used_ocr
+    except Exception as e:
+        return pdf_path, None, {"file": pdf_path, "error": str(e)}, False
+
+
+def _extract_chunk(chunk: List[str], ocr_fallback: bool) -> List[ExtractResult]:
+    return [_extract_one(pdf_path, ocr_fallback) for pdf_path in chunk]
+
+
+def _chunked(items: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Liest ausgefüllte Rechnungs-PDFs zurück in Kundendaten (JSON).")
+    parser.add_argument("input_dir", help="Ordner mit den Rechnungs-PDFs")
+    parser.add_argument("output_json", help="Ausgabedatei im Format der Kundendaten (customers.json)")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Anzahl paralleler Prozesse (Standard: seriell, 0 = alle Kerne)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=64, help="PDFs pro Arbeitspaket im Prozesspool")
+    parser.add_argument("--no-ocr", action="store_true", help="Keine OCR für PDFs ohne brauchbare Textebene")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"❌ Fehler: Ordner nicht gefunden: {args.input_dir}")
+        sys.exit(1)
+
+    workers = (os.cpu_count() or 1) if args.workers == 0 else args.workers
+    result = extract_invoices(
+        list(iter_invoice_paths(args.input_dir)),
+        workers=workers,
+        chunk_size=args.chunk_size,
+        ocr_fallback=not args.no_ocr,
+        verbose=False,
+    )
+    with open(args.output_json, "w", encoding="utf-8") as file:
+        json.dump([entry["invoice"] for entry in result["invoices"]], file, indent=4, ensure_ascii=False)
+
+    print(
+        f"DEBUG: {len(result['invoices'])} Rechnungen gelesen ({result['ocr_count']} per OCR), "
+        f"{len(result['errors'])} Fehler"
+    )
+    for error in result["errors"]:
+        print(f"❌ {error['file']}: {error['error']}")
@@ -0,0 +1,284 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sized, Tuple
+
+from fpdf import FPDF, FPDF_VERSION
+
+from render_cache import DEFAULT_MAX_BYTES, RenderCache
+
+# Bei Änderungen an `build_invoice_pdf` oder der Vorlagenüberlagerung erhöhen, damit der Render-Cache ungültig wird
+RENDERER_VERSION = "2"
+
+# Ergebnis einer einzelnen Rechnung: (PDF-Pfad, Fehler, aus dem Cache)
+RenderResult = Tuple[Optional[str], Optional[Dict[str, str]], bool]
+
+
+def safe_get(data: Dict[str, Any], key: str, default: Any = "Nicht angegeben") -> Any:
+    return data.get(key, default)
+
+
+def load_customers(json_file: str) -> List[Dict[str, Any]]:
+    """
+    Lädt die Kundenliste aus einer JSON-Datei.
+    """
+    with open(json_file, "r", encoding="utf-8") as file:
+        customers = json.load(file)
+
+    if not isinstance(customers, list):
+        raise ValueError("JSON-Daten sind nicht im Listenformat.")
+    return customers
+
+
+def invoice_filename(customer: Dict[str, Any]) -> str:
+    """
+    Liefert den Dateinamen der Rechnung eines Kunden (ohne Verzeichnis).
+
+    Eindeutig ist er über die Rechnungsnummer, damit mehrere Rechnungen desselben Kunden sich nicht
+    überschreiben; der Name steht nur zur Lesbarkeit davor.
+    """
+    invoice_number = str(customer.get("invoice_number") or "").strip()
+    if not invoice_number:
+        raise ValueError("Rechnung ohne Rechnungsnummer, der Dateiname wäre nicht eindeutig.")
+    return f"{_filename_part(safe_get(customer, 'name'))}_{_filename_part(invoice_number)}_invoice.pdf"
+
+
+def _filename_part(value: Any) -> str:
+    return str(value).replace("/", "_").replace("\\", "_")
+
+
+def build_invoice_pdf(customer: Dict[str, Any]) -> FPDF:
+    """
+    Baut das FPDF-Dokument einer Rechnung im Speicher auf, ohne es zu speichern.
+    """
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    # Kundeninformationen hinzufügen
+    pdf.cell(200, 10, txt=f"Name: {safe_get(customer, 'name')}", ln=True)
+    pdf.cell(200, 10, txt=f"Adresse: {safe_get(customer, 'address')}", ln=True)
+    pdf.cell(200, 10, txt=f"Telefon: {safe_get(customer, 'phone')}", ln=True)
+    pdf.cell(200, 10, txt=f"E-Mail: {safe_get(customer, 'email')}", ln=True)
+    pdf.cell(200, 10, txt=f"Rechnungsnummer: {safe_get(customer, 'invoice_number')}", ln=True)
+    pdf.cell(200, 10, txt=f"Rechnungsdatum: {safe_get(customer, 'invoice_date')}", ln=True)
+
+    # Produkte hinzufügen
+    pdf.cell(200, 10, txt="Produkte:", ln=True)
+    products = safe_get(customer, 'products', [])
+    if isinstance(products, list) and products:
+        for idx, product in enumerate(products, start=1):
+            # Kundendaten nutzen "product_name"/"unit_price", ältere Datensätze "name"/"price"
+            product_name = safe_get(product, 'product_name', safe_get(product, 'name', 'Unbekannt'))
+            quantity = safe_get(product, 'quantity', 'N/A')
+            price = safe_get(product, 'unit_price', safe_get(product, 'price', 'N/A'))
+            pdf.cell(200, 10, txt=f"{idx}. {product_name} - Menge: {quantity} - Preis: {price} EUR", ln=True)
+    else:
+        pdf.cell(200, 10, txt="Keine Produkte angegeben.", ln=True)
+
+    # Gesamtbetrag
+    pdf.cell(200, 10, txt=f"Gesamtbetrag: {safe_get(customer, 'total_amount', 'Nicht angegeben')} EUR", ln=True)
+    return pdf
+
+
+def render_invoice(
+    customer: Dict[str, Any], output_dir: str, template_path: Optional[str] = None, cache_dir: Optional[str] = None
+) -> str:
+    """
+    Rendert die Rechnung eines Kunden nach `output_dir` und gibt den Pfad der PDF zurück.
+
+    Mit `template_path` wird die vorkompilierte Vorlage (siehe `invoice_template.py`) nur noch
+    mit den Feldwerten überlagert; passt die Rechnung nicht in die Vorlage, wird wie bisher
+    mit FPDF gerendert. Mit `cache_dir` werden unveränderte Rechnungen aus dem Render-Cache
+    (siehe `render_cache.py`) kopiert statt neu gerendert.
+    """
+    return _render_invoice(customer, output_dir, template_path, cache_dir)[0]
+
+
+def _render_invoice(
+    customer: Dict[str, Any], output_dir: str, template_path: Optional[str] = None, cache_dir: Optional[str] = None
+) -> Tuple[str, bool]:
+    output_file = os.path.join(output_dir, invoice_filename(customer))
+
+    template = None
+    if template_path is not None:
+        from invoice_template import load_template
+
+        template = load_template(template_path)
+        if not template.fits(customer):
+            template = None
+
+    cache = key = None
+    if cache_dir is not None:
+        cache = _open_cache(cache_dir)
+        variant = f"template-{template.version}" if template is not None else f"fpdf-{FPDF_VERSION}"
+        key = cache.key(customer, f"{variant}-{RENDERER_VERSION}")
+        if cache.get(key, output_file):
+            return output_file, True
+
+    if template is not None:
+        with open(output_file, "wb") as file:
+            file.write(template.render(customer))
+    else:
+        build_invoice_pdf(customer).output(output_file)
+
+    if cache is not None and key is not None:
+        cache.put(key, output_file)
+    return output_file, False
+
+
+def render_invoices(
+    customers: Iterable[Dict[str, Any]],
+    output_dir: str,
+    verbose: bool = True,
+    template_path: Optional[str] = None,
+    progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    on_created: Optional[Callable[[str], None]] = None,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict[str, Any]:
+    """
+    Rendert alle Rechnungen im aktuellen Prozess.
+
+    Fehler einzelner Kunden brechen den Lauf nicht ab, sondern werden gesammelt.
+    `progress(fertig, gesamt)` wird nach jeder Rechnung aufgerufen (`gesamt` ist None,
+    wenn die Eingabe keine Länge hat), `on_created(pfad)` für jede erstellte PDF.
+    Mit `cache_dir` wird der Render-Cache genutzt und danach auf `cache_max_bytes` begrenzt.
+    Rückgabe: {"created": [Pfade], "errors": [{"name": ..., "error": ...}], "cache_hits": Anzahl}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    created: List[str] = []
+    errors: List[Dict[str, str]] = []
+    cache_hits = 0
+
+    total = len(customers) if isinstance(customers, Sized) else None
+    for done, customer in enumerate(customers, start=1):
+        output_file, error, cached = _render_one(customer, output_dir, template_path, cache_dir)
+        cache_hits += cached
+        _collect(output_file, error, created, errors, verbose, on_created)
+        if progress is not None:
+            progress(done, total)
+
+    _prune_cache(cache_dir, cache_max_bytes, verbose)
+    return {"created": created, "errors": errors, "cache_hits": cache_hits}
+
+
+def render_invoices_parallel(
+    customers: Iterable[Dict[str, Any]],
+    output_dir: str,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    verbose: bool = True,
+    progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    template_path: Optional[str] = None,
+    on_created: Optional[Callable[[str], None]] = None,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict[str, Any]:
+    """
+    Rendert die Rechnungen in einem Prozesspool.
+
+    Die Kunden werden in Blöcken von `chunk_size` an `workers` Prozesse verteilt
+    (Standard: Anzahl CPU-Kerne). Es sind höchstens zwei Blöcke pro Prozess
+    gleichzeitig unterwegs, sodass auch Generatoren mit beschränktem Speicher
+    abgearbeitet werden. Ergebnisse, Fortschritt und Fehler werden in der
+    Eingabereihenfolge gemeldet; `progress(fertig, gesamt)` wird nach jedem Block
+    aufgerufen (`gesamt` ist None, wenn die Eingabe keine Länge hat), `on_created(pfad)` für
+    jede erstellte PDF. Der Render-Cache (`cache_dir`) wird von allen Prozessen gemeinsam genutzt.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size muss mindestens 1 sein.")
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    total = len(customers) if isinstance(customers, Sized) else None
+    created: List[str] = []
+    errors: List[Dict[str, str]] = []
+    cache_hits = 0
+    done = 0
+
+    chunks = _chunked(iter(customers), chunk_size)
+    pending: Deque[Future[List[RenderResult]]] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in islice(chunks, workers * 2):
+            pending.append(executor.submit(_render_chunk, chunk, output_dir, template_path, cache_dir))
+
+        while pending:
+            results = pending.popleft().result()
+            # Sobald der älteste Block fertig ist, den nächsten nachreichen
+            for chunk in islice(chunks, 1):
+                pending.append(executor.submit(_render_chunk, chunk, output_dir, template_path, cache_dir))
+
+            for output_file, error, cached in results:
+                cache_hits += cached
+                _collect(output_file, error, created, errors, verbose, on_created)
+            done += len(results)
+            if progress is not None:
+                progress(done, total)
+
+    _prune_cache(cache_dir, cache_max_bytes, verbose)
+    return {"created": created, "errors": errors, "cache_hits": cache_hits}
+
+
+def _render_one(
+    customer: Dict[str, Any], output_dir: str, template_path: Optional[str] = None, cache_dir: Optional[str] = None
+) -> RenderResult:
+    try:
+        output_file, cached = _render_invoice(customer, output_dir, template_path, cache_dir)
+        return output_file, None, cached
+    except Exception as e:
+        name = safe_get(customer, 'name', 'Unbekannt') if isinstance(customer, dict) else 'Unbekannt'
+        return None, {"name": str(name), "error": str(e)}, False
+
+
+def _render_chunk(
+    chunk: List[Dict[str, Any]],
+    output_dir: str,
+    template_path: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> List[RenderResult]:
+    return [_render_one(customer, output_dir, template_path, cache_dir) for customer in chunk]
+
+
+@lru_cache(maxsize=8)
+def _open_cache(cache_dir: str) -> RenderCache:
+    return RenderCache(cache_dir)
+
+
+def _prune_cache(cache_dir: Optional[str], max_bytes: int, verbose: bool) -> None:
+    if cache_dir is None:
+        return
+    removed = RenderCache(cache_dir, max_bytes).prune()
+    if verbose and removed:
+        print(f"DEBUG: {removed} PDFs aus dem Render-Cache entfernt")
+
+
+def _chunked(items: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _collect(
+    output_file: Optional[str],
+    error: Optional[Dict[str, str]],
+    created: List[str],
+    errors: List[Dict[str, str]],
+    verbose: bool,
+    on_created: Optional[Callable[[str], None]] = None,
+) -> None:
+    if error is not None:
+        errors.append(error)
+        if verbose:
+            print(f"❌ Fehler beim Erstellen des PDFs für {error['name']}: {error['error']}")
+    elif output_file is not None:
+        created.append(output_file)
+        if on_created is not None:
+            on_created(output_file)
+        if verbose:
+            print(f"✅ PDF erstellt: {os.path.abspath(output_file)}")
@@ -0,0 +1,226 @@
+import hashlib
+import re
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from create_pdf import (
+    INVOICE_FOOTER_FIELDS,
+    INVOICE_HEADER_FIELDS,
+    INVOICE_LABEL_X,
+    INVOICE_MAX_PRODUCTS,
+    INVOICE_PRICE_BLANK,
+    INVOICE_PRODUCT_ROW_HEIGHT,
+    INVOICE_PRODUCTS_TOP,
+    INVOICE_QUANTITY_BLANK,
+    invoice_product_line,
+)
+
+# Schrift für die eingefügten Werte (Standard-Type1-Schrift, wird nicht eingebettet)
+OVERLAY_FONT = "Helvetica"
+OVERLAY_FONT_RESOURCE = "FOv"
+OVERLAY_FONT_SIZE = 10
+# Werte stehen knapp über den Unterstrichen der Vorlage
+OVERLAY_BASELINE_OFFSET = 2
+
+_OBJECT_REFERENCE = re.compile(rb"\d+\s+\d+\s+R\b")
+
+
+class InvoiceTemplate:
+    """
+    Vorkompilierte Rechnungsvorlage (siehe `create_pdf.py`).
+
+    Die Vorlage wird einmal mit PyMuPDF geparst. Der statische Seiteninhalt wird komprimiert
+    zwischengespeichert und zusammen mit Katalog, Seitenbaum und Schriften als fertiger
+    PDF-Anfang vorgehalten. Pro Rechnung wird nur noch ein kleiner Inhaltsstrom mit den
+    Feldwerten sowie Querverweistabelle und Trailer geschrieben.
+    """
+
+    def __init__(self, template_path: str) -> None:
+        with open(template_path, "rb") as file:
+            template_bytes = file.read()
+        self.template_path = template_path
+        self.version = hashlib.sha256(template_bytes).hexdigest()[:16]
+
+        doc = fitz.open(stream=template_bytes, filetype="pdf")
+        try:
+            if doc.page_count != 1:
+                raise ValueError(f"Vorlage muss genau eine Seite haben: {template_path}")
+            page = doc[0]
+            self.width = page.mediabox.width
+            self.height = page.mediabox.height
+            static_content = page.read_contents()
+            fonts = self._read_fonts(doc, page)
+        finally:
+            doc.close()
+
+        self._prefix, self._offsets = self._build_prefix(static_content, fonts)
+        self._overlay_obj = len(self._offsets) + 1
+        self._positions = self._field_positions()
+        self._product_rows = self._product_positions()
+
+    @staticmethod
+    def _read_fonts(doc: fitz.Document, page: fitz.Page) -> List[Tuple[str, bytes]]:
+        resources = doc.xref_get_key(page.xref, "Resources")[1]
+        if "/XObject" in resources or "/Pattern" in resources or "/Shading" in resources:
+            raise ValueError("Vorlage enthält Ressourcen, die nicht unterstützt werden (nur Text).")
+
+        fonts = []
+        for xref, _, _, _, name, _ in page.get_fonts():
+            font_dict = doc.xref_object(xref, compressed=True).encode("latin-1")
+            if _OBJECT_REFERENCE.search(font_dict):
+                # Eingebettete Schriften verweisen auf weitere Objekte (FontDescriptor, FontFile, ...)
+                raise ValueError(f"Vorlage enthält eingebettete Schrift {name}; nur Standard-Schriften möglich.")
+            fonts.append((name, font_dict))
+        return fonts
+
+    def _build_prefix(self, static_content: bytes, fonts: List[Tuple[str, bytes]]) -> Tuple[bytes, List[int]]:
+        """
+        Erzeugt den für alle Rechnungen identischen PDF-Anfang.
+
+        Objekte: 1 Katalog, 2 Seitenbaum, 3 Seite, 4 statischer Inhalt, danach Schriften.
+        Der Inhaltsstrom der Feldwerte folgt pro Rechnung als letztes Objekt.
+        """
+        font_objs = {name: 5 + i for i, (name, _) in enumerate(fonts)}
+        overlay_obj = 5 + len(fonts) + 1
+        font_refs = " ".join(f"/{name} {obj} 0 R" for name, obj in font_objs.items())
+        font_refs += f" /{OVERLAY_FONT_RESOURCE} {overlay_obj - 1} 0 R"
+
+        # In q/Q kapseln, damit Zustandsänderungen der Vorlage die Feldwerte nicht beeinflussen
+        static_stream = zlib.compress(b"q\n" + static_content + b"\nQ\n")
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width:.4f} {self.height:.4f}] "
+                f"/Resources << /Font << {font_refs} >> /ProcSet [/PDF /Text] >> "
+                f"/Contents [4 0 R {overlay_obj} 0 R] >>"
+            ).encode("latin-1"),
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(static_stream) + static_stream + b"\nendstream",
+        ]
+        objects.extend(font_dict for _, font_dict in fonts)
+        objects.append(
+            (
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{OVERLAY_FONT} /Encoding /WinAnsiEncoding >>"
+            ).encode("latin-1")
+        )
+
+        prefix = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(prefix))
+            prefix += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        return bytes(prefix), offsets
+
+    def _field_positions(self) -> Dict[str, Tuple[float, float]]:
+        """
+        Position (x, y) des Werts jedes Kopf- und Fußfelds.
+        """
+        positions: Dict[str, Tuple[float, float]] = {}
+        for field, _, value_x, top in INVOICE_HEADER_FIELDS:
+            positions[field] = (value_x, self.height - top)
+
+        y = self.height - INVOICE_PRODUCTS_TOP - INVOICE_MAX_PRODUCTS * INVOICE_PRODUCT_ROW_HEIGHT
+        for field, _, value_x in INVOICE_FOOTER_FIELDS:
+            positions[field] = (value_x, y)
+            y -= INVOICE_PRODUCT_ROW_HEIGHT
+        return positions
+
+    def _product_positions(self) -> List[Tuple[float, float, float, float]]:
+        """
+        Positionen (x Name, x Menge, x Preis, y) der Produktzeilen.
+        """
+        rows = []
+        y = self.height - INVOICE_PRODUCTS_TOP
+        for i in range(1, INVOICE_MAX_PRODUCTS + 1):
+            line = invoice_product_line(i)
+            name_x = INVOICE_LABEL_X + _label_width(f"{i}. ")
+            quantity_x = INVOICE_LABEL_X + _label_width(line[: line.index(f"Menge: {INVOICE_QUANTITY_BLANK}") + 7])
+            price_x = INVOICE_LABEL_X + _label_width(line[: line.index(f"Preis: {INVOICE_PRICE_BLANK}") + 7])
+            rows.append((name_x, quantity_x, price_x, y))
+            y -= INVOICE_PRODUCT_ROW_HEIGHT
+        return rows
+
+    def fits(self, customer: Dict[str, Any]) -> bool:
+        """
+        Prüft, ob die Rechnung in die Vorlage passt (höchstens `INVOICE_MAX_PRODUCTS` Produkte).
+        """
+        products = customer.get("products", [])
+        return isinstance(products, list) and len(products) <= INVOICE_MAX_PRODUCTS
+
+    def overlay(self, customer: Dict[str, Any]) -> bytes:
+        """
+        Erzeugt den Inhaltsstrom mit den Feldwerten einer Rechnung.
+        """
+        ops: List[bytes] = [b"BT /%s %d Tf" % (OVERLAY_FONT_RESOURCE.encode(), OVERLAY_FONT_SIZE)]
+
+        def text(x: float, y: float, value: Any) -> None:
+            if value in (None, ""):
+                return
+            ops.append(b"1 0 0 1 %.2f %.2f Tm (%s) Tj" % (x + 2, y + OVERLAY_BASELINE_OFFSET, _pdf_string(value)))
+
+        for field, _, _, _ in INVOICE_HEADER_FIELDS:
+            x, y = self._positions[field]
+            text(x, y, customer.get(field, ""))
+
+        for product, (name_x, quantity_x, price_x, y) in zip(customer.get("products", []), self._product_rows):
+            text(name_x, y, product.get("product_name", product.get("name", "Unbekannt")))
+            text(quantity_x, y, product.get("quantity", ""))
+            text(price_x, y, product.get("unit_price", product.get("price", "")))
+
+        for field, _, _ in INVOICE_FOOTER_FIELDS:
+            x, y = self._positions[field]
+            text(x, y, customer.get(field, ""))
+
+        ops.append(b"ET")
+        return b"\n".join(ops)
+
+    def render(self, customer: Dict[str, Any]) -> bytes:
+        """
+        Liefert die fertige PDF einer Rechnung als Bytes.
+        """
+        overlay = zlib.compress(self.overlay(customer))
+        output = bytearray(self._prefix)
+        offsets = self._offsets + [len(output)]
+        output += b"%d 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n" % (self._overlay_obj, len(overlay))
+        output += overlay + b"\nendstream\nendobj\n"
+
+        xref_offset = len(output)
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+        output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref_offset)
+        return bytes(output)
+
+
+def _label_width(text: str) -> float:
+    # Breite in der Schrift der Beschriftungen der Vorlage (siehe `create_invoice_template`)
+    width: float = stringWidth(text, "Helvetica", 12)
+    return width
+
+
+def _pdf_string(value: Any) -> bytes:
+    encoded = str(value).encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"").replace(
+        b"\n", b" "
+    )
+
+
+@lru_cache(maxsize=8)
+def load_template(template_path: str) -> InvoiceTemplate:
+    """
+    Lädt eine Vorlage einmal pro Prozess und hält sie im Speicher.
+    """
+    return InvoiceTemplate(template_path)
+
+
+def render_from_template(customer: Dict[str, Any], template_path: str) -> Optional[bytes]:
+    """
+    Rendert eine Rechnung über die Vorlage oder gibt None zurück, wenn sie nicht hineinpasst.
+    """
+    template = load_template(template_path)
+    if not template.fits(customer):
+        return None
+    return template.render(customer)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict
+
+# Standardgröße des Caches (Bytes), darüber werden die am längsten nicht genutzten PDFs gelöscht
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Beim Aufräumen wird bis auf diesen Anteil der Höchstgröße gelöscht, damit nicht jeder Lauf aufräumt
+PRUNE_TARGET_RATIO = 0.9
+
+
+class RenderCache:
+    """
+    Inhaltsadressierter Cache gerenderter Rechnungs-PDFs.
+
+    Schlüssel ist der SHA-256 des normalisierten Kundendatensatzes zusammen mit der Renderer-Variante
+    (FPDF-Layout oder Vorlagenversion). Dateien liegen unter `<cache_dir>/<2 Zeichen>/<schlüssel>.pdf`
+    und werden atomar geschrieben, sodass mehrere Prozesse den Cache gleichzeitig nutzen können.
+    Treffer aktualisieren die Änderungszeit; `prune` löscht danach die am längsten ungenutzten Einträge.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(customer: Dict[str, Any], variant: str) -> str:
+        normalized = json.dumps(customer, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{variant}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pdf")
+
+    def get(self, key: str, dest: str) -> bool:
+        """
+        Kopiert die zwischengespeicherte PDF nach `dest`; gibt False zurück, wenn sie nicht im Cache liegt.
+        """
+        path = self._path(key)
+        try:
+            shutil.copyfile(path, dest)
+            os.utime(path)
+        except FileNotFoundError:
+            # Nicht vorhanden oder gerade von einem anderen Prozess verdrängt
+            return False
+        return True
+
+    def put(self, key: str, src: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file, open(src, "rb") as src_file:
+                shutil.copyfileobj(src_file, tmp_file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def prune(self) -> int:
+        """
+        Löscht die am längsten nicht genutzten PDFs, wenn der Cache größer als `max_bytes` ist.
+        Gibt die Anzahl gelöschter Dateien zurück.
+        """
+        entries = []
+        total = 0
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        target = self.max_bytes * PRUNE_TARGET_RATIO
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
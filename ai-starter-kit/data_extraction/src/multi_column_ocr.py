@@ -5,20 +5,69 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 kit_dir = os.path.abspath(os.path.join(current_dir, '..'))
 repo_dir = os.path.abspath(os.path.join(kit_dir, '..'))
 
+sys.path.append(repo_dir)
+
 import json
-from typing import Any, Dict, List, Optional, Tuple
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import cv2
+import fitz
+import numpy as np
 from langchain.schema import Document
 from numpy.typing import NDArray
 from paddleocr import PaddleOCR, PPStructure  # type: ignore
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image, ImageDraw, ImageFont
 
-ocr = PaddleOCR(use_angle_cls=False, lang='en')  # need to run only once to download and load model into memory
-layout_engine = PPStructure(
-    recovery=False, layout=True, table=True, ocr=False, show_log=False
-)  # need to run only once to download and load model into memory
+from data_extraction.src.text_layer import extract_page_text, has_text_layer, page_runs
+
+# models are loaded on first use, once per process, so each page worker holds its own instances
+_ocr_engine: Optional[PaddleOCR] = None
+_layout_engine: Optional[PPStructure] = None
+# loader of the page worker processes, set by the pool initializer
+_worker_loader: Optional['PaddleOCRLoader'] = None
+
+
+def get_ocr_engine() -> PaddleOCR:
+    """Returns the PaddleOCR engine of this process, downloading and loading the model on first use"""
+    global _ocr_engine
+    if _ocr_engine is None:
+        _ocr_engine = PaddleOCR(use_angle_cls=False, lang='en')
+    return _ocr_engine
+
+
+def get_layout_engine() -> PPStructure:
+    """Returns the PaddleStructure engine of this process, downloading and loading the model on first use"""
+    global _layout_engine
+    if _layout_engine is None:
+        _layout_engine = PPStructure(recovery=False, layout=True, table=True, ocr=False, show_log=False)
+    return _layout_engine
+
+
+def _init_page_worker(loader: 'PaddleOCRLoader') -> None:
+    """Loads the models once in each page worker process"""
+    global _worker_loader
+    _worker_loader = loader
+    get_ocr_engine()
+    get_layout_engine()
+
+
+def _process_page_window(
+    pdf_path: str,
+    first_page: int,
+    last_page: int,
+    output_folder: str,
+    save_intermediate: bool,
+    header_height: int,
+    footer_height: int,
+) -> List[str]:
+    """Rasterizes and extracts a window of pages in a page worker process"""
+    assert _worker_loader is not None, 'page worker not initialized'
+    return _worker_loader.process_page_window(
+        pdf_path, first_page, last_page, output_folder, save_intermediate, header_height, footer_height
+    )
 
 
 class PaddleOCRLoader:
@@ -34,6 +83,10 @@ class PaddleOCRLoader:
         header_height: int = 0,
         footer_height: int = 0,
         font_path: Optional[str] = None,
+        num_workers: int = 1,
+        page_window: int = 4,
+        dpi: int = 200,
+        text_layer_fast_path: bool = False,
     ) -> None:
         """
         Initialize the PaddleOCRLoader class.
@@ -45,6 +98,14 @@ class PaddleOCRLoader:
             header_height (int, optional): Height of the header in pixels. Defaults to 0.
             footer_height (int, optional): Height of the footer in pixels. Defaults to 0.
             font_path (str, optional): Path to the font file. Defaults to '../data/fonts/simfang.ttf'.
+            num_workers (int, optional): Number of processes extracting pages in parallel, each one loading its own
+            models. Defaults to 1 (pages extracted in this process).
+            page_window (int, optional): Number of pages rasterized at once, only these pages are kept in memory
+            by each worker. Defaults to 4.
+            dpi (int, optional): Resolution pages are rasterized at. Defaults to 200.
+            text_layer_fast_path (bool, optional): Whether to extract the text layer of born-digital pages directly,
+            in `multi_column.column_boxes` order, and only OCR scanned pages. Tables of born-digital pages are then
+            extracted as plain text instead of html. Defaults to False.
         """
         if output_folder is None:
             self.output_folder = os.path.join(kit_dir, 'data/extraction')
@@ -58,15 +119,31 @@ class PaddleOCRLoader:
         self.save_intermediate = save_intermediate
         self.header_height = header_height
         self.footer_height = footer_height
+        self.num_workers = max(num_workers, 1)
+        self.page_window = max(page_window, 1)
+        self.dpi = dpi
+        self.text_layer_fast_path = text_layer_fast_path
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the loaded documents are not needed by the page workers
+        state = self.__dict__.copy()
+        state.pop('documents', None)
+        return state
 
     def load(self) -> List[Document]:
         """get langchain documens from PDF file
         Returns:
             list: langchain docs
         """
-        self.documents = []
-        print(self.save_intermediate)
-        texts = self.load_pdf(
+        self.documents = list(self.lazy_load())
+        return self.documents
+
+    def lazy_load(self) -> Iterator[Document]:
+        """get langchain documents from PDF file, one per page in page order, as soon as each page is extracted
+        Returns:
+            iterator: langchain docs
+        """
+        texts = self.iter_pdf(
             self.document_path,
             output_folder=self.output_folder,
             save_intermediate=self.save_intermediate,
@@ -75,9 +152,7 @@ class PaddleOCRLoader:
         )
         for page, content in enumerate(texts):
             metadata = {'source': self.document_path, 'page': page}
-            doc = Document(page_content=content, metadata=metadata)
-            self.documents.append(doc)
-        return self.documents
+            yield Document(page_content=content, metadata=metadata)
 
     # PDF Conversion
 
@@ -102,42 +177,53 @@ class PaddleOCRLoader:
 
     # OCR and tables-layout engine
 
-    def simple_ocr(self, img_file_path: str, ocr: PaddleOCR = ocr) -> Any:
+    def simple_ocr(self, img_file_path: str | NDArray[Any], ocr: Optional[PaddleOCR] = None) -> Any:
         """
         This method performs simple OCR on a single image
         Args:
-            img_file_path (str): image file path
-            ocr (PaddleOCR, optional): PaddleOCR engine object. Defaults to ocr.
+            img_file_path (str | np.array): image file path or BGR image array
+            ocr (PaddleOCR, optional): PaddleOCR engine object. Defaults to the engine of this process.
         Returns:
             str: output ocr object
         """
+        if ocr is None:
+            ocr = get_ocr_engine()
         result = ocr.ocr(img_file_path, cls=False)
         return result
 
-    def structured_ocr(self, img_file_path: str, ocr: PaddleOCR = layout_engine) -> Any:
+    def structured_ocr(self, img_file_path: str | NDArray[Any], ocr: Optional[PPStructure] = None) -> Any:
         """
         This method performs an structure deetction, table transcription and OCR on a single image
         Args:
-            img_file_path (str): image file path
-            ocr (PaddleOCR, optional): PaddleStructure engine object. Defaults to layout_engine.
+            img_file_path (str | np.array): image file path or BGR image array
+            ocr (PaddleOCR, optional): PaddleStructure engine object. Defaults to the engine of this process.
         Returns:
             str: output ocr object
         """
-        img = cv2.imread(img_file_path)
+        if ocr is None:
+            ocr = get_layout_engine()
+        img = cv2.imread(img_file_path) if isinstance(img_file_path, str) else img_file_path
         return ocr(img)
 
     # structure extraction
 
-    def show_paddle_structure_bboxs(self, image_path: str, result: List[Dict[str, Any]], save: bool = False) -> Any:
+    def show_paddle_structure_bboxs(
+        self,
+        image_path: str,
+        result: List[Dict[str, Any]],
+        save: bool = False,
+        image: Optional[NDArray[Any]] = None,
+    ) -> Any:
         """
         This method shows the bounding boxes of a structured_ocr execution over a provided image_file
         Args:
             image_path (str): image file path
             result (str): output structured ocr object
             save (bool, optional): save image in original directory. Defaults to False.
+            image (np.array, optional): BGR image to draw on instead of reading image_path. Defaults to None.
         Rturns: cv2 image obbject
         """
-        image = cv2.imread(image_path)
+        image = cv2.imread(image_path) if image is None else image.copy()
         type_color = {
             'header': (255, 220, 0),  # yellow
             'table': (255, 60, 155),  # purple
@@ -165,7 +251,12 @@ class PaddleOCRLoader:
         return image
 
     def show_simple_bboxes(
-        self, image_path: str, bboxs: List[Any], save: bool = False, tag: Optional[str] = None
+        self,
+        image_path: str,
+        bboxs: List[Any],
+        save: bool = False,
+        tag: Optional[str] = None,
+        image: Optional[NDArray[Any]] = None,
     ) -> Any:
         """
         This method shows a list of bounding boxes over a provided image file path
@@ -174,8 +265,9 @@ class PaddleOCRLoader:
             bboxs (list): list of bounding boxes
             save (bool, optional): save image in original directory. Defaults to False.
             tag (str, optional): tag for the out image. Defaults to None.
+            image (np.array, optional): BGR image to draw on instead of reading image_path. Defaults to None.
         """
-        image = cv2.imread(image_path)
+        image = cv2.imread(image_path) if image is None else image.copy()
         color = (255, 60, 155)  # purple
         for i, bbox in enumerate(bboxs):
             x1, y1, x2, y2 = bbox
@@ -254,13 +346,8 @@ class PaddleOCRLoader:
         Returns:
             (str): json output path
         """
+        figures_dict = self.save_images(figures, path, tag)
         path = os.path.join(os.path.dirname(path), ''.join(os.path.basename(path).split('.')[:-1]))
-        figures_dict = {}
-        for i, figure in enumerate(figures):
-            figure_path = f'{path}_figure_{i}.jpg'
-            image = Image.fromarray(figure)
-            image.save(figure_path, 'JPEG')
-            figures_dict[f'{tag} {i}'] = figure_path
         out_path = f'{path}_figures.json'
         with open(out_path, 'w') as json_file:
             json.dump(figures_dict, json_file)
@@ -293,18 +380,32 @@ class PaddleOCRLoader:
         Returns:
             (str): json output path
         """
+        equations_dict = self.save_images(equations, path, tag)
         path = os.path.join(os.path.dirname(path), ''.join(os.path.basename(path).split('.')[:-1]))
-        equations_dict = {}
-        for i, equation in enumerate(equations):
-            equation_path = f'{path}_equation_{i}.jpg'
-            image = Image.fromarray(equation)
-            image.save(equation_path, 'JPEG')
-            equations_dict[f'{tag} {i}'] = equation_path
         out_path = f'{path}_equations.json'
         with open(out_path, 'w') as json_file:
             json.dump(equations_dict, json_file)
         return out_path
 
+    def save_images(self, images: List[Any], path: str, tag: str) -> Dict[str, str]:
+        """
+        This method saves the page figures or equations in a folder
+        Args:
+            images (list): list of images (image array)
+            path (str): image_path
+            tag (str): tag of the images, 'figure' or 'equation'
+        Returns:
+            (dict): path of each image by its tag
+        """
+        path = os.path.join(os.path.dirname(path), ''.join(os.path.basename(path).split('.')[:-1]))
+        images_dict = {}
+        for i, image_array in enumerate(images):
+            image_path = f'{path}_{tag}_{i}.jpg'
+            image = Image.fromarray(image_array)
+            image.save(image_path, 'JPEG')
+            images_dict[f'{tag} {i}'] = image_path
+        return images_dict
+
     def mask_elements_from_image(
         self,
         image: NDArray[Any],
@@ -611,6 +712,23 @@ class PaddleOCRLoader:
         """
         # Open the original image
         original_image = Image.open(image_path)
+        new_image = self.concat_crops(original_image, bounding_boxes)
+        # Save or display the resulting image
+        # new_image.show()
+        # Alternatively, you can save the image using the following line
+        path = os.path.join(os.path.dirname(image_path), ''.join(os.path.basename(image_path).split('.')[:-1]))
+        save_path = f'{path}_{tag}.jpg'
+        new_image.save(save_path)
+        return save_path
+
+    def concat_crops(self, original_image: Image.Image, bounding_boxes: List[Any]) -> Image.Image:
+        """This function crops an image given a list of ordered bounding boxes and stacks the crops vertically
+        Args:
+            original_image (PIL.Image): image to crop
+            bounding_boxes (list): list of ordered bounding boxes
+        Returns:
+            PIL.Image: concatenated image
+        """
         # Create an empty list to store cropped images
         cropped_images = []
         # Crop the image according to each bounding box
@@ -627,13 +745,7 @@ class PaddleOCRLoader:
         for cropped_image in cropped_images:
             new_image.paste(cropped_image, (0, current_height))
             current_height += cropped_image.height
-        # Save or display the resulting image
-        # new_image.show()
-        # Alternatively, you can save the image using the following line
-        path = os.path.join(os.path.dirname(image_path), ''.join(os.path.basename(image_path).split('.')[:-1]))
-        save_path = f'{path}_{tag}.jpg'
-        new_image.save(save_path)
-        return save_path
+        return new_image
 
     def replace_from_extracted(
         self, text: str, tables_json_file_path: str, figures_json_file_path: str, equations_json_file_path: str
@@ -648,7 +760,7 @@ class PaddleOCRLoader:
         Returns:
             str: text with replacements
         """
-        replacements = {}
+        replacements: Dict[str, str] = {}
         with open(tables_json_file_path, 'r') as file:
             json_data = json.load(file)
             replacements.update(json_data)
@@ -658,10 +770,190 @@ class PaddleOCRLoader:
         with open(equations_json_file_path, 'r') as file:
             json_data = json.load(file)
             replacements.update(json_data)
+        return self.replace_placeholders(text, replacements)
+
+    def replace_placeholders(self, text: str, replacements: Dict[str, str]) -> str:
+        """
+        This function replaces the masked elements placeholders in the given text
+        Args:
+            text (str): simple ocr extracted text
+            replacements (dict): html table or image path of each masked element by its tag
+        Returns:
+            str: text with replacements
+        """
         for key, value in replacements.items():
             text = text.replace(f'**{key}**', value)
         return text
 
+    def process_page(
+        self,
+        page_image: Image.Image,
+        page_path: str,
+        save_intermediate: bool = False,
+        header_height: int = 0,
+        footer_height: int = 0,
+    ) -> str:
+        """this method extracts the text, tables and images of a page image, keeping the intermediate images in memory
+
+        Args:
+            page_image (PIL.Image): rasterized page
+            page_path (str): page image path, used as prefix of the figures and intermediate files of the page
+            save_intermediate (bool, optional): if is required to save some intermediuate results for debug purpouses.
+            Defaults to False.
+            header_height (int, optional): header height in pixels. Defaults to 0.
+            footer_height (int, optional): footer height in pixels. Defaults to 0.
+
+        Returns:
+            str: text, html like tables, and figures references of the page content
+        """
+        img = page_image.convert('RGB')
+        bgr_image = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+        if save_intermediate:
+            img.save(page_path, 'JPEG')
+        # process layout detaction
+        structured_ocr_result = self.structured_ocr(bgr_image)
+        # tables, figures and equations are replaced in the text by their html and image paths
+        tables_bboxs, tables = self.get_tables(structured_ocr_result)
+        figures_bboxs, figures = self.get_figures(structured_ocr_result)
+        equations_bboxs, equations = self.get_equations(structured_ocr_result)
+        replacements: Dict[str, str] = {f'table {i}': table for i, table in enumerate(tables)}
+        replacements.update(self.save_images(figures, page_path, 'figure'))
+        replacements.update(self.save_images(equations, page_path, 'equation'))
+        if save_intermediate:
+            self.save_tables(tables, page_path, save_html=True)
+        _, masked_img = self.mask_elements_from_image(img, tables_bboxs, 'table')
+        _, masked_img = self.mask_elements_from_image(masked_img, figures_bboxs, 'figure')
+        _, masked_img = self.mask_elements_from_image(
+            masked_img, equations_bboxs, 'equation', save=save_intermediate, image_path=page_path
+        )
+        # clean up and order bounding boxes
+        bboxes: List[Any] | Tuple[List[Any], List[Any]] | List[Any] = [
+            element['bbox'] for element in structured_ocr_result
+        ]
+        if not bboxes:  # blank page
+            return ''
+        bboxes = self.get_content_bboxes(bboxes)
+        img_size = (img.getbbox()[2], img.getbbox()[3])
+        assert isinstance(bboxes, list)
+        bboxes = self.order_paragraphs(bboxes, img_size, header_height=header_height, footer_height=footer_height)
+        assert isinstance(bboxes, list)
+        bboxes = self.expand_bounding_boxes(bboxes, img_size, 3)
+        assert isinstance(bboxes, list)
+        if save_intermediate:
+            self.show_paddle_structure_bboxs(page_path, structured_ocr_result, save=True, image=bgr_image)
+            self.show_simple_bboxes(page_path, bboxes, save=True, tag='ordered', image=bgr_image)
+        # create new in line image from masked image and ordered bboxes
+        final_image = self.concat_crops(masked_img, bboxes)
+        # do simple ocr over the inline masked image, and unmask text
+        simple_ocr_result = self.simple_ocr(cv2.cvtColor(np.asarray(final_image), cv2.COLOR_RGB2BGR))
+        masked_text = '\n'.join([line[1][0] for line in simple_ocr_result])
+        return self.replace_placeholders(masked_text, replacements)
+
+    def process_page_window(
+        self,
+        pdf_path: str,
+        first_page: int,
+        last_page: int,
+        output_folder: str = 'data/extraction',
+        save_intermediate: bool = False,
+        header_height: int = 0,
+        footer_height: int = 0,
+    ) -> List[str]:
+        """this method rasterizes the pages first_page to last_page (1-based, inclusive) of a pdf and extracts them
+
+        Returns:
+            list: content of each page of the window
+        """
+        file_name = os.path.basename(pdf_path).split('.')[0]
+        page_folder = os.path.join(output_folder, file_name)
+        os.makedirs(page_folder, exist_ok=True)
+        pages = range(first_page, last_page + 1)
+        texts: Dict[int, str] = {}
+        if self.text_layer_fast_path:
+            with fitz.open(pdf_path) as doc:
+                for page in pages:
+                    if has_text_layer(doc[page - 1]):
+                        texts[page] = extract_page_text(doc[page - 1])
+        # only the pages without text layer are rasterized and sent to OCR
+        for run_first_page, run_last_page in page_runs([page for page in pages if page not in texts]):
+            images = convert_from_path(pdf_path, dpi=self.dpi, first_page=run_first_page, last_page=run_last_page)
+            for page, image in enumerate(images, start=run_first_page):
+                page_path = os.path.join(page_folder, f'{file_name}_page_{page - 1}.jpg')
+                texts[page] = self.process_page(image, page_path, save_intermediate, header_height, footer_height)
+                image.close()
+        return [texts[page] for page in pages]
+
+    def iter_pdf(
+        self,
+        pdf_path: str,
+        output_folder: Optional[str] = None,
+        save_intermediate: bool = False,
+        header_height: int = 0,
+        footer_height: int = 0,
+    ) -> Iterator[str]:
+        """this metod thakes a pdf file and yields the text, table and images of each page in page order.
+
+        Pages are rasterized `page_window` at a time, so the document is never fully held in memory, and windows are
+        extracted by `num_workers` processes when more than one is set.
+
+        Args:
+            pdf_path (str): file path
+            output_folder (str, optional): path for storing figures and intermediate files. Defaults to the loader
+            output folder.
+            save_intermediate (bool, optional): if is required to save some intermediuate results for debug purpouses.
+            Defaults to False.
+            header_height (int, optional): header height in pixels. Defaults to 0.
+            footer_height (int, optional): footer height in pixels. Defaults to 0.
+
+        Returns:
+            iterator: texts, html like tables, and figures references of each page content
+        """
+        if output_folder is None:
+            output_folder = self.output_folder
+        num_pages = pdfinfo_from_path(pdf_path)['Pages']
+        windows = [
+            (first_page, min(first_page + self.page_window - 1, num_pages))
+            for first_page in range(1, num_pages + 1, self.page_window)
+        ]
+        if self.num_workers == 1:
+            for first_page, last_page in windows:
+                yield from self.process_page_window(
+                    pdf_path, first_page, last_page, output_folder, save_intermediate, header_height, footer_height
+                )
+            return
+
+        # workers are spawned rather than forked, the paddle models of this process are not fork safe
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_page_worker,
+            initargs=(self,),
+        ) as executor:
+            # a few windows are queued ahead of the one being yielded, to keep the workers busy
+            pending: List[Future[List[str]]] = []
+            next_window = 0
+            try:
+                while next_window < len(windows) or pending:
+                    while next_window < len(windows) and len(pending) < 2 * self.num_workers:
+                        first_page, last_page = windows[next_window]
+                        pending.append(
+                            executor.submit(
+                                _process_page_window,
+                                pdf_path,
+                                first_page,
+                                last_page,
+                                output_folder,
+                                save_intermediate,
+                                header_height,
+                                footer_height,
+                            )
+                        )
+                        next_window += 1
+                    yield from pending.pop(0).result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
     def load_pdf(
         self,
         pdf_path: str,
@@ -683,58 +975,15 @@ class PaddleOCRLoader:
         Returns:
             list: list of texts, html like tables, and figures referencesof each apge content
         """
-        file_ouput_forder = self.convert_pdf_to_images(pdf_path, output_folder=output_folder)
-        texts = []
-        # iterate over each page of the pdf
-        image_paths = list(os.listdir(file_ouput_forder))
-        for image_path in image_paths:
-            # open image
-            file_path = os.path.join(file_ouput_forder, image_path)
-            img = Image.open(file_path)
-            # process layout detaction
-            structured_ocr_result = self.structured_ocr(file_path)
-            # save tables
-            tables_bboxs, tables = self.get_tables(structured_ocr_result)
-            tables_json_file_path = self.save_tables(tables, file_path, save_html=save_intermediate)
-            _, masked_img = self.mask_elements_from_image(img, tables_bboxs, 'table')
-            # save figures
-            figures_bboxs, figures = self.get_figures(structured_ocr_result)
-            figures_json_file_path = self.save_figures(figures, file_path)
-            _, masked_img = self.mask_elements_from_image(masked_img, figures_bboxs, 'figure')
-            # save equations and save masked image
-            equations_bboxs, equations = self.get_equations(structured_ocr_result)
-            equations_json_file_path = self.save_equations(equations, file_path)
-            mask_img_path, masked_img = self.mask_elements_from_image(
-                masked_img, equations_bboxs, 'equation', save=True, image_path=file_path
+        return list(
+            self.iter_pdf(
+                pdf_path,
+                output_folder=output_folder,
+                save_intermediate=save_intermediate,
+                header_height=header_height,
+                footer_height=footer_height,
             )
-            # show structure bboxes
-            _structured_bboxes_image = self.show_paddle_structure_bboxs(
-                file_path, structured_ocr_result, save=save_intermediate
-            )
-            # clean up and order bounding boxes
-            bboxes: List[Any] | Tuple[List[Any], List[Any]] | List[Any] = [
-                element['bbox'] for element in structured_ocr_result
-            ]
-            bboxes = self.get_content_bboxes(bboxes)
-            img_size = (img.getbbox()[2], img.getbbox()[3])
-            assert isinstance(bboxes, list)
-            bboxes = self.order_paragraphs(bboxes, img_size, header_height=header_height, footer_height=footer_height)
-            assert isinstance(bboxes, list)
-            bboxes = self.expand_bounding_boxes(bboxes, img_size, 3)
-            print(save_intermediate)
-            assert isinstance(bboxes, list)
-            _paragraph_bboxes_image = self.show_simple_bboxes(file_path, bboxes, save=save_intermediate, tag='ordered')
-            # create new in line image from masked image and ordered bboxes
-            assert mask_img_path is not None and isinstance(bboxes, list)
-            final_image_path = self.crop_and_concat(mask_img_path, bboxes, tag='vertical')
-            # do simple ocr over the inline masked image, and unmask text
-            simple_ocr_result = self.simple_ocr(final_image_path, ocr=ocr)
-            masked_text = '\n'.join([line[1][0] for line in simple_ocr_result])
-            full_text = self.replace_from_extracted(
-                masked_text, tables_json_file_path, figures_json_file_path, equations_json_file_path
-            )
-            texts.append(full_text)
-        return texts
+        )
 
 
 if __name__ == '__main__':
@@ -1,7 +1,18 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(current_dir, '..'))
+repo_dir = os.path.abspath(os.path.join(kit_dir, '..'))
+
+sys.path.append(repo_dir)
+
 import argparse
 import json
+import tempfile
 from typing import Any, Dict, List, Optional
 
+import fitz
 from langchain.docstore.document import Document
 from langchain.document_loaders.base import BaseLoader
 
@@ -11,6 +22,8 @@ try:
 except ImportError as e:
     raise ValueError('unstructured package not found, please install it with ' '`pip install unstructured`') from e
 
+from data_extraction.src.text_layer import extract_page_text, has_text_layer
+
 
 def extract_elements_from_file(input_file: str, output_image_dir: str) -> List[Any]:
     """
@@ -50,6 +63,36 @@ def extract_elements_from_file(input_file: str, output_image_dir: str) -> List[A
     return raw_pdf_elements
 
 
+def element_text(entry: Dict[str, Any]) -> str:
+    """
+    Returns the html of a table element, or the text of any other element, from its json representation.
+    """
+    if entry['type'] == 'Table':
+        return str(entry['metadata']['text_as_html'])
+    # comment out this if need only table extraction
+    return str(entry['text'])
+
+
+def save_extracted_elements(extracted_elements: List[str], output_file_path: Optional[str]) -> str:
+    """
+    Writes the extracted elements (text, tables) in the specified plain text file.
+
+    Args:
+        extracted_elements (list): The text or html of each element.
+        output_file_path (str): The path to the output file to write the extracted elements.
+
+    Returns:
+        str: A string with all text and tables extarcted.
+    """
+    # Write the extracted elements to the output file
+    if output_file_path:
+        with open(output_file_path, 'w') as output_file:
+            for element in extracted_elements:
+                output_file.write(element + '\n\n')
+                # Adding two newlines for separation
+    return '\n\n'.join(extracted_elements)
+
+
 def process_json_file(input_json_filename: str, output_file_path: str) -> List[Any] | str:
     """
     Processes a JSON file and write the extracted elements (text, tables) in the specified plain text file.
@@ -67,21 +110,8 @@ def process_json_file(input_json_filename: str, output_file_path: str) -> List[A
         data = json.load(file)
 
     # Iterate over the JSON data and extract required table elements
-    extracted_elements = []
-    for entry in data:
-        if entry['type'] == 'Table':
-            extracted_elements.append(entry['metadata']['text_as_html'])
-        else:
-            extracted_elements.append(entry['text'])
-        # comment out this if need only table extraction
-
-    # Write the extracted elements to the output file
-    if output_file_path:
-        with open(output_file_path, 'w') as output_file:
-            for element in extracted_elements:
-                output_file.write(element + '\n\n')
-                # Adding two newlines for separation
-    return '\n\n'.join(extracted_elements)
+    extracted_elements = [element_text(entry) for entry in data]
+    return save_extracted_elements(extracted_elements, output_file_path)
 
 
 def process_elements(elements: str, output_file_path: str) -> str:
@@ -98,21 +128,8 @@ def process_elements(elements: str, output_file_path: str) -> str:
     # Read the elements string
     data = json.loads(elements)
     # Iterate over the JSON data and extract required table elements
-    extracted_elements = []
-    for entry in data:
-        if entry['type'] == 'Table':
-            extracted_elements.append(entry['metadata']['text_as_html'])
-        else:
-            extracted_elements.append(entry['text'])
-        # comment out this if need only table extraction
-
-    # Write the extracted elements to the output file
-    if output_file_path:
-        with open(output_file_path, 'w') as output_file:
-            for element in extracted_elements:
-                output_file.write(element + '\n\n')
-                # Adding two newlines for separation
-    return '\n\n'.join(extracted_elements)
+    extracted_elements = [element_text(entry) for entry in data]
+    return save_extracted_elements(extracted_elements, output_file_path)
 
 
 class UnstructuredPdfPytesseractLoader(BaseLoader):
@@ -123,6 +140,9 @@ class UnstructuredPdfPytesseractLoader(BaseLoader):
         output_image_dir: dir for storing images extracted form pdf file , default = None.
         output_file: text file for saving the result of the extraction , default = None.
         save_json: flag for storing elements structure along the input file , default = False.
+        text_layer_fast_path: flag for extracting the text layer of born-digital pages directly and only running
+            the hi_res layout and OCR models on scanned pages, default = False. Tables of born-digital pages are
+            then extracted as plain text instead of html, and the stored elements only cover the scanned pages.
     """
 
     def __init__(
@@ -131,6 +151,7 @@ class UnstructuredPdfPytesseractLoader(BaseLoader):
         output_image_dir: Optional[str] = None,
         output_file: Optional[str] = None,
         save_json: bool = False,
+        text_layer_fast_path: bool = False,
         **unstructured_kwargs: Any,
     ) -> None:
         # Initialize with file path.
@@ -138,12 +159,15 @@ class UnstructuredPdfPytesseractLoader(BaseLoader):
         self.output_file = output_file
         self.output_image_dir = output_image_dir
         self.save_json = save_json
+        self.text_layer_fast_path = text_layer_fast_path
 
     def _get_metadata(self) -> Dict[str, Any]:
         return {'source': self.file_path}
 
     def _get_elements(self) -> List[Any] | str:
         assert self.output_image_dir is not None
+        if self.text_layer_fast_path:
+            return self._get_elements_with_text_layer()
         self.pdf_elements = extract_elements_from_file(self.file_path, self.output_image_dir)
         if self.save_json:
             json_output = f"{self.file_path.split('.')[0]}.json"
@@ -155,6 +179,43 @@ class UnstructuredPdfPytesseractLoader(BaseLoader):
             assert elements is not None and self.output_file is not None
             return process_elements(elements, self.output_file)
 
+    def _get_elements_with_text_layer(self) -> str:
+        """Extracts the text layer of born-digital pages, and partitions only the scanned pages with hi_res"""
+        assert self.output_image_dir is not None
+        extracted_pages: Dict[int, List[str]] = {}
+        ocr_pages = []
+        self.pdf_elements = []
+        with fitz.open(self.file_path) as doc:
+            for page_number, page in enumerate(doc):
+                if has_text_layer(page):
+                    extracted_pages[page_number] = [extract_page_text(page)]
+                else:
+                    ocr_pages.append(page_number)
+
+            if ocr_pages:
+                # partition a copy of the document holding only the scanned pages
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    scans_path = os.path.join(tmp_dir, os.path.basename(self.file_path))
+                    with fitz.open() as scans:
+                        for page_number in ocr_pages:
+                            scans.insert_pdf(doc, from_page=page_number, to_page=page_number)
+                        scans.save(scans_path)
+                    self.pdf_elements = extract_elements_from_file(scans_path, self.output_image_dir)
+
+        # map the pages of the scans copy back to the document pages
+        for element in self.pdf_elements:
+            element.metadata.page_number = ocr_pages[(element.metadata.page_number or 1) - 1] + 1
+        if self.pdf_elements:
+            if self.save_json:
+                elements_to_json(self.pdf_elements, filename=f"{self.file_path.split('.')[0]}.json")
+            elements = elements_to_json(self.pdf_elements)
+            assert elements is not None
+            for entry in json.loads(elements):
+                extracted_pages.setdefault(entry['metadata']['page_number'] - 1, []).append(element_text(entry))
+
+        extracted_elements = [text for page in sorted(extracted_pages) for text in extracted_pages[page]]
+        return save_extracted_elements(extracted_elements, self.output_file)
+
     def load(self) -> List[Document]:
         elements = self._get_elements()
         metadata = self._get_metadata()
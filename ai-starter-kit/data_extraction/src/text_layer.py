@@ -0,0 +1,83 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(current_dir, '..'))
+repo_dir = os.path.abspath(os.path.join(kit_dir, '..'))
+
+sys.path.append(repo_dir)
+
+from typing import Any, List, Tuple
+
+import fitz
+
+from data_extraction.src.multi_column import column_boxes
+
+# pages with less extractable characters than this are treated as scans
+MIN_TEXT_CHARS = 50
+# pages whose images cover more than this fraction of the page are treated as scans, even with a text layer,
+# as the text layer of a scan is usually the output of a previous OCR pass
+MAX_IMAGE_COVERAGE = 0.8
+
+
+def page_coverage(page: Any) -> Tuple[int, float]:
+    """Returns the number of extractable non whitespace characters of a PyMuPDF page, and the fraction of the page
+    covered by images"""
+    text_chars = sum(not char.isspace() for char in page.get_text('text'))
+    page_rect = page.rect
+    page_area = abs(page_rect) or 1.0
+    image_area = 0.0
+    for image in page.get_images(full=True):
+        for rect in page.get_image_rects(image[0]):
+            image_area += abs(rect & page_rect)
+    return text_chars, min(image_area / page_area, 1.0)
+
+
+def has_text_layer(
+    page: Any, min_text_chars: int = MIN_TEXT_CHARS, max_image_coverage: float = MAX_IMAGE_COVERAGE
+) -> bool:
+    """Returns whether the text of a PyMuPDF page can be extracted directly instead of running OCR on it
+
+    Args:
+        page (fitz.Page): page to classify
+        min_text_chars (int, optional): minimum number of extractable characters. Defaults to 50.
+        max_image_coverage (float, optional): maximum fraction of the page covered by images. Defaults to 0.8.
+
+    Returns:
+        bool: True for born-digital pages, False for pages to OCR
+    """
+    text_chars, image_coverage = page_coverage(page)
+    return text_chars >= min_text_chars and image_coverage <= max_image_coverage
+
+
+def extract_page_text(page: Any, footer_margin: int = 0) -> str:
+    """Extracts the text layer of a PyMuPDF page in reading order, column by column as detected by `column_boxes`
+
+    Args:
+        page (fitz.Page): page to extract
+        footer_margin (int, optional): height of the bottom stripe of the page to ignore. Defaults to 0.
+
+    Returns:
+        str: page text
+    """
+    texts = [page.get_text(clip=rect, sort=True).strip() for rect in column_boxes(page, footer_margin=footer_margin)]
+    return '\n'.join(text for text in texts if text)
+
+
+def classify_pages(
+    pdf_path: str, min_text_chars: int = MIN_TEXT_CHARS, max_image_coverage: float = MAX_IMAGE_COVERAGE
+) -> List[bool]:
+    """Returns for each page of a pdf whether it has an extractable text layer, see `has_text_layer`"""
+    with fitz.open(pdf_path) as doc:
+        return [has_text_layer(page, min_text_chars, max_image_coverage) for page in doc]
+
+
+def page_runs(pages: List[int]) -> List[Tuple[int, int]]:
+    """Groups sorted page numbers into (first, last) runs of consecutive pages, e.g. to rasterize them at once"""
+    runs: List[Tuple[int, int]] = []
+    for page in pages:
+        if runs and runs[-1][1] == page - 1:
+            runs[-1] = (runs[-1][0], page)
+        else:
+            runs.append((page, page))
+    return runs
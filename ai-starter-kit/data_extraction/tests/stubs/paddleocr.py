@@ -0,0 +1,22 @@
+"""
+Test double of paddleocr. The page workers of `PaddleOCRLoader` load the engines on start; the tests replace
+`process_page`, so the engines are built but never run.
+"""
+
+from typing import Any
+
+
+class PaddleOCR:
+    def __init__(self, **kwargs: Any) -> None:
+        self.kwargs = kwargs
+
+    def ocr(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError('the paddleocr test double does not run OCR')
+
+
+class PPStructure:
+    def __init__(self, **kwargs: Any) -> None:
+        self.kwargs = kwargs
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError('the paddleocr test double does not run layout detection')
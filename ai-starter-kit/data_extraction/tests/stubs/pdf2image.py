@@ -0,0 +1,30 @@
+"""
+Test double of pdf2image rasterizing pages with PyMuPDF, so the tests do not need poppler. The page ranges
+converted by this process are recorded in `converted_ranges`.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz
+from PIL import Image
+
+converted_ranges: List[Tuple[int, int]] = []
+
+
+def pdfinfo_from_path(pdf_path: str, **kwargs: Any) -> Dict[str, Any]:
+    with fitz.open(pdf_path) as doc:
+        return {'Pages': doc.page_count}
+
+
+def convert_from_path(
+    pdf_path: str, dpi: int = 200, first_page: Optional[int] = None, last_page: Optional[int] = None, **kwargs: Any
+) -> List[Image.Image]:
+    with fitz.open(pdf_path) as doc:
+        first_page = first_page or 1
+        last_page = min(last_page or doc.page_count, doc.page_count)
+        converted_ranges.append((first_page, last_page))
+        images = []
+        for index in range(first_page - 1, last_page):
+            pixmap = doc[index].get_pixmap(dpi=dpi)
+            images.append(Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples))
+        return images
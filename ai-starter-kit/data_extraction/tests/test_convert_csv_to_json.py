@@ -0,0 +1,201 @@
+"""
+Unit tests of the CSV invoice readers of the data extraction scripts.
+
+Usage:
+    python -m pytest data_extraction/tests/test_convert_csv_to_json.py
+"""
+
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Dict, List
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+sys.path.append(os.path.join(kit_dir, 'scripts'))
+
+from convert_csv_to_json import (
+    InvoicesNotPresorted,
+    convert_csv_to_json,
+    find_total_mismatches,
+    iter_invoices_from_csv,
+    iter_invoices_from_csv_columnar,
+    parse_amount,
+)
+from fill_pdf_with_customers import create_customer_pdfs
+
+CUSTOMERS_CSV = os.path.join(kit_dir, 'data', 'customers', 'customers.csv')
+
+
+def read_rows(csv_file: str) -> List[Dict[str, str]]:
+    with open(csv_file, encoding='utf-8', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def write_rows(csv_file: str, rows: List[Dict[str, str]]) -> None:
+    with open(csv_file, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class CsvTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.rows = read_rows(CUSTOMERS_CSV)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, rows: List[Dict[str, str]], name: str = 'customers.csv') -> str:
+        csv_file = os.path.join(self.tmp_dir.name, name)
+        write_rows(csv_file, rows)
+        return csv_file
+
+
+class TestColumnarReader(CsvTestCase):
+    def test_same_invoices_as_row_reader(self) -> None:
+        expected = list(iter_invoices_from_csv(CUSTOMERS_CSV))
+        self.assertGreater(len(expected), 10)
+        for chunk_size in (1, 2, 7, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_invoices_from_csv_columnar(CUSTOMERS_CSV, chunk_size=chunk_size)), expected)
+
+    def test_unsorted_rows(self) -> None:
+        rows = self.rows[:]
+        random.Random(0).shuffle(rows)
+        csv_file = self.write_csv(rows)
+
+        expected = list(iter_invoices_from_csv(csv_file, presorted=False))
+        for chunk_size in (3, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                invoices = list(iter_invoices_from_csv_columnar(csv_file, presorted=False, chunk_size=chunk_size))
+                self.assertEqual(invoices, expected)
+
+    def test_invalid_chunk_size(self) -> None:
+        with self.assertRaises(ValueError):
+            next(iter_invoices_from_csv_columnar(CUSTOMERS_CSV, chunk_size=0))
+
+
+class TestStreaming(CsvTestCase):
+    def interleaved_rows(self) -> List[Dict[str, str]]:
+        template = self.rows[0]
+        return [
+            {**template, 'Invoice Number': 'INV-1', 'Product Name': 'A'},
+            {**template, 'Invoice Number': 'INV-1', 'Product Name': 'B'},
+            {**template, 'Invoice Number': 'INV-2', 'Product Name': 'C'},
+            {**template, 'Invoice Number': 'INV-1', 'Product Name': 'D'},
+            {**template, 'Invoice Number': 'INV-3', 'Product Name': 'E'},
+        ]
+
+    def test_invoices_are_yielded_before_unsorted_rows_are_reached(self) -> None:
+        csv_file = self.write_csv(self.interleaved_rows())
+        readers = {
+            'rows': iter_invoices_from_csv(csv_file),
+            'columnar chunk_size=1': iter_invoices_from_csv_columnar(csv_file, chunk_size=1),
+            'columnar chunk_size=2': iter_invoices_from_csv_columnar(csv_file, chunk_size=2),
+        }
+        for name, invoices in readers.items():
+            with self.subTest(reader=name):
+                first = next(invoices)
+                self.assertEqual(first['invoice_number'], 'INV-1')
+                self.assertEqual([product['product_name'] for product in first['products']], ['A', 'B'])
+                with self.assertRaises(InvoicesNotPresorted) as context:
+                    list(invoices)
+                self.assertEqual(context.exception.invoice_number, 'INV-1')
+
+        # within one block the rows are checked before any invoice of the block is yielded
+        with self.assertRaises(InvoicesNotPresorted):
+            next(iter_invoices_from_csv_columnar(csv_file, chunk_size=1000))
+
+    def test_unsorted_invoices_keep_the_order_of_first_appearance(self) -> None:
+        csv_file = self.write_csv(self.interleaved_rows())
+        for invoices in (
+            list(iter_invoices_from_csv(csv_file, presorted=False)),
+            list(iter_invoices_from_csv_columnar(csv_file, presorted=False)),
+        ):
+            self.assertEqual([invoice['invoice_number'] for invoice in invoices], ['INV-1', 'INV-2', 'INV-3'])
+            self.assertEqual([product['product_name'] for product in invoices[0]['products']], ['A', 'B', 'D'])
+
+    def test_convert_csv_to_json(self) -> None:
+        csv_file = self.write_csv(self.interleaved_rows())
+        json_file = os.path.join(self.tmp_dir.name, 'customers.json')
+        with redirect_stdout(StringIO()):
+            self.assertEqual(convert_csv_to_json(csv_file, json_file), json_file)
+        with open(json_file, encoding='utf-8') as file:
+            self.assertEqual(json.load(file), list(iter_invoices_from_csv(csv_file, presorted=False)))
+
+    def test_csv_is_rendered_without_json_intermediate(self) -> None:
+        csv_file = self.write_csv(self.rows)
+        output_dir = os.path.join(self.tmp_dir.name, 'pdfs')
+        with redirect_stdout(StringIO()):
+            create_customer_pdfs(csv_file, output_dir)
+
+        invoice_numbers = {row['Invoice Number'] for row in self.rows}
+        pdfs = os.listdir(output_dir)
+        self.assertEqual(len(pdfs), len(invoice_numbers))
+        self.assertTrue(all(any(number in pdf for pdf in pdfs) for number in invoice_numbers))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ['customers.csv', 'pdfs'])
+
+
+class TestTotals(CsvTestCase):
+    def test_parse_amount(self) -> None:
+        for text, amount in (
+            ('975 EUR', 975.0),
+            ('975,50 EUR', 975.5),
+            ('0,99', 0.99),
+            ('12.5', 12.5),
+            ('1.234,56 EUR', 1234.56),
+            ('1,234.56 EUR', 1234.56),
+            ('1.234 EUR', 1234.0),
+            ('1.234.567,89', 1234567.89),
+            ('-12,5 EUR', -12.5),
+            ('EUR', None),
+            ('', None),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(parse_amount(text), amount)
+
+    def test_sample_data_has_matching_totals(self) -> None:
+        self.assertEqual(find_total_mismatches(CUSTOMERS_CSV), [])
+
+    def test_mismatches_are_found_before_rendering(self) -> None:
+        template = self.rows[0]
+        rows = [
+            {**template, 'Invoice Number': 'INV-1', 'Product Total': '1000', 'Total Amount': '1.234,56 EUR'},
+            {**template, 'Invoice Number': 'INV-1', 'Product Total': '234.56', 'Total Amount': '1.234,56 EUR'},
+            {**template, 'Invoice Number': 'INV-2', 'Product Total': '10', 'Total Amount': '11 EUR'},
+            {**template, 'Invoice Number': 'INV-3', 'Product Total': '10', 'Total Amount': 'offen'},
+            {**template, 'Invoice Number': 'INV-4', 'Product Total': '975.5', 'Total Amount': '975,50 EUR'},
+            # rows of an invoice need not be contiguous
+            {**template, 'Invoice Number': 'INV-2', 'Product Total': '1', 'Total Amount': '11 EUR'},
+        ]
+        csv_file = self.write_csv(rows)
+        for chunk_size in (1, 4, 1000):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(find_total_mismatches(csv_file, chunk_size=chunk_size), ['INV-3'])
+
+        rows[-1]['Product Total'] = '2'
+        self.assertEqual(find_total_mismatches(self.write_csv(rows)), ['INV-2', 'INV-3'])
+
+    def test_nothing_is_rendered_on_mismatch(self) -> None:
+        rows = [dict(row) for row in self.rows]
+        rows[-1]['Total Amount'] = '1 EUR'
+        csv_file = self.write_csv(rows)
+        output_dir = os.path.join(self.tmp_dir.name, 'pdfs')
+        os.makedirs(output_dir)
+
+        with redirect_stdout(StringIO()) as output, self.assertRaises(SystemExit):
+            create_customer_pdfs(csv_file, output_dir, validate_totals=True)
+        self.assertIn(rows[-1]['Invoice Number'], output.getvalue())
+        self.assertEqual(os.listdir(output_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Unit tests of reading rendered invoices back into customer data, and of the comparison used by the extraction
+benchmark. Invoices are rendered with the FPDF layout and with the precompiled template, the OCR fallback is off.
+
+Usage:
+    python -m pytest data_extraction/tests/test_invoice_extractor.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, List, Optional, Tuple
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+sys.path.append(os.path.join(kit_dir, 'scripts'))
+
+from benchmark_invoice_extraction import FPDF_FIELDS, compare_invoices, field_matches, run_benchmark
+from create_pdf import create_pdf_template
+from invoice_extractor import extract_invoice, extract_invoices, invalid_fields, parse_invoice_lines
+from invoice_renderer import render_invoices
+
+
+def make_customer(invoice_number: str = 'INV-001') -> Dict[str, Any]:
+    return {
+        'name': 'Jürgen Müller',
+        'address': 'Hauptstraße 1, 10115 Berlin',
+        'phone': '030 123456',
+        'email': 'juergen@example.com',
+        'invoice_number': invoice_number,
+        'invoice_date': '2024-01-31',
+        'products': [
+            {'product_name': 'Laptop', 'quantity': 1, 'unit_price': 999.99},
+            {'product_name': 'Maus', 'quantity': 2, 'unit_price': 19.5},
+        ],
+        'total_amount': 1038.99,
+        'payment_due': '2024-02-29',
+        'comments': 'wird nicht gedruckt',
+    }
+
+
+class TestParseInvoiceLines(unittest.TestCase):
+    def test_fpdf_layout(self) -> None:
+        invoice, labels_found = parse_invoice_lines(
+            [
+                'Name: Max Mustermann',
+                'Telefon: Nicht angegeben',
+                'Rechnungsnummer: INV-001',
+                '1. Laptop - Menge: 1 - Preis: 999.99 EUR',
+                '2. Unbekannt - Menge: 3 - Preis: N/A EUR',
+                'Gesamtbetrag: 999,99 EUR',
+            ]
+        )
+        self.assertEqual(labels_found, 4)
+        self.assertEqual(
+            (invoice['name'], invoice['phone'], invoice['invoice_number']), ('Max Mustermann', '', 'INV-001')
+        )
+        # the FPDF layout appends the currency itself
+        self.assertEqual(invoice['total_amount'], '999,99')
+        self.assertEqual(
+            invoice['products'],
+            [
+                {'product_name': 'Laptop', 'quantity': 1, 'unit_price': 999.99, 'total': 999.99},
+                {'product_name': '', 'quantity': 3, 'unit_price': '', 'total': ''},
+            ],
+        )
+        self.assertEqual((invoice['email'], invoice['comments']), ('', ''))
+
+    def test_template_layout(self) -> None:
+        invoice, _ = parse_invoice_lines(
+            ['Rechnung', 'Gesamtbetrag: 10 EUR', '1. ___ Menge: ___ Preis: ___ EUR', '2. Maus Menge: 2 Preis: 5 EUR']
+        )
+        # the value of the template is printed as is, empty product lines are skipped
+        self.assertEqual(invoice['total_amount'], '10 EUR')
+        self.assertEqual(invoice['products'], [{'product_name': 'Maus', 'quantity': 2, 'unit_price': 5, 'total': 10}])
+
+    def test_invalid_fields(self) -> None:
+        invoice, _ = parse_invoice_lines(['E-Mail: keine Adresse', 'Rechnungsdatum: 2024-01-31'])
+        self.assertEqual(invalid_fields(invoice), ['email'])
+        invoice['products'] = [{'quantity': 'zwei', 'unit_price': 1.0}]
+        self.assertEqual(invalid_fields(invoice), ['email', 'products'])
+
+
+class TestExtractInvoices(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def render(self, customers: List[Dict[str, Any]], template_path: Optional[str] = None) -> List[str]:
+        output_dir = os.path.join(self.tmp_dir.name, 'template' if template_path else 'fpdf')
+        result = render_invoices(customers, output_dir, verbose=False, template_path=template_path)
+        self.assertEqual(result['errors'], [])
+        created: List[str] = result['created']
+        return created
+
+    def test_round_trip(self) -> None:
+        template_path = os.path.join(self.tmp_dir.name, 'invoice_template.pdf')
+        create_pdf_template('invoice', template_path)
+
+        customer = make_customer()
+        for layout, path, fields in (
+            ('fpdf', None, FPDF_FIELDS),
+            ('template', template_path, FPDF_FIELDS + ['payment_due']),
+        ):
+            with self.subTest(layout=layout):
+                (pdf_path,) = self.render([customer], path)
+                invoice, used_ocr = extract_invoice(pdf_path, ocr_fallback=False)
+                self.assertFalse(used_ocr)
+                self.assertEqual(compare_invoices(customer, invoice, fields), {field: True for field in fields})
+
+    def test_errors_are_collected_in_input_order(self) -> None:
+        pdf_paths = self.render([make_customer(f'INV-{i}') for i in range(3)])
+        broken = os.path.join(self.tmp_dir.name, 'broken.pdf')
+        with open(broken, 'wb') as file:
+            file.write(b'no pdf')
+        progress: List[Tuple[int, Optional[int]]] = []
+
+        result = extract_invoices(
+            pdf_paths[:2] + [broken] + pdf_paths[2:],
+            chunk_size=2,
+            ocr_fallback=False,
+            verbose=False,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+        self.assertEqual([entry['file'] for entry in result['invoices']], pdf_paths)
+        self.assertEqual(
+            [entry['invoice']['invoice_number'] for entry in result['invoices']], ['INV-0', 'INV-1', 'INV-2']
+        )
+        self.assertEqual([error['file'] for error in result['errors']], [broken])
+        self.assertEqual(progress, [(2, 4), (4, 4)])
+
+    def test_worker_pool(self) -> None:
+        pdf_paths = self.render([make_customer(f'INV-{i}') for i in range(5)])
+        serial = extract_invoices(pdf_paths, ocr_fallback=False, verbose=False)
+        parallel = extract_invoices(pdf_paths, workers=2, chunk_size=1, ocr_fallback=False, verbose=False)
+        self.assertEqual(parallel, serial)
+        with self.assertRaises(ValueError):
+            extract_invoices(pdf_paths, chunk_size=0)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_field_matches(self) -> None:
+        self.assertTrue(field_matches('total_amount', 1038.99, '1038,99 EUR'))
+        self.assertFalse(field_matches('total_amount', 1038.99, '1038,90'))
+        self.assertTrue(field_matches('name', ' Max ', 'Max'))
+        products = make_customer()['products']
+        extracted = [{**product, 'unit_price': str(product['unit_price'])} for product in products]
+        self.assertTrue(field_matches('products', products, extracted))
+        self.assertFalse(field_matches('products', products, extracted[:1]))
+
+    def test_run_benchmark(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            customers_json = os.path.join(tmp_dir, 'customers.json')
+            with open(customers_json, 'w', encoding='utf-8') as file:
+                json.dump([make_customer()], file, ensure_ascii=False)
+
+            report = run_benchmark(customers_json, 3, os.path.join(tmp_dir, 'out'), ocr_fallback=False)
+        self.assertEqual((report['documents'], report['layout'], report['extract_errors']), (3, 'fpdf', 0))
+        self.assertEqual(report['document_accuracy'], 1.0)
+        self.assertEqual(report['mismatches'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
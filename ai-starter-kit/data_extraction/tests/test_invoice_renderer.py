@@ -0,0 +1,146 @@
+"""
+Unit tests of the in-process invoice renderer of the data extraction scripts.
+
+Usage:
+    python -m pytest data_extraction/tests/test_invoice_renderer.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, List, Optional, Tuple
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+sys.path.append(os.path.join(kit_dir, 'scripts'))
+
+from invoice_renderer import invoice_filename, render_invoices, render_invoices_parallel
+
+
+def make_customer(name: str = 'Max Mustermann', invoice_number: str = 'INV-001') -> Dict[str, Any]:
+    return {
+        'name': name,
+        'address': 'Hauptstraße 1, 10115 Berlin',
+        'phone': '030 123456',
+        'email': 'max@example.com',
+        'invoice_number': invoice_number,
+        'invoice_date': '2024-01-31',
+        'products': [{'product_name': 'Laptop', 'quantity': 1, 'unit_price': 999.99}],
+        'total_amount': 999.99,
+    }
+
+
+class TestInvoiceFilename(unittest.TestCase):
+    def test_filename_contains_name_and_invoice_number(self) -> None:
+        self.assertEqual(invoice_filename(make_customer()), 'Max Mustermann_INV-001_invoice.pdf')
+        self.assertEqual(
+            invoice_filename(make_customer('A/B GmbH', 'INV\\7')),
+            'A_B GmbH_INV_7_invoice.pdf',
+        )
+
+    def test_invoices_of_one_customer_get_distinct_filenames(self) -> None:
+        self.assertNotEqual(
+            invoice_filename(make_customer(invoice_number='INV-001')),
+            invoice_filename(make_customer(invoice_number='INV-002')),
+        )
+
+    def test_missing_invoice_number_is_rejected(self) -> None:
+        for invoice_number in (None, '', '  '):
+            with self.subTest(invoice_number=invoice_number):
+                customer = make_customer()
+                customer['invoice_number'] = invoice_number
+                with self.assertRaises(ValueError):
+                    invoice_filename(customer)
+        customer = make_customer()
+        del customer['invoice_number']
+        with self.assertRaises(ValueError):
+            invoice_filename(customer)
+
+
+class TestRenderInvoices(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_every_invoice_of_a_customer_is_kept(self) -> None:
+        customers = [make_customer(invoice_number='INV-001'), make_customer(invoice_number='INV-002')]
+        created: List[str] = []
+        progress: List[Tuple[int, Optional[int]]] = []
+        result = render_invoices(
+            customers,
+            self.tmp_dir.name,
+            verbose=False,
+            on_created=created.append,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(result['created'], created)
+        self.assertEqual(len(set(result['created'])), 2)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), sorted(map(os.path.basename, created)))
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+
+    def test_errors_are_collected_per_invoice(self) -> None:
+        broken = make_customer('Erika Musterfrau')
+        del broken['invoice_number']
+        result = render_invoices(iter([make_customer(), broken]), self.tmp_dir.name, verbose=False)
+
+        self.assertEqual(len(result['created']), 1)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(result['errors'][0]['name'], 'Erika Musterfrau')
+
+
+class TestRenderInvoicesParallel(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_results_come_in_input_order(self) -> None:
+        customers = [make_customer(f'Kunde {i}', f'INV-{i:03d}') for i in range(7)]
+        customers[3] = {**customers[3], 'invoice_number': ''}
+        created: List[str] = []
+        progress: List[Tuple[int, Optional[int]]] = []
+        result = render_invoices_parallel(
+            iter(customers),
+            self.tmp_dir.name,
+            workers=2,
+            chunk_size=2,
+            verbose=False,
+            progress=lambda done, total: progress.append((done, total)),
+            on_created=created.append,
+        )
+
+        expected = [
+            os.path.join(self.tmp_dir.name, invoice_filename(customer))
+            for customer in customers
+            if customer is not customers[3]
+        ]
+        self.assertEqual(result['created'], expected)
+        self.assertEqual(created, expected)
+        self.assertEqual([error['name'] for error in result['errors']], ['Kunde 3'])
+        self.assertEqual(progress, [(2, None), (4, None), (6, None), (7, None)])
+
+    def test_progress_is_reported_only_through_the_callback(self) -> None:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            render_invoices_parallel(
+                [make_customer(), make_customer(invoice_number='INV-002')], self.tmp_dir.name, workers=1
+            )
+        # verbose output lists the created PDFs, progress is left to the progress callback
+        self.assertEqual(output.getvalue().count('PDF erstellt'), 2)
+        self.assertNotIn('Fortschritt', output.getvalue())
+
+    def test_invalid_chunk_size(self) -> None:
+        with self.assertRaises(ValueError):
+            render_invoices_parallel([make_customer()], self.tmp_dir.name, chunk_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests of the precompiled invoice template of the data extraction scripts.
+
+Usage:
+    python -m pytest data_extraction/tests/test_invoice_template.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, List, Tuple
+
+import fitz
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+sys.path.append(os.path.join(kit_dir, 'scripts'))
+
+from create_pdf import INVOICE_MAX_PRODUCTS, create_pdf_template, invoice_product_line
+from invoice_template import InvoiceTemplate
+
+
+def make_customer(products: int = 2) -> Dict[str, Any]:
+    return {
+        'name': 'Jürgen (Test)',
+        'address': 'Hauptstraße 1, 10115 Berlin',
+        'phone': '030 123456',
+        'email': 'juergen@example.com',
+        'invoice_number': 'INV-001',
+        'invoice_date': '2024-01-31',
+        'products': [
+            {'product_name': f'Produkt {i}', 'quantity': i, 'unit_price': f'{i}9.99'} for i in range(1, products + 1)
+        ],
+        'total_amount': '999,99',
+        'payment_due': '2024-02-29',
+    }
+
+
+def read_words(pdf: bytes) -> List[Tuple[float, float, str]]:
+    with fitz.open(stream=pdf, filetype='pdf') as doc:
+        return [(x0, y1, word) for x0, _, _, y1, word, *_ in doc[0].get_text('words')]
+
+
+class TestInvoiceTemplate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        template_path = os.path.join(self.tmp_dir.name, 'invoice_template.pdf')
+        create_pdf_template('invoice', template_path)
+        self.template = InvoiceTemplate(template_path)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_product_line(self) -> None:
+        self.assertTrue(invoice_product_line(3).startswith('3. _'))
+        self.assertIn('Menge: ____ Preis: ____ EUR', invoice_product_line(3))
+
+    def test_fits(self) -> None:
+        self.assertTrue(self.template.fits(make_customer(INVOICE_MAX_PRODUCTS)))
+        self.assertFalse(self.template.fits(make_customer(INVOICE_MAX_PRODUCTS + 1)))
+        self.assertFalse(self.template.fits({'products': 'keine Liste'}))
+
+    def test_render_contains_template_and_values(self) -> None:
+        pdf = self.template.render(make_customer())
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            self.assertEqual(doc.page_count, 1)
+            text = doc[0].get_text()
+
+        for value in ('Rechnung', 'Rechnungsnummer:', 'Jürgen (Test)', 'INV-001', 'Produkt 2', '29.99', '999,99'):
+            self.assertIn(value, text)
+
+    def test_values_are_placed_on_their_lines(self) -> None:
+        words = read_words(self.template.render(make_customer()))
+
+        def baseline(word: str) -> float:
+            return next(y for _, y, text in words if text == word)
+
+        def x_of(word: str) -> float:
+            return next(x for x, _, text in words if text == word)
+
+        # each value sits on the line of its label, right of it
+        for label, value in (
+            ('Rechnungsnummer:', 'INV-001'),
+            ('Gesamtbetrag:', '999,99'),
+            ('Zahlungsziel:', '2024-02-29'),
+        ):
+            self.assertAlmostEqual(baseline(label), baseline(value), delta=4)
+            self.assertGreater(x_of(value), x_of(label))
+        self.assertAlmostEqual(baseline('1.'), baseline('19.99'), delta=4)
+        self.assertAlmostEqual(baseline('2.'), baseline('29.99'), delta=4)
+        self.assertGreater(x_of('19.99'), x_of('Preis:'))
+
+    def test_empty_values_are_skipped(self) -> None:
+        customer = {**make_customer(0), 'email': '', 'phone': None}
+        self.assertNotIn(b'Tj', self.template.overlay({}))
+        self.assertEqual(self.template.overlay(customer).count(b'Tj'), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
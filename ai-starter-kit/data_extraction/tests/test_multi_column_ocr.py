@@ -0,0 +1,133 @@
+"""
+Unit tests of the page streaming of PaddleOCRLoader: pages are rasterized window by window, optionally in worker
+processes, and yielded in page order. paddleocr and poppler are replaced by the test doubles in `stubs`, and the
+loader under test returns the name and size of each rasterized page instead of running the models.
+
+Usage:
+    python -m pytest data_extraction/tests/test_multi_column_ocr.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from typing import List, Optional
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+repo_dir = os.path.abspath(os.path.join(kit_dir, '..'))
+stubs_dir = os.path.join(file_dir, 'stubs')
+
+sys.path.append(repo_dir)
+# the test doubles come first, also in the spawned page workers, which start with the sys.path of this process
+if stubs_dir not in sys.path:
+    sys.path.insert(0, stubs_dir)
+for module in ('paddleocr', 'pdf2image'):
+    sys.modules.pop(module, None)
+
+import fitz
+import pdf2image
+from PIL import Image
+
+from data_extraction.src.multi_column_ocr import PaddleOCRLoader
+from data_extraction.src.text_layer import page_runs
+
+TEXT_LAYER = 'This page was born digital and carries a text layer with enough characters to skip OCR.'
+
+
+class PageNameLoader(PaddleOCRLoader):
+    """Loader returning the name and size of each rasterized page instead of running the models"""
+
+    def process_page(
+        self,
+        page_image: Image.Image,
+        page_path: str,
+        save_intermediate: bool = False,
+        header_height: int = 0,
+        footer_height: int = 0,
+    ) -> str:
+        return f'{os.path.basename(page_path)} {page_image.width}x{page_image.height}'
+
+
+class TestPageRuns(unittest.TestCase):
+    def test_page_runs(self) -> None:
+        self.assertEqual(page_runs([]), [])
+        self.assertEqual(page_runs([4]), [(4, 4)])
+        self.assertEqual(page_runs([1, 2, 3, 5, 7, 8]), [(1, 3), (5, 5), (7, 8)])
+
+
+class TestPaddleOCRLoader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        pdf2image.converted_ranges.clear()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def make_pdf(self, num_pages: int, text_pages: Optional[List[int]] = None) -> str:
+        """Writes a pdf of `num_pages` A6 pages, the 1-based `text_pages` carrying a text layer"""
+        pdf_path = os.path.join(self.tmp_dir.name, 'doc.pdf')
+        with fitz.open() as doc:
+            for page_number in range(1, num_pages + 1):
+                page = doc.new_page(width=298, height=420)
+                if page_number in (text_pages or []):
+                    page.insert_textbox(fitz.Rect(20, 20, 278, 400), f'{TEXT_LAYER} Page {page_number}.')
+            doc.save(pdf_path)
+        return pdf_path
+
+    def make_loader(
+        self, pdf_path: str, page_window: int, num_workers: int = 1, text_layer_fast_path: bool = False
+    ) -> PageNameLoader:
+        return PageNameLoader(
+            pdf_path,
+            output_folder=self.tmp_dir.name,
+            save_intermediate=False,
+            num_workers=num_workers,
+            page_window=page_window,
+            dpi=18,
+            text_layer_fast_path=text_layer_fast_path,
+        )
+
+    def test_pages_are_yielded_in_order_across_windows(self) -> None:
+        pdf_path = self.make_pdf(5)
+        documents = self.make_loader(pdf_path, page_window=2).load()
+
+        self.assertEqual([doc.metadata['page'] for doc in documents], [0, 1, 2, 3, 4])
+        self.assertEqual([doc.page_content for doc in documents], [f'doc_page_{i}.jpg 75x105' for i in range(5)])
+        self.assertTrue(all(doc.metadata['source'] == pdf_path for doc in documents))
+        # only one window of pages is rasterized at a time
+        self.assertEqual(pdf2image.converted_ranges, [(1, 2), (3, 4), (5, 5)])
+
+    def test_page_window_larger_than_document(self) -> None:
+        pdf_path = self.make_pdf(3)
+        texts = self.make_loader(pdf_path, page_window=10).load_pdf(pdf_path, output_folder=self.tmp_dir.name)
+
+        self.assertEqual(texts, [f'doc_page_{i}.jpg 75x105' for i in range(3)])
+        self.assertEqual(pdf2image.converted_ranges, [(1, 3)])
+
+    def test_worker_pool_keeps_page_order(self) -> None:
+        pdf_path = self.make_pdf(7)
+        serial = [doc.page_content for doc in self.make_loader(pdf_path, page_window=2).lazy_load()]
+
+        for page_window in (1, 3):
+            with self.subTest(page_window=page_window):
+                loader = self.make_loader(pdf_path, page_window=page_window, num_workers=2)
+                self.assertEqual([doc.page_content for doc in loader.lazy_load()], serial)
+        # the windows of the pool were rasterized in the workers
+        self.assertEqual(pdf2image.converted_ranges, [(1, 2), (3, 4), (5, 6), (7, 7)])
+
+    def test_text_layer_pages_are_not_rasterized(self) -> None:
+        pdf_path = self.make_pdf(5, text_pages=[1, 2, 4])
+        texts = self.make_loader(pdf_path, page_window=5, text_layer_fast_path=True).load_pdf(
+            pdf_path, output_folder=self.tmp_dir.name
+        )
+
+        for page_number in (1, 2, 4):
+            self.assertIn(f'Page {page_number}.', texts[page_number - 1])
+        self.assertEqual(texts[2], 'doc_page_2.jpg 75x105')
+        self.assertEqual(texts[4], 'doc_page_4.jpg 75x105')
+        self.assertEqual(pdf2image.converted_ranges, [(3, 3), (5, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
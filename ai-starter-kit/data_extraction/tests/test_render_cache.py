@@ -0,0 +1,103 @@
+"""
+Unit tests of the render cache of the data extraction scripts.
+
+Usage:
+    python -m pytest data_extraction/tests/test_render_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+sys.path.append(os.path.join(kit_dir, 'scripts'))
+
+from invoice_renderer import render_invoices
+from render_cache import RenderCache
+
+
+def make_customer(invoice_number: str = 'INV-001', quantity: int = 1) -> Dict[str, Any]:
+    return {
+        'name': 'Max Mustermann',
+        'invoice_number': invoice_number,
+        'products': [{'product_name': 'Laptop', 'quantity': quantity, 'unit_price': 999.99}],
+        'total_amount': 999.99 * quantity,
+    }
+
+
+class RenderCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write(self, name: str, content: bytes) -> str:
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+
+class TestRenderCache(RenderCacheTestCase):
+    def test_key(self) -> None:
+        customer = make_customer()
+        reordered = dict(reversed(list(customer.items())))
+        self.assertEqual(RenderCache.key(customer, 'fpdf'), RenderCache.key(reordered, 'fpdf'))
+        self.assertNotEqual(RenderCache.key(customer, 'fpdf'), RenderCache.key(customer, 'template'))
+        self.assertNotEqual(RenderCache.key(customer, 'fpdf'), RenderCache.key(make_customer(quantity=2), 'fpdf'))
+
+    def test_get_and_put(self) -> None:
+        cache = RenderCache(self.cache_dir)
+        key = RenderCache.key(make_customer(), 'fpdf')
+        dest = os.path.join(self.tmp_dir.name, 'copy.pdf')
+        self.assertFalse(cache.get(key, dest))
+        self.assertFalse(os.path.exists(dest))
+
+        cache.put(key, self.write('a.pdf', b'%PDF-a'))
+        self.assertTrue(cache.get(key, dest))
+        with open(dest, 'rb') as file:
+            self.assertEqual(file.read(), b'%PDF-a')
+        # only the entry itself is left in its shard, no temporary file
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, key[:2])), [f'{key}.pdf'])
+
+    def test_prune_removes_least_recently_used_entries(self) -> None:
+        cache = RenderCache(self.cache_dir, max_bytes=2500)
+        keys = [RenderCache.key(make_customer(f'INV-{i}'), 'fpdf') for i in range(4)]
+        src = self.write('a.pdf', b'x' * 1000)
+        for i, key in enumerate(keys):
+            cache.put(key, src)
+            path = os.path.join(self.cache_dir, key[:2], f'{key}.pdf')
+            os.utime(path, (1000 + i, 1000 + i))
+        # a hit makes the oldest entry the most recently used one
+        self.assertTrue(cache.get(keys[0], os.path.join(self.tmp_dir.name, 'copy.pdf')))
+
+        self.assertEqual(cache.prune(), 2)
+        dest = os.path.join(self.tmp_dir.name, 'copy.pdf')
+        self.assertEqual([cache.get(key, dest) for key in keys], [True, False, False, True])
+        self.assertEqual(cache.prune(), 0)
+
+
+class TestRenderInvoicesWithCache(RenderCacheTestCase):
+    def test_unchanged_invoices_are_copied_from_the_cache(self) -> None:
+        customers = [make_customer('INV-001'), make_customer('INV-002')]
+        first_dir = os.path.join(self.tmp_dir.name, 'first')
+        first = render_invoices(customers, first_dir, verbose=False, cache_dir=self.cache_dir)
+        self.assertEqual(first['cache_hits'], 0)
+
+        customers[1] = make_customer('INV-002', quantity=3)
+        second_dir = os.path.join(self.tmp_dir.name, 'second')
+        second = render_invoices(customers, second_dir, verbose=False, cache_dir=self.cache_dir)
+        self.assertEqual(second['cache_hits'], 1)
+        self.assertEqual(second['errors'], [])
+
+        with open(first['created'][0], 'rb') as cached, open(second['created'][0], 'rb') as copied:
+            self.assertEqual(cached.read(), copied.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
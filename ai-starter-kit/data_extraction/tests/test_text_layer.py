@@ -0,0 +1,93 @@
+"""
+Unit tests of the classification of pdf pages into born-digital pages with a text layer and scans to OCR,
+and of the direct extraction of the text layer.
+
+Usage:
+    python -m pytest data_extraction/tests/test_text_layer.py
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+repo_dir = os.path.abspath(os.path.join(kit_dir, '..'))
+sys.path.append(repo_dir)
+
+import fitz
+from PIL import Image
+
+from data_extraction.src.text_layer import classify_pages, extract_page_text, has_text_layer, page_coverage
+
+TEXT_LAYER = 'This page was born digital and carries a text layer with enough characters to skip OCR.'
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestTextLayer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.doc = fitz.open()
+
+    def tearDown(self) -> None:
+        self.doc.close()
+        self.tmp_dir.cleanup()
+
+    def new_page(self, text: str = '', image: float = 0.0) -> fitz.Page:
+        """Adds an A6 page with `text`, its top `image` fraction covered by an image"""
+        page = self.doc.new_page(width=298, height=420)
+        if image:
+            page.insert_image(fitz.Rect(0, 0, 298, 420 * image), stream=png(30, 42), keep_proportion=False)
+        if text:
+            page.insert_textbox(fitz.Rect(20, 20, 278, 400), text)
+        return page
+
+    def test_page_coverage(self) -> None:
+        text_chars, image_coverage = page_coverage(self.new_page('a b\nc', image=0.5))
+        self.assertEqual(text_chars, 3)
+        self.assertAlmostEqual(image_coverage, 0.5, places=2)
+        self.assertEqual(page_coverage(self.new_page()), (0, 0.0))
+
+    def test_has_text_layer(self) -> None:
+        self.assertTrue(has_text_layer(self.new_page(TEXT_LAYER)))
+        self.assertTrue(has_text_layer(self.new_page(TEXT_LAYER, image=0.5)))
+        # empty pages, pages with a few characters and scans with the text layer of a previous OCR pass
+        self.assertFalse(has_text_layer(self.new_page()))
+        self.assertFalse(has_text_layer(self.new_page('Seite 1')))
+        self.assertFalse(has_text_layer(self.new_page(TEXT_LAYER, image=1.0)))
+        # the thresholds can be changed
+        self.assertTrue(has_text_layer(self.new_page('Seite 1'), min_text_chars=5))
+        self.assertTrue(has_text_layer(self.new_page(TEXT_LAYER, image=1.0), max_image_coverage=1.0))
+
+    def test_classify_pages(self) -> None:
+        self.new_page(TEXT_LAYER)
+        self.new_page(TEXT_LAYER, image=1.0)
+        self.new_page()
+        pdf_path = os.path.join(self.tmp_dir.name, 'doc.pdf')
+        self.doc.save(pdf_path)
+
+        self.assertEqual(classify_pages(pdf_path), [True, False, False])
+        self.assertEqual(classify_pages(pdf_path, max_image_coverage=1.0), [True, True, False])
+
+    def test_columns_are_extracted_one_after_the_other(self) -> None:
+        page = self.doc.new_page(width=595, height=842)
+        for x, column in ((40, 'links'), (320, 'rechts')):
+            for line in range(3):
+                page.insert_text((x, 100 + 20 * line), f'Spalte {column} Zeile {line}')
+
+        text = extract_page_text(page)
+        self.assertEqual(
+            text.split('\n'),
+            [f'Spalte {column} Zeile {line}' for column in ('links', 'rechts') for line in range(3)],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,14 +8,17 @@ questions.
 
 Key Features:
 - Processes questions in bulk from an Excel file
+- Answers several questions concurrently with a bounded pool of workers
 - Uses a pre-built vector database for document retrieval
 - Measures and records performance metrics including:
   * Preprocessing time
   * LLM inference time
   * Token count and tokens per second
   * Source documents used for each answer
-- Saves results incrementally to prevent data loss
-- Supports resuming interrupted runs by skipping already answered questions
+- Records every answer in an append-only journal to prevent data loss
+- Supports resuming interrupted runs by skipping questions already answered in the
+  journal or in the Excel file
+- Prints a throughput and latency summary of the run
 
 Input Requirements:
 - Vector database path containing stored documents for RAG
@@ -27,19 +30,23 @@ Output:
   * Generated answers
   * Source documents used
   * Performance metrics for each response
+- A '_journal.jsonl' file next to it with one line per answered question
 
 Usage:
-    python bulkQA.py <vectordb_path> <questions_path>
+    python bulkQA.py <vectordb_path> <questions_path> [--workers N] [--journal_path PATH]
 
 Example:
-    python bulkQA.py ./path/to/vectordb ./path/to/questions.xlsx
+    python bulkQA.py ./path/to/vectordb ./path/to/questions.xlsx --workers 8
 """
 
 import argparse
+import json
 import os
 import sys
+import threading
 import time
-from typing import Any, Dict, Optional, Set, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import pandas as pd
 from langchain.prompts import load_prompt
@@ -56,9 +63,16 @@ sys.path.append(kit_dir)
 sys.path.append(repo_dir)
 
 from enterprise_knowledge_retriever.src.document_retrieval import DocumentRetrieval, RetrievalQAChain
+from utils.model_wrappers.reranker import DEFAULT_RERANKER_MODEL
 
 sambanova_api_key = os.environ.get('SAMBANOVA_API_KEY', '')
 
+DEFAULT_WORKERS = 4
+METRIC_COLUMNS = ['preprocessing_time', 'llm_time', 'token_count', 'tokens_per_second']
+
+# huggingface fast tokenizers are not safe to call from several threads at once
+_tokenizer_lock = threading.Lock()
+
 
 class TimedRetrievalQAChain(RetrievalQAChain):
     # override call method to return times
@@ -89,7 +103,8 @@ def analyze_times(
 ) -> Dict[str, float | int]:
     preprocessing_time = end_preprocessing_time - start_time
     llm_time = end_llm_time - end_preprocessing_time
-    token_count = len(tokenizer.encode(answer))
+    with _tokenizer_lock:
+        token_count = len(tokenizer.encode(answer))
     tokens_per_second = token_count / llm_time
     perf = {
         'preprocessing_time': preprocessing_time,
@@ -125,7 +140,71 @@ def generate(
     return answer, sources, times
 
 
-def process_bulk_QA(vectordb_path: str, questions_file_path: str) -> str:
+def is_answered(answer: Any) -> bool:
+    return not pd.isna(answer) and str(answer).strip() != ''
+
+
+def load_journal(journal_path: str) -> Dict[int, Dict[str, Any]]:
+    """Reads the answers recorded in a checkpoint journal, keyed by row index.
+
+    A line cut short by an interrupted run is ignored, its question is answered again.
+    """
+    entries: Dict[int, Dict[str, Any]] = {}
+    if not os.path.exists(journal_path):
+        return entries
+    with open(journal_path, encoding='utf-8') as journal:
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[entry['index']] = entry
+    return entries
+
+
+def set_row(df: pd.DataFrame, index: Any, answer: str, sources: Set[str], times: Dict[str, Any]) -> None:
+    df.at[index, 'Answer'] = answer
+    df.at[index, 'Sources'] = sources
+    for column in METRIC_COLUMNS:
+        df.at[index, column] = times.get(column)
+
+
+def summarize_run(times: List[Dict[str, float | int]], failed: int, wall_time: float) -> Dict[str, float | int]:
+    """Computes the throughput and the latency percentiles of the questions answered in a run"""
+    summary: Dict[str, float | int] = {
+        'answered': len(times),
+        'failed': failed,
+        'wall_time': wall_time,
+        'questions_per_second': len(times) / wall_time if wall_time > 0 else 0.0,
+    }
+    if times:
+        metrics = pd.DataFrame(times)
+        for column in ['preprocessing_time', 'llm_time']:
+            summary[f'{column}_mean'] = metrics[column].mean()
+            summary[f'{column}_p50'] = metrics[column].quantile(0.5)
+            summary[f'{column}_p95'] = metrics[column].quantile(0.95)
+        summary['tokens_per_second_mean'] = metrics['tokens_per_second'].mean()
+    return summary
+
+
+def process_bulk_QA(
+    vectordb_path: str,
+    questions_file_path: str,
+    max_workers: int = DEFAULT_WORKERS,
+    journal_path: Optional[str] = None,
+) -> str:
+    """Answers all the unanswered questions of an Excel file and writes them to an '_output' Excel file
+
+    Args:
+        vectordb_path (str): vector db path with stored documents for RAG
+        questions_file_path (str): xlsx file containing questions in a column named Questions
+        max_workers (int, optional): number of questions answered concurrently. Defaults to 4.
+        journal_path (str, optional): checkpoint journal recording every answer as soon as it is generated,
+            answers found in it are not generated again. Defaults to the output file with '_journal.jsonl' suffix.
+
+    Returns:
+        str: path of the output Excel file
+    """
     documentRetrieval = DocumentRetrieval(sambanova_api_key=sambanova_api_key)
     tokenizer = AutoTokenizer.from_pretrained('NousResearch/Llama-2-7b-chat-hf')
     if os.path.exists(vectordb_path):
@@ -142,43 +221,79 @@ def process_bulk_QA(vectordb_path: str, questions_file_path: str) -> str:
             llm=documentRetrieval.llm,
             qa_prompt=load_prompt(os.path.join(kit_dir, documentRetrieval.prompts['qa_prompt'])),
             rerank=documentRetrieval.retrieval_info['rerank'],
+            reranker=documentRetrieval.retrieval_info.get('reranker', DEFAULT_RERANKER_MODEL),
+            reranker_quantize=documentRetrieval.retrieval_info.get('reranker_quantize', False),
             final_k_retrieved_documents=documentRetrieval.retrieval_info['final_k_retrieved_documents'],
             conversational=False,
         )
     else:
         raise FileNotFoundError(f'vector db path {vectordb_path} does not exist')
-    if os.path.exists(questions_file_path):
-        df = pd.read_excel(questions_file_path)
-        print(df)
-        output_file_path = questions_file_path.replace('.xlsx', '_output.xlsx')
-        if 'Answer' not in df.columns:
-            df['Answer'] = ''
-            df['Sources'] = ''
-            df['preprocessing_time'] = ''
-            df['llm_time'] = ''
-            df['token_count'] = ''
-            df['tokens_per_second'] = ''
-        for index, row in df.iterrows():
-            if row['Answer'].strip() == '':  # Only process if 'Answer' is empty
+    if not os.path.exists(questions_file_path):
+        raise FileNotFoundError(f'questions file path {questions_file_path} does not exist')
+
+    df = pd.read_excel(questions_file_path)
+    print(df)
+    output_file_path = questions_file_path.replace('.xlsx', '_output.xlsx')
+    if journal_path is None:
+        journal_path = questions_file_path.replace('.xlsx', '_journal.jsonl')
+    if 'Answer' not in df.columns:
+        df['Answer'] = ''
+        df['Sources'] = ''
+        for column in METRIC_COLUMNS:
+            df[column] = ''
+    df = df.astype({column: object for column in ['Answer', 'Sources'] + METRIC_COLUMNS})
+
+    # answers of an interrupted run, only used if the question at that row is still the same
+    journal = load_journal(journal_path)
+    resumed = 0
+    for index, entry in journal.items():
+        if index in df.index and df.at[index, 'Questions'] == entry['question']:
+            set_row(df, index, entry['answer'], set(entry['sources']), entry)
+            resumed += 1
+    if resumed:
+        print(f'Resumed {resumed} answers from {journal_path}')
+
+    pending = [index for index, answer in df['Answer'].items() if not is_answered(answer)]
+    print(f'{len(pending)} of {len(df)} questions to answer with {max_workers} workers')
+
+    run_times: List[Dict[str, float | int]] = []
+    failed = 0
+    start_time = time.time()
+    with open(journal_path, 'a+', encoding='utf-8') as journal_file:
+        # start on a new line if the last line was cut short by an interrupted run
+        if journal_file.tell() > 0:
+            journal_file.seek(journal_file.tell() - 1)
+            if journal_file.read(1) != '\n':
+                journal_file.write('\n')
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            futures: Dict[Future[Tuple[str, Set[str], Dict[str, float | int]]], Any] = {
+                executor.submit(generate, qa_chain, df.at[index, 'Questions'], tokenizer): index for index in pending
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
                 try:
-                    # Generate the answer
-                    print(f'Generating answer for row {index}')
-                    answer, sources, times = generate(qa_chain, row['Questions'], tokenizer)
-                    df.at[index, 'Answer'] = answer
-                    df.at[index, 'Sources'] = sources
-                    df.at[index, 'preprocessing_time'] = times.get('preprocessing_time')
-                    df.at[index, 'llm_time'] = times.get('llm_time')
-                    df.at[index, 'token_count'] = times.get('token_count')
-                    df.at[index, 'tokens_per_second'] = times.get('tokens_per_second')
+                    answer, sources, times = future.result()
                 except Exception as e:
+                    failed += 1
                     print(f'Error processing row {index}: {e}')
-                # Save the file after each iteration to avoid data loss
-                df.to_excel(output_file_path, index=False)
-            else:
-                print(f"Skipping row {index} because 'Answer' is already in the document")
-        return output_file_path
-    else:
-        raise f'questions file path {questions_file_path} does not exist'
+                    continue
+                set_row(df, index, answer, sources, times)
+                run_times.append(times)
+                entry = {'index': int(index), 'question': df.at[index, 'Questions'], 'answer': answer}
+                entry.update(sources=sorted(sources), **times)
+                # one line per answer, flushed right away so that an interrupted run loses nothing
+                journal_file.write(json.dumps(entry, default=str) + '\n')
+                journal_file.flush()
+                print(f'Answered row {index} ({done}/{len(pending)})')
+    wall_time = time.time() - start_time
+
+    df.to_excel(output_file_path, index=False)
+
+    summary = summarize_run(run_times, failed, wall_time)
+    print('Run summary:')
+    for key, value in summary.items():
+        print(f'  {key}: {value:.3f}' if isinstance(value, float) else f'  {key}: {value}')
+    return output_file_path
 
 
 if __name__ == '__main__':
@@ -189,7 +304,13 @@ if __name__ == '__main__':
     )
     parser.add_argument('vectordb_path', type=str, help='vector db path with stored documents for RAG')
     parser.add_argument('questions_path', type=str, help='xlsx file containing questions in a column named Questions')
+    parser.add_argument(
+        '--workers', type=int, default=DEFAULT_WORKERS, help='number of questions answered concurrently'
+    )
+    parser.add_argument(
+        '--journal_path', type=str, default=None, help='checkpoint journal, defaults to <questions>_journal.jsonl'
+    )
     args = parser.parse_args()
     # process in bulk
-    out_file = process_bulk_QA(args.vectordb_path, args.questions_path)
+    out_file = process_bulk_QA(args.vectordb_path, args.questions_path, args.workers, args.journal_path)
     print(f'Finished, responses in: {out_file}')
@@ -5,7 +5,6 @@ import threading
 from typing import Any, Dict, List, Optional, Tuple
 
 import nltk
-import torch
 import yaml
 from dotenv import load_dotenv
 from langchain.chains.base import Chain
@@ -18,7 +17,6 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.retrievers import BaseRetriever
 from langchain_core.vectorstores.base import VectorStoreRetriever
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 kit_dir = os.path.abspath(os.path.join(current_dir, '..'))
@@ -27,6 +25,7 @@ sys.path.append(kit_dir)
 sys.path.append(repo_dir)
 
 from utils.model_wrappers.api_gateway import APIGateway
+from utils.model_wrappers.reranker import DEFAULT_RERANKER_MODEL, get_reranker
 from utils.vectordb.vector_db import VectorDb
 from utils.visual.env_utils import get_wandb_key
 
@@ -103,6 +102,9 @@ class RetrievalQAChain(Chain):
 
     retriever: BaseRetriever
     rerank: bool = True
+    reranker: str = DEFAULT_RERANKER_MODEL
+    # wether or not to use an int8 quantized reranker model on cpu
+    reranker_quantize: bool = False
     llm: BaseChatModel
     qa_prompt: ChatPromptTemplate
     final_k_retrieved_documents: int = 3
@@ -136,37 +138,9 @@ class RetrievalQAChain(Chain):
         return '\n\n'.join(doc.page_content for doc in docs)
 
     def rerank_docs(self, query: str, docs: List[Document], final_k: int) -> List[Document]:
-        # Lazy hardcoding for now
-        tokenizer = AutoTokenizer.from_pretrained('BAAI/bge-reranker-large')
-        reranker = AutoModelForSequenceClassification.from_pretrained('BAAI/bge-reranker-large')
-        pairs = []
-        for d in docs:
-            pairs.append([query, d.page_content])
-
-        with torch.no_grad():
-            inputs = tokenizer(
-                pairs,
-                padding=True,
-                truncation=True,
-                return_tensors='pt',
-                max_length=512,
-            )
-            scores = (
-                reranker(**inputs, return_dict=True)
-                .logits.view(
-                    -1,
-                )
-                .float()
-            )
-
-        scores_list = scores.tolist()
-        scores_sorted_idx = sorted(range(len(scores_list)), key=lambda k: scores_list[k], reverse=True)
-
-        docs_sorted = [docs[k] for k in scores_sorted_idx]
-        # docs_sorted = [docs[k] for k in scores_sorted_idx if scores_list[k]>0]
-        docs_sorted = docs_sorted[:final_k]
-
-        return docs_sorted
+        # the reranker model is loaded once per process and shared by all chains
+        reranker = get_reranker(self.reranker, quantize=self.reranker_quantize)
+        return reranker.rerank(query, docs, final_k)
 
     def init_memory(self) -> None:
         """
@@ -310,6 +284,9 @@ class DocumentRetrieval:
             batch_size=self.embedding_model_info['batch_size'],
             bundle=self.embedding_model_info['bundle'],
             select_expert=self.embedding_model_info['select_expert'],
+            cache=self.embedding_model_info.get('cache'),
+            max_concurrency=self.embedding_model_info.get('max_concurrency', 1),
+            adaptive_batch_size=self.embedding_model_info.get('adaptive_batch_size', False),
         )
         return embeddings
 
@@ -373,6 +350,8 @@ class DocumentRetrieval:
             llm=self.llm,
             qa_prompt=load_chat_prompt(os.path.join(repo_dir, self.prompts['qa_prompt'])),
             rerank=self.retrieval_info['rerank'],
+            reranker=self.retrieval_info.get('reranker', DEFAULT_RERANKER_MODEL),
+            reranker_quantize=self.retrieval_info.get('reranker_quantize', False),
             final_k_retrieved_documents=self.retrieval_info['final_k_retrieved_documents'],
             conversational=conversational,
             summary_prompt=load_chat_prompt(os.path.join(repo_dir, self.prompts['summary_prompt'])),
@@ -0,0 +1,152 @@
+"""
+Unit tests of the bulk QA script: the checkpoint journal, the run summary and resuming an interrupted run.
+The retrieval chain and the tokenizer are replaced by fakes, so no vector db or model is needed.
+
+Usage:
+    python -m pytest enterprise_knowledge_retriever/tests/bulk_qa_test.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+repo_dir = os.path.abspath(os.path.join(kit_dir, '..'))
+sys.path.append(kit_dir)
+sys.path.append(repo_dir)
+
+from enterprise_knowledge_retriever.src import bulkQA
+
+QUESTIONS = ['Frage 1', 'Frage 2', 'Frage 3']
+
+
+class FakeTokenizer:
+    def encode(self, text: str) -> List[str]:
+        return text.split()
+
+
+class FakeQAChain:
+    """Answers every question but the failing ones, records the questions it was asked"""
+
+    def __init__(self, failing: List[str]) -> None:
+        self.failing = failing
+        self.questions: List[str] = []
+        self._lock = threading.Lock()
+
+    def invoke(self, inputs: Dict[str, str]) -> Dict[str, Any]:
+        question = inputs['question']
+        with self._lock:
+            self.questions.append(question)
+        if question in self.failing:
+            raise RuntimeError(f'{question} failed')
+        start_time = time.time()
+        return {
+            'answer': f'Antwort auf {question}',
+            'source_documents': [Document(page_content='', metadata={'filename': 'doc.pdf'})],
+            'start_time': start_time,
+            'end_preprocessing_time': start_time + 1.0,
+            'end_llm_time': start_time + 2.0,
+        }
+
+
+class BulkQATestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.questions_path = os.path.join(self.tmp_dir.name, 'questions.xlsx')
+        self.journal_path = os.path.join(self.tmp_dir.name, 'questions_journal.jsonl')
+        pd.DataFrame({'Questions': QUESTIONS}).to_excel(self.questions_path, index=False)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write_journal(self, lines: List[str]) -> None:
+        with open(self.journal_path, 'w', encoding='utf-8') as journal:
+            journal.write('\n'.join(lines))
+
+    def run_bulk_qa(self, qa_chain: FakeQAChain) -> pd.DataFrame:
+        retrieval = mock.MagicMock()
+        retrieval.retriever = mock.MagicMock(spec=BaseRetriever)
+        retrieval.retrieval_info = {'rerank': False, 'final_k_retrieved_documents': 3}
+        tokenizer = mock.MagicMock()
+        tokenizer.from_pretrained.return_value = FakeTokenizer()
+        with mock.patch.multiple(
+            bulkQA,
+            DocumentRetrieval=mock.MagicMock(return_value=retrieval),
+            AutoTokenizer=tokenizer,
+            TimedRetrievalQAChain=mock.MagicMock(return_value=qa_chain),
+            load_prompt=mock.MagicMock(),
+        ):
+            output_path = bulkQA.process_bulk_QA(self.tmp_dir.name, self.questions_path, max_workers=2)
+        return pd.read_excel(output_path)
+
+
+class TestJournal(BulkQATestCase):
+    def test_load_journal(self) -> None:
+        self.assertEqual(bulkQA.load_journal(self.journal_path), {})
+        self.write_journal(
+            [
+                json.dumps({'index': 0, 'question': 'Frage 1', 'answer': 'alt'}),
+                json.dumps({'index': 0, 'question': 'Frage 1', 'answer': 'neu'}),
+                '{"index": 1, "question": "Fr',
+            ]
+        )
+        # the last entry of a row wins, a line cut short is ignored
+        self.assertEqual(
+            bulkQA.load_journal(self.journal_path), {0: {'index': 0, 'question': 'Frage 1', 'answer': 'neu'}}
+        )
+
+    def test_summarize_run(self) -> None:
+        times: List[Dict[str, float | int]] = [
+            {'preprocessing_time': 1.0, 'llm_time': 2.0, 'token_count': 10, 'tokens_per_second': 5.0},
+            {'preprocessing_time': 3.0, 'llm_time': 4.0, 'token_count': 10, 'tokens_per_second': 2.5},
+        ]
+        summary = bulkQA.summarize_run(times, failed=1, wall_time=4.0)
+        self.assertEqual((summary['answered'], summary['failed'], summary['questions_per_second']), (2, 1, 0.5))
+        self.assertEqual((summary['preprocessing_time_mean'], summary['llm_time_p50']), (2.0, 3.0))
+        self.assertEqual(bulkQA.summarize_run([], failed=0, wall_time=0.0)['questions_per_second'], 0.0)
+
+
+class TestProcessBulkQA(BulkQATestCase):
+    def test_interrupted_run_is_resumed(self) -> None:
+        self.write_journal(
+            [
+                json.dumps({'index': 0, 'question': 'Frage 1', 'answer': 'Antwort aus dem Journal', 'sources': []}),
+                # the question of this row changed since it was answered
+                json.dumps({'index': 1, 'question': 'Alte Frage', 'answer': 'veraltet', 'sources': []}),
+                '{"index": 2, "question": "Fr',
+            ]
+        )
+        qa_chain = FakeQAChain(failing=['Frage 3'])
+        df = self.run_bulk_qa(qa_chain)
+        self.assertCountEqual(qa_chain.questions, ['Frage 2', 'Frage 3'])
+        self.assertEqual(df.at[0, 'Answer'], 'Antwort aus dem Journal')
+        self.assertEqual(df.at[1, 'Answer'], 'Antwort auf Frage 2')
+        self.assertEqual(df.at[1, 'token_count'], 4)
+        self.assertTrue(pd.isna(df.at[2, 'Answer']))
+
+        # the new answer is appended after the line cut short, on a line of its own
+        journal = bulkQA.load_journal(self.journal_path)
+        self.assertEqual(journal[1]['answer'], 'Antwort auf Frage 2')
+        self.assertEqual(journal[1]['sources'], ['doc.pdf'])
+
+        # only the failed question is asked again
+        qa_chain = FakeQAChain(failing=[])
+        df = self.run_bulk_qa(qa_chain)
+        self.assertEqual(qa_chain.questions, ['Frage 3'])
+        self.assertEqual(list(df['Answer']), ['Antwort aus dem Journal', 'Antwort auf Frage 2', 'Antwort auf Frage 3'])
+        self.assertEqual(sorted(bulkQA.load_journal(self.journal_path)), [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
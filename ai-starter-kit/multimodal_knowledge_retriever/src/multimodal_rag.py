@@ -326,6 +326,9 @@ class MultimodalRetrieval:
             batch_size=self.embedding_model_info['batch_size'],
             bundle=self.embedding_model_info['bundle'],
             select_expert=self.embedding_model_info['select_expert'],
+            cache=self.embedding_model_info.get('cache'),
+            max_concurrency=self.embedding_model_info.get('max_concurrency', 1),
+            adaptive_batch_size=self.embedding_model_info.get('adaptive_batch_size', False),
         )
 
         collection_name = f'collection_{self.collection_id}'
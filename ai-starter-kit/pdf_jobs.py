@@ -0,0 +1,397 @@
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import time
+import uuid
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Skripte für das Rendern (auch in den Worker-Prozessen) auffindbar machen
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_extraction", "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.append(SCRIPTS_DIR)
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+
+# Fortschritt und neue PDFs werden höchstens so oft (Sekunden) in die Datenbank geschrieben
+PROGRESS_INTERVAL = 0.5
+# Standard- und Höchstgröße einer Seite beim Auflisten der PDFs eines Jobs
+PDF_PAGE_SIZE = 100
+MAX_PDF_PAGE_SIZE = 1000
+# Kennung dieses Server-Prozesses; unterscheidet ihn von früheren Prozessen mit derselben PID (z. B. PID 1 im Container)
+PROCESS_TOKEN = uuid.uuid4().hex
+
+
+class DuplicatePdfError(ValueError):
+    """
+    Ein Job hat zwei PDFs mit demselben Dateinamen erzeugt.
+    """
+
+
+class JobStore:
+    """
+    SQLite-Ablage für Render-Jobs, die vom Flask-Prozess und den Worker-Prozessen gemeinsam genutzt wird.
+
+    Neben den Jobs wird ein Index der erzeugten PDFs geführt (`job_pdfs`, fortlaufende Nummer pro Job),
+    über den die Ergebnisse eines Jobs seitenweise in O(Seitengröße) aufgelistet werden.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    total INTEGER,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    pdf_count INTEGER NOT NULL DEFAULT 0,
+                    errors TEXT NOT NULL DEFAULT '[]',
+                    message TEXT,
+                    owner_pid INTEGER NOT NULL,
+                    owner_token TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_pdfs (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    crc32 INTEGER NOT NULL,
+                    PRIMARY KEY (job_id, seq),
+                    UNIQUE (job_id, filename)
+                ) WITHOUT ROWID
+                """
+            )
+            # Für die Download-Adressen ohne Job-ID (`/pdfs/<Dateiname>`, siehe `find_pdf_job`)
+            conn.execute("CREATE INDEX IF NOT EXISTS job_pdfs_by_filename ON job_pdfs (filename)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, filename: str, input_path: str, job_id: Optional[str] = None) -> str:
+        """
+        Legt einen wartenden Job an; er gehört dem aufrufenden Server-Prozess (siehe `fail_unfinished`).
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, filename, input_path, status, owner_pid, owner_token, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, filename, input_path, JOB_STATUS_QUEUED, os.getpid(), PROCESS_TOKEN, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["errors"] = json.loads(job["errors"])
+        return job
+
+    def update(self, job_id: str, pdfs: Optional[List[Tuple[str, int, int]]] = None, **fields: Any) -> None:
+        """
+        Aktualisiert Felder eines Jobs; `pdfs` (Dateiname, Größe, CRC32) werden in derselben Transaktion
+        an den Index angehängt. Ein bereits erfasster Dateiname bricht die Aktualisierung mit `DuplicatePdfError` ab,
+        da die neue PDF die frühere auf der Platte überschrieben hat.
+        """
+        if "errors" in fields:
+            fields["errors"] = json.dumps(fields["errors"], ensure_ascii=False)
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            if pdfs:
+                (start,) = conn.execute(
+                    "SELECT COALESCE(MAX(seq), -1) + 1 FROM job_pdfs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+                try:
+                    conn.executemany(
+                        "INSERT INTO job_pdfs (job_id, seq, filename, size, crc32) VALUES (?, ?, ?, ?, ?)",
+                        ((job_id, start + i, filename, size, crc) for i, (filename, size, crc) in enumerate(pdfs)),
+                    )
+                except sqlite3.IntegrityError as e:
+                    conn.rollback()
+                    duplicate = _duplicate_filename(conn, job_id, [filename for filename, _, _ in pdfs])
+                    if duplicate is None:
+                        raise
+                    raise DuplicatePdfError(f"PDF {duplicate} wurde im Job mehrfach erzeugt.") from e
+                assignments += ", pdf_count = pdf_count + ?"
+                conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), len(pdfs), job_id))
+            else:
+                conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def clear_pdfs(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_pdfs WHERE job_id = ?", (job_id,))
+            conn.execute("UPDATE jobs SET pdf_count = 0 WHERE id = ?", (job_id,))
+
+    def list_pdfs(self, job_id: str, after: int = -1, limit: int = PDF_PAGE_SIZE) -> List[Tuple[int, str]]:
+        """
+        Liefert bis zu `limit` PDFs des Jobs mit einer Nummer größer als `after` als (Nummer, Dateiname).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, filename FROM job_pdfs WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, after, limit),
+            ).fetchall()
+        return [(row["seq"], row["filename"]) for row in rows]
+
+    def find_pdf_job(self, filename: str) -> Optional[str]:
+        """
+        Liefert die ID des zuletzt angelegten Jobs, der eine PDF mit diesem Dateinamen erzeugt hat.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT jobs.id FROM job_pdfs JOIN jobs ON jobs.id = job_pdfs.job_id "
+                "WHERE job_pdfs.filename = ? ORDER BY jobs.created_at DESC LIMIT 1",
+                (filename,),
+            ).fetchone()
+        return None if row is None else str(row["id"])
+
+    def iter_pdfs(self, job_id: str, batch_size: int = 1000) -> Iterator[Tuple[str, int, int]]:
+        """
+        Liefert alle PDFs eines Jobs als (Dateiname, Größe, CRC32) in Index-Reihenfolge, seitenweise gelesen.
+        """
+        after = -1
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT seq, filename, size, crc32 FROM job_pdfs WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (job_id, after, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield row["filename"], row["size"], row["crc32"]
+            if len(rows) < batch_size:
+                return
+            after = rows[-1]["seq"]
+
+    def pdf_stats(self, job_id: str) -> Dict[str, int]:
+        """
+        Kennzahlen des PDF-Index eines Jobs (Anzahl, Bytes der UTF-8-Dateinamen, Dateigrößen).
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT COUNT(*) AS count,
+                       COALESCE(SUM(LENGTH(CAST(filename AS BLOB))), 0) AS name_bytes,
+                       COALESCE(SUM(size), 0) AS data_bytes
+                FROM job_pdfs WHERE job_id = ?
+                """,
+                (job_id,),
+            ).fetchone()
+        return {key: row[key] or 0 for key in ("count", "name_bytes", "data_bytes")}
+
+    def fail_unfinished(self, message: str) -> int:
+        """
+        Markiert wartende oder laufende Jobs als fehlgeschlagen, deren Server-Prozess nicht mehr läuft
+        (z. B. nach einem Absturz). Jobs anderer, noch laufender Server-Prozesse mit derselben Ablage bleiben
+        unberührt. Rückgabe: Anzahl der abgebrochenen Jobs.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner_pid, owner_token FROM jobs WHERE status IN (?, ?)",
+                (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING),
+            ).fetchall()
+            stale = [row["id"] for row in rows if not _owner_alive(row["owner_pid"], row["owner_token"])]
+            now = time.time()
+            conn.executemany(
+                "UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                ((JOB_STATUS_FAILED, message, now, job_id, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING) for job_id in stale),
+            )
+        return len(stale)
+
+
+def _duplicate_filename(conn: sqlite3.Connection, job_id: str, filenames: List[str]) -> Optional[str]:
+    """
+    Liefert den ersten Dateinamen, der bereits im Index des Jobs steht oder in `filenames` doppelt vorkommt.
+    """
+    seen = set()
+    for filename in filenames:
+        if filename in seen:
+            return filename
+        if conn.execute("SELECT 1 FROM job_pdfs WHERE job_id = ? AND filename = ?", (job_id, filename)).fetchone():
+            return filename
+        seen.add(filename)
+    return None
+
+
+def _owner_alive(pid: int, token: str) -> bool:
+    """
+    Prüft, ob der Server-Prozess, der einen Job angelegt hat, noch läuft.
+    """
+    if pid == os.getpid():
+        return token == PROCESS_TOKEN
+    if os.name == "nt":
+        # Unter Windows nicht prüfbar (os.kill(pid, 0) würde den Prozess beenden): fremde Jobs gelten als verwaist
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def job_output_dir(output_dir: str, job_id: str) -> str:
+    """
+    Eigenes Ausgabeverzeichnis pro Job, damit parallele Uploads sich nicht gegenseitig überschreiben.
+    """
+    return os.path.join(output_dir, job_id)
+
+
+def run_job(
+    db_path: str,
+    job_id: str,
+    output_dir: str,
+    template_path: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: Optional[int] = None,
+) -> None:
+    """
+    Führt einen Job in einem Worker-Prozess aus und schreibt Status, Fortschritt und die erzeugten PDFs
+    laufend in die Job-Ablage. Mit `cache_dir` teilen sich alle Jobs den Render-Cache.
+    """
+    from convert_csv_to_json import InvoicesNotPresorted, iter_invoices_from_csv_columnar
+    from invoice_renderer import load_customers, render_invoices
+    from render_cache import DEFAULT_MAX_BYTES
+
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    if job is None:
+        return
+    store.update(job_id, status=JOB_STATUS_RUNNING)
+    output_dir = job_output_dir(output_dir, job_id)
+
+    last_update = 0.0
+    pending: List[Tuple[str, int, int]] = []
+
+    def created(path: str) -> None:
+        # Größe und Prüfsumme für das ZIP-Archiv (siehe zip_stream.py) direkt mitschreiben
+        with open(path, "rb") as file:
+            content = file.read()
+        pending.append((os.path.basename(path), len(content), zlib.crc32(content)))
+
+    def report(done: int, total: Optional[int]) -> None:
+        nonlocal last_update
+        now = time.monotonic()
+        if now - last_update >= PROGRESS_INTERVAL:
+            store.update(job_id, pdfs=pending, done=done, total=total)
+            pending.clear()
+            last_update = now
+
+    def render(customers: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        result: Dict[str, Any] = render_invoices(
+            customers,
+            output_dir,
+            verbose=False,
+            template_path=template_path,
+            progress=report,
+            on_created=created,
+            cache_dir=cache_dir,
+            cache_max_bytes=cache_max_bytes or DEFAULT_MAX_BYTES,
+        )
+        return result
+
+    input_path = job["input_path"]
+    try:
+        if input_path.endswith(".csv"):
+            try:
+                result = render(iter_invoices_from_csv_columnar(input_path))
+            except InvoicesNotPresorted:
+                # Nicht nach Rechnungsnummer sortiert: Index und bereits erzeugte PDFs verwerfen und
+                # Rechnungen im Speicher gruppieren
+                pending.clear()
+                store.clear_pdfs(job_id)
+                shutil.rmtree(output_dir, ignore_errors=True)
+                result = render(iter_invoices_from_csv_columnar(input_path, presorted=False))
+        else:
+            customers = load_customers(input_path)
+            store.update(job_id, total=len(customers))
+            result = render(customers)
+
+        processed = len(result["created"]) + len(result["errors"])
+        store.update(
+            job_id,
+            pdfs=pending,
+            status=JOB_STATUS_DONE if result["created"] or not result["errors"] else JOB_STATUS_FAILED,
+            total=processed,
+            done=processed,
+            errors=result["errors"],
+        )
+    except DuplicatePdfError as e:
+        # Der Stapel mit dem doppelten Dateinamen lässt sich nicht in den Index übernehmen
+        store.update(job_id, status=JOB_STATUS_FAILED, message=str(e))
+    except Exception as e:
+        store.update(job_id, pdfs=pending, status=JOB_STATUS_FAILED, message=str(e))
+
+
+class JobQueue:
+    """
+    Lokaler Worker-Pool für Render-Jobs.
+
+    Jeder Job läuft in einem eigenen Prozess des Pools; der Aufrufer erhält sofort die Job-ID
+    und fragt Status und Ergebnis über die `JobStore` ab.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        output_dir: str,
+        workers: int = 2,
+        template_path: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: Optional[int] = None,
+    ) -> None:
+        self.store = store
+        self.output_dir = output_dir
+        self.template_path = template_path
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        # "spawn" statt "fork": der Flask-Prozess ist mehrfädig
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, filename: str, input_path: str, job_id: Optional[str] = None) -> str:
+        job_id = self.store.create(filename, input_path, job_id)
+        future = self._executor.submit(
+            run_job,
+            self.store.db_path,
+            job_id,
+            self.output_dir,
+            self.template_path,
+            self.cache_dir,
+            self.cache_max_bytes,
+        )
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def _on_done(self, job_id: str, future: Future[None]) -> None:
+        # Absturz des Worker-Prozesses (run_job selbst fängt Fehler ab)
+        error = future.exception()
+        if error is not None:
+            self.store.update(job_id, status=JOB_STATUS_FAILED, message=str(error))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -32,6 +33,14 @@ from serpapi import GoogleSearch
 from utils.model_wrappers.api_gateway import APIGateway
 from utils.vectordb.vector_db import VectorDb
 from utils.visual.env_utils import get_wandb_key
+from utils.web_crawling.crawl_cache import DEFAULT_CACHE_MAX_MB as DEFAULT_CRAWL_CACHE_MAX_MB, load_crawl_cache
+from utils.web_crawling.crawler import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_PER_HOST_CONCURRENCY,
+    DEFAULT_PER_HOST_RATE,
+    AsyncCrawler,
+    normalize_url,
+)
 
 CONFIG_PATH = os.path.join(kit_dir, 'config.yaml')
 PERSIST_DIRECTORY = os.path.join(kit_dir, 'data/my-vector-db')
@@ -84,6 +93,11 @@ class SearchAssistant:
         self.llm_info = config_info[1]
         self.retrieval_info = config_info[2]
         self.web_crawling_params = config_info[3]
+        # opened once and reused by every crawl, pages crawled before are then revalidated with conditional requests
+        self.crawl_cache = load_crawl_cache(
+            self.web_crawling_params.get('cache_dir'),
+            self.web_crawling_params.get('cache_max_mb', DEFAULT_CRAWL_CACHE_MAX_MB),
+        )
         self.extra_loaders: List[str] = config_info[4]
         self.prod_mode = config_info[5]
         self.documents: Sequence[Document]
@@ -478,7 +492,7 @@ class SearchAssistant:
             excluded_links = []
         excluded_links.extend(self.web_crawling_params['excluded_links'])
         excluded_link_suffixes = {'.ico', '.svg', '.jpg', '.png', '.jpeg', '.', '.docx', '.xls', '.xlsx'}
-        scrapped_urls = []
+        scrapped_urls: List[str] = []
 
         urls = [url for url in urls if not url.endswith(tuple(excluded_link_suffixes))]
         unique_urls = self.link_filter(urls, set(excluded_links))
@@ -490,10 +504,26 @@ class SearchAssistant:
             )
         urls = list(unique_urls)[: self.web_crawling_params['max_scraped_websites']]
 
-        scraped_docs = self.load_htmls(urls, self.extra_loaders)
-        scrapped_urls.extend(urls)
+        # pages crawled in previous searches are revalidated with conditional requests if a crawl cache is set
+        crawler = AsyncCrawler(
+            max_pages=len(urls),
+            max_concurrency=self.web_crawling_params.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+            per_host_concurrency=self.web_crawling_params.get('per_host_concurrency', DEFAULT_PER_HOST_CONCURRENCY),
+            per_host_rate=self.web_crawling_params.get('per_host_rate', DEFAULT_PER_HOST_RATE),
+            pdf_loader=self.load_remote_pdf if 'pdf' in self.extra_loaders else None,
+            verify_ssl=self.web_crawling_params.get('verify_ssl', True),
+            cache=self.crawl_cache,
+        )
+
+        async def crawl() -> List[Document]:
+            return [doc async for doc in crawler.crawl(urls, depth=1)]
+
+        docs = asyncio.run(crawl())
+        # documents have the normalized url as source, references keep the order of the search results
+        crawled_urls = set(crawler.crawled_urls)
+        scrapped_urls.extend(url for url in dict.fromkeys(map(normalize_url, urls)) if url in crawled_urls)
+        self.logger.info(f'{len(crawler.unchanged_urls)} of {len(scrapped_urls)} sites unchanged since last crawl')
 
-        docs = self.clean_docs(scraped_docs)
         self.documents = docs
         self.urls = scrapped_urls
 
@@ -538,6 +568,9 @@ class SearchAssistant:
             batch_size=self.embedding_model_info['batch_size'],
             bundle=self.embedding_model_info['bundle'],
             select_expert=self.embedding_model_info['select_expert'],
+            cache=self.embedding_model_info.get('cache'),
+            max_concurrency=self.embedding_model_info.get('max_concurrency', 1),
+            adaptive_batch_size=self.embedding_model_info.get('adaptive_batch_size', False),
         )
 
         if os.path.exists(persist_directory) and not force_reload and not update:
@@ -587,6 +620,9 @@ class SearchAssistant:
             batch_size=self.embedding_model_info['batch_size'],
             bundle=self.embedding_model_info['bundle'],
             select_expert=self.embedding_model_info['select_expert'],
+            cache=self.embedding_model_info.get('cache'),
+            max_concurrency=self.embedding_model_info.get('max_concurrency', 1),
+            adaptive_batch_size=self.embedding_model_info.get('adaptive_batch_size', False),
         )
         if update and os.path.exists(persist_directory):
             self.config['update'] = True
@@ -5,16 +5,12 @@ ROOT_DIR=$(cd "$(dirname "$0")" && pwd)
 CUSTOMERS_DIR="$ROOT_DIR/data_extraction/data/customers"
 PDFS_DIR="$ROOT_DIR/data_extraction/data/output/customer_pdfs"
 
-# 0. Bereinigung alter PDF-Dateien
-echo "=== 0. Bereinigung alter PDF-Dateien ==="
-if [ -d "$PDFS_DIR" ]; then
-    echo "⚠️  Alter PDF-Ordner gefunden. Lösche den Inhalt..."
-    rm -rf "$PDFS_DIR"/*
-else
-    echo "ℹ️  Kein alter PDF-Ordner gefunden. Erstelle neuen Ordner..."
-    mkdir -p "$PDFS_DIR"
-fi
-echo "✅ PDF-Verzeichnis bereinigt."
+# 0. Eigenes Ausgabeverzeichnis für diesen Lauf (parallele Läufe überschreiben sich nicht)
+echo "=== 0. Ausgabeverzeichnis anlegen ==="
+RUN_ID="run_$(date +%Y%m%d_%H%M%S)_$$"
+PDFS_DIR="$PDFS_DIR/$RUN_ID"
+mkdir -p "$PDFS_DIR"
+echo "✅ PDF-Verzeichnis: $PDFS_DIR"
 
 # 1. Virtuelle Umgebung erstellen
 echo "=== 1. Virtuelle Umgebung erstellen ==="
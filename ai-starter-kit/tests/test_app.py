@@ -0,0 +1,87 @@
+"""
+Unit tests of the job routes of the PDF upload service (app.py), with the job store in a temporary directory.
+
+Usage:
+    python -m pytest tests/test_app.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from typing import Dict
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(repo_dir)
+
+import app
+from pdf_jobs import JobStore, job_output_dir
+
+
+class TestJobRoutes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pdfs_dir = os.path.join(self.tmp_dir.name, 'customer_pdfs')
+        self.store = JobStore(os.path.join(self.tmp_dir.name, 'jobs.sqlite3'))
+        for name, value in (('job_store', self.store), ('PDFS_DIR', self.pdfs_dir)):
+            patch = mock.patch.object(app, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = app.app.test_client()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def create_job(self, pdfs: Dict[str, bytes]) -> str:
+        job_id = self.store.create('customers.json', 'customers.json')
+        job_dir = job_output_dir(self.pdfs_dir, job_id)
+        os.makedirs(job_dir)
+        for filename, content in pdfs.items():
+            with open(os.path.join(job_dir, filename), 'wb') as file:
+                file.write(content)
+        self.store.update(job_id, pdfs=[(filename, len(content), 0) for filename, content in pdfs.items()])
+        return job_id
+
+    def test_unknown_job(self) -> None:
+        for url in ('/jobs/missing', '/jobs/missing/pdfs', '/jobs/missing/pdfs/a.pdf', '/jobs/missing/archive'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_pdfs_are_listed_page_by_page(self) -> None:
+        job_id = self.create_job({f'{i}.pdf': b'%PDF' for i in range(5)})
+
+        response = self.client.get(f'/jobs/{job_id}/pdfs?limit=2')
+        self.assertEqual(response.status_code, 200)
+        page = response.get_json()
+        self.assertEqual([pdf['filename'] for pdf in page['pdfs']], ['0.pdf', '1.pdf'])
+        self.assertEqual(page['next_after'], 1)
+
+        page = self.client.get(f'/jobs/{job_id}/pdfs?after=3&limit=2').get_json()
+        self.assertEqual([pdf['filename'] for pdf in page['pdfs']], ['4.pdf'])
+        self.assertIsNone(page['next_after'])
+        self.assertEqual(self.client.get(f'/jobs/{job_id}/pdfs?after=x').status_code, 400)
+
+    def test_job_pdf_download(self) -> None:
+        job_id = self.create_job({'a.pdf': b'%PDF-a'})
+        response = self.client.get(f'/jobs/{job_id}/pdfs/a.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'%PDF-a')
+        response.close()
+
+    def test_download_without_job_id_uses_the_newest_job(self) -> None:
+        self.create_job({'a.pdf': b'%PDF-old'})
+        time.sleep(0.01)
+        self.create_job({'a.pdf': b'%PDF-new', 'b.pdf': b'%PDF-b'})
+
+        response = self.client.get('/pdfs/a.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'%PDF-new')
+        response.close()
+        self.assertEqual(self.client.get('/pdfs/missing.pdf').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
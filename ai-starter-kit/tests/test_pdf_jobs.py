@@ -0,0 +1,198 @@
+"""
+Unit tests of the job store and worker of the PDF upload service (pdf_jobs.py).
+
+Usage:
+    python -m pytest tests/test_pdf_jobs.py
+"""
+
+import csv
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(repo_dir)
+
+CUSTOMERS_CSV = os.path.join(repo_dir, 'data_extraction', 'data', 'customers', 'customers.csv')
+
+from pdf_jobs import (
+    JOB_STATUS_DONE,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_RUNNING,
+    DuplicatePdfError,
+    JobStore,
+    job_output_dir,
+    run_job,
+)
+
+
+def make_customers(*invoice_numbers: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            'name': 'Max Mustermann',
+            'invoice_number': invoice_number,
+            'products': [{'product_name': 'Laptop', 'quantity': 1, 'unit_price': 999.99}],
+            'total_amount': 999.99,
+        }
+        for invoice_number in invoice_numbers
+    ]
+
+
+class JobStoreTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'jobs.sqlite3')
+        self.output_dir = os.path.join(self.tmp_dir.name, 'output')
+        self.store = JobStore(self.db_path)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def create_json_job(self, customers: List[Dict[str, Any]]) -> str:
+        input_path = os.path.join(self.tmp_dir.name, 'customers.json')
+        with open(input_path, 'w', encoding='utf-8') as file:
+            json.dump(customers, file)
+        return self.store.create('customers.json', input_path)
+
+
+class TestPdfIndex(JobStoreTestCase):
+    def test_duplicate_filenames_are_rejected(self) -> None:
+        job_id = self.store.create('customers.json', 'customers.json')
+        self.store.update(job_id, pdfs=[('a.pdf', 1, 1), ('b.pdf', 2, 2)], done=2)
+
+        for pdfs in ([('c.pdf', 3, 3), ('a.pdf', 4, 4)], [('c.pdf', 3, 3), ('c.pdf', 4, 4)]):
+            with self.subTest(pdfs=pdfs):
+                with self.assertRaises(DuplicatePdfError) as context:
+                    self.store.update(job_id, pdfs=pdfs, done=4)
+                self.assertIn(pdfs[1][0], str(context.exception))
+
+        # the rejected batches left neither index entries nor counters behind
+        job = self.store.get(job_id)
+        assert job is not None
+        self.assertEqual((job['pdf_count'], job['done']), (2, 2))
+        self.assertEqual(self.store.list_pdfs(job_id), [(0, 'a.pdf'), (1, 'b.pdf')])
+
+    def test_paging_and_stats(self) -> None:
+        job_id = self.store.create('customers.json', 'customers.json')
+        other_id = self.store.create('other.json', 'other.json')
+        pdfs = [(f'{i}_ä.pdf', i, i * 7) for i in range(25)]
+        for start in range(0, len(pdfs), 10):
+            self.store.update(job_id, pdfs=pdfs[start : start + 10])
+        self.store.update(other_id, pdfs=[('0_ä.pdf', 1, 1)])
+
+        self.assertEqual(self.store.list_pdfs(job_id, limit=3), [(0, '0_ä.pdf'), (1, '1_ä.pdf'), (2, '2_ä.pdf')])
+        self.assertEqual(self.store.list_pdfs(job_id, after=22), [(23, '23_ä.pdf'), (24, '24_ä.pdf')])
+        self.assertEqual(list(self.store.iter_pdfs(job_id, batch_size=4)), pdfs)
+        self.assertEqual(
+            self.store.pdf_stats(job_id),
+            {
+                'count': 25,
+                'name_bytes': sum(len(name.encode('utf-8')) for name, _, _ in pdfs),
+                'data_bytes': sum(size for _, size, _ in pdfs),
+            },
+        )
+
+        self.store.clear_pdfs(job_id)
+        job = self.store.get(job_id)
+        assert job is not None
+        self.assertEqual(job['pdf_count'], 0)
+        self.assertEqual(self.store.list_pdfs(job_id), [])
+        self.assertEqual(self.store.pdf_stats(other_id)['count'], 1)
+
+    def test_index_entries_need_size_and_checksum(self) -> None:
+        job_id = self.store.create('customers.json', 'customers.json')
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.store.update(job_id, pdfs=[('a.pdf', None, None)])  # type: ignore[list-item]
+
+
+class TestFailUnfinished(JobStoreTestCase):
+    def set_owner(self, job_id: str, pid: int, token: str) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('UPDATE jobs SET owner_pid = ?, owner_token = ? WHERE id = ?', (pid, token, job_id))
+
+    def status(self, job_id: str) -> str:
+        job = self.store.get(job_id)
+        assert job is not None
+        return str(job['status'])
+
+    def test_only_jobs_of_finished_processes_fail(self) -> None:
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+
+        own = self.store.create('own.json', 'own.json')
+        restarted = self.store.create('restarted.json', 'restarted.json')
+        self.set_owner(restarted, os.getpid(), 'token-of-an-earlier-process')
+        crashed = self.store.create('crashed.json', 'crashed.json')
+        self.set_owner(crashed, process.pid, 'token')
+        self.store.update(crashed, status=JOB_STATUS_RUNNING)
+        finished = self.store.create('finished.json', 'finished.json')
+        self.set_owner(finished, process.pid, 'token')
+        self.store.update(finished, status=JOB_STATUS_DONE)
+
+        self.assertEqual(self.store.fail_unfinished('Server neu gestartet'), 2)
+        self.assertEqual(self.status(own), JOB_STATUS_QUEUED)
+        self.assertEqual(self.status(restarted), JOB_STATUS_FAILED)
+        self.assertEqual(self.status(crashed), JOB_STATUS_FAILED)
+        self.assertEqual(self.status(finished), JOB_STATUS_DONE)
+        job = self.store.get(crashed)
+        assert job is not None
+        self.assertEqual(job['message'], 'Server neu gestartet')
+
+
+class TestRunJob(JobStoreTestCase):
+    def test_invoices_of_one_customer_are_all_indexed(self) -> None:
+        job_id = self.create_json_job(make_customers('INV-001', 'INV-002'))
+        run_job(self.db_path, job_id, self.output_dir)
+
+        job = self.store.get(job_id)
+        assert job is not None
+        self.assertEqual(job['status'], JOB_STATUS_DONE)
+        self.assertEqual(job['pdf_count'], 2)
+        filenames = [filename for _, filename in self.store.list_pdfs(job_id)]
+        self.assertEqual(sorted(os.listdir(job_output_dir(self.output_dir, job_id))), sorted(filenames))
+
+    def test_duplicate_invoice_numbers_fail_the_job(self) -> None:
+        job_id = self.create_json_job(make_customers('INV-001', 'INV-001'))
+        run_job(self.db_path, job_id, self.output_dir)
+
+        job = self.store.get(job_id)
+        assert job is not None
+        self.assertEqual(job['status'], JOB_STATUS_FAILED)
+        self.assertIn('Max Mustermann_INV-001_invoice.pdf', job['message'])
+
+    def test_retry_of_unsorted_csv_starts_from_an_empty_directory(self) -> None:
+        with open(CUSTOMERS_CSV, encoding='utf-8', newline='') as file:
+            rows = list(csv.DictReader(file))
+        random.Random(0).shuffle(rows)
+        input_path = os.path.join(self.tmp_dir.name, 'customers.csv')
+        with open(input_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        job_id = self.store.create('customers.csv', input_path)
+        # stands in for a PDF left behind by the first, aborted pass
+        job_dir = job_output_dir(self.output_dir, job_id)
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, 'partial_invoice.pdf'), 'wb') as file:
+            file.write(b'%PDF-')
+
+        run_job(self.db_path, job_id, self.output_dir)
+
+        job = self.store.get(job_id)
+        assert job is not None
+        self.assertEqual(job['status'], JOB_STATUS_DONE)
+        self.assertEqual(job['pdf_count'], len({row['Invoice Number'] for row in rows}))
+        filenames = [filename for _, filename in self.store.list_pdfs(job_id, limit=1000)]
+        self.assertEqual(sorted(os.listdir(job_dir)), sorted(filenames))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Unit tests of the streamed ZIP archive used by the `/jobs/<job_id>/archive` route of app.py.
+
+Usage:
+    python -m pytest tests/test_zip_stream.py
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+import zlib
+from typing import List
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(repo_dir)
+
+from zip_stream import StoredZipStream, ZipEntry, parse_range
+
+
+class TestStoredZipStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write(self, name: str, content: bytes) -> ZipEntry:
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return ZipEntry(name, path, len(content), zlib.crc32(content))
+
+    def _stream(self, entries: List[ZipEntry]) -> StoredZipStream:
+        return StoredZipStream(
+            lambda: iter(entries),
+            len(entries),
+            sum(len(entry.name.encode('utf-8')) for entry in entries),
+            sum(entry.size for entry in entries),
+            timestamp=0,
+        )
+
+    def test_archive_is_readable(self) -> None:
+        entries = [
+            self._write('a.pdf', b'%PDF-a' * 100),
+            self._write('rechnung_ä.pdf', b''),
+            self._write('c.pdf', b'c'),
+        ]
+        archive = self._stream(entries)
+        data = b''.join(archive.iter_bytes())
+
+        self.assertEqual(len(data), archive.total_size)
+        self.assertFalse(archive.zip64)
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ['a.pdf', 'rechnung_ä.pdf', 'c.pdf'])
+            self.assertEqual(zip_file.read('a.pdf'), b'%PDF-a' * 100)
+
+    def test_ranges_concatenate_to_full_archive(self) -> None:
+        entries = [self._write(f'{i}.pdf', os.urandom(i * 37)) for i in range(5)]
+        archive = self._stream(entries)
+        data = b''.join(archive.iter_bytes())
+
+        for chunk_size in (1, 7, 100, archive.total_size):
+            parts = [
+                b''.join(archive.iter_bytes(start, start + chunk_size - 1, chunk_size=3))
+                for start in range(0, archive.total_size, chunk_size)
+            ]
+            self.assertEqual(b''.join(parts), data)
+
+    def test_zip64_with_many_entries(self) -> None:
+        entry = self._write('x', b'x')
+        entries = [ZipEntry(f'{i}.pdf', entry.path, entry.size, entry.crc32) for i in range(0xFFFF)]
+        archive = self._stream(entries)
+        data = b''.join(archive.iter_bytes())
+
+        self.assertTrue(archive.zip64)
+        self.assertEqual(len(data), archive.total_size)
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+            infos = zip_file.infolist()
+            self.assertEqual(len(infos), 0xFFFF)
+            self.assertEqual(zip_file.read(infos[-1]), b'x')
+
+    def test_size_mismatch_is_detected(self) -> None:
+        entry = self._write('a.pdf', b'abc')
+        archive = self._stream([entry._replace(size=5)])
+        with self.assertRaises(ValueError):
+            b''.join(archive.iter_bytes())
+
+
+class TestParseRange(unittest.TestCase):
+    def test_no_or_unsupported_range(self) -> None:
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('', 100))
+        self.assertIsNone(parse_range('items=0-1', 100))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+
+    def test_ranges(self) -> None:
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-1000', 100), (0, 99))
+        self.assertEqual(parse_range('bytes=50-1000', 100), (50, 99))
+
+    def test_unsatisfiable_ranges(self) -> None:
+        for header in ('bytes=100-', 'bytes=10-5', 'bytes=-0', 'bytes=a-b', 'bytes=-'):
+            with self.subTest(header=header):
+                with self.assertRaises(ValueError):
+                    parse_range(header, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
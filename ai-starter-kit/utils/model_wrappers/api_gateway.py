@@ -14,6 +14,7 @@ repo_dir = os.path.abspath(os.path.join(utils_dir, '..'))
 sys.path.append(utils_dir)
 sys.path.append(repo_dir)
 
+from utils.model_wrappers.embedding_cache import cache_embedding_model
 from utils.model_wrappers.langchain_chat_models import ChatSambaNovaCloud, ChatSambaStudio
 from utils.model_wrappers.langchain_embeddings import SambaStudioEmbeddings
 from utils.model_wrappers.langchain_llms import SambaNovaCloud, SambaStudio
@@ -44,6 +45,9 @@ class APIGateway:
         sambastudio_embeddings_project_id: Optional[str] = None,
         sambastudio_embeddings_endpoint_id: Optional[str] = None,
         sambastudio_embeddings_api_key: Optional[str] = None,
+        cache: Optional[Dict[str, Any]] = None,
+        max_concurrency: int = 1,
+        adaptive_batch_size: bool = False,
     ) -> Embeddings:
         """Loads a langchain embedding model given a type and parameters
         Args:
@@ -57,6 +61,12 @@ class APIGateway:
             sambastudio_embeddings_project_id (str, optional): project id for sambastudio model. Defaults to None.
             sambastudio_embeddings_endpoint_id (str, optional): endpoint id for sambastudio model. Defaults to None.
             sambastudio_embeddings_api_key (str, optional): api key for sambastudio model. Defaults to None.
+            cache (dict, optional): embedding cache settings (`cache_dir`, `max_mb`, `memory_items`), see
+                `cache_embedding_model`. Defaults to None (no caching).
+            max_concurrency (int, optional): max number of batch requests in flight at once for sambastudio model.
+                Defaults to 1.
+            adaptive_batch_size (bool, optional): whether to adapt the batch size of the sambastudio model to the
+                endpoint latency, starting from batch_size. Defaults to False.
         Returns:
             langchain embedding model
         """
@@ -75,26 +85,48 @@ class APIGateway:
                 if batch_size is None:
                     batch_size = 1
                 embeddings = SambaStudioEmbeddings(
-                    **envs, batch_size=batch_size, model_kwargs={'select_expert': select_expert}
+                    **envs,
+                    batch_size=batch_size,
+                    model_kwargs={'select_expert': select_expert},
+                    max_concurrency=max_concurrency,
+                    adaptive_batch_size=adaptive_batch_size,
                 )
             else:
                 if batch_size is None:
                     batch_size = 32
-                embeddings = SambaStudioEmbeddings(**envs, batch_size=batch_size)
+                embeddings = SambaStudioEmbeddings(
+                    **envs,
+                    batch_size=batch_size,
+                    max_concurrency=max_concurrency,
+                    adaptive_batch_size=adaptive_batch_size,
+                )
+            model_id = '/'.join(
+                [
+                    'sambastudio',
+                    embeddings.sambastudio_embeddings_base_url,
+                    embeddings.sambastudio_embeddings_base_uri,
+                    embeddings.sambastudio_embeddings_project_id,
+                    embeddings.sambastudio_embeddings_endpoint_id,
+                    str(embeddings.model_kwargs.get('select_expert', '')),
+                ]
+            )
+            return cache_embedding_model(embeddings, model_id, cache)
         elif type == 'cpu':
             encode_kwargs = {'normalize_embeddings': NORMALIZE_EMBEDDINGS}
             embedding_model = EMBEDDING_MODEL
+            embed_instruction = ''  # no instruction is needed for candidate passages
+            query_instruction = 'Represent this sentence for searching relevant passages: '
             embeddings = HuggingFaceInstructEmbeddings(
                 model_name=embedding_model,
-                embed_instruction='',  # no instruction is needed for candidate passages
-                query_instruction='Represent this sentence for searching relevant passages: ',
+                embed_instruction=embed_instruction,
+                query_instruction=query_instruction,
                 encode_kwargs=encode_kwargs,
             )
+            model_id = f'cpu/{embedding_model}/normalize={NORMALIZE_EMBEDDINGS}'
+            return cache_embedding_model(embeddings, model_id, cache, embed_instruction, query_instruction)
         else:
             raise ValueError(f'{type} is not a valid embedding model type')
 
-        return embeddings
-
     @staticmethod
     def load_llm(
         type: str,
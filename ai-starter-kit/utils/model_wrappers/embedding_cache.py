@@ -0,0 +1,216 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from utils.sqlite_cache import SqliteLRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_MB = 1024
+DEFAULT_MEMORY_ITEMS = 10_000
+# vectors served from memory refresh their access time on disk at most this often (seconds), so that often used
+# vectors are not evicted from disk first, without a disk write for every memory hit
+TOUCH_INTERVAL = 60.0
+
+
+class EmbeddingCache:
+    """Two-tier key-value store for embedding vectors.
+
+    Vectors are kept in an in-memory LRU of `memory_items` entries in front of a sqlite database in `cache_dir`.
+    The database is limited to `max_bytes` of vector data; when it grows beyond that, the least recently used
+    vectors are evicted (see `SqliteLRUCache`). Vectors are stored as float64, so cached results are identical to
+    the model output.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024,
+        memory_items: int = DEFAULT_MEMORY_ITEMS,
+    ) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'embeddings.sqlite3')
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        # key -> (vector, time its disk entry was last marked as used)
+        self._memory: OrderedDict[str, Tuple[List[float], float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = SqliteLRUCache(self.db_path, 'embeddings', max_bytes, value_column='vector')
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Returns the cached vectors of the given keys, missing keys are left out"""
+        found: Dict[str, List[float]] = {}
+        missing = []
+        stale = []
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is None:
+                    missing.append(key)
+                    continue
+                vector, touched = entry
+                self._memory.move_to_end(key)
+                found[key] = vector
+                if now - touched >= TOUCH_INTERVAL:
+                    stale.append(key)
+                    self._memory[key] = (vector, now)
+
+        if stale:
+            self._store.touch(stale)
+        if missing:
+            blobs = self._store.get_many(missing)
+            with self._lock:
+                for key, blob in blobs.items():
+                    found[key] = array('d', blob).tolist()
+                    self._remember(key, found[key], now)
+        return found
+
+    def put_many(self, items: List[Tuple[str, List[float]]]) -> None:
+        now = time.time()
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector, now)
+        self._store.put_many([(key, array('d', vector).tobytes()) for key, vector in items])
+
+    def _remember(self, key: str, vector: List[float], touched: float) -> None:
+        self._memory[key] = (vector, touched)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        self._store.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Caching wrapper around a langchain embedding model.
+
+    Vectors are cached under the hash of the model id, the kind of input (document or query), the instruction the
+    model prepends to it and the text itself, so that different models or instructions never share entries.
+    Only texts missing from the cache are sent to the wrapped model, and identical texts within one call are
+    embedded once. Other attributes are delegated to the wrapped model.
+
+    Example:
+        .. code-block:: python
+
+            embeddings = CachedEmbeddings(
+                SambaStudioEmbeddings(batch_size=32),
+                model_id='sambastudio:my-endpoint',
+                cache=EmbeddingCache('./data/embedding_cache'),
+            )
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_id: str,
+        cache: EmbeddingCache,
+        document_instruction: str = '',
+        query_instruction: str = '',
+    ) -> None:
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.cache = cache
+        self.document_instruction = document_instruction
+        self.query_instruction = query_instruction
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes not found on the wrapper itself
+        if name == 'embeddings':
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _key(self, kind: str, instruction: str, text: str) -> str:
+        payload = '\0'.join((self.model_id, kind, instruction, text))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _lookup_documents(self, texts: List[str]) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """Returns the keys of the texts, their cached vectors and the distinct texts missing from the cache"""
+        keys = [self._key('document', self.document_instruction, text) for text in texts]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        logger.debug(f'Embedding cache: {len(texts) - len(missing)} of {len(texts)} documents cached')
+        return keys, cached, missing
+
+    def _store_documents(
+        self, cached: Dict[str, List[float]], missing: Dict[str, str], vectors: List[List[float]]
+    ) -> None:
+        new_items = list(zip(missing.keys(), vectors))
+        self.cache.put_many(new_items)
+        cached.update(new_items)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._lookup_documents(texts)
+        if missing:
+            self._store_documents(cached, missing, self.embeddings.embed_documents(list(missing.values())))
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key('query', self.query_instruction, text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return cached[key]
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many([(key, vector)])
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Non blocking version of `embed_documents`, embedding the missing texts with the async method of the
+        wrapped model. The cache itself is local and accessed synchronously."""
+        keys, cached, missing = self._lookup_documents(texts)
+        if missing:
+            self._store_documents(cached, missing, await self.embeddings.aembed_documents(list(missing.values())))
+        return [cached[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Non blocking version of `embed_query`"""
+        key = self._key('query', self.query_instruction, text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return cached[key]
+        vector = await self.embeddings.aembed_query(text)
+        self.cache.put_many([(key, vector)])
+        return vector
+
+
+def cache_embedding_model(
+    embeddings: Embeddings,
+    model_id: str,
+    cache_config: Optional[Dict[str, Any]],
+    document_instruction: str = '',
+    query_instruction: str = '',
+) -> Embeddings:
+    """Wraps an embedding model with `CachedEmbeddings` if caching is enabled in `cache_config`
+
+    Args:
+        embeddings (Embeddings): embedding model to wrap
+        model_id (str): identifier of the model and its settings, part of every cache key
+        cache_config (dict, optional): cache settings, usually the `cache` entry of a kit's `embedding_model`
+            config. Keys: `cache_dir` (required to enable the cache), `max_mb` (disk size limit, default 1024)
+            and `memory_items` (in-memory LRU size, default 10000). Defaults to None (no caching).
+        document_instruction (str, optional): instruction the model prepends to documents. Defaults to ''.
+        query_instruction (str, optional): instruction the model prepends to queries. Defaults to ''.
+
+    Returns:
+        the cached or the unchanged embedding model
+    """
+    if not cache_config or not cache_config.get('cache_dir'):
+        return embeddings
+    cache = EmbeddingCache(
+        cache_config['cache_dir'],
+        max_bytes=int(cache_config.get('max_mb', DEFAULT_CACHE_MAX_MB) * 1024 * 1024),
+        memory_items=int(cache_config.get('memory_items', DEFAULT_MEMORY_ITEMS)),
+    )
+    return CachedEmbeddings(embeddings, model_id, cache, document_instruction, query_instruction)
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+import requests
+import requests.adapters
+from pydantic import BaseModel
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class TransportConfig(BaseModel):
+    """Settings of the HTTP connections shared by the SambaNova model wrappers"""
+
+    pool_size: int = 32
+    """Max number of keep-alive connections kept open per host"""
+
+    connect_timeout: Optional[float] = None
+    """Timeout in seconds for establishing a connection, None waits indefinitely"""
+
+    read_timeout: Optional[float] = None
+    """Timeout in seconds between two received chunks of a response, None waits indefinitely"""
+
+    max_retries: int = 3
+    """Max number of retries of a request that failed to connect or returned one of retry_statuses, for clients
+    that do not retry themselves (see `get_http_session`)"""
+
+    retry_statuses: List[int] = []
+    """Status codes retried by the transport, e.g. [429, 502, 503, 504]. By default errors are not retried"""
+
+    backoff_factor: float = 0.5
+    """Base delay in seconds of the exponential backoff between retries"""
+
+
+class _TimeoutSession(requests.Session):
+    """requests session applying the configured timeouts to requests that do not set their own"""
+
+    def __init__(self, timeout: Any) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args: Any, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class _RetryingAsyncTransport(httpx.AsyncBaseTransport):
+    """httpx transport retrying responses with one of the configured status codes"""
+
+    def __init__(self, config: TransportConfig, max_retries: int) -> None:
+        self.config = config
+        self.max_retries = max_retries
+        self.transport = httpx.AsyncHTTPTransport(
+            retries=max_retries,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=config.pool_size),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            response = await self.transport.handle_async_request(request)
+            if response.status_code not in self.config.retry_statuses or attempt == self.max_retries:
+                return response
+            retry_after = response.headers.get('Retry-After', '')
+            await response.aclose()
+            if retry_after.isdigit():
+                delay = float(retry_after)
+            else:
+                delay = self.config.backoff_factor * 2**attempt * random.uniform(0.5, 1.5)
+            logger.warning(f'Request failed with status code {response.status_code}, retrying in {delay:.1f}s')
+            await asyncio.sleep(delay)
+        raise RuntimeError('unreachable')
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_config = TransportConfig()
+_lock = threading.Lock()
+# shared sessions and async clients, with (True) and without (False) transport level retries
+_sessions: Dict[bool, requests.Session] = {}
+_session_pid: Optional[int] = None
+_async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, httpx.AsyncClient]]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def configure_transport(**kwargs: Any) -> TransportConfig:
+    """Changes the settings of the shared HTTP connections, see `TransportConfig` for the available settings.
+
+    The sessions and async clients opened with the previous settings are closed, async clients on their own event
+    loop, so configure the transport before sending requests rather than while requests are in flight.
+
+    Example:
+        .. code-block:: python
+
+            configure_transport(pool_size=64, read_timeout=120, retry_statuses=[429, 503])
+
+    Returns:
+        TransportConfig: the new settings
+    """
+    global _config
+    with _lock:
+        _config = TransportConfig(**{**_config.model_dump(), **kwargs})
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        for loop, clients in list(_async_clients.items()):
+            for client in clients.values():
+                _close_async_client(loop, client)
+        _async_clients.clear()
+        return _config
+
+
+def _close_async_client(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+    """Closes an async client on the event loop it was created on"""
+    if client.is_closed or loop.is_closed():
+        # the connections of a closed loop can no longer be closed gracefully
+        return
+    try:
+        running_loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if loop is running_loop:
+        loop.create_task(client.aclose())
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        loop.run_until_complete(client.aclose())
+
+
+def get_transport_config() -> TransportConfig:
+    return _config
+
+
+def _timeout(config: TransportConfig) -> Tuple[Optional[float], Optional[float]]:
+    return (config.connect_timeout, config.read_timeout)
+
+
+def get_http_session(retries: bool = True) -> requests.Session:
+    """Returns the process wide requests session, whose connections are kept alive and reused across calls.
+
+    The session is safe to share between threads; a forked process gets its own session.
+
+    Args:
+        retries (bool, optional): whether the transport retries failed requests as configured. Clients with their
+            own retry loop pass False, so that retries do not multiply. Defaults to True.
+    """
+    global _session_pid
+    with _lock:
+        if _session_pid != os.getpid():
+            # sessions inherited from the parent process share its sockets
+            _sessions.clear()
+            _session_pid = os.getpid()
+        session = _sessions.get(retries)
+        if session is None:
+            max_retries = _config.max_retries if retries else 0
+            retry = Retry(
+                total=max_retries,
+                connect=max_retries,
+                read=0,
+                status=max_retries,
+                status_forcelist=_config.retry_statuses,
+                allowed_methods=None,
+                backoff_factor=_config.backoff_factor,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=_config.pool_size, pool_maxsize=_config.pool_size, max_retries=retry
+            )
+            session = _TimeoutSession(_timeout(_config))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[retries] = session
+        return session
+
+
+def get_async_http_client(retries: bool = True) -> httpx.AsyncClient:
+    """Returns the httpx client shared by the coroutines of the running event loop.
+
+    Clients are bound to their event loop, so every loop gets its own connection pool with the configured settings.
+
+    Args:
+        retries (bool, optional): whether the transport retries failed requests, see `get_http_session`.
+            Defaults to True.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(retries)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                transport=_RetryingAsyncTransport(_config, _config.max_retries if retries else 0),
+                timeout=httpx.Timeout(_config.read_timeout, connect=_config.connect_timeout),
+            )
+            clients[retries] = client
+        return client
+
+
+async def async_post(
+    url: str, headers: Dict[str, str], json: Any, stream: bool = False, retries: bool = True
+) -> httpx.Response:
+    """Posts `json` with the shared async client of the running event loop.
+
+    With `stream=True` the body is not read; the caller iterates it and has to close the response. The body of a
+    failed streaming response is read and the response closed, so that its text can be used in error messages.
+    With `retries=False` the transport does not retry the request, see `get_http_session`.
+    """
+    client = get_async_http_client(retries)
+    request = client.build_request('POST', url, headers=headers, json=json)
+    response = await client.send(request, stream=stream)
+    if stream and response.status_code != 200:
+        await response.aread()
+        await response.aclose()
+    return response
+
+
+class SSEEvent(NamedTuple):
+    event: str
+    data: str
+
+
+async def aiter_sse_events(response: httpx.Response) -> AsyncIterator[SSEEvent]:
+    """Parses the server-sent events of a streaming httpx response, like sseclient does for requests responses"""
+    event = 'message'
+    data: List[str] = []
+    async for line in response.aiter_lines():
+        if not line:
+            # a blank line dispatches the event
+            if data:
+                yield SSEEvent(event, '\n'.join(data))
+            event, data = 'message', []
+            continue
+        if line.startswith(':'):
+            continue
+        field, _, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'event':
+            event = value
+        elif field == 'data':
+            data.append(value)
+    if data:
+        yield SSEEvent(event, '\n'.join(data))
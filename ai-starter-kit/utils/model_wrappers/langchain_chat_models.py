@@ -2,6 +2,7 @@ import json
 from operator import itemgetter
 from typing import (
     Any,
+    AsyncIterator,
     Callable,
     Dict,
     Iterator,
@@ -15,13 +16,15 @@ from typing import (
     cast,
 )
 
-import requests
+import httpx
 from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
     CallbackManagerForLLMRun,
 )
 from langchain_core.language_models import LanguageModelInput
 from langchain_core.language_models.chat_models import (
     BaseChatModel,
+    agenerate_from_stream,
     generate_from_stream,
 )
 from langchain_core.messages import (
@@ -54,6 +57,8 @@ from langchain_core.utils.pydantic import is_basemodel_subclass
 from pydantic import BaseModel, Field, SecretStr
 from requests import Response
 
+from utils.model_wrappers.http_transport import aiter_sse_events, async_post, get_http_session
+
 
 def _convert_message_to_dict(message: BaseMessage) -> Dict[str, Any]:
     """
@@ -665,15 +670,15 @@ class ChatSambaNovaCloud(BaseChatModel):
         else:
             return llm | output_parser
 
-    def _handle_request(
+    def _prepare_request(
         self,
         messages_dicts: List[Dict[str, Any]],
         stop: Optional[List[str]] = None,
         streaming: bool = False,
         **kwargs: Any,
-    ) -> Response:
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
         """
-        Performs a post request to the LLM API.
+        Creates the headers and payload of a request to the LLM API.
 
         Args:
             messages_dicts: List of role / content dicts to use as input.
@@ -681,7 +686,7 @@ class ChatSambaNovaCloud(BaseChatModel):
             streaming: wether to do a streaming call
 
         Returns:
-            An iterator of response dicts.
+            A tuple with the headers and the json payload of the request
         """
         if streaming:
             data = {
@@ -707,17 +712,34 @@ class ChatSambaNovaCloud(BaseChatModel):
                 'top_k': self.top_k,
                 **kwargs,
             }
-        http_session = requests.Session()
-        response = http_session.post(
-            self.sambanova_url,
-            headers={
-                'Authorization': f'Bearer {self.sambanova_api_key.get_secret_value()}',
-                'Content-Type': 'application/json',
-                **self.additional_headers,
-            },
-            json=data,
-            stream=streaming,
-        )
+        headers = {
+            'Authorization': f'Bearer {self.sambanova_api_key.get_secret_value()}',
+            'Content-Type': 'application/json',
+            **self.additional_headers,
+        }
+        return headers, data
+
+    def _handle_request(
+        self,
+        messages_dicts: List[Dict[str, Any]],
+        stop: Optional[List[str]] = None,
+        streaming: bool = False,
+        **kwargs: Any,
+    ) -> Response:
+        """
+        Performs a post request to the LLM API.
+
+        Args:
+            messages_dicts: List of role / content dicts to use as input.
+            stop: list of stop tokens
+            streaming: wether to do a streaming call
+
+        Returns:
+            An iterator of response dicts.
+        """
+        headers, data = self._prepare_request(messages_dicts, stop, streaming, **kwargs)
+        http_session = get_http_session()
+        response = http_session.post(self.sambanova_url, headers=headers, json=data, stream=streaming)
         if response.status_code != 200:
             raise RuntimeError(
                 f'Sambanova /complete call failed with status code ' f'{response.status_code}.',
@@ -725,7 +747,34 @@ class ChatSambaNovaCloud(BaseChatModel):
             )
         return response
 
-    def _process_response(self, response: Response) -> AIMessage:
+    async def _ahandle_request(
+        self,
+        messages_dicts: List[Dict[str, Any]],
+        stop: Optional[List[str]] = None,
+        streaming: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Performs a non blocking post request to the LLM API.
+
+        Args:
+            messages_dicts: List of role / content dicts to use as input.
+            stop: list of stop tokens
+            streaming: wether to do a streaming call, the caller has to close the streamed response
+
+        Returns:
+            An httpx Response object
+        """
+        headers, data = self._prepare_request(messages_dicts, stop, streaming, **kwargs)
+        response = await async_post(self.sambanova_url, headers=headers, json=data, stream=streaming)
+        if response.status_code != 200:
+            raise RuntimeError(
+                f'Sambanova /complete call failed with status code ' f'{response.status_code}.',
+                f'{response.text}.',
+            )
+        return response
+
+    def _process_response(self, response: Union[Response, httpx.Response]) -> AIMessage:
         """
         Process a non streaming response from the api
 
@@ -795,55 +844,86 @@ class ChatSambaNovaCloud(BaseChatModel):
 
         client = sseclient.SSEClient(response)
 
+        state: Dict[str, Any] = {}
         for event in client.events():
-            if event.event == 'error_event':
+            chunk = self._process_stream_event(event.event, event.data, response.status_code, state)
+            if chunk is not None:
+                yield chunk
+
+    async def _aprocess_stream_response(self, response: httpx.Response) -> AsyncIterator[BaseMessageChunk]:
+        """
+        Process a streaming httpx response from the api
+
+        Args:
+            response: A streamed httpx Response object
+
+        Yields:
+            generation: an AIMessageChunk with model partial generation
+        """
+        state: Dict[str, Any] = {}
+        async for event in aiter_sse_events(response):
+            chunk = self._process_stream_event(event.event, event.data, response.status_code, state)
+            if chunk is not None:
+                yield chunk
+
+    def _process_stream_event(
+        self, event: str, event_data: Any, status_code: int, state: Dict[str, Any]
+    ) -> Optional[BaseMessageChunk]:
+        """
+        Process a server-sent event of the api
+
+        Args:
+            event: the event type
+            event_data: the event data
+            status_code: the status code of the response
+            state: dict shared by the events of one response, keeps the finish reason for the usage event
+
+        Returns:
+            generation: an AIMessageChunk with model partial generation, None for the final event
+        """
+        if event == 'error_event':
+            raise RuntimeError(f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.')
+
+        try:
+            # check if the response is a final event
+            # in that case event data response is '[DONE]'
+            if event_data == '[DONE]':
+                return None
+            if isinstance(event_data, str):
+                data = json.loads(event_data)
+            else:
                 raise RuntimeError(
-                    f'Sambanova /complete call failed with status code ' f'{response.status_code}.' f'{event.data}.'
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
                 )
+            if data.get('error'):
+                raise RuntimeError(
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
+                )
+            if len(data['choices']) > 0:
+                state['finish_reason'] = data['choices'][0].get('finish_reason')
+                content = data['choices'][0]['delta']['content']
+                id = data['id']
+                chunk = AIMessageChunk(content=content, id=id, additional_kwargs={})
+            else:
+                content = ''
+                id = data['id']
+                metadata = {
+                    'finish_reason': state.get('finish_reason'),
+                    'usage': data.get('usage'),
+                    'model_name': data['model'],
+                    'system_fingerprint': data['system_fingerprint'],
+                    'created': data['created'],
+                }
+                chunk = AIMessageChunk(
+                    content=content,
+                    id=id,
+                    response_metadata=metadata,
+                    additional_kwargs={},
+                )
+            return chunk
 
-            try:
-                # check if the response is a final event
-                # in that case event data response is '[DONE]'
-                if event.data != '[DONE]':
-                    if isinstance(event.data, str):
-                        data = json.loads(event.data)
-                    else:
-                        raise RuntimeError(
-                            f'Sambanova /complete call failed with status code '
-                            f'{response.status_code}.'
-                            f'{event.data}.'
-                        )
-                    if data.get('error'):
-                        raise RuntimeError(
-                            f'Sambanova /complete call failed with status code '
-                            f'{response.status_code}.'
-                            f'{event.data}.'
-                        )
-                    if len(data['choices']) > 0:
-                        finish_reason = data['choices'][0].get('finish_reason')
-                        content = data['choices'][0]['delta']['content']
-                        id = data['id']
-                        chunk = AIMessageChunk(content=content, id=id, additional_kwargs={})
-                    else:
-                        content = ''
-                        id = data['id']
-                        metadata = {
-                            'finish_reason': finish_reason,
-                            'usage': data.get('usage'),
-                            'model_name': data['model'],
-                            'system_fingerprint': data['system_fingerprint'],
-                            'created': data['created'],
-                        }
-                        chunk = AIMessageChunk(
-                            content=content,
-                            id=id,
-                            response_metadata=metadata,
-                            additional_kwargs={},
-                        )
-                    yield chunk
-
-            except Exception as e:
-                raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event.data}')
+        except Exception as e:
+            raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event_data}')
 
     def _generate(
         self,
@@ -912,6 +992,65 @@ class ChatSambaNovaCloud(BaseChatModel):
                 run_manager.on_llm_new_token(chunk.text, chunk=chunk)
             yield chunk
 
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        Call SambaNovaCloud models without blocking the event loop.
+
+        Args:
+            messages: the prompt composed of a list of messages.
+            stop: a list of strings on which the model should stop generating.
+            run_manager: A run manager with callbacks for the LLM.
+
+        Returns:
+            result: ChatResult with model generation
+        """
+        if self.streaming:
+            stream_iter = self._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return await agenerate_from_stream(stream_iter)
+        messages_dicts = _create_message_dicts(messages)
+        response = await self._ahandle_request(messages_dicts, stop, streaming=False, **kwargs)
+        message = self._process_response(response)
+        generation = ChatGeneration(
+            message=message,
+            generation_info={'finish_reason': message.response_metadata['finish_reason']},
+        )
+        return ChatResult(generations=[generation])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        Stream the output of the SambaNovaCloud chat model without blocking the event loop.
+
+        Args:
+            messages: the prompt composed of a list of messages.
+            stop: a list of strings on which the model should stop generating.
+            run_manager: A run manager with callbacks for the LLM.
+
+        Yields:
+            chunk: ChatGenerationChunk with model partial generation
+        """
+        messages_dicts = _create_message_dicts(messages)
+        response = await self._ahandle_request(messages_dicts, stop, streaming=True, **kwargs)
+        try:
+            async for ai_message_chunk in self._aprocess_stream_response(response):
+                chunk = ChatGenerationChunk(message=ai_message_chunk)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        finally:
+            await response.aclose()
+
 
 class ChatSambaStudio(BaseChatModel):
     """
@@ -1645,23 +1784,23 @@ class ChatSambaStudio(BaseChatModel):
                     raise ValueError('Unsupported URL')
         return base_url, stream_url
 
-    def _handle_request(
+    def _prepare_request(
         self,
         messages: List[BaseMessage],
         stop: Optional[List[str]] = None,
         streaming: Optional[bool] = False,
         **kwargs: Any,
-    ) -> Response:
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         """
-        Performs a post request to the LLM API.
+        Creates the url, headers and payload of a request to the LLM API.
 
         Args:
-        messages_dicts: List of role / content dicts to use as input.
+        messages: the prompt composed of a list of messages.
         stop: list of stop tokens
         streaming: wether to do a streaming call
 
         Returns:
-            A request Response object
+            A tuple with the url, the headers and the json payload of the request
         """
 
         # create request payload for openai compatible API
@@ -1744,18 +1883,64 @@ class ChatSambaStudio(BaseChatModel):
                 f'Unsupported URL{self.sambastudio_url}' 'only openai, generic v1 and generic v2 APIs are supported'
             )
 
-        http_session = requests.Session()
         if streaming:
-            response = http_session.post(self.streaming_url, headers=headers, json=data, stream=True)
-        else:
-            response = http_session.post(self.base_url, headers=headers, json=data, stream=False)
+            return self.streaming_url, headers, data
+        return self.base_url, headers, data
+
+    def _handle_request(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        streaming: Optional[bool] = False,
+        **kwargs: Any,
+    ) -> Response:
+        """
+        Performs a post request to the LLM API.
+
+        Args:
+        messages: the prompt composed of a list of messages.
+        stop: list of stop tokens
+        streaming: wether to do a streaming call
+
+        Returns:
+            A request Response object
+        """
+        url, headers, data = self._prepare_request(messages, stop, streaming, **kwargs)
+        http_session = get_http_session()
+        response = http_session.post(url, headers=headers, json=data, stream=bool(streaming))
+        if response.status_code != 200:
+            raise RuntimeError(
+                f'Sambanova /complete call failed with status code ' f'{response.status_code}.' f'{response.text}.'
+            )
+        return response
+
+    async def _ahandle_request(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        streaming: Optional[bool] = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Performs a non blocking post request to the LLM API.
+
+        Args:
+        messages: the prompt composed of a list of messages.
+        stop: list of stop tokens
+        streaming: wether to do a streaming call, the caller has to close the streamed response
+
+        Returns:
+            An httpx Response object
+        """
+        url, headers, data = self._prepare_request(messages, stop, streaming, **kwargs)
+        response = await async_post(url, headers=headers, json=data, stream=bool(streaming))
         if response.status_code != 200:
             raise RuntimeError(
                 f'Sambanova /complete call failed with status code ' f'{response.status_code}.' f'{response.text}.'
             )
         return response
 
-    def _process_response(self, response: Response) -> AIMessage:
+    def _process_response(self, response: Union[Response, httpx.Response]) -> AIMessage:
         """
         Process a non streaming response from the api
 
@@ -1860,148 +2045,189 @@ class ChatSambaStudio(BaseChatModel):
 
         # process response payload for openai compatible API
         if 'chat/completions' in self.sambastudio_url:
-            finish_reason = ''
+            state: Dict[str, Any] = {'finish_reason': ''}
             client = sseclient.SSEClient(response)
             for event in client.events():
-                if event.event == 'error_event':
-                    raise RuntimeError(
-                        f'Sambanova /complete call failed with status code ' f'{response.status_code}.' f'{event.data}.'
-                    )
-                try:
-                    # check if the response is not a final event ("[DONE]")
-                    if event.data != '[DONE]':
-                        if isinstance(event.data, str):
-                            data = json.loads(event.data)
-                        else:
-                            raise RuntimeError(
-                                f'Sambanova /complete call failed with status code '
-                                f'{response.status_code}.'
-                                f'{event.data}.'
-                            )
-                        if data.get('error'):
-                            raise RuntimeError(
-                                f'Sambanova /complete call failed with status code '
-                                f'{response.status_code}.'
-                                f'{event.data}.'
-                            )
-                        if len(data['choices']) > 0:
-                            finish_reason = data['choices'][0].get('finish_reason')
-                            content = data['choices'][0]['delta']['content']
-                            id = data['id']
-                            metadata = {}
-                        else:
-                            content = ''
-                            id = data['id']
-                            metadata = {
-                                'finish_reason': finish_reason,
-                                'usage': data.get('usage'),
-                                'model_name': data['model'],
-                                'system_fingerprint': data['system_fingerprint'],
-                                'created': data['created'],
-                            }
-                        if data.get('usage') is not None:
-                            content = ''
-                            id = data['id']
-                            metadata = {
-                                'finish_reason': finish_reason,
-                                'usage': data.get('usage'),
-                                'model_name': data['model'],
-                                'system_fingerprint': data['system_fingerprint'],
-                                'created': data['created'],
-                            }
-                        yield AIMessageChunk(
-                            content=content,
-                            id=id,
-                            response_metadata=metadata,
-                            additional_kwargs={},
-                        )
-
-                except Exception as e:
-                    raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event.data}')
+                chunk = self._process_stream_event(event.event, event.data, response.status_code, state)
+                if chunk is not None:
+                    yield chunk
 
-        # process response payload for generic v2 API
-        elif 'api/v2/predict/generic' in self.sambastudio_url:
+        # process response payload for generic v1 and v2 API
+        elif 'predict/generic' in self.sambastudio_url:
             for line in response.iter_lines():
-                try:
-                    data = json.loads(line)
-                    content = data['result']['items'][0]['value']['stream_token']
-                    id = data['result']['items'][0]['id']
-                    if data['result']['items'][0]['value']['is_last_response']:
-                        metadata = {
-                            'finish_reason': data['result']['items'][0]['value'].get('stop_reason'),
-                            'prompt': data['result']['items'][0]['value'].get('prompt'),
-                            'usage': {
-                                'prompt_tokens_count': data['result']['items'][0]['value'].get('prompt_tokens_count'),
-                                'completion_tokens_count': data['result']['items'][0]['value'].get(
-                                    'completion_tokens_count'
-                                ),
-                                'total_tokens_count': data['result']['items'][0]['value'].get('total_tokens_count'),
-                                'start_time': data['result']['items'][0]['value'].get('start_time'),
-                                'end_time': data['result']['items'][0]['value'].get('end_time'),
-                                'model_execution_time': data['result']['items'][0]['value'].get('model_execution_time'),
-                                'time_to_first_token': data['result']['items'][0]['value'].get('time_to_first_token'),
-                                'throughput_after_first_token': data['result']['items'][0]['value'].get(
-                                    'throughput_after_first_token'
-                                ),
-                                'batch_size_used': data['result']['items'][0]['value'].get('batch_size_used'),
-                            },
-                        }
-                    else:
-                        metadata = {}
-                    yield AIMessageChunk(
-                        content=content,
-                        id=id,
-                        response_metadata=metadata,
-                        additional_kwargs={},
-                    )
+                yield self._process_stream_line(line)
 
-                except Exception as e:
-                    raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'line: {line}')
+        else:
+            raise ValueError(
+                f'Unsupported URL{self.sambastudio_url}' 'only openai, generic v1 and generic v2 APIs are supported'
+            )
 
-        # process response payload for generic v1 API
-        elif 'api/predict/generic' in self.sambastudio_url:
-            for line in response.iter_lines():
-                try:
-                    data = json.loads(line)
-                    content = data['result']['responses'][0]['stream_token']
-                    id = None
-                    if data['result']['responses'][0]['is_last_response']:
-                        metadata = {
-                            'finish_reason': data['result']['responses'][0].get('stop_reason'),
-                            'prompt': data['result']['responses'][0].get('prompt'),
-                            'usage': {
-                                'prompt_tokens_count': data['result']['responses'][0].get('prompt_tokens_count'),
-                                'completion_tokens_count': data['result']['responses'][0].get(
-                                    'completion_tokens_count'
-                                ),
-                                'total_tokens_count': data['result']['responses'][0].get('total_tokens_count'),
-                                'start_time': data['result']['responses'][0].get('start_time'),
-                                'end_time': data['result']['responses'][0].get('end_time'),
-                                'model_execution_time': data['result']['responses'][0].get('model_execution_time'),
-                                'time_to_first_token': data['result']['responses'][0].get('time_to_first_token'),
-                                'throughput_after_first_token': data['result']['responses'][0].get(
-                                    'throughput_after_first_token'
-                                ),
-                                'batch_size_used': data['result']['responses'][0].get('batch_size_used'),
-                            },
-                        }
-                    else:
-                        metadata = {}
-                    yield AIMessageChunk(
-                        content=content,
-                        id=id,
-                        response_metadata=metadata,
-                        additional_kwargs={},
-                    )
+    async def _aprocess_stream_response(self, response: httpx.Response) -> AsyncIterator[BaseMessageChunk]:
+        """
+        Process a streaming httpx response from the api
 
-                except Exception as e:
-                    raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'line: {line}')
+        Args:
+            response: A streamed httpx Response object
+
+        Yields:
+            generation: an AIMessageChunk with model partial generation
+        """
+        # process response payload for openai compatible API
+        if 'chat/completions' in self.sambastudio_url:
+            state: Dict[str, Any] = {'finish_reason': ''}
+            async for event in aiter_sse_events(response):
+                chunk = self._process_stream_event(event.event, event.data, response.status_code, state)
+                if chunk is not None:
+                    yield chunk
+
+        # process response payload for generic v1 and v2 API
+        elif 'predict/generic' in self.sambastudio_url:
+            async for line in response.aiter_lines():
+                if line:
+                    yield self._process_stream_line(line)
 
         else:
             raise ValueError(
                 f'Unsupported URL{self.sambastudio_url}' 'only openai, generic v1 and generic v2 APIs are supported'
             )
 
+    def _process_stream_event(
+        self, event: str, event_data: Any, status_code: int, state: Dict[str, Any]
+    ) -> Optional[BaseMessageChunk]:
+        """
+        Process a server-sent event of the openai compatible API
+
+        Args:
+            event: the event type
+            event_data: the event data
+            status_code: the status code of the response
+            state: dict shared by the events of one response, keeps the finish reason for the usage event
+
+        Returns:
+            generation: an AIMessageChunk with model partial generation, None for the final event
+        """
+        if event == 'error_event':
+            raise RuntimeError(f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.')
+        try:
+            # check if the response is a final event ("[DONE]")
+            if event_data == '[DONE]':
+                return None
+            if isinstance(event_data, str):
+                data = json.loads(event_data)
+            else:
+                raise RuntimeError(
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
+                )
+            if data.get('error'):
+                raise RuntimeError(
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
+                )
+            metadata: Dict[str, Any] = {}
+            if len(data['choices']) > 0:
+                state['finish_reason'] = data['choices'][0].get('finish_reason')
+                content = data['choices'][0]['delta']['content']
+            else:
+                content = ''
+            if len(data['choices']) == 0 or data.get('usage') is not None:
+                content = ''
+                metadata = {
+                    'finish_reason': state['finish_reason'],
+                    'usage': data.get('usage'),
+                    'model_name': data['model'],
+                    'system_fingerprint': data['system_fingerprint'],
+                    'created': data['created'],
+                }
+            return AIMessageChunk(
+                content=content,
+                id=data['id'],
+                response_metadata=metadata,
+                additional_kwargs={},
+            )
+
+        except Exception as e:
+            raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event_data}')
+
+    def _process_stream_line(self, line: Union[str, bytes]) -> BaseMessageChunk:
+        """
+        Process a streamed line of the generic v1 or v2 API
+
+        Args:
+            line: a json line of the streamed response
+
+        Returns:
+            generation: an AIMessageChunk with model partial generation
+        """
+        try:
+            data = json.loads(line)
+            # process response payload for generic v2 API
+            if 'api/v2/predict/generic' in self.sambastudio_url:
+                content = data['result']['items'][0]['value']['stream_token']
+                id = data['result']['items'][0]['id']
+                if data['result']['items'][0]['value']['is_last_response']:
+                    metadata = {
+                        'finish_reason': data['result']['items'][0]['value'].get('stop_reason'),
+                        'prompt': data['result']['items'][0]['value'].get('prompt'),
+                        'usage': {
+                            'prompt_tokens_count': data['result']['items'][0]['value'].get('prompt_tokens_count'),
+                            'completion_tokens_count': data['result']['items'][0]['value'].get(
+                                'completion_tokens_count'
+                            ),
+                            'total_tokens_count': data['result']['items'][0]['value'].get('total_tokens_count'),
+                            'start_time': data['result']['items'][0]['value'].get('start_time'),
+                            'end_time': data['result']['items'][0]['value'].get('end_time'),
+                            'model_execution_time': data['result']['items'][0]['value'].get('model_execution_time'),
+                            'time_to_first_token': data['result']['items'][0]['value'].get('time_to_first_token'),
+                            'throughput_after_first_token': data['result']['items'][0]['value'].get(
+                                'throughput_after_first_token'
+                            ),
+                            'batch_size_used': data['result']['items'][0]['value'].get('batch_size_used'),
+                        },
+                    }
+                else:
+                    metadata = {}
+                return AIMessageChunk(
+                    content=content,
+                    id=id,
+                    response_metadata=metadata,
+                    additional_kwargs={},
+                )
+
+            # process response payload for generic v1 API
+            else:
+                content = data['result']['responses'][0]['stream_token']
+                id = None
+                if data['result']['responses'][0]['is_last_response']:
+                    metadata = {
+                        'finish_reason': data['result']['responses'][0].get('stop_reason'),
+                        'prompt': data['result']['responses'][0].get('prompt'),
+                        'usage': {
+                            'prompt_tokens_count': data['result']['responses'][0].get('prompt_tokens_count'),
+                            'completion_tokens_count': data['result']['responses'][0].get(
+                                'completion_tokens_count'
+                            ),
+                            'total_tokens_count': data['result']['responses'][0].get('total_tokens_count'),
+                            'start_time': data['result']['responses'][0].get('start_time'),
+                            'end_time': data['result']['responses'][0].get('end_time'),
+                            'model_execution_time': data['result']['responses'][0].get('model_execution_time'),
+                            'time_to_first_token': data['result']['responses'][0].get('time_to_first_token'),
+                            'throughput_after_first_token': data['result']['responses'][0].get(
+                                'throughput_after_first_token'
+                            ),
+                            'batch_size_used': data['result']['responses'][0].get('batch_size_used'),
+                        },
+                    }
+                else:
+                    metadata = {}
+                return AIMessageChunk(
+                    content=content,
+                    id=id,
+                    response_metadata=metadata,
+                    additional_kwargs={},
+                )
+
+        except Exception as e:
+            raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'line: {line!r}')
+
     def _generate(
         self,
         messages: List[BaseMessage],
@@ -2063,3 +2289,57 @@ class ChatSambaStudio(BaseChatModel):
             if run_manager:
                 run_manager.on_llm_new_token(chunk.text, chunk=chunk)
             yield chunk
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        Call SambaStudio models without blocking the event loop.
+
+        Args:
+            messages: the prompt composed of a list of messages.
+            stop: a list of strings on which the model should stop generating.
+            run_manager: A run manager with callbacks for the LLM.
+
+        Returns:
+            result: ChatResult with model generation
+        """
+        if self.streaming:
+            stream_iter = self._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return await agenerate_from_stream(stream_iter)
+        response = await self._ahandle_request(messages, stop, streaming=False, **kwargs)
+        message = self._process_response(response)
+        generation = ChatGeneration(message=message)
+        return ChatResult(generations=[generation])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        Stream the output of the SambaStudio model without blocking the event loop.
+
+        Args:
+            messages: the prompt composed of a list of messages.
+            stop: a list of strings on which the model should stop generating.
+            run_manager: A run manager with callbacks for the LLM.
+
+        Yields:
+            chunk: ChatGenerationChunk with model partial generation
+        """
+        response = await self._ahandle_request(messages, stop, streaming=True, **kwargs)
+        try:
+            async for ai_message_chunk in self._aprocess_stream_response(response):
+                chunk = ChatGenerationChunk(message=ai_message_chunk)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        finally:
+            await response.aclose()
@@ -1,11 +1,25 @@
+import asyncio
 import json
-from typing import Dict, Generator, List, Optional
-
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Generator, List, Optional, Tuple, Union, cast
+
+import httpx
 import requests
 from langchain_core.embeddings import Embeddings
 from langchain_core.utils import get_from_dict_or_env, pre_init
 from pydantic import BaseModel
 
+from utils.model_wrappers.http_transport import async_post, get_http_session
+
+logger = logging.getLogger(__name__)
+
+# status codes of rate limited or temporarily failing requests, which are retried
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 class SambaStudioEmbeddings(BaseModel, Embeddings):
     """SambaNova embedding models.
@@ -41,6 +55,13 @@ class SambaStudioEmbeddings(BaseModel, Embeddings):
                     'select_expert':'e5-mistral-7b-instruct'
                 }
             )
+
+            (or)
+
+            # 8 batches in flight, batch size adapted to the endpoint latency
+            embeddings = SambaStudioEmbeddings(
+                batch_size=32, max_concurrency=8, adaptive_batch_size=True
+            )
     """
 
     sambastudio_embeddings_base_url: str = ''
@@ -64,6 +85,24 @@ class SambaStudioEmbeddings(BaseModel, Embeddings):
     batch_size: int = 32
     """Batch size for the embedding models"""
 
+    max_concurrency: int = 1
+    """Max number of batch requests in flight at once in embed_documents"""
+
+    adaptive_batch_size: bool = False
+    """Whether to adapt the batch size to the observed latency and errors, starting from batch_size"""
+
+    max_batch_size: int = 256
+    """Upper limit of the adaptive batch size"""
+
+    target_batch_latency: float = 2.0
+    """Latency in seconds below which the adaptive batch size is increased"""
+
+    max_retries: int = 3
+    """Max number of retries of a request failing with 429, 5xx or a connection error"""
+
+    retry_backoff: float = 1.0
+    """Base delay in seconds of the exponential backoff between retries"""
+
     @pre_init
     def validate_environment(cls, values: Dict) -> Dict:
         """Validate that api key and python package exists in environment."""
@@ -129,99 +168,219 @@ class SambaStudioEmbeddings(BaseModel, Embeddings):
         for i in range(0, len(texts), batch_size):
             yield texts[i : i + batch_size]
 
-    def embed_documents(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
-        """Returns a list of embeddings for the given sentences.
-        Args:
-            texts (`List[str]`): List of texts to encode
-            batch_size (`int`): Batch size for the encoding
-
-        Returns:
-            `List[np.ndarray]` or `List[tensor]`: List of embeddings
-            for the given sentences
-        """
-        if batch_size is None:
-            batch_size = self.batch_size
-        http_session = requests.Session()
-        url = self._get_full_url(f'{self.sambastudio_embeddings_project_id}/{self.sambastudio_embeddings_endpoint_id}')
-        params = json.loads(self._get_tuning_params())
-        embeddings = []
+    def _get_payload(self, batch: List[str], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds the request body for a batch of texts depending on the endpoint api"""
+        if 'api/predict/nlp' in self.sambastudio_embeddings_base_uri:
+            return {'inputs': batch, 'params': params}
+        elif 'api/v2/predict/generic' in self.sambastudio_embeddings_base_uri:
+            return {'items': [{'id': f'item{i}', 'value': item} for i, item in enumerate(batch)], 'params': params}
+        elif 'api/predict/generic' in self.sambastudio_embeddings_base_uri:
+            return {'instances': batch, 'params': params}
+        else:
+            raise ValueError(
+                f'handling of endpoint uri: {self.sambastudio_embeddings_base_uri} not implemented'  # noqa: E501
+            )
 
+    def _parse_response(self, response: Union[requests.Response, httpx.Response]) -> List[List[float]]:
+        """Extracts the embeddings of a batch from the endpoint response"""
         if 'api/predict/nlp' in self.sambastudio_embeddings_base_uri:
-            for batch in self._iterate_over_batches(texts, batch_size):
-                data = {'inputs': batch, 'params': params}
-                response = http_session.post(
-                    url,
-                    headers={'key': self.sambastudio_embeddings_api_key},
-                    json=data,
+            try:
+                embeddings: List[List[float]] = response.json()['data']
+                return embeddings
+            except KeyError:
+                raise KeyError(
+                    "'data' not found in endpoint response",
+                    response.json(),
                 )
-                if response.status_code != 200:
-                    raise RuntimeError(
-                        f'Sambanova /complete call failed with status code '
-                        f'{response.status_code}.\n Details: {response.text}'
-                    )
-                try:
-                    embedding = response.json()['data']
-                    embeddings.extend(embedding)
-                except KeyError:
-                    raise KeyError(
-                        "'data' not found in endpoint response",
-                        response.json(),
-                    )
-
         elif 'api/v2/predict/generic' in self.sambastudio_embeddings_base_uri:
-            for batch in self._iterate_over_batches(texts, batch_size):
-                items = [{'id': f'item{i}', 'value': item} for i, item in enumerate(batch)]
-                data = {'items': items, 'params': params}
+            try:
+                embeddings = [item['value'] for item in response.json()['items']]
+                return embeddings
+            except KeyError:
+                raise KeyError(
+                    "'items' not found in endpoint response",
+                    response.json(),
+                )
+        else:
+            try:
+                embeddings = response.json()['predictions']
+                return embeddings
+            except KeyError:
+                raise KeyError(
+                    "'predictions' not found in endpoint response",
+                    response.json(),
+                )
+
+    def _embed_batch(
+        self,
+        http_session: requests.Session,
+        url: str,
+        batch: List[str],
+        params: Dict[str, Any],
+        batch_sizer: Optional['_AdaptiveBatchSize'] = None,
+    ) -> List[List[float]]:
+        """Embeds one batch, retrying with exponential backoff on rate limits, server errors and connection errors
+        Args:
+            http_session (requests.Session): session used for the request
+            url (str): endpoint url
+            batch (List[str]): texts to embed
+            params (dict): tuning params of the request
+            batch_sizer (_AdaptiveBatchSize, optional): notified of the latency and failures of the request.
+                Defaults to None.
+        Returns:
+            List[List[float]]: embeddings of the batch, in order
+        """
+        data = self._get_payload(batch, params)
+        for attempt in range(self.max_retries + 1):
+            start_time = time.perf_counter()
+            try:
                 response = http_session.post(
                     url,
                     headers={'key': self.sambastudio_embeddings_api_key},
                     json=data,
                 )
-                if response.status_code != 200:
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                retry_after = None
+            else:
+                if response.status_code == 200:
+                    if batch_sizer is not None:
+                        batch_sizer.record_success(time.perf_counter() - start_time)
+                    return self._parse_response(response)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
                     raise RuntimeError(
                         f'Sambanova /complete call failed with status code '
                         f'{response.status_code}.\n Details: {response.text}'
                     )
-                try:
-                    embedding = [item['value'] for item in response.json()['items']]
-                    embeddings.extend(embedding)
-                except KeyError:
-                    raise KeyError(
-                        "'items' not found in endpoint response",
-                        response.json(),
-                    )
-
-        elif 'api/predict/generic' in self.sambastudio_embeddings_base_uri:
-            for batch in self._iterate_over_batches(texts, batch_size):
-                data = {'instances': batch, 'params': params}
-                response = http_session.post(
-                    url,
-                    headers={'key': self.sambastudio_embeddings_api_key},
-                    json=data,
+                retry_after = response.headers.get('Retry-After')
+            if batch_sizer is not None:
+                batch_sizer.record_failure()
+            time.sleep(self._retry_delay(attempt, retry_after))
+        raise RuntimeError('unreachable')
+
+    async def _aembed_batch(
+        self,
+        url: str,
+        batch: List[str],
+        params: Dict[str, Any],
+        batch_sizer: Optional['_AdaptiveBatchSize'] = None,
+    ) -> List[List[float]]:
+        """Non blocking version of `_embed_batch`, using the shared async http client"""
+        data = self._get_payload(batch, params)
+        for attempt in range(self.max_retries + 1):
+            start_time = time.perf_counter()
+            try:
+                response = await async_post(
+                    url, headers={'key': self.sambastudio_embeddings_api_key}, json=data, retries=False
                 )
-                if response.status_code != 200:
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = None
+            else:
+                if response.status_code == 200:
+                    if batch_sizer is not None:
+                        batch_sizer.record_success(time.perf_counter() - start_time)
+                    return self._parse_response(response)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
                     raise RuntimeError(
                         f'Sambanova /complete call failed with status code '
                         f'{response.status_code}.\n Details: {response.text}'
                     )
-                try:
-                    if params.get('select_expert'):
-                        embedding = response.json()['predictions']
-                    else:
-                        embedding = response.json()['predictions']
-                    embeddings.extend(embedding)
-                except KeyError:
-                    raise KeyError(
-                        "'predictions' not found in endpoint response",
-                        response.json(),
-                    )
-
+                retry_after = response.headers.get('Retry-After')
+            if batch_sizer is not None:
+                batch_sizer.record_failure()
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+        raise RuntimeError('unreachable')
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Returns the delay before the next retry, honoring the Retry-After header if present"""
+        if retry_after is not None and retry_after.isdigit():
+            delay = float(retry_after)
         else:
-            raise ValueError(
-                f'handling of endpoint uri: {self.sambastudio_embeddings_base_uri} not implemented'  # noqa: E501
-            )
+            delay = self.retry_backoff * 2**attempt * random.uniform(0.5, 1.5)
+        logger.warning(f'Embedding request failed (attempt {attempt + 1}), retrying in {delay:.1f}s')
+        return delay
+
+    @staticmethod
+    def _check_batch_length(batch_embeddings: List[List[float]], length: int) -> List[List[float]]:
+        """Returns the embeddings of a batch, raising if the endpoint did not return one per text, which would shift
+        the embeddings of the following texts"""
+        if len(batch_embeddings) != length:
+            raise RuntimeError(f'endpoint returned {len(batch_embeddings)} embeddings for a batch of {length} texts')
+        return batch_embeddings
+
+    def _get_batch_sizer(self, batch_size: int) -> Optional['_AdaptiveBatchSize']:
+        """Returns the adaptive batch size controller, or None if `adaptive_batch_size` is disabled.
+
+        Bundle endpoints (`select_expert` in `model_kwargs`) only accept batches of one text, so the adaptive
+        batch size is capped at 1 for them.
+        """
+        if not self.adaptive_batch_size:
+            return None
+        max_batch_size = 1 if 'select_expert' in self.model_kwargs else self.max_batch_size
+        return _AdaptiveBatchSize(batch_size, max_batch_size, self.target_batch_latency)
 
-        return embeddings
+    def embed_documents(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Returns a list of embeddings for the given sentences.
+
+        With `max_concurrency` > 1 up to that many batches are in flight at once, and with `adaptive_batch_size`
+        the batch size is adjusted to the observed latency and errors; the embeddings are always returned in
+        the order of the texts.
+        Args:
+            texts (`List[str]`): List of texts to encode
+            batch_size (`int`): Batch size for the encoding
+
+        Returns:
+            `List[np.ndarray]` or `List[tensor]`: List of embeddings
+            for the given sentences
+        """
+        if batch_size is None:
+            batch_size = self.batch_size
+        url = self._get_full_url(f'{self.sambastudio_embeddings_project_id}/{self.sambastudio_embeddings_endpoint_id}')
+        params = json.loads(self._get_tuning_params())
+        # validates the endpoint uri before any request is sent
+        self._get_payload([], params)
+        batch_sizer = self._get_batch_sizer(batch_size)
+
+        if self.max_concurrency <= 1:
+            http_session = get_http_session(retries=False)
+            embeddings: List[List[float]] = []
+            if batch_sizer is None:
+                for batch in self._iterate_over_batches(texts, batch_size):
+                    batch_embeddings = self._embed_batch(http_session, url, batch, params)
+                    embeddings.extend(self._check_batch_length(batch_embeddings, len(batch)))
+            else:
+                while len(embeddings) < len(texts):
+                    batch = texts[len(embeddings) : len(embeddings) + batch_sizer.size]
+                    batch_embeddings = self._embed_batch(http_session, url, batch, params, batch_sizer)
+                    embeddings.extend(self._check_batch_length(batch_embeddings, len(batch)))
+            return embeddings
+
+        http_session = get_http_session(retries=False)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        pending: Dict[Future[List[List[float]]], Tuple[int, int]] = {}
+        next_start = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            try:
+                while next_start < len(texts) or pending:
+                    # keep up to max_concurrency batches in flight
+                    while next_start < len(texts) and len(pending) < self.max_concurrency:
+                        size = batch_size if batch_sizer is None else batch_sizer.size
+                        batch = texts[next_start : next_start + size]
+                        future = executor.submit(self._embed_batch, http_session, url, batch, params, batch_sizer)
+                        pending[future] = (next_start, len(batch))
+                        next_start += len(batch)
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        start, length = pending.pop(future)
+                        results[start : start + length] = self._check_batch_length(future.result(), length)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        return cast(List[List[float]], results)
 
     def embed_query(self, text: str) -> List[float]:
         """Returns a list of embeddings for the given sentences.
@@ -232,76 +391,88 @@ class SambaStudioEmbeddings(BaseModel, Embeddings):
             `List[np.ndarray]` or `List[tensor]`: List of embeddings
             for the given sentences
         """
-        http_session = requests.Session()
+        http_session = get_http_session(retries=False)
         url = self._get_full_url(f'{self.sambastudio_embeddings_project_id}/{self.sambastudio_embeddings_endpoint_id}')
         params = json.loads(self._get_tuning_params())
+        embedding = self._embed_batch(http_session, url, [text], params)[0]
 
-        if 'api/predict/nlp' in self.sambastudio_embeddings_base_uri:
-            data = {'inputs': [text], 'params': params}
-            response = http_session.post(
-                url,
-                headers={'key': self.sambastudio_embeddings_api_key},
-                json=data,
-            )
-            if response.status_code != 200:
-                raise RuntimeError(
-                    f'Sambanova /complete call failed with status code '
-                    f'{response.status_code}.\n Details: {response.text}'
-                )
-            try:
-                embedding = response.json()['data'][0]
-            except KeyError:
-                raise KeyError(
-                    "'data' not found in endpoint response",
-                    response.json(),
-                )
+        return embedding
 
-        elif 'api/v2/predict/generic' in self.sambastudio_embeddings_base_uri:
-            data = {'items': [{'id': 'item0', 'value': text}], 'params': params}
-            response = http_session.post(
-                url,
-                headers={'key': self.sambastudio_embeddings_api_key},
-                json=data,
-            )
-            if response.status_code != 200:
-                raise RuntimeError(
-                    f'Sambanova /complete call failed with status code '
-                    f'{response.status_code}.\n Details: {response.text}'
-                )
-            try:
-                embedding = response.json()['items'][0]['value']
-            except KeyError:
-                raise KeyError(
-                    "'items' not found in endpoint response",
-                    response.json(),
-                )
+    async def aembed_documents(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Returns a list of embeddings for the given sentences without blocking the event loop.
 
-        elif 'api/predict/generic' in self.sambastudio_embeddings_base_uri:
-            data = {'instances': [text], 'params': params}
-            response = http_session.post(
-                url,
-                headers={'key': self.sambastudio_embeddings_api_key},
-                json=data,
-            )
-            if response.status_code != 200:
-                raise RuntimeError(
-                    f'Sambanova /complete call failed with status code '
-                    f'{response.status_code}.\n Details: {response.text}'
-                )
-            try:
-                if params.get('select_expert'):
-                    embedding = response.json()['predictions'][0]
-                else:
-                    embedding = response.json()['predictions'][0]
-            except KeyError:
-                raise KeyError(
-                    "'predictions' not found in endpoint response",
-                    response.json(),
-                )
+        Up to `max_concurrency` batches are in flight at once, with `adaptive_batch_size` as in `embed_documents`.
+        Args:
+            texts (`List[str]`): List of texts to encode
+            batch_size (`int`): Batch size for the encoding
 
-        else:
-            raise ValueError(
-                f'handling of endpoint uri: {self.sambastudio_embeddings_base_uri} not implemented'  # noqa: E501
-            )
+        Returns:
+            List of embeddings for the given sentences, in order
+        """
+        if batch_size is None:
+            batch_size = self.batch_size
+        url = self._get_full_url(f'{self.sambastudio_embeddings_project_id}/{self.sambastudio_embeddings_endpoint_id}')
+        params = json.loads(self._get_tuning_params())
+        # validates the endpoint uri before any request is sent
+        self._get_payload([], params)
+        batch_sizer = self._get_batch_sizer(batch_size)
+        semaphore = asyncio.Semaphore(max(self.max_concurrency, 1))
+
+        async def embed(start: int, batch: List[str]) -> Tuple[int, int, List[List[float]]]:
+            try:
+                return start, len(batch), await self._aembed_batch(url, batch, params, batch_sizer)
+            finally:
+                semaphore.release()
+
+        tasks = []
+        next_start = 0
+        try:
+            while next_start < len(texts):
+                # the batch size is read once a slot is free, so that it follows the latest observations
+                await semaphore.acquire()
+                size = batch_size if batch_sizer is None else batch_sizer.size
+                batch = texts[next_start : next_start + size]
+                tasks.append(asyncio.create_task(embed(next_start, batch)))
+                next_start += len(batch)
+            batches = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for start, length, batch_embeddings in batches:
+            results[start : start + length] = self._check_batch_length(batch_embeddings, length)
+        return cast(List[List[float]], results)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Returns the embedding of the given text without blocking the event loop."""
+        url = self._get_full_url(f'{self.sambastudio_embeddings_project_id}/{self.sambastudio_embeddings_endpoint_id}')
+        params = json.loads(self._get_tuning_params())
+        embedding = (await self._aembed_batch(url, [text], params))[0]
 
         return embedding
+
+
+class _AdaptiveBatchSize:
+    """Thread safe batch size controller for `SambaStudioEmbeddings.embed_documents`.
+
+    The batch size is doubled (up to `max_size`) after a request answered within `target_latency` seconds and
+    halved after a failed or slow request.
+    """
+
+    def __init__(self, initial_size: int, max_size: int, target_latency: float) -> None:
+        self.max_size = max(max_size, 1)
+        self.size = min(max(initial_size, 1), self.max_size)
+        self.target_latency = target_latency
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if latency <= self.target_latency:
+                self.size = min(self.size * 2, self.max_size)
+            else:
+                self.size = max(self.size // 2, 1)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.size = max(self.size // 2, 1)
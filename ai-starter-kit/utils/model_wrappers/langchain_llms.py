@@ -1,14 +1,16 @@
 import json
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
-import requests
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+import httpx
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
 from langchain_core.outputs import GenerationChunk
 from langchain_core.utils import convert_to_secret_str, get_from_dict_or_env
 from pydantic import Field, SecretStr
 from requests import Response
 
+from utils.model_wrappers.http_transport import aiter_sse_events, async_post, get_http_session
+
 
 class SambaStudio(LLM):
     """
@@ -240,22 +242,22 @@ class SambaStudio(LLM):
 
         return tuning_params
 
-    def _handle_request(
+    def _prepare_request(
         self,
         prompt: Union[List[str], str],
         stop: Optional[List[str]] = None,
         streaming: Optional[bool] = False,
-    ) -> Response:
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         """
-        Performs a post request to the LLM API.
+        Creates the url, headers and payload of a request to the LLM API.
 
         Args:
-        messages_dicts: List of role / content dicts to use as input.
+        prompt: The prompt to pass into the model.
         stop: list of stop tokens
         streaming: wether to do a streaming call
 
         Returns:
-            A request Response object
+            A tuple with the url, the headers and the json payload of the request
         """
 
         if isinstance(prompt, str):
@@ -320,19 +322,64 @@ class SambaStudio(LLM):
                 f'Unsupported URL{self.sambastudio_url}' 'only openai, generic v1 and generic v2 APIs are supported'
             )
 
-        # make the request to SambaStudio API
-        http_session = requests.Session()
         if streaming:
-            response = http_session.post(self.streaming_url, headers=headers, json=data, stream=True)
-        else:
-            response = http_session.post(self.base_url, headers=headers, json=data, stream=False)
+            return self.streaming_url, headers, data
+        return self.base_url, headers, data
+
+    def _handle_request(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        streaming: Optional[bool] = False,
+    ) -> Response:
+        """
+        Performs a post request to the LLM API.
+
+        Args:
+        prompt: The prompt to pass into the model.
+        stop: list of stop tokens
+        streaming: wether to do a streaming call
+
+        Returns:
+            A request Response object
+        """
+        url, headers, data = self._prepare_request(prompt, stop, streaming)
+
+        # make the request to SambaStudio API
+        http_session = get_http_session()
+        response = http_session.post(url, headers=headers, json=data, stream=bool(streaming))
+        if response.status_code != 200:
+            raise RuntimeError(
+                f'Sambanova / complete call failed with status code ' f'{response.status_code}.' f'{response.text}.'
+            )
+        return response
+
+    async def _ahandle_request(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        streaming: Optional[bool] = False,
+    ) -> httpx.Response:
+        """
+        Performs a non blocking post request to the LLM API.
+
+        Args:
+        prompt: The prompt to pass into the model.
+        stop: list of stop tokens
+        streaming: wether to do a streaming call, the caller has to close the streamed response
+
+        Returns:
+            An httpx Response object
+        """
+        url, headers, data = self._prepare_request(prompt, stop, streaming)
+        response = await async_post(url, headers=headers, json=data, stream=bool(streaming))
         if response.status_code != 200:
             raise RuntimeError(
                 f'Sambanova / complete call failed with status code ' f'{response.status_code}.' f'{response.text}.'
             )
         return response
 
-    def _process_response(self, response: Response) -> str:
+    def _process_response(self, response: Union[Response, httpx.Response]) -> str:
         """
         Process a non streaming response from the api
 
@@ -386,66 +433,108 @@ class SambaStudio(LLM):
         if 'chat/completions' in self.sambastudio_url:
             client = sseclient.SSEClient(response)
             for event in client.events():
-                if event.event == 'error_event':
-                    raise RuntimeError(
-                        f'Sambanova /complete call failed with status code ' f'{response.status_code}.' f'{event.data}.'
-                    )
-                try:
-                    # check if the response is not a final event ("[DONE]")
-                    if event.data != '[DONE]':
-                        if isinstance(event.data, str):
-                            data = json.loads(event.data)
-                        else:
-                            raise RuntimeError(
-                                f'Sambanova /complete call failed with status code '
-                                f'{response.status_code}.'
-                                f'{event.data}.'
-                            )
-                        if data.get('error'):
-                            raise RuntimeError(
-                                f'Sambanova /complete call failed with status code '
-                                f'{response.status_code}.'
-                                f'{event.data}.'
-                            )
-                        if len(data['choices']) > 0:
-                            content = data['choices'][0]['delta']['content']
-                        else:
-                            content = ''
-                        generated_chunk = GenerationChunk(text=content)
-                        yield generated_chunk
-
-                except Exception as e:
-                    raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event.data}')
+                chunk = self._process_stream_event(event.event, event.data, response.status_code)
+                if chunk is not None:
+                    yield chunk
 
-        # process response payload for generic v2 API
-        elif 'api/v2/predict/generic' in self.sambastudio_url:
+        # process response payload for generic v1 and v2 API
+        elif 'predict/generic' in self.sambastudio_url:
             for line in response.iter_lines():
-                try:
-                    data = json.loads(line)
-                    content = data['result']['items'][0]['value']['stream_token']
-                    generated_chunk = GenerationChunk(text=content)
-                    yield generated_chunk
+                yield self._process_stream_line(line)
+
+        else:
+            raise ValueError(
+                f'Unsupported URL{self.sambastudio_url}' 'only openai, generic v1 and generic v2 APIs are supported'
+            )
 
-                except Exception as e:
-                    raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'line: {line}')
+    async def _aprocess_stream_response(self, response: httpx.Response) -> AsyncIterator[GenerationChunk]:
+        """
+        Process a streaming httpx response from the api
 
-        # process response payload for generic v1 API
-        elif 'api/predict/generic' in self.sambastudio_url:
-            for line in response.iter_lines():
-                try:
-                    data = json.loads(line)
-                    content = data['result']['responses'][0]['stream_token']
-                    generated_chunk = GenerationChunk(text=content)
-                    yield generated_chunk
+        Args:
+            response: A streamed httpx Response object
 
-                except Exception as e:
-                    raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'line: {line}')
+        Yields:
+            GenerationChunk: a GenerationChunk with model partial generation
+        """
+        # process response payload for openai compatible API
+        if 'chat/completions' in self.sambastudio_url:
+            async for event in aiter_sse_events(response):
+                chunk = self._process_stream_event(event.event, event.data, response.status_code)
+                if chunk is not None:
+                    yield chunk
+
+        # process response payload for generic v1 and v2 API
+        elif 'predict/generic' in self.sambastudio_url:
+            async for line in response.aiter_lines():
+                if line:
+                    yield self._process_stream_line(line)
 
         else:
             raise ValueError(
                 f'Unsupported URL{self.sambastudio_url}' 'only openai, generic v1 and generic v2 APIs are supported'
             )
 
+    def _process_stream_event(self, event: str, event_data: Any, status_code: int) -> Optional[GenerationChunk]:
+        """
+        Process a server-sent event of the openai compatible API
+
+        Args:
+            event: the event type
+            event_data: the event data
+            status_code: the status code of the response
+
+        Returns:
+            GenerationChunk: a GenerationChunk with model partial generation, None for the final event
+        """
+        if event == 'error_event':
+            raise RuntimeError(f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.')
+        try:
+            # check if the response is a final event ("[DONE]")
+            if event_data == '[DONE]':
+                return None
+            if isinstance(event_data, str):
+                data = json.loads(event_data)
+            else:
+                raise RuntimeError(
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
+                )
+            if data.get('error'):
+                raise RuntimeError(
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
+                )
+            if len(data['choices']) > 0:
+                content = data['choices'][0]['delta']['content']
+            else:
+                content = ''
+            return GenerationChunk(text=content)
+
+        except Exception as e:
+            raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event_data}')
+
+    def _process_stream_line(self, line: Union[str, bytes]) -> GenerationChunk:
+        """
+        Process a streamed line of the generic v1 or v2 API
+
+        Args:
+            line: a json line of the streamed response
+
+        Returns:
+            GenerationChunk: a GenerationChunk with model partial generation
+        """
+        try:
+            data = json.loads(line)
+            # process response payload for generic v2 API
+            if 'api/v2/predict/generic' in self.sambastudio_url:
+                content = data['result']['items'][0]['value']['stream_token']
+            # process response payload for generic v1 API
+            else:
+                content = data['result']['responses'][0]['stream_token']
+            return GenerationChunk(text=content)
+
+        except Exception as e:
+            raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'line: {line!r}')
+
     def _stream(
         self,
         prompt: Union[List[str], str],
@@ -495,6 +584,58 @@ class SambaStudio(LLM):
         completion = self._process_response(response)
         return completion
 
+    async def _astream(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Call out to Sambanova's complete endpoint without blocking the event loop.
+
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: a list of strings on which the model should stop generating.
+            run_manager: A run manager with callbacks for the LLM.
+        Yields:
+            chunk: GenerationChunk with model partial generation
+        """
+        response = await self._ahandle_request(prompt, stop, streaming=True)
+        try:
+            async for chunk in self._aprocess_stream_response(response):
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text)
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def _acall(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call out to Sambanova's complete endpoint without blocking the event loop.
+
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: a list of strings on which the model should stop generating.
+
+        Returns:
+            result: string with model generation
+        """
+        if self.streaming:
+            completion = ''
+            async for chunk in self._astream(prompt=prompt, stop=stop, run_manager=run_manager, **kwargs):
+                completion += chunk.text
+
+            return completion
+
+        response = await self._ahandle_request(prompt, stop, streaming=False)
+        completion = self._process_response(response)
+        return completion
+
 
 class SambaNovaCloud(LLM):
     """
@@ -635,21 +776,21 @@ class SambaNovaCloud(LLM):
         )
         super().__init__(**kwargs)
 
-    def _handle_request(
+    def _prepare_request(
         self,
         prompt: Union[List[str], str],
         stop: Optional[List[str]] = None,
         streaming: Optional[bool] = False,
-    ) -> Response:
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
         """
-        Performs a post request to the LLM API.
+        Creates the headers and payload of a request to the LLM API.
 
         Args:
             prompt: The prompt to pass into the model.
             stop: list of stop tokens
 
         Returns:
-            A request Response object
+            A tuple with the headers and the json payload of the request
         """
         if isinstance(prompt, str):
             prompt = [prompt]
@@ -670,12 +811,53 @@ class SambaNovaCloud(LLM):
             'Authorization': f'Bearer ' f'{self.sambanova_api_key.get_secret_value()}',
             'Content-Type': 'application/json',
         }
+        return headers, data
 
-        http_session = requests.Session()
-        if streaming:
-            response = http_session.post(self.sambanova_url, headers=headers, json=data, stream=True)
-        else:
-            response = http_session.post(self.sambanova_url, headers=headers, json=data, stream=False)
+    def _handle_request(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        streaming: Optional[bool] = False,
+    ) -> Response:
+        """
+        Performs a post request to the LLM API.
+
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: list of stop tokens
+
+        Returns:
+            A request Response object
+        """
+        headers, data = self._prepare_request(prompt, stop, streaming)
+        http_session = get_http_session()
+        response = http_session.post(self.sambanova_url, headers=headers, json=data, stream=bool(streaming))
+
+        if response.status_code != 200:
+            raise RuntimeError(
+                f'Sambanova / complete call failed with status code ' f'{response.status_code}.' f'{response.text}.'
+            )
+        return response
+
+    async def _ahandle_request(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        streaming: Optional[bool] = False,
+    ) -> httpx.Response:
+        """
+        Performs a non blocking post request to the LLM API.
+
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: list of stop tokens
+            streaming: wether to do a streaming call, the caller has to close the streamed response
+
+        Returns:
+            An httpx Response object
+        """
+        headers, data = self._prepare_request(prompt, stop, streaming)
+        response = await async_post(self.sambanova_url, headers=headers, json=data, stream=bool(streaming))
 
         if response.status_code != 200:
             raise RuntimeError(
@@ -683,7 +865,7 @@ class SambaNovaCloud(LLM):
             )
         return response
 
-    def _process_response(self, response: Response) -> str:
+    def _process_response(self, response: Union[Response, httpx.Response]) -> str:
         """
         Process a non streaming response from the api
 
@@ -724,36 +906,61 @@ class SambaNovaCloud(LLM):
 
         client = sseclient.SSEClient(response)
         for event in client.events():
-            if event.event == 'error_event':
+            chunk = self._process_stream_event(event.event, event.data, response.status_code)
+            if chunk is not None:
+                yield chunk
+
+    async def _aprocess_stream_response(self, response: httpx.Response) -> AsyncIterator[GenerationChunk]:
+        """
+        Process a streaming httpx response from the api
+
+        Args:
+            response: A streamed httpx Response object
+
+        Yields:
+            GenerationChunk: a GenerationChunk with model partial generation
+        """
+        async for event in aiter_sse_events(response):
+            chunk = self._process_stream_event(event.event, event.data, response.status_code)
+            if chunk is not None:
+                yield chunk
+
+    def _process_stream_event(self, event: str, event_data: Any, status_code: int) -> Optional[GenerationChunk]:
+        """
+        Process a server-sent event of the api
+
+        Args:
+            event: the event type
+            event_data: the event data
+            status_code: the status code of the response
+
+        Returns:
+            GenerationChunk: a GenerationChunk with model partial generation, None for the final event
+        """
+        if event == 'error_event':
+            raise RuntimeError(f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.')
+        try:
+            # check if the response is a final event ("[DONE]")
+            if event_data == '[DONE]':
+                return None
+            if isinstance(event_data, str):
+                data = json.loads(event_data)
+            else:
+                raise RuntimeError(
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
+                )
+            if data.get('error'):
                 raise RuntimeError(
-                    f'Sambanova /complete call failed with status code ' f'{response.status_code}.' f'{event.data}.'
+                    f'Sambanova /complete call failed with status code ' f'{status_code}.' f'{event_data}.'
                 )
-            try:
-                # check if the response is not a final event ("[DONE]")
-                if event.data != '[DONE]':
-                    if isinstance(event.data, str):
-                        data = json.loads(event.data)
-                    else:
-                        raise RuntimeError(
-                            f'Sambanova /complete call failed with status code '
-                            f'{response.status_code}.'
-                            f'{event.data}.'
-                        )
-                    if data.get('error'):
-                        raise RuntimeError(
-                            f'Sambanova /complete call failed with status code '
-                            f'{response.status_code}.'
-                            f'{event.data}.'
-                        )
-                    if len(data['choices']) > 0:
-                        content = data['choices'][0]['delta']['content']
-                    else:
-                        content = ''
-                    generated_chunk = GenerationChunk(text=content)
-                    yield generated_chunk
-
-            except Exception as e:
-                raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event.data}')
+            if len(data['choices']) > 0:
+                content = data['choices'][0]['delta']['content']
+            else:
+                content = ''
+            return GenerationChunk(text=content)
+
+        except Exception as e:
+            raise RuntimeError(f'Error getting content chunk raw streamed response: {e}' f'data: {event_data}')
 
     def _call(
         self,
@@ -803,3 +1010,55 @@ class SambaNovaCloud(LLM):
             if run_manager:
                 run_manager.on_llm_new_token(chunk.text)
             yield chunk
+
+    async def _acall(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call out to SambaNovaCloud complete endpoint without blocking the event loop.
+
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: Optional list of stop words to use when generating.
+
+        Returns:
+            The string generated by the model.
+        """
+        if self.streaming:
+            completion = ''
+            async for chunk in self._astream(prompt=prompt, stop=stop, run_manager=run_manager, **kwargs):
+                completion += chunk.text
+
+            return completion
+
+        response = await self._ahandle_request(prompt, stop, streaming=False)
+        completion = self._process_response(response)
+        return completion
+
+    async def _astream(
+        self,
+        prompt: Union[List[str], str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Call out to SambaNovaCloud complete endpoint without blocking the event loop.
+
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: Optional list of stop words to use when generating.
+
+        Yields:
+            chunk: GenerationChunk with model partial generation
+        """
+        response = await self._ahandle_request(prompt, stop, streaming=True)
+        try:
+            async for chunk in self._aprocess_stream_response(response):
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text)
+                yield chunk
+        finally:
+            await response.aclose()
@@ -10,6 +10,8 @@ from typing import Any, Dict, Generator, Iterator, List, Optional, Union
 import requests
 import sseclient
 
+from utils.model_wrappers.http_transport import get_http_session
+
 
 class SambastudioMultimodal:
     """
@@ -56,7 +58,7 @@ class SambastudioMultimodal:
         if stop is None:
             self.stop = []
         self.do_sample = do_sample
-        self.http_session = requests.Session()
+        self.http_session = get_http_session()
 
     def image_to_base64(self, image_path: str) -> str:
         """
@@ -79,7 +81,7 @@ class SambastudioMultimodal:
         :return: The base64 encoded string representation of the image.
         :rtype: str
         """
-        response = requests.get(url)
+        response = self.http_session.get(url)
         try:
             if response.status_code == 200:
                 image_binary = response.content
@@ -236,7 +238,7 @@ class SambastudioMultimodal:
             },
         }
         headers = {'Content-Type': 'application/json', 'key': self.api_key}
-        response = requests.post(self.base_url, headers=headers, data=json.dumps(data))
+        response = self.http_session.post(self.base_url, headers=headers, data=json.dumps(data))
         if response.status_code != 200:
             raise RuntimeError(
                 f'Sambastudio multimodal API call failed with status code {response.status_code}',
@@ -281,7 +283,7 @@ class SambastudioMultimodal:
             data['messages'][0]['content'].append({'type': 'image_url', 'image_url': {'url': image}})
 
         headers = {'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'}
-        response = requests.post(self.base_url, headers=headers, data=json.dumps(data))
+        response = self.http_session.post(self.base_url, headers=headers, data=json.dumps(data))
         if response.status_code != 200:
             raise RuntimeError(
                 f'Sambastudio multimodal API call failed with status code {response.status_code}.',
@@ -325,7 +327,7 @@ class SambastudioMultimodal:
             data['messages'][0]['content'].append({'type': 'image_url', 'image_url': {'url': image}})
 
         headers = {'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'}
-        response = requests.post(self.base_url, headers=headers, data=json.dumps(data), stream=True)
+        response = self.http_session.post(self.base_url, headers=headers, data=json.dumps(data), stream=True)
         if response.status_code != 200:
             raise RuntimeError(
                 f'Sambastudio multimodal API call failed with status code {response.status_code}.',
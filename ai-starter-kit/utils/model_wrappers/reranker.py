@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import torch
+from langchain_core.documents import Document
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, PreTrainedModel, PreTrainedTokenizerBase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RERANKER_MODEL = 'BAAI/bge-reranker-large'
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_CACHE_SIZE = 10_000
+
+
+class CrossEncoderReranker:
+    """Cross-encoder reranker scoring (query, document) pairs with a sequence classification model.
+
+    Pairs are scored in micro-batches of `batch_size`, sorted by length so that little padding is computed, and
+    the scores of the last `cache_size` pairs are kept in memory, so repeated queries over the same documents
+    skip the model. With `quantize` the linear layers are dynamically quantized to int8, which speeds up
+    inference on CPU at a small cost in accuracy; smaller models such as 'BAAI/bge-reranker-base' can be set
+    with `model_name`.
+
+    Use `get_reranker` to share one loaded model per process.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANKER_MODEL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        quantize: bool = False,
+    ) -> None:
+        self.model_name = model_name
+        self.batch_size = max(batch_size, 1)
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.quantize = quantize
+        self._cache: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+        logger.info(f'Loading reranker model {model_name}')
+        self.tokenizer: PreTrainedTokenizerBase = AutoTokenizer.from_pretrained(model_name)
+        model: PreTrainedModel = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+    def _key(self, query: str, text: str) -> bytes:
+        return hashlib.sha256(f'{query}\0{text}'.encode('utf-8')).digest()
+
+    def _score_pairs(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Scores the pairs with the model in micro-batches, returns the scores in the order of the pairs"""
+        scores: List[float] = [0.0] * len(pairs)
+        # pairs of similar length end up in the same batch, so less padding is computed
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+        with torch.no_grad():
+            for start in range(0, len(order), self.batch_size):
+                batch_idx = order[start : start + self.batch_size]
+                inputs = self.tokenizer(
+                    [list(pairs[i]) for i in batch_idx],
+                    padding=True,
+                    truncation=True,
+                    return_tensors='pt',
+                    max_length=self.max_length,
+                )
+                logits = self.model(**inputs, return_dict=True).logits.view(-1).float().tolist()
+                for i, score in zip(batch_idx, logits):
+                    scores[i] = score
+        return scores
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Returns the relevance score of each text for the query, in the order of the texts"""
+        keys = [self._key(query, text) for text in texts]
+        scores: Dict[bytes, float] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[key] = self._cache[key]
+
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in scores:
+                missing.setdefault(key, text)
+        if missing:
+            new_scores = self._score_pairs([(query, text) for text in missing.values()])
+            with self._lock:
+                for key, score in zip(missing.keys(), new_scores):
+                    scores[key] = score
+                    self._cache[key] = score
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        logger.debug(f'Reranker: {len(texts) - len(missing)} of {len(texts)} scores cached')
+
+        return [scores[key] for key in keys]
+
+    def rerank(self, query: str, docs: List[Document], final_k: Optional[int] = None) -> List[Document]:
+        """Returns the `final_k` documents most relevant to the query, most relevant first"""
+        scores = self.score(query, [doc.page_content for doc in docs])
+        scores_sorted_idx = sorted(range(len(scores)), key=lambda k: scores[k], reverse=True)
+        docs_sorted = [docs[k] for k in scores_sorted_idx]
+        if final_k is not None:
+            docs_sorted = docs_sorted[:final_k]
+        return docs_sorted
+
+
+_rerankers: Dict[Tuple[str, bool], CrossEncoderReranker] = {}
+_rerankers_lock = threading.Lock()
+
+
+def get_reranker(model_name: str = DEFAULT_RERANKER_MODEL, quantize: bool = False) -> CrossEncoderReranker:
+    """Returns the process wide reranker of the given model, loading it on first use
+
+    Args:
+        model_name (str, optional): huggingface cross-encoder model. Defaults to 'BAAI/bge-reranker-large'.
+        quantize (bool, optional): whether to use an int8 dynamically quantized model on cpu. Defaults to False.
+
+    Returns:
+        CrossEncoderReranker: the shared reranker
+    """
+    key = (model_name, quantize)
+    with _rerankers_lock:
+        if key not in _rerankers:
+            _rerankers[key] = CrossEncoderReranker(model_name, quantize=quantize)
+        return _rerankers[key]
@@ -0,0 +1,166 @@
+"""
+Unit tests of the native async generation and streaming of the SambaNova LLM and chat model wrappers. Requests are
+answered by a fake openai compatible endpoint.
+
+Usage:
+    python -m pytest utils/model_wrappers/tests/async_wrappers_test.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+import httpx
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.messages import AIMessage
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from utils.model_wrappers import langchain_chat_models, langchain_llms
+from utils.model_wrappers.langchain_chat_models import ChatSambaNovaCloud, ChatSambaStudio
+from utils.model_wrappers.langchain_llms import SambaNovaCloud
+
+CHUNKS = ['Hallo', ' Welt', '!']
+
+
+def completion(content: str) -> Dict[str, Any]:
+    return {
+        'id': 'id',
+        'model': 'model',
+        'created': 1,
+        'system_fingerprint': 'fingerprint',
+        'choices': [{'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'total_tokens': 3},
+    }
+
+
+def stream_body(chunks: List[str]) -> bytes:
+    events = [
+        {'id': 'id', 'choices': [{'delta': {'content': chunk}, 'finish_reason': None}]} for chunk in chunks[:-1]
+    ] + [{'id': 'id', 'choices': [{'delta': {'content': chunks[-1]}, 'finish_reason': 'stop'}]}]
+    usage = {**completion(''), 'choices': []}
+    lines = [f'data: {json.dumps(event)}\n\n' for event in events + [usage]] + ['data: [DONE]\n\n']
+    return ''.join(lines).encode()
+
+
+class FakeSyncResponse:
+    def __init__(self, response: httpx.Response) -> None:
+        self.status_code = response.status_code
+        self.text = response.text
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class FakeEndpoint:
+    """Answers non streaming requests with the joined chunks and streaming requests with one event per chunk"""
+
+    def __init__(self, status_code: int = 200) -> None:
+        self.status_code = status_code
+        self.requests: List[Dict[str, Any]] = []
+        self.responses: List[httpx.Response] = []
+        self.streamed: List[bool] = []
+
+    def response(self, json_data: Dict[str, Any]) -> httpx.Response:
+        self.requests.append(json_data)
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, text='rate limited')
+        if json_data.get('stream'):
+            return httpx.Response(200, content=stream_body(CHUNKS))
+        return httpx.Response(200, json=completion(''.join(CHUNKS)))
+
+    def post(self, url: str, headers: Dict[str, str], json: Dict[str, Any], **kwargs: Any) -> FakeSyncResponse:
+        return FakeSyncResponse(self.response(json))
+
+    async def async_post(
+        self, url: str, headers: Dict[str, str], json: Dict[str, Any], stream: bool = False, retries: bool = True
+    ) -> httpx.Response:
+        await asyncio.sleep(0)
+        self.streamed.append(stream)
+        response = self.response(json)
+        self.responses.append(response)
+        return response
+
+
+class TestAsyncWrappers(unittest.TestCase):
+    def make_model(self, model_type: str, endpoint: FakeEndpoint, streaming: bool = False) -> BaseLanguageModel[Any]:
+        for module in (langchain_llms, langchain_chat_models):
+            patcher = mock.patch.multiple(module, get_http_session=lambda: endpoint, async_post=endpoint.async_post)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        model: BaseLanguageModel[Any]
+        if model_type == 'llm':
+            model = SambaNovaCloud(sambanova_url='https://example.com', sambanova_api_key='key', streaming=streaming)
+        elif model_type == 'chat':
+            model = ChatSambaNovaCloud(
+                sambanova_url='https://example.com', sambanova_api_key='key', streaming=streaming
+            )
+        else:
+            model = ChatSambaStudio(
+                sambastudio_url='https://example.com/openai/v1/chat/completions',
+                sambastudio_api_key='key',
+                streaming=streaming,
+            )
+        return model
+
+    @staticmethod
+    def text(output: Any) -> str:
+        return str(output.content) if isinstance(output, AIMessage) else str(output)
+
+    def test_ainvoke_matches_invoke(self) -> None:
+        for model_type in ('llm', 'chat', 'studio'):
+            for streaming in (False, True):
+                with self.subTest(model_type=model_type, streaming=streaming):
+                    endpoint = FakeEndpoint()
+                    model = self.make_model(model_type, endpoint, streaming)
+                    output = asyncio.run(model.ainvoke('Hallo?'))
+                    self.assertEqual(self.text(output), ''.join(CHUNKS))
+                    self.assertEqual(endpoint.streamed, [streaming])
+                    self.assertEqual(bool(endpoint.requests[0].get('stream')), streaming)
+                    if not streaming:
+                        self.assertEqual(self.text(model.invoke('Hallo?')), self.text(output))
+
+    def test_astream(self) -> None:
+        for model_type in ('llm', 'chat', 'studio'):
+            with self.subTest(model_type=model_type):
+                endpoint = FakeEndpoint()
+                model = self.make_model(model_type, endpoint)
+
+                async def stream() -> List[str]:
+                    return [self.text(chunk) async for chunk in model.astream('Hallo?')]
+
+                chunks = [chunk for chunk in asyncio.run(stream()) if chunk]
+                self.assertEqual(chunks, CHUNKS)
+                # the streamed response is closed once it is consumed
+                self.assertTrue(all(response.is_closed for response in endpoint.responses))
+
+    def test_chat_stream_metadata(self) -> None:
+        model = self.make_model('chat', FakeEndpoint())
+
+        async def stream() -> Optional[Any]:
+            metadata = None
+            async for chunk in model.astream('Hallo?'):
+                metadata = chunk.response_metadata or metadata
+            return metadata
+
+        metadata = asyncio.run(stream())
+        assert metadata is not None
+        self.assertEqual((metadata['finish_reason'], metadata['usage']), ('stop', {'total_tokens': 3}))
+
+    def test_failed_requests_raise(self) -> None:
+        for model_type in ('llm', 'chat', 'studio'):
+            for streaming in (False, True):
+                with self.subTest(model_type=model_type, streaming=streaming):
+                    model = self.make_model(model_type, FakeEndpoint(status_code=429), streaming)
+                    with self.assertRaisesRegex(RuntimeError, '429'):
+                        asyncio.run(model.ainvoke('Hallo?'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Unit tests of the batching of SambaStudioEmbeddings: concurrent and adaptive batches, retries and the check that
+the endpoint returns one embedding per text. Requests are answered by a fake http session.
+
+Usage:
+    python -m pytest utils/model_wrappers/tests/embedding_batches_test.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from utils.model_wrappers import langchain_embeddings
+from utils.model_wrappers.langchain_embeddings import SambaStudioEmbeddings, _AdaptiveBatchSize
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: Dict[str, Any]) -> None:
+        self.status_code = status_code
+        self.body = body
+        self.headers: Dict[str, str] = {}
+        self.text = str(body)
+
+    def json(self) -> Dict[str, Any]:
+        return self.body
+
+
+class FakeEndpoint:
+    """Answers each batch with one embedding per text, the embedding of 'text <i>' being [i]"""
+
+    def __init__(self, failures: int = 0, missing: int = 0) -> None:
+        self.failures = failures
+        self.missing = missing
+        self.batches: List[List[str]] = []
+        self._lock = threading.Lock()
+
+    def post(self, url: str, headers: Dict[str, str], json: Dict[str, Any], **kwargs: Any) -> FakeResponse:
+        batch = json['instances']
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                return FakeResponse(429, {})
+            self.batches.append(batch)
+        embeddings = [[float(text.split()[1])] for text in batch]
+        return FakeResponse(200, {'predictions': embeddings[: max(len(embeddings) - self.missing, 0)]})
+
+    async def async_post(self, url: str, **kwargs: Any) -> FakeResponse:
+        await asyncio.sleep(0)
+        return self.post(url, **kwargs)
+
+
+class TestEmbedDocuments(unittest.TestCase):
+    def make_embeddings(self, endpoint: FakeEndpoint, **kwargs: Any) -> SambaStudioEmbeddings:
+        patcher = mock.patch.multiple(
+            langchain_embeddings, get_http_session=lambda retries: endpoint, async_post=endpoint.async_post
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return SambaStudioEmbeddings(
+            sambastudio_embeddings_base_url='https://example.com',
+            sambastudio_embeddings_base_uri='api/predict/generic',
+            sambastudio_embeddings_project_id='project',
+            sambastudio_embeddings_endpoint_id='endpoint',
+            sambastudio_embeddings_api_key='key',
+            retry_backoff=0.0,
+            **kwargs,
+        )
+
+    def embed(self, embeddings: SambaStudioEmbeddings, texts: List[str], asynchronous: bool) -> List[List[float]]:
+        if asynchronous:
+            return asyncio.run(embeddings.aembed_documents(texts))
+        return embeddings.embed_documents(texts)
+
+    def test_embeddings_are_returned_in_order(self) -> None:
+        texts = [f'text {i}' for i in range(50)]
+        for settings in (
+            {},
+            {'max_concurrency': 4},
+            {'adaptive_batch_size': True},
+            {'max_concurrency': 4, 'adaptive_batch_size': True},
+        ):
+            for asynchronous in (False, True):
+                with self.subTest(asynchronous=asynchronous, **settings):
+                    endpoint = FakeEndpoint()
+                    embeddings = self.make_embeddings(endpoint, batch_size=4, **settings)
+                    self.assertEqual(self.embed(embeddings, texts, asynchronous), [[float(i)] for i in range(50)])
+                    self.assertEqual(sorted(text for batch in endpoint.batches for text in batch), sorted(texts))
+
+    def test_adaptive_batch_size_grows_with_fast_responses(self) -> None:
+        endpoint = FakeEndpoint()
+        embeddings = self.make_embeddings(endpoint, batch_size=2, adaptive_batch_size=True, max_batch_size=8)
+        embeddings.embed_documents([f'text {i}' for i in range(30)])
+        self.assertEqual([len(batch) for batch in endpoint.batches], [2, 4, 8, 8, 8])
+
+    def test_bundle_endpoints_send_one_text_per_batch(self) -> None:
+        endpoint = FakeEndpoint()
+        embeddings = self.make_embeddings(
+            endpoint, batch_size=1, adaptive_batch_size=True, model_kwargs={'select_expert': 'e5-mistral-7b-instruct'}
+        )
+        embeddings.embed_documents([f'text {i}' for i in range(5)])
+        self.assertEqual([len(batch) for batch in endpoint.batches], [1] * 5)
+
+    def test_rate_limited_requests_are_retried(self) -> None:
+        endpoint = FakeEndpoint(failures=2)
+        embeddings = self.make_embeddings(endpoint, batch_size=4, max_retries=2)
+        self.assertEqual(embeddings.embed_documents(['text 1', 'text 2']), [[1.0], [2.0]])
+
+        endpoint = FakeEndpoint(failures=3)
+        embeddings = self.make_embeddings(endpoint, batch_size=4, max_retries=2)
+        with self.assertRaises(RuntimeError):
+            embeddings.embed_documents(['text 1', 'text 2'])
+
+    def test_missing_embeddings_are_detected(self) -> None:
+        texts = [f'text {i}' for i in range(10)]
+        for missing in (1, 4):
+            for settings in ({}, {'max_concurrency': 3}, {'adaptive_batch_size': True}):
+                for asynchronous in (False, True):
+                    with self.subTest(missing=missing, asynchronous=asynchronous, **settings):
+                        embeddings = self.make_embeddings(FakeEndpoint(missing=missing), batch_size=4, **settings)
+                        with self.assertRaisesRegex(RuntimeError, r'embeddings for a batch of [24] texts'):
+                            self.embed(embeddings, texts, asynchronous)
+
+
+class TestAdaptiveBatchSize(unittest.TestCase):
+    def test_size_follows_latency_and_failures(self) -> None:
+        sizer = _AdaptiveBatchSize(initial_size=4, max_size=16, target_latency=1.0)
+        sizer.record_success(0.5)
+        sizer.record_success(0.5)
+        self.assertEqual(sizer.size, 16)
+        sizer.record_success(0.5)
+        self.assertEqual(sizer.size, 16)
+        sizer.record_success(2.0)
+        self.assertEqual(sizer.size, 8)
+        for _ in range(5):
+            sizer.record_failure()
+        self.assertEqual(sizer.size, 1)
+
+    def test_initial_size_is_bounded(self) -> None:
+        self.assertEqual(_AdaptiveBatchSize(64, 8, 1.0).size, 8)
+        self.assertEqual(_AdaptiveBatchSize(0, 8, 1.0).size, 1)
+        self.assertEqual(_AdaptiveBatchSize(4, 0, 1.0).size, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
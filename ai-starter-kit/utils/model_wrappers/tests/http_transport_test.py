@@ -0,0 +1,149 @@
+"""
+Unit tests of the HTTP transport shared by the SambaNova model wrappers: pooled sessions and async clients, their
+settings, retries of the async transport and the parsing of server-sent events. Async requests are answered by an
+httpx mock transport.
+
+Usage:
+    python -m pytest utils/model_wrappers/tests/http_transport_test.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import unittest
+from typing import List, Tuple
+
+import httpx
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from utils.model_wrappers.http_transport import (
+    SSEEvent,
+    TransportConfig,
+    _RetryingAsyncTransport,
+    aiter_sse_events,
+    async_post,
+    configure_transport,
+    get_async_http_client,
+    get_http_session,
+    get_transport_config,
+)
+
+
+class TransportTestCase(unittest.TestCase):
+    def tearDown(self) -> None:
+        configure_transport(**TransportConfig().model_dump())
+
+
+class TestHttpSession(TransportTestCase):
+    def test_session_is_shared(self) -> None:
+        sessions: List[object] = []
+        threads = [threading.Thread(target=lambda: sessions.append(get_http_session())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(session) for session in sessions}), 1)
+        self.assertIsNot(get_http_session(retries=False), get_http_session())
+
+    def test_settings(self) -> None:
+        config = configure_transport(pool_size=4, read_timeout=30, retry_statuses=[503], max_retries=2)
+        self.assertEqual(get_transport_config(), config)
+        # unchanged settings are kept
+        self.assertEqual(configure_transport(connect_timeout=5).read_timeout, 30)
+
+        session = get_http_session()
+        self.assertEqual(getattr(session, 'timeout'), (5, 30))
+        adapter = session.get_adapter('https://example.com')
+        retry = getattr(adapter, 'max_retries')
+        self.assertEqual((retry.total, retry.status_forcelist), (2, [503]))
+        self.assertEqual(getattr(adapter, '_pool_maxsize'), 4)
+        self.assertEqual(
+            getattr(get_http_session(retries=False).get_adapter('https://example.com'), 'max_retries').total, 0
+        )
+
+    def test_configure_replaces_the_session(self) -> None:
+        session = get_http_session()
+        configure_transport(pool_size=8)
+        self.assertIsNot(get_http_session(), session)
+
+
+class TestAsyncTransport(TransportTestCase):
+    def mock(self, transport: _RetryingAsyncTransport, statuses: List[int]) -> List[int]:
+        """Answers the requests sent through the transport with the given status codes, returns the sent attempts"""
+        attempts: List[int] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(len(attempts))
+            status = statuses[min(len(attempts) - 1, len(statuses) - 1)]
+            return httpx.Response(status, headers={'Retry-After': '0'}, text=f'status {status}')
+
+        transport.transport = httpx.MockTransport(handler)  # type: ignore[assignment]
+        return attempts
+
+    def test_statuses_are_retried(self) -> None:
+        configure_transport(retry_statuses=[503], max_retries=2)
+
+        async def post(retries: bool, statuses: List[int]) -> Tuple[int, int]:
+            attempts = self.mock(getattr(get_async_http_client(retries), '_transport'), statuses)
+            response = await async_post('https://example.com', headers={}, json={}, retries=retries)
+            return response.status_code, len(attempts)
+
+        for retries, statuses, expected in (
+            (True, [503, 200], (200, 2)),
+            (True, [503], (503, 3)),
+            (True, [500, 200], (500, 1)),
+            (False, [503, 200], (503, 1)),
+        ):
+            with self.subTest(retries=retries, statuses=statuses):
+                self.assertEqual(asyncio.run(post(retries, statuses)), expected)
+
+    def test_failed_streaming_response_is_read(self) -> None:
+        async def post() -> httpx.Response:
+            self.mock(getattr(get_async_http_client(), '_transport'), [400])
+            return await async_post('https://example.com', headers={}, json={}, stream=True)
+
+        response = asyncio.run(post())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.text, 'status 400')
+        self.assertTrue(response.is_closed)
+
+    def test_client_per_event_loop(self) -> None:
+        async def client() -> httpx.AsyncClient:
+            first = get_async_http_client()
+            self.assertIs(get_async_http_client(), first)
+            self.assertIsNot(get_async_http_client(retries=False), first)
+            return first
+
+        self.assertIsNot(asyncio.run(client()), asyncio.run(client()))
+
+    def test_configure_closes_the_clients(self) -> None:
+        async def configure() -> None:
+            client = get_async_http_client()
+            configure_transport(pool_size=8)
+            # the client is closed by a task on its own loop
+            await asyncio.sleep(0)
+            self.assertTrue(client.is_closed)
+            self.assertIsNot(get_async_http_client(), client)
+
+        asyncio.run(configure())
+
+
+class TestServerSentEvents(unittest.TestCase):
+    def test_events(self) -> None:
+        body = b': comment\ndata: {"a": 1}\n\nevent: error\ndata:line 1\ndata: line 2\n\n\ndata: [DONE]'
+
+        async def events() -> List[SSEEvent]:
+            return [event async for event in aiter_sse_events(httpx.Response(200, content=body))]
+
+        self.assertEqual(
+            asyncio.run(events()),
+            [SSEEvent('message', '{"a": 1}'), SSEEvent('error', 'line 1\nline 2'), SSEEvent('message', '[DONE]')],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
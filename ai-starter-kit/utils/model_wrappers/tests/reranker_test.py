@@ -0,0 +1,106 @@
+"""
+Unit tests of the cross-encoder reranker: ordering, micro-batching, the score cache and the shared instances.
+The huggingface tokenizer and model are replaced by a fake scoring the words of the query found in the text.
+
+Usage:
+    python -m pytest utils/model_wrappers/tests/reranker_test.py
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from unittest import mock
+
+import torch
+from langchain_core.documents import Document
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from utils.model_wrappers import reranker
+from utils.model_wrappers.reranker import CrossEncoderReranker, get_reranker
+
+
+class FakeCrossEncoder:
+    """Fake tokenizer and model, the score of a pair is the number of query words in the text"""
+
+    def __init__(self) -> None:
+        self.batches: List[List[List[str]]] = []
+        self.loads = 0
+
+    def from_pretrained(self, model_name: str) -> 'FakeCrossEncoder':
+        self.loads += 1
+        return self
+
+    def eval(self) -> None:
+        pass
+
+    def __call__(self, pairs: Any = None, score: Any = None, **kwargs: Any) -> Any:
+        if score is not None:
+            # model call with the output of the tokenizer
+            return SimpleNamespace(logits=score.view(-1, 1))
+        self.batches.append(pairs)
+        scores = [sum(word in text.split() for word in query.split()) for query, text in pairs]
+        return {'score': torch.tensor(scores, dtype=torch.float)}
+
+
+class RerankerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake = FakeCrossEncoder()
+        patcher = mock.patch.multiple(reranker, AutoTokenizer=self.fake, AutoModelForSequenceClassification=self.fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestCrossEncoderReranker(RerankerTestCase):
+    def test_rerank(self) -> None:
+        docs = [Document(page_content=text) for text in ('rot', 'rot blau gelb', 'gruen', 'blau gelb')]
+        model = CrossEncoderReranker('model', batch_size=2)
+        self.assertEqual(model.score('rot blau gelb', [doc.page_content for doc in docs]), [1.0, 3.0, 0.0, 2.0])
+        self.assertEqual(
+            [doc.page_content for doc in model.rerank('rot blau gelb', docs, final_k=2)], ['rot blau gelb', 'blau gelb']
+        )
+
+    def test_pairs_are_scored_in_batches_of_similar_length(self) -> None:
+        model = CrossEncoderReranker('model', batch_size=2)
+        model.score('q', ['a' * 10, 'b', 'c' * 10, 'd'])
+        self.assertEqual(
+            [[text for _, text in batch] for batch in self.fake.batches], [['b', 'd'], ['a' * 10, 'c' * 10]]
+        )
+
+    def test_scores_are_cached(self) -> None:
+        model = CrossEncoderReranker('model', batch_size=8, cache_size=3)
+        model.score('q', ['a', 'b', 'a'])
+        self.assertEqual(self.fake.batches, [[['q', 'a'], ['q', 'b']]])
+
+        # 'a' and 'b' are cached, 'c' is scored once, the cache keeps the 3 most recently used pairs
+        model.score('q', ['a', 'b', 'c'])
+        self.assertEqual(self.fake.batches[1:], [[['q', 'c']]])
+        model.score('q', ['d'])
+        model.score('q', ['a'])
+        self.assertEqual(self.fake.batches[-1], [['q', 'a']])
+        # the same text for another query is another pair
+        model.score('other', ['c'])
+        self.assertEqual(self.fake.batches[-1], [['other', 'c']])
+
+
+class TestGetReranker(RerankerTestCase):
+    def test_reranker_is_loaded_once_per_model(self) -> None:
+        patcher = mock.patch.object(reranker, '_rerankers', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        first = get_reranker('model')
+        self.assertIs(get_reranker('model'), first)
+        self.assertIsNot(get_reranker('other'), first)
+        # the tokenizer and the model of both rerankers
+        self.assertEqual(self.fake.loads, 4)
+        rerankers: Dict[Any, CrossEncoderReranker] = reranker._rerankers
+        self.assertEqual(set(rerankers), {('model', False), ('other', False)})
+
+
+if __name__ == '__main__':
+    unittest.main()
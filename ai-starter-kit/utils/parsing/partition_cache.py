@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+from utils.sqlite_cache import SqliteLRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_MB = 1024
+# files are hashed in blocks of this size, so large documents are never fully loaded in memory
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """Returns the sha256 hex digest of the content of a file"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PartitionCache:
+    """Content-addressed store of document partition results.
+
+    The elements unstructured extracted from a file are stored as compressed json in a sqlite database in
+    `cache_dir`, under a key derived from the content of the file, its name and the partitioning settings (see
+    `key`), so a document parsed before with the same settings is not partitioned again, whatever its path.
+    The database is limited to `max_bytes` of compressed elements; when it grows beyond that, the least recently
+    used results are evicted (see `SqliteLRUCache`). The database can be shared by several processes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'partitions.sqlite3')
+        self.max_bytes = max_bytes
+        self._store = SqliteLRUCache(self.db_path, 'partitions', max_bytes, value_column='elements')
+
+    @staticmethod
+    def key(file_path: str, settings: Dict[str, Any]) -> str:
+        """Returns the cache key of a file partitioned with the given settings
+
+        Args:
+            file_path (str): path of the file
+            settings (dict): every setting the partition result depends on, e.g. the partitioning and chunking
+                sections of the SambaParse config and the unstructured version
+
+        Returns:
+            str: sha256 of the file content, the file name (elements carry it in their metadata and ids) and the
+                settings
+        """
+        payload = '\0'.join(
+            (file_digest(file_path), os.path.basename(file_path), json.dumps(settings, sort_keys=True, default=str))
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Returns the cached elements of a key, or None if they are not cached"""
+        blob = self._store.get(key)
+        if blob is None:
+            return None
+        elements: List[Dict[str, Any]] = json.loads(zlib.decompress(blob))
+        return elements
+
+    def put(self, key: str, elements: List[Dict[str, Any]]) -> None:
+        self._store.put(key, zlib.compress(json.dumps(elements).encode('utf-8')))
+
+    def close(self) -> None:
+        self._store.close()
+
+
+def load_partition_cache(cache_config: Optional[Dict[str, Any]], base_dir: str) -> Optional[PartitionCache]:
+    """Returns the partition cache described by the `cache` section of a SambaParse config
+
+    Args:
+        cache_config (dict, optional): cache settings. Keys: `enabled`, `cache_dir` and `max_mb` (size limit of
+            the cache, default 1024).
+        base_dir (str): directory relative cache dirs are resolved against, usually the one of the config file, so
+            that every kit using the same config shares the cache
+
+    Returns:
+        the cache, or None if caching is disabled
+    """
+    if not cache_config or not cache_config.get('enabled') or not cache_config.get('cache_dir'):
+        return None
+    cache_dir = os.path.join(base_dir, os.path.expanduser(cache_config['cache_dir']))
+    logger.info(f'Using partition cache in {cache_dir}')
+    return PartitionCache(cache_dir, max_bytes=int(cache_config.get('max_mb', DEFAULT_CACHE_MAX_MB) * 1024 * 1024))
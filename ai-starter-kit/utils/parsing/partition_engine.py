@@ -0,0 +1,198 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def partition_kwargs(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Translates the partitioning and chunking sections of a SambaParse config to `partition` arguments, the
+    way unstructured-ingest does
+
+    Args:
+        config (dict): SambaParse config
+
+    Returns:
+        dict: keyword arguments of `unstructured.partition.auto.partition`
+    """
+    partitioning = config['partitioning']
+    kwargs: Dict[str, Any] = {
+        'strategy': partitioning['strategy'],
+        'languages': list(partitioning['ocr_languages']),
+        'encoding': partitioning['encoding'],
+        'skip_infer_table_types': list(partitioning['skip_infer_table_types']),
+    }
+    if partitioning['strategy'] == 'hi_res' and partitioning.get('hi_res_model_name'):
+        kwargs['hi_res_model_name'] = partitioning['hi_res_model_name']
+
+    chunking = config['chunking']
+    if chunking['enabled']:
+        kwargs['chunking_strategy'] = chunking['strategy']
+        kwargs['max_characters'] = chunking['chunk_max_characters']
+        kwargs['overlap'] = chunking['chunk_overlap']
+        if chunking['strategy'] == 'by_title':
+            kwargs['combine_text_under_n_chars'] = chunking['combine_under_n_chars']
+    return kwargs
+
+
+def element_filters(config: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Returns the element fields and metadata keys to keep or drop, from the partitioning section of a config"""
+    partitioning = config['partitioning']
+    return {
+        'fields_include': list(partitioning['fields_include']),
+        'metadata_include': list(partitioning['metadata_include']),
+        'metadata_exclude': list(partitioning['metadata_exclude']),
+    }
+
+
+def partition_file(file_path: str, kwargs: Dict[str, Any], filters: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """Partitions a file with unstructured and returns its elements as dicts, like the JSON written by
+    unstructured-ingest
+
+    Args:
+        file_path (str): path of the file
+        kwargs (dict): arguments of `partition`, see `partition_kwargs`
+        filters (dict): fields and metadata keys to keep or drop, see `element_filters`
+
+    Returns:
+        list: elements of the file
+    """
+    from unstructured.partition.auto import partition
+    from unstructured.staging.base import convert_to_dict
+
+    elements = convert_to_dict(partition(filename=os.path.realpath(file_path), **kwargs))
+    return [_filter_element(element, filters) for element in elements]
+
+
+def _filter_element(element: Dict[str, Any], filters: Dict[str, List[str]]) -> Dict[str, Any]:
+    if filters['fields_include']:
+        element = {key: value for key, value in element.items() if key in filters['fields_include']}
+    metadata = element.get('metadata')
+    if metadata is not None:
+        if filters['metadata_include']:
+            element['metadata'] = {key: value for key, value in metadata.items() if key in filters['metadata_include']}
+        elif filters['metadata_exclude']:
+            element['metadata'] = {
+                key: value for key, value in metadata.items() if key not in filters['metadata_exclude']
+            }
+    return element
+
+
+def _init_partition_worker(kwargs: Dict[str, Any]) -> None:
+    """Loads the layout model once per worker process, instead of on the first file of each worker"""
+    if kwargs['strategy'] != 'hi_res':
+        return
+    from unstructured_inference.models.base import get_model
+
+    get_model(kwargs.get('hi_res_model_name'))
+
+
+class PartitionEngine:
+    """Partitions files with unstructured in a pool of worker processes.
+
+    Unlike running unstructured-ingest for each file, the workers are started and load their models once, and
+    are reused for every file and every call as long as the settings do not change. Elements are sent back to
+    the caller directly instead of through JSON files, and each file is yielded as soon as it is partitioned.
+    """
+
+    def __init__(self, kwargs: Dict[str, Any], filters: Dict[str, List[str]], num_processes: int = 1) -> None:
+        """
+        Args:
+            kwargs (dict): arguments of `partition`, see `partition_kwargs`
+            filters (dict): fields and metadata keys to keep or drop, see `element_filters`
+            num_processes (int, optional): number of worker processes, with 1 files are partitioned in the calling
+                process. Defaults to 1.
+        """
+        self.kwargs = kwargs
+        self.filters = filters
+        self.num_processes = num_processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawned workers do not inherit the models, threads and locks of the caller, e.g. a Streamlit app
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.num_processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_partition_worker,
+                    initargs=(self.kwargs,),
+                )
+            return self._executor
+
+    def iter_partition(self, file_paths: List[str]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """Partitions the files and yields (file path, elements) for each of them, in completion order
+
+        Args:
+            file_paths (list): paths of the files to partition
+
+        Raises:
+            Exception: the error of the first file that could not be partitioned, after cancelling the others
+        """
+        if self.num_processes <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                yield file_path, self._partition(file_path)
+            return
+
+        executor = self._get_executor()
+        futures: Dict[Future[List[Dict[str, Any]]], str] = {
+            executor.submit(partition_file, file_path, self.kwargs, self.filters): file_path for file_path in file_paths
+        }
+        try:
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    elements = future.result()
+                except Exception:
+                    logger.error(f'Failed to partition {file_path}')
+                    raise
+                yield file_path, elements
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _partition(self, file_path: str) -> List[Dict[str, Any]]:
+        try:
+            return partition_file(file_path, self.kwargs, self.filters)
+        except Exception:
+            logger.error(f'Failed to partition {file_path}')
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+_engine: Optional[PartitionEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_partition_engine(config: Dict[str, Any]) -> PartitionEngine:
+    """Returns the partition engine of a SambaParse config, reusing the running one if its settings did not change
+
+    Args:
+        config (dict): SambaParse config, `processor.num_processes` sets the number of worker processes
+
+    Returns:
+        PartitionEngine: engine partitioning files with the settings of the config
+    """
+    global _engine
+    kwargs = partition_kwargs(config)
+    filters = element_filters(config)
+    num_processes = int(config['processor']['num_processes'])
+    with _engine_lock:
+        if _engine is None or (_engine.kwargs, _engine.filters, _engine.num_processes) != (
+            kwargs,
+            filters,
+            num_processes,
+        ):
+            if _engine is not None:
+                _engine.close()
+            _engine = PartitionEngine(kwargs, filters, num_processes)
+        return _engine
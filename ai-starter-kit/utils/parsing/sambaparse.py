@@ -3,7 +3,8 @@ import logging
 import os
 import shutil
 import subprocess
-from typing import Any, Dict, List, Optional, Tuple, Union
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import yaml
 from dotenv import load_dotenv
@@ -11,6 +12,9 @@ from langchain.docstore.document import Document
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from utils.parsing.partition_cache import load_partition_cache
+from utils.parsing.partition_engine import get_partition_engine
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,6 +32,11 @@ class SambaParse:
             if default_api_key:
                 os.environ['UNSTRUCTURED_API_KEY'] = default_api_key
 
+        # relative cache dirs are resolved against the config folder, so every kit using the config shares the cache
+        self.partition_cache = load_partition_cache(
+            self.config.get('cache'), os.path.dirname(os.path.abspath(config_path))
+        )
+
     def run_ingest(
         self,
         source_type: str,
@@ -57,6 +66,59 @@ class SambaParse:
         logger.info(f'Deleting contents of output directory: {output_dir}')
         subprocess.run(del_command, shell=True, check=True)
 
+        # local files partitioned before with the same settings are loaded from the partition cache
+        cache_key = self._partition_cache_key(source_type, input_path)
+        elements = None
+        if self.partition_cache is not None and cache_key is not None and not self.config['processor']['reprocess']:
+            elements = self.partition_cache.get(cache_key)
+
+        if elements is not None and input_path is not None:
+            logger.info(f'Loaded the partition result of {input_path} from the partition cache')
+            write_cached_elements(elements, input_path, output_dir)
+        else:
+            command = self._ingest_command(source_type, input_path)
+            command_str = ' '.join(command)
+            logger.info(f'Running command: {command_str}')
+            logger.info('This may take some time depending on the size of your data. Please be patient...')
+
+            subprocess.run(command_str, shell=True, check=True)
+
+            logger.info('Ingest process completed successfully!')
+
+            if self.partition_cache is not None and cache_key is not None:
+                elements = load_output_elements(output_dir)
+                # empty results are not cached, they usually come from a file unstructured could not read
+                if elements:
+                    self.partition_cache.put(cache_key, elements)
+
+        # Call the additional processing function if enabled
+        if self.config['additional_processing']['enabled']:
+            logger.info('Performing additional processing...')
+            texts, metadata_list, langchain_docs = additional_processing(
+                directory=output_dir,
+                extend_metadata=self.config['additional_processing']['extend_metadata'],
+                additional_metadata=additional_metadata,
+                replace_table_text=self.config['additional_processing']['replace_table_text'],
+                table_text_key=self.config['additional_processing']['table_text_key'],
+                return_langchain_docs=self.config['additional_processing']['return_langchain_docs'],
+                convert_metadata_keys_to_string=self.config['additional_processing']['convert_metadata_keys_to_string'],
+            )
+            logger.info('Additional processing completed.')
+            return texts, metadata_list, langchain_docs
+
+    def _ingest_command(self, source_type: str, input_path: Optional[str] = None) -> List[str]:
+        """
+        Builds the unstructured-ingest command for the specified source type and input path.
+
+        Args:
+            source_type (str): The type of source to ingest (e.g., 'local', 'confluence', 'github', 'google-drive').
+            input_path (Optional[str]): The input path for the source (only required for 'local' source type).
+
+        Returns:
+            List[str]: The command and its arguments.
+        """
+        output_dir = self.config['processor']['output_dir']
+
         command = [
             'unstructured-ingest',
             source_type,
@@ -232,28 +294,117 @@ class SambaParse:
             else:
                 raise ValueError(f'Unsupported destination connector type: {destination_type}')
 
-        command_str = ' '.join(command)
-        logger.info(f'Running command: {command_str}')
-        logger.info('This may take some time depending on the size of your data. Please be patient...')
+        return command
 
-        subprocess.run(command_str, shell=True, check=True)
+    def partition_settings(self) -> Dict[str, Any]:
+        """
+        Returns the settings the partition result of a file depends on, part of its partition cache key.
 
-        logger.info('Ingest process completed successfully!')
+        Returns:
+            Dict[str, Any]: The partitioning, chunking and embedding settings and the unstructured version.
+        """
+        partitioning = {
+            key: value for key, value in self.config['partitioning'].items() if key != 'default_unstructured_api_key'
+        }
+        return {
+            'partitioning': partitioning,
+            'chunking': self.config['chunking'],
+            'embedding': self.config['embedding'],
+            'unstructured_version': _unstructured_version(),
+        }
+
+    def _partition_cache_key(self, source_type: str, input_path: Optional[str]) -> Optional[str]:
+        """
+        Returns the partition cache key of a local file, or None if its partition result can not be cached.
+        """
+        if self.partition_cache is None or source_type != 'local' or input_path is None:
+            return None
+        if not os.path.isfile(input_path):
+            return None
+        # a cache hit would skip the upload to the destination connector
+        if self.config['destination_connectors']['enabled']:
+            return None
+        return self.partition_cache.key(input_path, self.partition_settings())
 
-        # Call the additional processing function if enabled
-        if self.config['additional_processing']['enabled']:
-            logger.info('Performing additional processing...')
-            texts, metadata_list, langchain_docs = additional_processing(
-                directory=output_dir,
-                extend_metadata=self.config['additional_processing']['extend_metadata'],
-                additional_metadata=additional_metadata,
-                replace_table_text=self.config['additional_processing']['replace_table_text'],
-                table_text_key=self.config['additional_processing']['table_text_key'],
-                return_langchain_docs=self.config['additional_processing']['return_langchain_docs'],
-                convert_metadata_keys_to_string=self.config['additional_processing']['convert_metadata_keys_to_string'],
-            )
-            logger.info('Additional processing completed.')
-            return texts, metadata_list, langchain_docs
+    def can_partition_in_process(self, source_type: str) -> bool:
+        """
+        Returns whether files of the source type can be partitioned by the in-process partition engine.
+
+        The engine covers local files whose documents are returned to the caller. Partitioning by API, embedding,
+        destination connectors and flattened metadata still go through unstructured-ingest.
+
+        Args:
+            source_type (str): The type of source to ingest.
+
+        Returns:
+            bool: True if `iter_partition_files` can be used for the files of the source.
+        """
+        return bool(
+            self.config['processor'].get('in_process', True)
+            and source_type == 'local'
+            and not self.config['partitioning']['partition_by_api']
+            and not self.config['partitioning']['flatten_metadata']
+            and not self.config['embedding']['enabled']
+            and not self.config['destination_connectors']['enabled']
+            and self.config['additional_processing']['enabled']
+        )
+
+    def iter_partition_files(
+        self, file_paths: List[str], additional_metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Tuple[str, List[str], List[Dict[str, Any]], List[Document]]]:
+        """
+        Partitions local files with the in-process partition engine, without unstructured-ingest.
+
+        Files in the partition cache are yielded first, the others are partitioned by a pool of
+        `processor.num_processes` worker processes that load their models once and are reused across calls. Each
+        file is yielded as soon as it is done, without writing its elements to the output directory.
+
+        Args:
+            file_paths (List[str]): The paths of the files to partition.
+            additional_metadata (Optional[Dict]): Additional metadata to include in the processed documents.
+
+        Yields:
+            Tuple[str, List[str], List[Dict], List[Document]]: The path of each file with its extracted texts,
+            metadata, and LangChain documents, in completion order.
+        """
+        cache_keys: Dict[str, Optional[str]] = {}
+        for file_path in file_paths:
+            cache_key = self._partition_cache_key('local', file_path)
+            elements = None
+            if self.partition_cache is not None and cache_key is not None and not self.config['processor']['reprocess']:
+                elements = self.partition_cache.get(cache_key)
+            if elements is None:
+                cache_keys[file_path] = cache_key
+            else:
+                logger.info(f'Loaded the partition result of {file_path} from the partition cache')
+                relocate_elements(elements, file_path)
+                yield (file_path, *self._process_elements(elements, additional_metadata))
+
+        if not cache_keys:
+            return
+        logger.info(f'Partitioning {len(cache_keys)} files in process...')
+        engine = get_partition_engine(self.config)
+        for file_path, elements in engine.iter_partition(list(cache_keys)):
+            cache_key = cache_keys[file_path]
+            # empty results are not cached, they usually come from a file unstructured could not read
+            if self.partition_cache is not None and cache_key is not None and elements:
+                self.partition_cache.put(cache_key, elements)
+            yield (file_path, *self._process_elements(elements, additional_metadata))
+
+    def _process_elements(
+        self, elements: List[Dict[str, Any]], additional_metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[Document]]:
+        settings = self.config['additional_processing']
+        texts, metadata_list = process_elements(
+            elements,
+            extend_metadata=settings['extend_metadata'],
+            additional_metadata=additional_metadata,
+            replace_table_text=settings['replace_table_text'],
+            table_text_key=settings['table_text_key'],
+            convert_metadata_keys_to_string=settings['convert_metadata_keys_to_string'],
+        )
+        langchain_docs = get_langchain_docs(texts, metadata_list) if settings['return_langchain_docs'] else []
+        return texts, metadata_list, langchain_docs
 
     def _run_ingest_pymupdf(
         self, input_path: str, additional_metadata: Optional[Dict] = None
@@ -312,6 +463,62 @@ class SambaParse:
         return texts, metadata_list, langchain_docs
 
 
+def _unstructured_version() -> Optional[str]:
+    try:
+        return version('unstructured')
+    except PackageNotFoundError:
+        return None
+
+
+def load_output_elements(directory: str) -> List[Dict[str, Any]]:
+    """
+    Loads the elements of the JSON files written by unstructured-ingest to a directory.
+
+    Args:
+        directory (str): The directory containing the extracted JSON files.
+
+    Returns:
+        List[Dict[str, Any]]: The elements of all files, file by file.
+    """
+    elements = []
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith('.json'):
+            with open(os.path.join(directory, file_name), 'r') as file:
+                elements.extend(json.load(file))
+    return elements
+
+
+def relocate_elements(elements: List[Dict[str, Any]], input_path: str) -> None:
+    """
+    Points the file directory in the metadata of cached elements to the folder the file is in now.
+
+    The cache key covers the file name but not its folder, which may differ from the one of the cached file.
+
+    Args:
+        elements (List[Dict[str, Any]]): The cached elements of the file.
+        input_path (str): The path of the file.
+    """
+    file_directory = os.path.dirname(os.path.realpath(input_path))
+    for element in elements:
+        metadata = element.get('metadata', element)
+        if 'file_directory' in metadata:
+            metadata['file_directory'] = file_directory
+
+
+def write_cached_elements(elements: List[Dict[str, Any]], input_path: str, output_dir: str) -> None:
+    """
+    Writes the cached elements of a file to the output directory the way unstructured-ingest would have.
+
+    Args:
+        elements (List[Dict[str, Any]]): The cached elements of the file.
+        input_path (str): The path of the file.
+        output_dir (str): The output directory of the ingest process.
+    """
+    relocate_elements(elements, input_path)
+    with open(os.path.join(output_dir, f'{os.path.basename(input_path)}.json'), 'w') as file:
+        json.dump(elements, file)
+
+
 def convert_to_string(value: Union[List, Tuple, Dict, Any]) -> str:
     """
     Convert a value to its string representation.
@@ -368,29 +575,19 @@ def additional_processing(
         with open(file_path, 'r') as file:
             data = json.load(file)
 
-        for element in data:
-            if extend_metadata and additional_metadata:
-                element['metadata'].update(additional_metadata)
-
-            if replace_table_text and element['type'] == 'Table':
-                element['text'] = element['metadata'][table_text_key]
-
-            metadata = element['metadata'].copy()
-            if convert_metadata_keys_to_string:
-                metadata = {str(key): convert_to_string(value) for key, value in metadata.items()}
-            for key in element:
-                if key not in ['text', 'metadata', 'embeddings']:
-                    metadata[key] = element[key]
-            if 'page_number' in metadata:
-                metadata['page'] = metadata['page_number']
-            else:
-                metadata['page'] = 1
-
-            metadata_list.append(metadata)
-            texts.append(element['text'])
+        file_texts, file_metadata_list = process_elements(
+            data,
+            extend_metadata=extend_metadata,
+            additional_metadata=additional_metadata,
+            replace_table_text=replace_table_text,
+            table_text_key=table_text_key,
+            convert_metadata_keys_to_string=convert_metadata_keys_to_string,
+        )
+        texts.extend(file_texts)
+        metadata_list.extend(file_metadata_list)
 
         if return_langchain_docs:
-            langchain_docs.extend(get_langchain_docs(texts, metadata_list))
+            langchain_docs.extend(get_langchain_docs(file_texts, file_metadata_list))
 
         with open(file_path, 'w') as file:
             json.dump(data, file, indent=2)
@@ -398,6 +595,55 @@ def additional_processing(
     return texts, metadata_list, langchain_docs
 
 
+def process_elements(
+    elements: List[Dict[str, Any]],
+    extend_metadata: bool,
+    additional_metadata: Optional[Dict[str, Any]],
+    replace_table_text: bool,
+    table_text_key: str,
+    convert_metadata_keys_to_string: bool,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Extracts the texts and metadata of the elements of a file, updating the elements in place.
+
+    Args:
+        elements (List[Dict[str, Any]]): The elements of the file, as written by unstructured-ingest.
+        extend_metadata (bool): Whether to extend the metadata with additional metadata.
+        additional_metadata (Optional[Dict]): Additional metadata to include in the processed documents.
+        replace_table_text (bool): Whether to replace table text with the specified table text key.
+        table_text_key (str): The key to use for replacing table text.
+        convert_metadata_keys_to_string (bool): Whether to convert non-string metadata keys to string.
+
+    Returns:
+        Tuple[List[str], List[Dict]]: A tuple containing the texts and metadata of the elements.
+    """
+    texts = []
+    metadata_list = []
+
+    for element in elements:
+        if extend_metadata and additional_metadata:
+            element['metadata'].update(additional_metadata)
+
+        if replace_table_text and element['type'] == 'Table':
+            element['text'] = element['metadata'][table_text_key]
+
+        metadata = element['metadata'].copy()
+        if convert_metadata_keys_to_string:
+            metadata = {str(key): convert_to_string(value) for key, value in metadata.items()}
+        for key in element:
+            if key not in ['text', 'metadata', 'embeddings']:
+                metadata[key] = element[key]
+        if 'page_number' in metadata:
+            metadata['page'] = metadata['page_number']
+        else:
+            metadata['page'] = 1
+
+        metadata_list.append(metadata)
+        texts.append(element['text'])
+
+    return texts, metadata_list
+
+
 def get_langchain_docs(texts: List[str], metadata_list: List[Dict]) -> List[Document]:
     """
     Creates LangChain documents from the extracted texts and metadata.
@@ -412,11 +658,21 @@ def get_langchain_docs(texts: List[str], metadata_list: List[Dict]) -> List[Docu
     return [Document(page_content=content, metadata=metadata) for content, metadata in zip(texts, metadata_list)]
 
 
-def parse_doc_universal(
-    doc: str, additional_metadata: Optional[Dict] = None, source_type: str = 'local', lite_mode: bool = False
-) -> Tuple[List[str], List[Dict], List[Document]]:
+def _list_files(doc: str) -> List[str]:
+    if os.path.isfile(doc):
+        return [doc]
+    return [os.path.join(root, file) for root, _, files in os.walk(doc) for file in files]
+
+
+def iter_parse_doc_universal(
+    doc: str, additional_metadata: Optional[Dict[str, Any]] = None, source_type: str = 'local', lite_mode: bool = False
+) -> Iterator[Tuple[str, List[str], List[Dict[str, Any]], List[Document]]]:
     """
-    Extract text, tables, images, and metadata from a document or a folder of documents.
+    Extract text, tables, images, and metadata from a document or a folder of documents, file by file.
+
+    Local files are partitioned in parallel by the in-process partition engine when the config allows it (see
+    `SambaParse.can_partition_in_process`), and each file is yielded as soon as it is parsed, so the caller can
+    use the first documents while the others are still being partitioned.
 
     Args:
         doc (str): Path to the document or folder of documents.
@@ -425,11 +681,13 @@ def parse_doc_universal(
         source_type (str, optional): The type of source to ingest. Defaults to 'local'.
         lite_mode (bool, optional): Whether to use a lighter version (PyMupdf) for pdf parsing.
 
-    Returns:
-        Tuple[List[str], List[Dict], List[Document]]: A tuple containing:
-            - A list of extracted text per page.
-            - A list of extracted metadata per page.
-            - A list of LangChain documents.
+    Yields:
+        Tuple[str, List[str], List[Dict], List[Document]]: The path of each file with its extracted texts,
+        metadata, and LangChain documents, in completion order.
+
+    Raises:
+        ValueError: if files have to be parsed with unstructured-ingest while `additional_processing` is disabled
+            in the config, as no documents are returned then (the elements are only written to the output dir)
     """
     if additional_metadata is None:
         additional_metadata = {}
@@ -442,26 +700,76 @@ def parse_doc_universal(
 
     wrapper = SambaParse(config_path)
 
-    def process_file(file_path: str) -> Any:
+    engine_files = []
+    other_files = []
+    for file_path in _list_files(doc):
+        if file_path.lower().endswith('.pdf') and lite_mode:
+            other_files.append(file_path)
+        elif wrapper.can_partition_in_process(source_type):
+            engine_files.append(file_path)
+        else:
+            other_files.append(file_path)
+
+    if not wrapper.config['additional_processing']['enabled'] and not all(
+        file_path.lower().endswith('.pdf') and lite_mode for file_path in other_files
+    ):
+        raise ValueError(
+            'additional_processing is disabled in the SambaParse config, so unstructured-ingest only writes the '
+            f'elements to {wrapper.config["processor"]["output_dir"]} and no documents can be returned. '
+            'Enable additional_processing or use SambaParse.run_ingest directly.'
+        )
+
+    if engine_files:
+        yield from wrapper.iter_partition_files(engine_files, additional_metadata)
+
+    for file_path in other_files:
         if file_path.lower().endswith('.pdf') and lite_mode:
             # Use PyMuPDF for PDF parsing (lighter version)
-            return wrapper._run_ingest_pymupdf(file_path, additional_metadata)
+            yield (file_path, *wrapper._run_ingest_pymupdf(file_path, additional_metadata))
         else:
-            # Use the original method for non-PDF files
-            return wrapper.run_ingest(source_type, input_path=file_path, additional_metadata=additional_metadata)
+            # Use unstructured-ingest for the sources and settings the partition engine does not cover
+            yield (
+                file_path,
+                *wrapper.run_ingest(source_type, input_path=file_path, additional_metadata=additional_metadata),
+            )
 
-    if os.path.isfile(doc):
-        return process_file(doc)
-    else:
-        all_texts, all_metadata, all_docs = [], [], []
-        for root, _, files in os.walk(doc):
-            for file in files:
-                file_path = os.path.join(root, file)
-                texts, metadata_list, langchain_docs = process_file(file_path)
-                all_texts.extend(texts)
-                all_metadata.extend(metadata_list)
-                all_docs.extend(langchain_docs)
-        return all_texts, all_metadata, all_docs
+
+def parse_doc_universal(
+    doc: str, additional_metadata: Optional[Dict] = None, source_type: str = 'local', lite_mode: bool = False
+) -> Tuple[List[str], List[Dict], List[Document]]:
+    """
+    Extract text, tables, images, and metadata from a document or a folder of documents.
+
+    Args:
+        doc (str): Path to the document or folder of documents.
+        additional_metadata (Optional[Dict], optional): Additional metadata to include in the processed documents.
+            Defaults to an empty dictionary.
+        source_type (str, optional): The type of source to ingest. Defaults to 'local'.
+        lite_mode (bool, optional): Whether to use a lighter version (PyMupdf) for pdf parsing.
+
+    Returns:
+        Tuple[List[str], List[Dict], List[Document]]: A tuple containing:
+            - A list of extracted text per page.
+            - A list of extracted metadata per page.
+            - A list of LangChain documents.
+
+    Raises:
+        ValueError: if `additional_processing` is disabled in the config, see `iter_parse_doc_universal`
+    """
+    # files are parsed in completion order but returned in folder order, so results do not depend on timing
+    order = {file_path: index for index, file_path in enumerate(_list_files(doc))}
+    results = sorted(
+        iter_parse_doc_universal(doc, additional_metadata, source_type, lite_mode), key=lambda result: order[result[0]]
+    )
+
+    all_texts: List[str] = []
+    all_metadata: List[Dict[str, Any]] = []
+    all_docs: List[Document] = []
+    for _, texts, metadata_list, langchain_docs in results:
+        all_texts.extend(texts)
+        all_metadata.extend(metadata_list)
+        all_docs.extend(langchain_docs)
+    return all_texts, all_metadata, all_docs
 
 
 def parse_doc_streamlit(
@@ -0,0 +1,116 @@
+"""
+Unit tests of the partition cache and of the sqlite LRU store behind it.
+
+Usage:
+    python -m pytest utils/parsing/tests/test_partition_cache.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from contextlib import closing
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from utils.parsing.partition_cache import PartitionCache, load_partition_cache
+from utils.sqlite_cache import SqliteLRUCache
+
+
+class TestSqliteLRUCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'cache.sqlite3')
+        self.cache = SqliteLRUCache(self.db_path, 'entries', max_bytes=1000)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def _stored_size(self) -> int:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            total: int = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        return total
+
+    def test_size_is_kept_in_sync(self) -> None:
+        self.cache.put('a', b'x' * 100)
+        self.cache.put_many([('b', b'x' * 50), ('c', b'x' * 10)])
+        self.cache.put('a', b'x' * 30)
+        self.assertEqual(self.cache.size, 90)
+        self.assertEqual(self.cache.size, self._stored_size())
+        self.assertEqual(self.cache.get('a'), b'x' * 30)
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        for key in 'abcd':
+            self.cache.put(key, b'x' * 300)
+        # c is read and b is marked as used, so a and d are the least recently used entries
+        self.cache.get('c')
+        self.cache.touch(['b'])
+        self.cache.put('e', b'x' * 300)
+
+        self.assertLessEqual(self.cache.size, 900)
+        self.assertEqual(self.cache.size, self._stored_size())
+        self.assertEqual(set(self.cache.get_many(list('abcde'))), {'b', 'c', 'e'})
+
+    def test_size_of_existing_table_is_computed_once(self) -> None:
+        self.cache.put('a', b'x' * 100)
+        self.cache.close()
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute('DROP TABLE entries_size')
+        self.cache = SqliteLRUCache(self.db_path, 'entries', max_bytes=1000)
+        self.assertEqual(self.cache.size, 100)
+
+
+class TestPartitionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, 'doc.txt')
+        with open(self.file_path, 'w') as file:
+            file.write('some text')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_key_depends_on_content_and_settings(self) -> None:
+        key = PartitionCache.key(self.file_path, {'strategy': 'fast'})
+        self.assertEqual(key, PartitionCache.key(self.file_path, {'strategy': 'fast'}))
+        self.assertNotEqual(key, PartitionCache.key(self.file_path, {'strategy': 'hi_res'}))
+        with open(self.file_path, 'a') as file:
+            file.write('more text')
+        self.assertNotEqual(key, PartitionCache.key(self.file_path, {'strategy': 'fast'}))
+
+    def test_round_trip_and_eviction(self) -> None:
+        cache = PartitionCache(os.path.join(self.tmp_dir.name, 'cache'), max_bytes=2000)
+        try:
+            elements = [{'type': 'Title', 'text': 'Hello', 'metadata': {'page_number': 1}}]
+            cache.put('first', elements)
+            self.assertEqual(cache.get('first'), elements)
+            self.assertIsNone(cache.get('missing'))
+
+            # incompressible elements, so that a few of them exceed the limit
+            for i in range(5):
+                cache.put(f'big-{i}', [{'text': os.urandom(600).hex()}])
+            self.assertIsNone(cache.get('first'))
+            self.assertIsNotNone(cache.get('big-4'))
+            self.assertLessEqual(cache._store.size, 2000)
+        finally:
+            cache.close()
+
+    def test_load_partition_cache(self) -> None:
+        self.assertIsNone(load_partition_cache(None, self.tmp_dir.name))
+        self.assertIsNone(load_partition_cache({'enabled': False, 'cache_dir': 'cache'}, self.tmp_dir.name))
+        cache = load_partition_cache({'enabled': True, 'cache_dir': 'cache', 'max_mb': 1}, self.tmp_dir.name)
+        assert cache is not None
+        try:
+            self.assertEqual(cache.max_bytes, 1024 * 1024)
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, 'cache', 'partitions.sqlite3')))
+        finally:
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+Unit tests of the partition engine. unstructured is replaced by a stub package written to a temporary directory,
+which the spawned worker processes import as well, so the tests neither need unstructured nor its models.
+
+Usage:
+    python -m pytest utils/parsing/tests/test_partition_engine.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from utils.parsing import partition_engine
+from utils.parsing.partition_engine import PartitionEngine, element_filters, get_partition_engine, partition_kwargs
+
+STUB_PARTITION = """
+import os
+
+
+def partition(filename, **kwargs):
+    with open(filename) as file:
+        text = file.read()
+    if text == 'broken':
+        raise RuntimeError('cannot partition ' + filename)
+    metadata = {'filename': os.path.basename(filename), 'page_number': 1, 'pid': os.getpid()}
+    return [{'type': 'NarrativeText', 'text': text, 'strategy': kwargs['strategy'], 'metadata': metadata}]
+"""
+STUB_STAGING = """
+def convert_to_dict(elements):
+    return [dict(element) for element in elements]
+"""
+
+
+def make_config(strategy: str = 'fast', num_processes: int = 1) -> Dict[str, Any]:
+    return {
+        'processor': {'num_processes': num_processes},
+        'partitioning': {
+            'strategy': strategy,
+            'hi_res_model_name': 'yolox',
+            'ocr_languages': ['eng'],
+            'encoding': 'utf_8',
+            'skip_infer_table_types': [],
+            'fields_include': ['type', 'text', 'metadata'],
+            'metadata_include': [],
+            'metadata_exclude': ['pid'],
+        },
+        'chunking': {
+            'enabled': True,
+            'strategy': 'by_title',
+            'chunk_max_characters': 1500,
+            'chunk_overlap': 300,
+            'combine_under_n_chars': 100,
+        },
+    }
+
+
+class TestPartitionSettings(unittest.TestCase):
+    def test_partition_kwargs(self) -> None:
+        kwargs = partition_kwargs(make_config())
+        self.assertEqual(kwargs['strategy'], 'fast')
+        self.assertEqual(kwargs['languages'], ['eng'])
+        self.assertEqual(kwargs['chunking_strategy'], 'by_title')
+        self.assertEqual(kwargs['combine_text_under_n_chars'], 100)
+        self.assertNotIn('hi_res_model_name', kwargs)
+        self.assertEqual(partition_kwargs(make_config('hi_res'))['hi_res_model_name'], 'yolox')
+
+        config = make_config()
+        config['chunking']['enabled'] = False
+        self.assertNotIn('chunking_strategy', partition_kwargs(config))
+
+    def test_element_filters(self) -> None:
+        self.assertEqual(
+            element_filters(make_config()),
+            {'fields_include': ['type', 'text', 'metadata'], 'metadata_include': [], 'metadata_exclude': ['pid']},
+        )
+
+
+class TestPartitionEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.stub_dir = tempfile.TemporaryDirectory()
+        for module, source in (('partition/auto.py', STUB_PARTITION), ('staging/base.py', STUB_STAGING)):
+            package_dir = os.path.join(cls.stub_dir.name, 'unstructured', os.path.dirname(module))
+            os.makedirs(package_dir, exist_ok=True)
+            for init_dir in (os.path.dirname(package_dir), package_dir):
+                open(os.path.join(init_dir, '__init__.py'), 'a').close()
+            with open(os.path.join(cls.stub_dir.name, 'unstructured', module), 'w') as file:
+                file.write(source)
+        # spawned workers start with the sys.path of the parent, so they find the stub too
+        sys.path.insert(0, cls.stub_dir.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        sys.path.remove(cls.stub_dir.name)
+        for name in [name for name in sys.modules if name.split('.')[0] == 'unstructured']:
+            del sys.modules[name]
+        cls.stub_dir.cleanup()
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_paths = []
+        for i in range(4):
+            file_path = os.path.join(self.tmp_dir.name, f'doc_{i}.txt')
+            with open(file_path, 'w') as file:
+                file.write(f'text {i}')
+            self.file_paths.append(file_path)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _engine(self, num_processes: int) -> PartitionEngine:
+        config = make_config()
+        engine = PartitionEngine(partition_kwargs(config), element_filters(config), num_processes)
+        self.addCleanup(engine.close)
+        return engine
+
+    def test_serial_partition(self) -> None:
+        results = list(self._engine(1).iter_partition(self.file_paths))
+
+        self.assertEqual([file_path for file_path, _ in results], self.file_paths)
+        file_path, elements = results[0]
+        self.assertEqual(
+            elements,
+            [{'type': 'NarrativeText', 'text': 'text 0', 'metadata': {'filename': 'doc_0.txt', 'page_number': 1}}],
+        )
+
+    def test_worker_pool_partition(self) -> None:
+        engine = self._engine(2)
+        for _ in range(2):
+            results = dict(engine.iter_partition(self.file_paths))
+            self.assertEqual(sorted(results), self.file_paths)
+            for i, file_path in enumerate(self.file_paths):
+                self.assertEqual(results[file_path][0]['text'], f'text {i}')
+                self.assertNotIn('pid', results[file_path][0]['metadata'])
+        # the pool is started once and reused across calls
+        self.assertIsNotNone(engine._executor)
+
+    def test_worker_pool_raises_partition_errors(self) -> None:
+        with open(self.file_paths[2], 'w') as file:
+            file.write('broken')
+        with self.assertLogs(partition_engine.logger, 'ERROR'), self.assertRaises(RuntimeError):
+            list(self._engine(2).iter_partition(self.file_paths))
+
+    def test_engine_is_reused_while_settings_do_not_change(self) -> None:
+        engine = get_partition_engine(make_config(num_processes=2))
+        self.addCleanup(lambda: get_partition_engine(make_config()).close())
+        self.assertIs(get_partition_engine(make_config(num_processes=2)), engine)
+
+        other_engine = get_partition_engine(make_config(num_processes=3))
+        self.assertIsNot(other_engine, engine)
+        self.assertEqual(other_engine.num_processes, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# on eviction the cache is shrunk to this fraction of its maximum size, so that not every insert evicts
+EVICTION_TARGET_RATIO = 0.9
+# number of least recently used entries read per eviction query
+EVICTION_BATCH_SIZE = 256
+# max number of keys per sqlite query, below sqlite's host parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+class SqliteLRUCache:
+    """Size-bounded key-value store of blobs in a sqlite table, evicting the least recently used entries.
+
+    Each entry records its size and last access time. The total size is kept in a one-row table next to the
+    entries and updated by triggers, in the same transaction as every insert, update and delete, so checking the
+    limit after a write costs a single-row read instead of a scan. It also stays correct when several processes
+    share the database. When the total grows beyond `max_bytes`, entries are evicted oldest first, read and
+    deleted in batches of `EVICTION_BATCH_SIZE`, until it is below `EVICTION_TARGET_RATIO` of the limit.
+    """
+
+    def __init__(self, db_path: str, table: str, max_bytes: int, value_column: str = 'value') -> None:
+        """
+        Args:
+            db_path (str): path of the sqlite database, created if missing
+            table (str): name of the table holding the entries
+            max_bytes (int): maximum total size of the stored values
+            value_column (str, optional): name of the blob column. Defaults to 'value'.
+        """
+        self.db_path = db_path
+        self.table = table
+        self.max_bytes = max_bytes
+        self.value_column = value_column
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        meta = f'{table}_size'
+        with self._conn:
+            # one transaction, so that no other process writes entries between computing the total and the triggers
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} '
+                f'(key TEXT PRIMARY KEY, {value_column} BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)')
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {meta} (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)'
+            )
+            # the total of a table created before the size table is computed once
+            self._conn.execute(f'INSERT OR IGNORE INTO {meta} SELECT 0, COALESCE(SUM(size), 0) FROM {table}')
+            self._conn.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {table}_size_insert AFTER INSERT ON {table} '
+                f'BEGIN UPDATE {meta} SET total = total + NEW.size; END'
+            )
+            self._conn.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {table}_size_update AFTER UPDATE OF size ON {table} '
+                f'BEGIN UPDATE {meta} SET total = total - OLD.size + NEW.size; END'
+            )
+            self._conn.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {table}_size_delete AFTER DELETE ON {table} '
+                f'BEGIN UPDATE {meta} SET total = total - OLD.size; END'
+            )
+        self._meta = meta
+
+    @property
+    def size(self) -> int:
+        """Total size of the stored values"""
+        with self._lock:
+            return self._size()
+
+    def _size(self) -> int:
+        total: int = self._conn.execute(f'SELECT total FROM {self._meta}').fetchone()[0]
+        return total
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value of a key, or None if it is not cached"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Returns the values of the given keys and marks them as used, missing keys are left out"""
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch = keys[start : start + LOOKUP_BATCH_SIZE]
+                rows = self._conn.execute(
+                    f'SELECT key, {self.value_column} FROM {self.table} WHERE key IN ({",".join("?" * len(batch))})',
+                    batch,
+                ).fetchall()
+                found.update(rows)
+            self._touch(found)
+        return found
+
+    def touch(self, keys: Iterable[str]) -> None:
+        """Marks entries as used without reading them, e.g. when they were served from a faster tier"""
+        with self._lock:
+            self._touch(keys)
+
+    def _touch(self, keys: Iterable[str]) -> None:
+        now = time.time()
+        rows = [(now, key) for key in keys]
+        if rows:
+            with self._conn:
+                self._conn.executemany(f'UPDATE {self.table} SET accessed = ? WHERE key = ?', rows)
+
+    def put(self, key: str, value: bytes) -> None:
+        self.put_many([(key, value)])
+
+    def put_many(self, items: List[Tuple[str, bytes]]) -> None:
+        """Stores the values, replacing existing entries, and evicts if the cache grew beyond its limit"""
+        now = time.time()
+        rows = [(key, value, len(value), now) for key, value in items]
+        with self._lock:
+            with self._conn:
+                # an upsert instead of INSERT OR REPLACE, whose implicit delete would not fire the size trigger
+                self._conn.executemany(
+                    f'INSERT INTO {self.table} VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                    f'{self.value_column} = excluded.{self.value_column}, size = excluded.size, '
+                    'accessed = excluded.accessed',
+                    rows,
+                )
+            size = self._size()
+            if size > self.max_bytes:
+                self._evict(size)
+
+    def _evict(self, size: int) -> None:
+        excess = size - self.max_bytes * EVICTION_TARGET_RATIO
+        evicted = 0
+        while excess > 0:
+            rows = self._conn.execute(
+                f'SELECT key, size FROM {self.table} ORDER BY accessed LIMIT ?', (EVICTION_BATCH_SIZE,)
+            ).fetchall()
+            if not rows:
+                break
+            keys = []
+            for key, entry_size in rows:
+                if excess <= 0:
+                    break
+                keys.append((key,))
+                excess -= entry_size
+            with self._conn:
+                self._conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', keys)
+            evicted += len(keys)
+        logger.info(f'{self.table} cache: evicted {evicted} entries')
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,150 @@
+"""
+Unit tests of the incremental vector store updates of VectorDb, on local FAISS and Qdrant stores
+with a deterministic fake embedding model.
+
+Usage:
+    python -m pytest utils/vectordb/tests/test_vector_db.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, List
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from utils.vectordb.vector_db import UPDATE_BATCH_SIZE, VectorDb, chunk_fingerprint
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Fake embedding model that records the texts it embeds"""
+
+    embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def make_chunk(text: str, source: str = 'a.txt') -> Document:
+    return Document(page_content=text, metadata={'source': source})
+
+
+class TestChunkFingerprint(unittest.TestCase):
+    def test_fingerprint(self) -> None:
+        chunk = make_chunk('Hello')
+        self.assertEqual(chunk_fingerprint(chunk), chunk_fingerprint(make_chunk('Hello')))
+        self.assertNotEqual(chunk_fingerprint(chunk), chunk_fingerprint(make_chunk('Hello', source='b.txt')))
+        self.assertNotEqual(chunk_fingerprint(chunk), chunk_fingerprint(chunk, {'chunk_size': 500}))
+        self.assertNotEqual(
+            chunk_fingerprint(chunk), chunk_fingerprint(Document(page_content='Hello', metadata={'url': 'a.txt'}))
+        )
+        self.assertEqual(
+            chunk_fingerprint(chunk),
+            chunk_fingerprint(Document(page_content='Hello', metadata={'url': 'a.txt'}), source_key='url'),
+        )
+        # formatted as a UUID, the only string ids Qdrant accepts
+        self.assertRegex(chunk_fingerprint(chunk), r'^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$')
+
+
+class VectorDbTestCase(unittest.TestCase):
+    db_type = 'faiss'
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_db = os.path.join(self.tmp_dir.name, 'input_db')
+        self.output_db = os.path.join(self.tmp_dir.name, 'output_db')
+        self.embeddings = CountingEmbedding(size=8, embedded=[])
+        self.vdb = VectorDb()
+        self.chunks = [make_chunk('a1'), make_chunk('a2'), make_chunk('b1', source='b.txt')]
+        self.close(self.vdb.create_vector_store(self.chunks, self.embeddings, self.db_type, self.input_db))
+        self.embeddings.embedded.clear()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def close(self, vector_store: Any) -> None:
+        """Releases the lock of a local Qdrant store, so that it can be loaded again"""
+        if self.db_type == 'qdrant':
+            vector_store.client.close()
+
+    def update(self, chunks: List[Document], **kwargs: Any) -> List[str]:
+        """Updates the input store into the output store and returns the sorted stored texts"""
+        vector_store = self.vdb.update_vdb(
+            chunks, self.embeddings, self.db_type, self.input_db, self.output_db, **kwargs
+        )
+        self.close(vector_store)
+        vector_store = self.vdb.load_vdb(self.output_db, self.embeddings, db_type=self.db_type)
+        texts = sorted(doc.page_content for doc in vector_store.similarity_search('a', k=100))
+        self.close(vector_store)
+        return texts
+
+
+class TestFaissUpdate(VectorDbTestCase):
+    def test_unchanged_chunks_are_not_embedded_again(self) -> None:
+        self.assertEqual(self.update(self.chunks), ['a1', 'a2', 'b1'])
+        self.assertEqual(self.embeddings.embedded, [])
+        report = self.vdb.last_update_report
+        assert report is not None
+        self.assertEqual((report.added, report.unchanged, report.deleted), (0, 3, 0))
+
+    def test_changed_source_is_replaced(self) -> None:
+        chunks = [make_chunk('a1'), make_chunk('a3'), make_chunk('a3'), make_chunk('c1', source='c.txt')]
+        # b.txt is kept, since it is not part of the update
+        self.assertEqual(self.update(chunks), ['a1', 'a3', 'b1', 'c1'])
+        self.assertEqual(sorted(self.embeddings.embedded), ['a3', 'c1'])
+        report = self.vdb.last_update_report
+        assert report is not None
+        self.assertEqual((report.added, report.unchanged, report.deleted, report.duplicates), (2, 1, 1, 1))
+        self.assertEqual(report.deleted_sources, [])
+
+    def test_missing_sources_are_deleted_on_request(self) -> None:
+        self.assertEqual(self.update(self.chunks[:2], delete_missing_sources=True), ['a1', 'a2'])
+        report = self.vdb.last_update_report
+        assert report is not None
+        self.assertEqual(report.deleted_sources, ['b.txt'])
+
+    def test_changed_chunk_params_re_embed_all_chunks(self) -> None:
+        self.assertEqual(self.update(self.chunks, chunk_params={'chunk_size': 500}), ['a1', 'a2', 'b1'])
+        self.assertEqual(sorted(self.embeddings.embedded), ['a1', 'a2', 'b1'])
+
+    def test_input_store_is_kept_without_output_db(self) -> None:
+        vector_store = self.vdb.update_vdb([make_chunk('a3')], self.embeddings, self.db_type, self.input_db)
+        self.assertEqual(len(vector_store.index_to_docstore_id), 2)
+        stored = self.vdb.load_vdb(self.input_db, self.embeddings, db_type=self.db_type)
+        self.assertEqual(len(stored.index_to_docstore_id), 3)
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            self.vdb.update_vdb(self.chunks, self.embeddings, 'unknown', self.input_db)
+        with self.assertRaises(ValueError):
+            self.vdb.update_vdb(self.chunks, self.embeddings, self.db_type)
+
+    def test_update_larger_than_a_batch(self) -> None:
+        chunks = [make_chunk(f'a{i}') for i in range(UPDATE_BATCH_SIZE + 3)]
+        vector_store = self.vdb.update_vdb(chunks, self.embeddings, self.db_type, self.input_db)
+        self.assertEqual(len(vector_store.index_to_docstore_id), UPDATE_BATCH_SIZE + 4)
+        self.assertEqual(len(self.embeddings.embedded), UPDATE_BATCH_SIZE + 1)
+
+
+class TestQdrantUpdate(VectorDbTestCase):
+    db_type = 'qdrant'
+
+    def test_changed_source_is_replaced(self) -> None:
+        self.assertEqual(self.update([make_chunk('a1'), make_chunk('a3')]), ['a1', 'a3', 'b1'])
+        self.assertEqual(self.embeddings.embedded, ['a3'])
+
+        # the input store is copied, not modified
+        vector_store = self.vdb.load_vdb(self.input_db, self.embeddings, db_type=self.db_type)
+        self.assertEqual(vector_store.client.count(vector_store.collection_name).count, 3)
+        self.close(vector_store)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,15 +17,20 @@ Optional arguments:
 """
 
 import argparse
+import hashlib
+import json
 import logging
 import os
+import shutil
 import sys
-from typing import Any, List, Optional, Set
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import DirectoryLoader, UnstructuredURLLoader
 from langchain_community.vectorstores import FAISS, Chroma, Qdrant
+from langchain_core.documents import Document
 from langchain_milvus import Milvus
+from pydantic import BaseModel, Field
 
 vectordb_dir = os.path.dirname(os.path.abspath(__file__))
 utils_dir = os.path.abspath(os.path.join(vectordb_dir, '..'))
@@ -41,6 +46,10 @@ from utils.model_wrappers.api_gateway import APIGateway
 EMBEDDING_MODEL = 'intfloat/e5-large-v2'
 NORMALIZE_EMBEDDINGS = True
 VECTORDB_LOG_FILE_NAME = 'vector_db.log'
+QDRANT_COLLECTION_NAME = 'test_collection'
+MILVUS_COLLECTION_NAME = 'LangChainCollection'
+# number of chunks added, deleted or listed per vector store call during incremental updates
+UPDATE_BATCH_SIZE = 1000
 
 # Configure the logger
 logging.basicConfig(
@@ -56,6 +65,45 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class IndexUpdateReport(BaseModel):
+    """Summary of an incremental vector store update"""
+
+    added: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    duplicates: int = 0
+    deleted_sources: List[str] = Field(default_factory=list)
+
+
+def chunk_fingerprint(
+    chunk: Document, chunk_params: Optional[Dict[str, Any]] = None, source_key: str = 'source'
+) -> str:
+    """Deterministic id of a chunk, derived from its content, source and the chunking parameters.
+
+    The id is formatted as a UUID so that it is accepted by every supported backend (Qdrant only allows
+    UUIDs or integers as point ids).
+
+    Args:
+        chunk (Document): chunk to fingerprint
+        chunk_params (dict, optional): parameters used to create the chunk, e.g. chunk size and overlap
+        source_key (str, optional): metadata key holding the chunk source. Defaults to 'source'.
+
+    Returns:
+        str: chunk id
+    """
+    payload = json.dumps(
+        {
+            'source': chunk.metadata.get(source_key),
+            'content': chunk.page_content,
+            'params': chunk_params or {},
+        },
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return str(uuid.UUID(hex=digest[:32]))
+
+
 class VectorDb:
     """
     A class for creating, updating and loading FAISS or Chroma vector databases,
@@ -73,13 +121,15 @@ class VectorDb:
         get_token_chunks: Get token chunks from a list of documents
         create_vector_store: Create a vector store from chunks and an embedding model
         load_vdb: load a previous stored vector database
-        update_vdb: Update an existing vector store with new chunks
+        update_vdb: Incrementally update an existing vector store with new or changed chunks
+        sync_vector_store: Bring a loaded vector store in line with a list of chunks
         create_vdb: Create a vector database from the raw files in a specific input directory
     """
 
     def __init__(self) -> None:
         self.collection_id = str(uuid.uuid4())
         self.vector_collections: Set[Any] = set()
+        self.last_update_report: Optional[IndexUpdateReport] = None
 
     def load_files(
         self,
@@ -185,22 +235,30 @@ class VectorDb:
         db_type: str,
         output_db: Optional[str] = None,
         collection_name: Optional[str] = None,
+        chunk_params: Optional[Dict[str, Any]] = None,
     ) -> Any:
         """Creates a vector store
 
+        Chunks are stored under their fingerprint (see `chunk_fingerprint`), identical chunks are indexed once,
+        so that the store can later be updated incrementally with `update_vdb`.
+
         Args:
             chunks (list): list of chunks
             embeddings (HuggingFaceInstructEmbeddings): embedding model
             db_type (str): vector db type
             output_db (str, optional): output path to save the vector db. Defaults to None.
+            chunk_params (dict, optional): chunking parameters included in the chunk fingerprints. Defaults to None.
         """
+        unique_chunks = self._unique_chunks(chunks, chunk_params)
+        chunks, ids = list(unique_chunks.values()), list(unique_chunks.keys())
+
         if collection_name is None:
             collection_name = f'collection_{self.collection_id}'
             logger.info(f'This is the collection name: {collection_name}')
 
         vector_store: FAISS | Qdrant | Chroma | Milvus
         if db_type == 'faiss':
-            vector_store = FAISS.from_documents(documents=chunks, embedding=embeddings)
+            vector_store = FAISS.from_documents(documents=chunks, embedding=embeddings, ids=ids)
             if output_db:
                 vector_store.save_local(output_db)
 
@@ -209,13 +267,17 @@ class VectorDb:
                 vector_store = Chroma()
                 vector_store.delete_collection()
                 vector_store = Chroma.from_documents(
-                    documents=chunks, embedding=embeddings, persist_directory=output_db, collection_name=collection_name
+                    documents=chunks,
+                    embedding=embeddings,
+                    ids=ids,
+                    persist_directory=output_db,
+                    collection_name=collection_name,
                 )
             else:
                 vector_store = Chroma()
                 vector_store.delete_collection()
                 vector_store = Chroma.from_documents(
-                    documents=chunks, embedding=embeddings, collection_name=collection_name
+                    documents=chunks, embedding=embeddings, ids=ids, collection_name=collection_name
                 )
             self.vector_collections.add(collection_name)
 
@@ -224,14 +286,16 @@ class VectorDb:
                 vector_store = Qdrant.from_documents(
                     documents=chunks,
                     embedding=embeddings,
+                    ids=ids,
                     path=output_db,
-                    collection_name='test_collection',
+                    collection_name=QDRANT_COLLECTION_NAME,
                 )
             else:
                 vector_store = Qdrant.from_documents(
                     documents=chunks,
                     embedding=embeddings,
-                    collection_name='test_collection',
+                    ids=ids,
+                    collection_name=QDRANT_COLLECTION_NAME,
                 )
         elif db_type == 'milvus':
             if output_db:
@@ -243,6 +307,7 @@ class VectorDb:
             vector_store = Milvus.from_documents(
                 documents=chunks,
                 embedding=embeddings,
+                ids=ids,
                 collection_name=collection_name,
                 connection_args={'uri': uri},
                 index_params={
@@ -276,11 +341,16 @@ class VectorDb:
             else:
                 vector_store = Chroma(persist_directory=persist_directory, embedding_function=embedding_model)
         elif db_type == 'qdrant':
-            # TODO: Implement Qdrant loading
-            pass
+            from qdrant_client import QdrantClient
+
+            vector_store = Qdrant(
+                client=QdrantClient(path=persist_directory),
+                collection_name=collection_name or QDRANT_COLLECTION_NAME,
+                embeddings=embedding_model,
+            )
         elif db_type == 'milvus':
             if collection_name is None:
-                collection_name = 'LangChainCollection'
+                collection_name = MILVUS_COLLECTION_NAME
             if persist_directory.endswith('.db'):
                 persist_directory = os.path.dirname(persist_directory)
             uri = os.path.join(persist_directory, 'milvus.db')
@@ -308,25 +378,180 @@ class VectorDb:
         db_type: str,
         input_db: Optional[str] = None,
         output_db: Optional[str] = None,
+        collection_name: Optional[str] = None,
+        chunk_params: Optional[Dict[str, Any]] = None,
+        delete_missing_sources: bool = False,
+        source_key: str = 'source',
     ) -> Any:
+        """Incrementally updates an existing vector store with the given chunks
+
+        Only chunks whose fingerprint (see `chunk_fingerprint`) is not yet stored are embedded and added.
+        Stored chunks of the sources in `chunks` that are no longer part of them are deleted, as are the chunks
+        of sources missing from `chunks` entirely if `delete_missing_sources` is set. The changes are logged and
+        kept in `last_update_report`.
+
+        FAISS is loaded from `input_db` and only saved if `output_db` is given. Chroma, Qdrant and Milvus are
+        updated in place at `output_db`, which is seeded with a copy of `input_db` if both paths differ.
+
+        Args:
+            chunks (list): complete, current list of chunks of the updated sources
+            embeddings (HuggingFaceInstructEmbeddings): embedding model
+            db_type (str): vector db type
+            input_db (str, optional): path of the existing vector db. Defaults to None.
+            output_db (str, optional): output path to save the vector db. Defaults to None.
+            collection_name (str, optional): collection to update. Defaults to the backend's default collection.
+            chunk_params (dict, optional): chunking parameters included in the chunk fingerprints. Defaults to None.
+            delete_missing_sources (bool, optional): delete chunks of sources not present in `chunks`.
+                Defaults to False.
+            source_key (str, optional): metadata key holding the chunk source. Defaults to 'source'.
+
+        Returns:
+            the updated vector store
+        """
+        if db_type not in ('faiss', 'chroma', 'qdrant', 'milvus'):
+            raise ValueError(f'Unsupported database type: {db_type}')
+        if input_db is None:
+            raise ValueError('input_db is required to update a vector store')
+
+        persist_directory = input_db
+        if db_type != 'faiss' and output_db and os.path.abspath(output_db) != os.path.abspath(input_db):
+            if os.path.isdir(input_db):
+                shutil.copytree(input_db, output_db, dirs_exist_ok=True)
+            persist_directory = output_db
+
+        vector_store = self.load_vdb(persist_directory, embeddings, db_type=db_type, collection_name=collection_name)
+        self.last_update_report = self.sync_vector_store(
+            vector_store,
+            chunks,
+            db_type,
+            chunk_params=chunk_params,
+            delete_missing_sources=delete_missing_sources,
+            source_key=source_key,
+        )
+        logger.info(f'Vector store updated: {self.last_update_report}')
+
+        if db_type == 'faiss' and output_db:
+            vector_store.save_local(output_db)
+            logger.info(f'Vector store saved to {output_db}')
+
+        return vector_store
+
+    def sync_vector_store(
+        self,
+        vector_store: Any,
+        chunks: List[Any],
+        db_type: str,
+        chunk_params: Optional[Dict[str, Any]] = None,
+        delete_missing_sources: bool = False,
+        source_key: str = 'source',
+    ) -> IndexUpdateReport:
+        """Brings a loaded vector store in line with the given chunks, embedding only new or changed chunks
+
+        Args:
+            vector_store: vector store loaded with `load_vdb` or created with `create_vector_store`
+            chunks (list): complete, current list of chunks of the updated sources
+            db_type (str): vector db type
+            chunk_params (dict, optional): chunking parameters included in the chunk fingerprints. Defaults to None.
+            delete_missing_sources (bool, optional): delete chunks of sources not present in `chunks`.
+                Defaults to False.
+            source_key (str, optional): metadata key holding the chunk source. Defaults to 'source'.
+
+        Returns:
+            IndexUpdateReport: counts of added, unchanged, deleted and duplicate chunks
+        """
+        report = IndexUpdateReport()
+        unique_chunks = self._unique_chunks(chunks, chunk_params, source_key)
+        report.duplicates = len(chunks) - len(unique_chunks)
+
+        stored = dict(self._stored_chunk_sources(vector_store, db_type, source_key))
+        current_sources = {chunk.metadata.get(source_key) for chunk in unique_chunks.values()}
+
+        new_ids = [chunk_id for chunk_id in unique_chunks if chunk_id not in stored]
+        stale_ids = [
+            chunk_id
+            for chunk_id, source in stored.items()
+            if chunk_id not in unique_chunks and (delete_missing_sources or source in current_sources)
+        ]
+        report.added = len(new_ids)
+        report.unchanged = len(unique_chunks) - len(new_ids)
+        report.deleted = len(stale_ids)
+        report.deleted_sources = sorted(
+            {str(stored[chunk_id]) for chunk_id in stale_ids if stored[chunk_id] not in current_sources}
+        )
+
+        # add before deleting, so that a failed update never leaves a source without chunks
+        for start in range(0, len(new_ids), UPDATE_BATCH_SIZE):
+            batch_ids = new_ids[start : start + UPDATE_BATCH_SIZE]
+            vector_store.add_documents([unique_chunks[chunk_id] for chunk_id in batch_ids], ids=batch_ids)
+        for start in range(0, len(stale_ids), UPDATE_BATCH_SIZE):
+            vector_store.delete(ids=stale_ids[start : start + UPDATE_BATCH_SIZE])
+
+        return report
+
+    @staticmethod
+    def _unique_chunks(
+        chunks: List[Any], chunk_params: Optional[Dict[str, Any]] = None, source_key: str = 'source'
+    ) -> Dict[str, Any]:
+        """Maps chunk fingerprints to chunks, keeping the first of identical chunks"""
+        unique_chunks: Dict[str, Any] = {}
+        for chunk in chunks:
+            unique_chunks.setdefault(chunk_fingerprint(chunk, chunk_params, source_key), chunk)
+        return unique_chunks
+
+    def _stored_chunk_sources(self, vector_store: Any, db_type: str, source_key: str) -> Iterator[Tuple[str, Any]]:
+        """Lists (chunk id, source) of all chunks stored in a vector store"""
         if db_type == 'faiss':
-            vector_store = FAISS.load_local(input_db, embeddings, allow_dangerous_deserialization=True)  # type: ignore
-            new_vector_store = self.create_vector_store(chunks, embeddings, db_type, None)
-            vector_store.merge_from(new_vector_store)
-            if output_db:
-                vector_store.save_local(output_db)
+            for chunk_id in vector_store.index_to_docstore_id.values():
+                doc = vector_store.docstore.search(chunk_id)
+                yield chunk_id, doc.metadata.get(source_key) if isinstance(doc, Document) else None
 
         elif db_type == 'chroma':
-            # TODO implement update method for chroma
-            pass
+            offset = 0
+            while True:
+                result = vector_store.get(include=['metadatas'], limit=UPDATE_BATCH_SIZE, offset=offset)
+                for chunk_id, metadata in zip(result['ids'], result['metadatas']):
+                    yield chunk_id, (metadata or {}).get(source_key)
+                if len(result['ids']) < UPDATE_BATCH_SIZE:
+                    break
+                offset += UPDATE_BATCH_SIZE
+
         elif db_type == 'qdrant':
-            # TODO implement update method for qdrant
-            pass
-        elif db_type == 'milvus':
-            # TODO implement update method for milvus
-            pass
+            if not vector_store.client.collection_exists(vector_store.collection_name):
+                return
+            next_offset = None
+            while True:
+                points, next_offset = vector_store.client.scroll(
+                    collection_name=vector_store.collection_name,
+                    limit=UPDATE_BATCH_SIZE,
+                    offset=next_offset,
+                    with_payload=[vector_store.metadata_payload_key],
+                    with_vectors=False,
+                )
+                for point in points:
+                    metadata = (point.payload or {}).get(vector_store.metadata_payload_key) or {}
+                    yield str(point.id), metadata.get(source_key)
+                if next_offset is None:
+                    break
 
-        return vector_store
+        elif db_type == 'milvus':
+            collection = vector_store.col
+            if collection is None:
+                return
+            primary_field = vector_store._primary_field
+            field_names = {field.name for field in collection.schema.fields}
+            output_fields = [primary_field] + ([source_key] if source_key in field_names else [])
+            iterator = collection.query_iterator(
+                batch_size=UPDATE_BATCH_SIZE, expr=f'{primary_field} != ""', output_fields=output_fields
+            )
+            try:
+                while True:
+                    rows = iterator.next()
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row[primary_field], row.get(source_key)
+            finally:
+                iterator.close()
 
     def create_vdb(
         self,
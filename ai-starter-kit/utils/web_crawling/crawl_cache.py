@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from pydantic import BaseModel, Field
+
+from utils.sqlite_cache import SqliteLRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_MB = 1024
+
+
+class CachedPage(BaseModel):
+    """A crawled page as stored in the crawl cache"""
+
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: str
+    body: bytes = b''
+    text: str
+    metadata: Dict[str, str] = Field(default_factory=dict)
+    links: List[str] = Field(default_factory=list)
+    fetched: float = 0.0
+
+    def document(self) -> Document:
+        """Returns the cleaned page as a langchain document, like a fresh crawl would"""
+        return Document(page_content=self.text, metadata={'source': self.url, **self.metadata})
+
+
+class CrawlCache:
+    """Local cache of crawled pages, used to revalidate pages instead of downloading and cleaning them again.
+
+    For each url the sqlite database in `cache_dir` stores the compressed body, the ETag and Last-Modified
+    validators sent by the server, the hash of the body, the plain text the page was cleaned to and its links.
+    The crawler sends the validators in conditional requests, and reuses the cached text when the server answers
+    304 Not Modified or the body hash did not change. The database is limited to `max_bytes` of compressed pages;
+    when it grows beyond that, the least recently used pages are evicted (see `SqliteLRUCache`).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'crawl_cache.sqlite3')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._store = SqliteLRUCache(self.db_path, 'crawled_pages', max_bytes, value_column='page')
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        blob = self._store.get(url)
+        if blob is None:
+            return None
+        # header fields as json, then the body; json.dumps escapes newlines, so the first one ends the header
+        header, _, body = zlib.decompress(blob).partition(b'\n')
+        return CachedPage(**json.loads(header), body=body)
+
+    def put(self, page: CachedPage) -> None:
+        header = page.model_dump(exclude={'body'})
+        header['fetched'] = page.fetched or time.time()
+        self._store.put(page.url, zlib.compress(json.dumps(header).encode('utf-8') + b'\n' + page.body))
+
+    def revalidated(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Records that the cached page is still current, keeping the validators if the server sent no new ones"""
+        with self._lock:
+            page = self.get(url)
+            if page is None:
+                return
+            page.etag = etag or page.etag
+            page.last_modified = last_modified or page.last_modified
+            page.fetched = time.time()
+            self.put(page)
+
+    def close(self) -> None:
+        self._store.close()
+
+
+def load_crawl_cache(cache_dir: Optional[str], max_mb: float = DEFAULT_CACHE_MAX_MB) -> Optional[CrawlCache]:
+    """Returns the crawl cache in `cache_dir`, limited to `max_mb` of compressed pages, or None if no directory is
+    set (caching disabled)"""
+    if not cache_dir:
+        return None
+    logger.info(f'Using crawl cache in {cache_dir}')
+    return CrawlCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024))
@@ -0,0 +1,410 @@
+import asyncio
+import codecs
+import hashlib
+import logging
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse, urlunparse
+
+import aiohttp
+import html2text
+from langchain_community.document_loaders.async_html import default_header_template
+from langchain_core.documents import Document
+
+from utils.web_crawling.crawl_cache import CachedPage, CrawlCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_PER_HOST_CONCURRENCY = 2
+DEFAULT_PER_HOST_RATE = 4.0
+DEFAULT_REQUEST_TIMEOUT = 30.0
+DEFAULT_MAX_PAGE_BYTES = 10 * 1024 * 1024
+SKIPPED_LINK_PREFIXES = ('#', 'data:', 'javascript:', 'mailto:', 'tel:')
+EXCLUDED_LINK_SUFFIXES = ('.ico', '.svg', '.jpg', '.png', '.jpeg', '.', '.docx', '.xls', '.xlsx')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# links are only taken from the first of these containers found in a page, in this order of preference
+CONTENT_CONTAINERS = ('main', 'article', 'content')
+CONTAINER_TAGS = {'main': 'main', 'article': 'article', 'content': 'div'}
+
+
+def normalize_url(url: str) -> str:
+    """Returns a canonical form of the url, so that equivalent urls are crawled once.
+
+    The scheme and host are lowercased, default ports and the fragment are dropped and an empty path becomes '/'.
+    """
+    url, _ = urldefrag(url.strip())
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or '').lower()
+    if parsed.port is not None and parsed.port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{parsed.port}'
+    if parsed.username:
+        credentials = parsed.username if parsed.password is None else f'{parsed.username}:{parsed.password}'
+        netloc = f'{credentials}@{netloc}'
+    return urlunparse((scheme, netloc, parsed.path or '/', parsed.params, parsed.query, ''))
+
+
+class PageParser(html2text.HTML2Text):
+    """Streaming HTML parser converting a page to plain text while collecting its metadata and the links of its main
+    content, so that a page is parsed once.
+
+    Html can be fed in chunks as it is downloaded. The text is converted with the settings of langchain's
+    Html2TextTransformer. Links are taken from the first `main` element, or else the first `article`, or else the
+    first `div` with class `content`; pages without any of them have no links.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.ignore_links = True
+        self.ignore_images = True
+        self.start = True
+        self.metadata: Dict[str, str] = {}
+        self._title: Optional[List[str]] = None
+        self._links: Dict[str, List[str]] = {kind: [] for kind in CONTENT_CONTAINERS}
+        # nesting depth of the container tag while inside the first container of each kind
+        self._open: Dict[str, int] = {}
+        self._seen: Set[str] = set()
+
+    def _container_kind(self, tag: str, attrs: Dict[str, Optional[str]]) -> Optional[str]:
+        if tag in ('main', 'article'):
+            return tag
+        if tag == 'div' and 'content' in (attrs.get('class') or '').split():
+            return 'content'
+        return None
+
+    def handle_tag(self, tag: str, attrs: Dict[str, Optional[str]], start: bool) -> None:
+        if start:
+            self._handle_start(tag, attrs)
+        else:
+            self._handle_end(tag)
+        super().handle_tag(tag, attrs, start)
+
+    def _handle_start(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        if tag == 'html' and attrs.get('lang'):
+            self.metadata.setdefault('language', attrs['lang'] or '')
+        elif tag == 'title' and 'title' not in self.metadata:
+            self._title = []
+        elif tag == 'meta' and (attrs.get('name') or '').lower() == 'description':
+            self.metadata.setdefault('description', attrs.get('content') or '')
+
+        for open_kind in self._open:
+            if tag == CONTAINER_TAGS[open_kind]:
+                self._open[open_kind] += 1
+        kind = self._container_kind(tag, attrs)
+        if kind is not None and kind not in self._seen:
+            self._seen.add(kind)
+            self._open[kind] = 1
+
+        if tag == 'a' and attrs.get('href'):
+            for open_kind in self._open:
+                self._links[open_kind].append(attrs['href'] or '')
+
+    def _handle_end(self, tag: str) -> None:
+        if tag == 'title' and self._title is not None:
+            self.metadata['title'] = ''.join(self._title)
+            self._title = None
+        for kind in list(self._open):
+            if tag == CONTAINER_TAGS[kind]:
+                self._open[kind] -= 1
+                if self._open[kind] == 0:
+                    del self._open[kind]
+
+    def handle_data(self, data: str, entity_char: bool = False) -> None:
+        if self._title is not None:
+            self._title.append(data)
+        super().handle_data(data, entity_char)
+
+    @property
+    def links(self) -> List[str]:
+        """hrefs of the links of the main content, in document order"""
+        for kind in CONTENT_CONTAINERS:
+            if kind in self._seen:
+                return self._links[kind]
+        return []
+
+    def text(self) -> str:
+        """Ends the parsing and returns the plain text of the page"""
+        self.feed('')
+        text = self.optwrap(self.finish())
+        if self.pad_tables:
+            text = html2text.utils.pad_tables_in_text(text)
+        return text
+
+
+def extract_links(base_url: str, hrefs: List[str]) -> List[str]:
+    """Resolves the crawlable hrefs of a page to absolute urls, skipping anchors, data, scripts and media files"""
+    links = []
+    for href in dict.fromkeys(hrefs):
+        if href.startswith(SKIPPED_LINK_PREFIXES) or href.endswith(EXCLUDED_LINK_SUFFIXES):
+            continue
+        full_url = urljoin(base_url, href).partition('#')[0]
+        if full_url.startswith(('http://', 'https://')):
+            links.append(full_url)
+    return links
+
+
+class _HostLimiter:
+    """Limits the number of requests in flight to a host and the rate at which they are started"""
+
+    def __init__(self, concurrency: int, rate: float) -> None:
+        self.semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_start = 0.0
+
+    async def __aenter__(self) -> None:
+        await self.semaphore.acquire()
+        try:
+            if self.interval:
+                now = asyncio.get_running_loop().time()
+                start = max(now, self.next_start)
+                # book the slot before sleeping, so concurrent requests are spaced by the interval
+                self.next_start = start + self.interval
+                await asyncio.sleep(start - now)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    async def __aexit__(self, *args: object) -> None:
+        self.semaphore.release()
+
+
+class AsyncCrawler:
+    """Concurrent breadth-first web crawler returning the plain text of the crawled pages.
+
+    Urls wait in a frontier queue served by `max_concurrency` workers. Each host gets at most
+    `per_host_concurrency` requests in flight, started at most `per_host_rate` times per second. Urls are
+    normalized before being queued, so each page is fetched once, and no more than `max_pages` pages are fetched.
+    Pages are parsed while they download: their links are extracted and their html converted to text on the fly,
+    so without a cache the html of a page is never held in memory as a whole. With a `CrawlCache`, pages crawled
+    before are revalidated with conditional requests, and their cached text is reused if they did not change; the
+    cache stores the raw body, so each page (at most `max_page_bytes`) is then buffered to be hashed and stored,
+    and pages in the cache are only parsed once their hash shows they changed. Cache reads and writes run in the
+    default executor, off the event loop.
+
+    Example:
+        .. code-block:: python
+
+            crawler = AsyncCrawler(max_pages=500, excluded_links=['facebook.com'])
+            async for doc in crawler.crawl(['https://sambanova.ai/'], depth=2):
+                chunks.extend(splitter.split_documents([doc]))
+    """
+
+    def __init__(
+        self,
+        max_pages: int = 20,
+        excluded_links: Optional[List[str]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+        per_host_rate: float = DEFAULT_PER_HOST_RATE,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+        pdf_loader: Optional[Callable[[str], List[Document]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        verify_ssl: bool = True,
+        cache: Optional[CrawlCache] = None,
+    ) -> None:
+        """
+        Args:
+            max_pages (int, optional): max number of pages fetched. Defaults to 20.
+            excluded_links (list, optional): links whose host and path exclude the urls containing them from the
+                crawl. Defaults to None.
+            max_concurrency (int, optional): max number of pages fetched at once. Defaults to 16.
+            per_host_concurrency (int, optional): max number of pages fetched at once from one host. Defaults to 2.
+            per_host_rate (float, optional): max number of requests per second to one host, 0 for no limit.
+                Defaults to 4.
+            request_timeout (float, optional): timeout in seconds of a page download. Defaults to 30.
+            max_page_bytes (int, optional): pages are truncated to this size. Defaults to 10 MB.
+            pdf_loader (callable, optional): loads the documents of a '.pdf' url, pdf urls are skipped if not set.
+            headers (dict, optional): request headers. Defaults to browser like headers.
+            verify_ssl (bool, optional): whether to verify ssl certificates, only disable it for sites you trust.
+                Defaults to True.
+            cache (CrawlCache, optional): cache of previously crawled pages, which are then revalidated with
+                conditional requests instead of being downloaded and cleaned again. Defaults to None.
+        """
+        self.max_pages = max_pages
+        self.excluded_links = excluded_links or []
+        self._excluded_parts = [urlparse(link).netloc + urlparse(link).path for link in self.excluded_links]
+        self.max_concurrency = max(max_concurrency, 1)
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.request_timeout = request_timeout
+        self.max_page_bytes = max_page_bytes
+        self.pdf_loader = pdf_loader
+        self.headers = headers if headers is not None else self._default_headers()
+        self.verify_ssl = verify_ssl
+        self.cache = cache
+        self.crawled_urls: List[str] = []
+        # crawled urls whose cached page was still current
+        self.unchanged_urls: Set[str] = set()
+
+    @staticmethod
+    def _default_headers() -> Dict[str, str]:
+        headers = dict(default_header_template)
+        try:
+            from fake_useragent import UserAgent
+
+            headers['User-Agent'] = UserAgent().random
+        except ImportError:
+            pass
+        return headers
+
+    async def crawl(self, urls: List[str], depth: int = 1) -> AsyncIterator[Document]:
+        """Crawls the urls and the pages they link to, yielding the text documents as soon as they are ready.
+
+        Args:
+            urls (list): urls to start from.
+            depth (int, optional): number of layers of pages fetched, 1 only fetches the given urls. Defaults to 1.
+
+        Yields:
+            Document: the plain text of a page, with its url as source; or the documents of a pdf
+        """
+        self.crawled_urls = []
+        self.unchanged_urls = set()
+        # normalized urls already queued or rejected, only grows until max_pages urls are queued
+        seen: Set[str] = set()
+        scheduled = 0
+        frontier: asyncio.Queue[Tuple[str, int]] = asyncio.Queue()
+        # bounded, so that crawling pauses while the consumer is busy with the documents
+        results: asyncio.Queue[Optional[Document]] = asyncio.Queue(maxsize=self.max_concurrency * 2)
+        hosts: Dict[str, _HostLimiter] = {}
+
+        def enqueue(url: str, level: int, check_excluded: bool = True) -> None:
+            nonlocal scheduled
+            if scheduled >= self.max_pages:
+                return
+            if url in seen:
+                return
+            # the url as found is remembered too, so that links repeated across pages are not normalized again
+            seen.add(url)
+            key = normalize_url(url)
+            if key != url:
+                if key in seen:
+                    return
+                seen.add(key)
+            if check_excluded and any(part in key for part in self._excluded_parts):
+                return
+            scheduled += 1
+            frontier.put_nowait((key, level))
+
+        async def worker(session: aiohttp.ClientSession) -> None:
+            while True:
+                url, level = await frontier.get()
+                try:
+                    host = urlparse(url).netloc
+                    if host not in hosts:
+                        hosts[host] = _HostLimiter(self.per_host_concurrency, self.per_host_rate)
+                    async with hosts[host]:
+                        self.crawled_urls.append(url)
+                        docs, links = await self._load(session, url)
+                    for doc in docs:
+                        await results.put(doc)
+                    if level + 1 < depth:
+                        for link in links:
+                            enqueue(link, level + 1)
+                except Exception as e:
+                    logger.warning(f'Error crawling {url}: {e}')
+                finally:
+                    frontier.task_done()
+
+        async def run(session: aiohttp.ClientSession) -> None:
+            workers = [asyncio.create_task(worker(session)) for _ in range(self.max_concurrency)]
+            try:
+                await frontier.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            await results.put(None)
+
+        for url in urls:
+            enqueue(url, 0, check_excluded=False)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ssl=self.verify_ssl)
+        async with aiohttp.ClientSession(headers=self.headers, timeout=timeout, connector=connector) as session:
+            runner = asyncio.create_task(run(session))
+            try:
+                while (doc := await results.get()) is not None:
+                    yield doc
+            finally:
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+
+    @staticmethod
+    def _decoder(charset: Optional[str]) -> codecs.IncrementalDecoder:
+        try:
+            decoder_class = codecs.getincrementaldecoder(charset or 'utf-8')
+        except LookupError:
+            decoder_class = codecs.getincrementaldecoder('utf-8')
+        return decoder_class(errors='replace')
+
+    async def _load(self, session: aiohttp.ClientSession, url: str) -> Tuple[List[Document], List[str]]:
+        """Fetches a page, returns its documents and the links of its main content"""
+        if url.endswith('.pdf'):
+            if self.pdf_loader is None:
+                return [], []
+            return await asyncio.to_thread(self.pdf_loader, url), []
+
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self.cache.get, url) if self.cache is not None else None
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        async with session.get(url, headers=headers) as response:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status == 304 and cached is not None:
+                return await self._unchanged(cached, etag, last_modified)
+            response.raise_for_status()
+            if response.content_type not in ('text/html', 'application/xhtml+xml', 'text/plain', ''):
+                logger.info(f'Skipping {url} with content type {response.content_type}')
+                return [], []
+            decoder = self._decoder(response.charset)
+            parser = PageParser()
+            # with a cache the body is kept to be hashed and stored, and only parsed if it changed
+            body = bytearray()
+            size = 0
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                if self.cache is not None:
+                    body.extend(chunk)
+                if cached is None:
+                    parser.feed(decoder.decode(chunk))
+                size += len(chunk)
+                if size >= self.max_page_bytes:
+                    logger.info(f'Truncating {url} at {size} bytes')
+                    break
+            base_url = str(response.url)
+
+        content_hash = hashlib.sha256(body).hexdigest()
+        if cached is not None:
+            if content_hash == cached.content_hash:
+                return await self._unchanged(cached, etag, last_modified)
+            parser.feed(decoder.decode(bytes(body)))
+        parser.feed(decoder.decode(b'', final=True))
+
+        doc = Document(page_content=parser.text(), metadata={'source': url, **parser.metadata})
+        links = extract_links(base_url, parser.links)
+        if self.cache is not None:
+            page = CachedPage(
+                url=url,
+                etag=etag,
+                last_modified=last_modified,
+                content_hash=content_hash,
+                body=bytes(body),
+                text=doc.page_content,
+                metadata=parser.metadata,
+                links=links,
+            )
+            await loop.run_in_executor(None, self.cache.put, page)
+        return [doc], links
+
+    async def _unchanged(
+        self, cached: CachedPage, etag: Optional[str], last_modified: Optional[str]
+    ) -> Tuple[List[Document], List[str]]:
+        assert self.cache is not None
+        await asyncio.get_running_loop().run_in_executor(None, self.cache.revalidated, cached.url, etag, last_modified)
+        self.unchanged_urls.add(cached.url)
+        return [cached.document()], cached.links
@@ -0,0 +1,158 @@
+"""
+Unit tests of the crawl cache and of the conditional requests the async crawler sends with it,
+against a local aiohttp server.
+
+Usage:
+    python -m pytest utils/web_crawling/tests/test_crawl_cache.py
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.abspath(os.path.join(file_dir, '../../..'))
+sys.path.append(repo_dir)
+
+from langchain_core.documents import Document
+
+from utils.web_crawling.crawl_cache import CachedPage, CrawlCache
+from utils.web_crawling.crawler import AsyncCrawler
+
+
+def make_page(url: str, body: bytes = b'<p>Hello</p>', text: str = 'Hello') -> CachedPage:
+    return CachedPage(
+        url=url,
+        etag='"v1"',
+        content_hash='hash',
+        body=body,
+        text=text,
+        metadata={'title': 'Hello'},
+        links=['http://example.com/b'],
+        fetched=1.0,
+    )
+
+
+def texts(docs: List[Document]) -> Dict[str, str]:
+    return {doc.metadata['source']: doc.page_content for doc in docs}
+
+
+class TestCrawlCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self) -> None:
+        cache = CrawlCache(self.tmp_dir.name)
+        # the body may contain newlines, which also separate the header from the body
+        page = make_page('http://example.com/a', body=b'<p>\nHello\n</p>')
+        cache.put(page)
+        self.assertEqual(cache.get('http://example.com/a'), page)
+        self.assertIsNone(cache.get('http://example.com/missing'))
+        cache.close()
+
+        # the pages survive reopening the cache
+        cache = CrawlCache(self.tmp_dir.name)
+        self.assertEqual(cache.get('http://example.com/a'), page)
+        cache.close()
+
+    def test_revalidated_keeps_validators_the_server_did_not_resend(self) -> None:
+        cache = CrawlCache(self.tmp_dir.name)
+        cache.put(make_page('http://example.com/a'))
+        cache.revalidated('http://example.com/a', None, 'Mon, 01 Jan 2024 00:00:00 GMT')
+        cache.revalidated('http://example.com/missing', '"v2"', None)
+
+        page = cache.get('http://example.com/a')
+        assert page is not None
+        self.assertEqual(page.etag, '"v1"')
+        self.assertEqual(page.last_modified, 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertGreater(page.fetched, 1.0)
+        self.assertIsNone(cache.get('http://example.com/missing'))
+        cache.close()
+
+    def test_least_recently_used_pages_are_evicted(self) -> None:
+        cache = CrawlCache(self.tmp_dir.name, max_bytes=4000)
+        for i in range(3):
+            cache.put(make_page(f'http://example.com/{i}', body=os.urandom(1500)))
+        self.assertIsNone(cache.get('http://example.com/0'))
+        self.assertIsNotNone(cache.get('http://example.com/2'))
+        cache.close()
+
+
+class TestCrawlerWithCache(unittest.TestCase):
+    """Crawls a local server twice with the same cache"""
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pages: Dict[str, bytes] = {
+            '/etag': b'<html><body><main><p>With ETag</p></main></body></html>',
+            '/plain': b'<html><body><main><p>Without validators</p></main></body></html>',
+        }
+        self.requests: List[Optional[str]] = []
+        # the same port for both crawls, so that the urls match the cached ones
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append(request.headers.get('If-None-Match'))
+        body = self.pages[request.path]
+        if request.path != '/etag':
+            return web.Response(body=body, content_type='text/html')
+        etag = f'"{hash(body)}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=body, content_type='text/html', headers={'ETag': etag})
+
+    async def crawl(self, paths: List[str]) -> List[Document]:
+        app = web.Application()
+        app.router.add_get('/{name}', self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', self.port)
+        await site.start()
+        self.crawler = AsyncCrawler(per_host_rate=0, headers={}, cache=self.cache)
+        try:
+            return [doc async for doc in self.crawler.crawl([f'http://127.0.0.1:{self.port}{path}' for path in paths])]
+        finally:
+            await runner.cleanup()
+
+    def test_unchanged_pages_are_reused(self) -> None:
+        self.cache = CrawlCache(self.tmp_dir.name)
+        first = asyncio.run(self.crawl(['/etag', '/plain']))
+        self.assertEqual(self.crawler.unchanged_urls, set())
+        self.assertEqual(self.requests, [None, None])
+
+        self.requests.clear()
+        second = asyncio.run(self.crawl(['/etag', '/plain']))
+        # the ETag page is revalidated with a 304, the other one by the hash of its body
+        self.assertEqual(len(self.crawler.unchanged_urls), 2)
+        self.assertCountEqual(self.requests, [None, f'"{hash(self.pages["/etag"])}"'])
+        self.assertEqual(texts(second), texts(first))
+        self.cache.close()
+
+    def test_changed_pages_are_parsed_again(self) -> None:
+        self.cache = CrawlCache(self.tmp_dir.name)
+        asyncio.run(self.crawl(['/etag', '/plain']))
+
+        self.pages['/etag'] = b'<html><body><main><p>New ETag page</p></main></body></html>'
+        self.pages['/plain'] = b'<html><body><main><p>New plain page</p></main></body></html>'
+        docs = asyncio.run(self.crawl(['/etag', '/plain']))
+        self.assertEqual(self.crawler.unchanged_urls, set())
+        self.assertEqual(sorted(doc.page_content.strip() for doc in docs), ['New ETag page', 'New plain page'])
+        self.cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,11 @@
+import asyncio
 import os
 import sys
-from typing import Dict, List, Optional, Set, Tuple
-from urllib.parse import urldefrag, urljoin, urlparse
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
 
 import nest_asyncio
 import yaml
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from langchain.chains import RetrievalQA
 from langchain.docstore.document import Document
@@ -26,6 +26,15 @@ sys.path.append(repo_dir)
 from typing import Any, Dict, List
 
 from utils.vectordb.vector_db import VectorDb
+from utils.web_crawling.crawl_cache import DEFAULT_CACHE_MAX_MB as DEFAULT_CRAWL_CACHE_MAX_MB, load_crawl_cache
+from utils.web_crawling.crawler import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_PER_HOST_CONCURRENCY,
+    DEFAULT_PER_HOST_RATE,
+    AsyncCrawler,
+    PageParser,
+    extract_links,
+)
 
 load_dotenv(os.path.join(repo_dir, '.env'))
 nest_asyncio.apply()
@@ -57,8 +66,14 @@ class WebCrawlingRetrieval:
         self.llm_info = config_info[2]
         self.retrieval_info = config_info[3]
         self.web_crawling_params = config_info[4]
+        # opened once and reused by every crawl, pages crawled before are then revalidated with conditional requests
+        self.crawl_cache = load_crawl_cache(
+            self.web_crawling_params.get('cache_dir'),
+            self.web_crawling_params.get('cache_max_mb', DEFAULT_CRAWL_CACHE_MAX_MB),
+        )
         self.extra_loaders = config_info[5]
         self.vectordb = VectorDb()
+        self.unchanged_urls: Set[str] = set()
 
     def _get_config_info(
         self, config_path: Optional[str] = CONFIG_PATH
@@ -114,15 +129,17 @@ class WebCrawlingRetrieval:
         if extra_loaders is None:
             extra_loaders = []
         docs = []
+        html_urls = []
         for url in urls:
             if url.endswith('.pdf'):
                 if 'pdf' in extra_loaders:
                     docs.extend(WebCrawlingRetrieval.load_remote_pdf(url))
-                else:
-                    continue
             else:
-                loader = AsyncHtmlLoader(url, verify_ssl=False)
-                docs.extend(loader.load())
+                html_urls.append(url)
+        if html_urls:
+            # a single loader fetches all the pages concurrently
+            loader = AsyncHtmlLoader(html_urls, verify_ssl=False)
+            docs.extend(loader.load())
         return docs
 
     @staticmethod
@@ -159,24 +176,11 @@ class WebCrawlingRetrieval:
         if excluded_links is None:
             excluded_links = []
         all_links = set()
-        excluded_link_suffixes = {'.ico', '.svg', '.jpg', '.png', '.jpeg', '.', '.docx', '.xls', '.xlsx'}
         for doc in docs:
-            page_content = doc.page_content
-            base_url = doc.metadata['source']
-            # excluded_links.append(base_url) #enable this to prevent to crawl inside the same root website
-            soup = BeautifulSoup(page_content, 'html.parser')
-            # Identify the main content section (customize based on HTML structure)
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-            if main_content:
-                links = main_content.find_all('a', href=True)
-                for link in links:
-                    href = link['href']
-                    # Check if the link is not an anchor link and not in the excluded links or suffixes
-                    if not href.startswith(('#', 'data:', 'javascript:')) and not any(
-                        href.endswith(suffix) for suffix in excluded_link_suffixes
-                    ):
-                        full_url, _ = urldefrag(urljoin(base_url, href))
-                        all_links.add(full_url)
+            # excluded_links.append(doc.metadata['source']) #enable this to prevent to crawl inside the same website
+            parser = PageParser()
+            parser.feed(doc.page_content)
+            all_links.update(extract_links(doc.metadata['source'], parser.links))
         all_links = WebCrawlingRetrieval.link_filter(all_links, set(excluded_links))
         return all_links
 
@@ -194,16 +198,24 @@ class WebCrawlingRetrieval:
         return docs
 
     def web_crawl(
-        self, urls: Set[str], excluded_links: Optional[List[str]] = None, depth: int = 1
+        self,
+        urls: Set[str],
+        excluded_links: Optional[List[str]] = None,
+        depth: int = 1,
+        on_document: Optional[Callable[[Document], None]] = None,
     ) -> Tuple[List[Document], List[str]]:
         """
         Perform web crawling, retrieve and clean HTML documents from the given URLs, with specified depth
-        of exploration.
+        of exploration. Pages are fetched concurrently, see AsyncCrawler, with the limits set in the web_crawling
+        section of the config. If a cache_dir is set there, pages crawled before are revalidated with conditional
+        requests, the ones that did not change are kept in unchanged_urls.
         Args:
             urls (list): A list of URLs to crawl.
             excluded_links (list, optional): A list of links to exclude from crawling. Defaults to None.
             depth (int, optional): The depth of crawling, determining how many layers of internal links to explore.
             Defaults to 1
+            on_document (callable, optional): Called with each cleaned document as soon as it is crawled, e.g. to
+            chunk the documents while the crawl goes on. Defaults to None.
         Returns:
             tuple: A tuple containing the langchain documents (list) and the scrapped URLs (list).
         """
@@ -214,25 +226,28 @@ class WebCrawlingRetrieval:
             depth > self.web_crawling_params['max_depth']
         ):  # Max depth change with precaution number of sites grow exponentially
             depth = self.web_crawling_params['max_depth']
-        scraped_urls: List[Any] = []
-        raw_docs: List[Any] = []
-        for _ in range(depth):
-            if len(scraped_urls) + len(urls) >= self.web_crawling_params['max_scraped_websites']:
-                list_urls = list(urls)[: self.web_crawling_params['max_scraped_websites'] - len(scraped_urls)]
-                urls = set(list_urls)
-
-            scraped_docs = WebCrawlingRetrieval.load_htmls(urls, self.extra_loaders)
-            scraped_urls.extend(urls)
-            urls = WebCrawlingRetrieval.find_links(scraped_docs, excluded_links)
-
-            excluded_links.extend(scraped_urls)
-            raw_docs.extend(scraped_docs)
+        crawler = AsyncCrawler(
+            max_pages=self.web_crawling_params['max_scraped_websites'],
+            excluded_links=excluded_links,
+            max_concurrency=self.web_crawling_params.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+            per_host_concurrency=self.web_crawling_params.get('per_host_concurrency', DEFAULT_PER_HOST_CONCURRENCY),
+            per_host_rate=self.web_crawling_params.get('per_host_rate', DEFAULT_PER_HOST_RATE),
+            pdf_loader=WebCrawlingRetrieval.load_remote_pdf if 'pdf' in self.extra_loaders else None,
+            verify_ssl=self.web_crawling_params.get('verify_ssl', True),
+            cache=self.crawl_cache,
+        )
 
-            if len(scraped_urls) == self.web_crawling_params['max_scraped_websites']:
-                break
+        async def crawl() -> List[Document]:
+            docs = []
+            async for doc in crawler.crawl(list(urls), depth):
+                if on_document is not None:
+                    on_document(doc)
+                docs.append(doc)
+            return docs
 
-        docs = WebCrawlingRetrieval.clean_docs(raw_docs)
-        return docs, scraped_urls
+        docs = asyncio.run(crawl())
+        self.unchanged_urls = crawler.unchanged_urls
+        return docs, crawler.crawled_urls
 
     def init_llm_model(self) -> None:
         """
@@ -263,6 +278,9 @@ class WebCrawlingRetrieval:
             batch_size=self.embedding_model_info['batch_size'],
             bundle=self.embedding_model_info['bundle'],
             select_expert=self.embedding_model_info['select_expert'],
+            cache=self.embedding_model_info.get('cache'),
+            max_concurrency=self.embedding_model_info.get('max_concurrency', 1),
+            adaptive_batch_size=self.embedding_model_info.get('adaptive_batch_size', False),
         )
 
         if os.path.exists(persist_directory) and not force_reload and not update:
@@ -310,6 +328,9 @@ class WebCrawlingRetrieval:
             batch_size=self.embedding_model_info['batch_size'],
             bundle=self.embedding_model_info['bundle'],
             select_expert=self.embedding_model_info['select_expert'],
+            cache=self.embedding_model_info.get('cache'),
+            max_concurrency=self.embedding_model_info.get('max_concurrency', 1),
+            adaptive_batch_size=self.embedding_model_info.get('adaptive_batch_size', False),
         )
         if update:
             self.config['update'] = True
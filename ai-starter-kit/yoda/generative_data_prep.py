@@ -1,10 +1,43 @@
 import os
 import json
 
-def preprocess_data(input_file, output_path, max_seq_length=4096, shuffle=True):
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from tools.training_data import ARROW_SUFFIX, TrainingDataReader, iter_jsonl_records, write_records
+
+def preprocess_data(
+    input_file: str,
+    output_path: str,
+    max_seq_length: int = 4096,
+    shuffle: bool = True,
+    output_format: str = "jsonl",
+) -> str:
+    """
+    Kürzt die Texte auf `max_seq_length` Zeichen und schreibt die Trainingsdaten.
+
+    Standardmäßig entsteht wie bisher `preprocessed_data.jsonl`. Mit `output_format="arrow"` (so ruft die
+    YoDA-Pipeline das Skript auf) entsteht `preprocessed_data.arrow` (siehe `tools/training_data.py`), das
+    ohne JSON-Parsen per Memory-Mapping gelesen wird. Die Eingabe kann JSONL oder eine bereits konvertierte
+    Arrow-Datei sein.
+    """
     os.makedirs(output_path, exist_ok=True)
+
+    if output_format == "arrow":
+        processed_file = os.path.join(output_path, "preprocessed_data" + ARROW_SUFFIX)
+        if input_file.endswith(ARROW_SUFFIX):
+            _truncate_arrow(input_file, processed_file, max_seq_length)
+        else:
+            records = (
+                {"text": data.get("text", "")[:max_seq_length], "label": data.get("label", {})}
+                for data in iter_jsonl_records(input_file)
+            )
+            write_records(records, processed_file)
+        print(f"Preprocessing abgeschlossen: {processed_file}")
+        return processed_file
+
     processed_file = os.path.join(output_path, "preprocessed_data.jsonl")
-    
+
     with open(input_file, "r") as infile, open(processed_file, "w") as outfile:
         for line in infile:
             data = json.loads(line)
@@ -17,10 +50,27 @@ def preprocess_data(input_file, output_path, max_seq_length=4096, shuffle=True):
             }
             json.dump(processed_entry, outfile)
             outfile.write("\n")
-    
+
     print(f"Preprocessing abgeschlossen: {processed_file}")
+    return processed_file
+
+
+def _truncate_arrow(input_file: str, processed_file: str, max_seq_length: int) -> None:
+    """
+    Kürzt die Textspalte einer Arrow-Datei spaltenweise, ohne die Einträge einzeln zu lesen.
+    """
+    with TrainingDataReader(input_file) as reader:
+        table = reader.table.select([name for name in ("text", "label") if name in reader.table.column_names])
+        if "text" in table.column_names:
+            text = pc.utf8_slice_codeunits(table.column("text"), 0, max_seq_length)
+            table = table.set_column(table.column_names.index("text"), "text", text)
+        elif table.num_rows:
+            raise ValueError(f"Arrow-Datei ohne Textspalte: {input_file}")
+        # Leere Dateien (ohne Einträge geschrieben) haben keine Spalten und werden unverändert übernommen
+        with pa.OSFile(processed_file, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
 
 if __name__ == "__main__":
     input_path = "../data_extraction/data/training_data.jsonl"
     output_dir = "./data/output/preprocessed"
-    preprocess_data(input_path, output_dir)
+    preprocess_data(input_path, output_dir, output_format="arrow")
@@ -0,0 +1,128 @@
+"""
+Unit tests of the Arrow training data format and the YoDA preprocessing and training steps that use it.
+
+Usage:
+    python -m pytest yoda/tests/test_training_data.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+file_dir = os.path.dirname(os.path.abspath(__file__))
+kit_dir = os.path.abspath(os.path.join(file_dir, '..'))
+sys.path.append(kit_dir)
+
+from generative_data_prep import preprocess_data
+from tools.training_data import TrainingDataReader, convert_jsonl_to_arrow, write_records
+from train import train_model
+
+RECORDS: List[Dict[str, Any]] = [
+    {'text': 'Rechnung 1 ' * 10, 'label': {'name': 'Max', 'products': [{'quantity': 1}]}},
+    {'text': 'Rechnung 2', 'label': {}},
+    {'text': 'Rechnung 3 ä', 'label': {'name': None}},
+]
+
+
+class TrainingDataTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, name)
+
+    def write_jsonl(self, name: str, records: List[Dict[str, Any]]) -> str:
+        path = self.path(name)
+        with open(path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+        return path
+
+
+class TestTrainingData(TrainingDataTestCase):
+    def test_round_trip(self) -> None:
+        path = self.path('data.arrow')
+        self.assertEqual(write_records(iter(RECORDS), path, batch_size=2), 3)
+
+        with TrainingDataReader(path) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(list(reader), RECORDS)
+            self.assertEqual(reader[-1], RECORDS[-1])
+            self.assertEqual(reader[1:3], RECORDS[1:3])
+            self.assertEqual(reader.column('text').to_pylist(), [record['text'] for record in RECORDS])
+            with self.assertRaises(IndexError):
+                reader[3]
+
+    def test_convert_jsonl(self) -> None:
+        jsonl = self.write_jsonl('data.jsonl', RECORDS)
+        self.assertEqual(convert_jsonl_to_arrow(jsonl, self.path('data.arrow')), 3)
+        with TrainingDataReader(self.path('data.arrow')) as reader:
+            self.assertEqual(list(reader), RECORDS)
+
+    def test_unknown_columns_are_rejected(self) -> None:
+        records: List[Dict[str, Any]] = [{'text': 'a'}, {'text': 'b', 'label': {}}]
+        with self.assertRaises(ValueError):
+            write_records(records, self.path('data.arrow'), batch_size=1)
+
+
+class TestPreprocessData(TrainingDataTestCase):
+    def test_jsonl_is_default(self) -> None:
+        jsonl = self.write_jsonl('input.jsonl', RECORDS)
+        output = preprocess_data(jsonl, self.path('out'), max_seq_length=5)
+
+        self.assertEqual(output, self.path('out/preprocessed_data.jsonl'))
+        with open(output, encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([record['text'] for record in records], ['Rechn'] * 3)
+
+    def test_arrow_from_jsonl_and_arrow_match(self) -> None:
+        jsonl = self.write_jsonl('input.jsonl', RECORDS)
+        convert_jsonl_to_arrow(jsonl, self.path('input.arrow'))
+
+        for input_file in (jsonl, self.path('input.arrow')):
+            with self.subTest(input_file=os.path.basename(input_file)):
+                output = preprocess_data(input_file, self.path('out'), max_seq_length=12, output_format='arrow')
+                with TrainingDataReader(output) as reader:
+                    self.assertEqual(
+                        list(reader), [{'text': record['text'][:12], 'label': record['label']} for record in RECORDS]
+                    )
+
+    def test_empty_arrow_input(self) -> None:
+        write_records([], self.path('input.arrow'))
+        output = preprocess_data(self.path('input.arrow'), self.path('out'), output_format='arrow')
+        with TrainingDataReader(output) as reader:
+            self.assertEqual(len(reader), 0)
+
+    def test_arrow_input_without_text_is_rejected(self) -> None:
+        write_records([{'label': {}}], self.path('input.arrow'))
+        with self.assertRaises(ValueError):
+            preprocess_data(self.path('input.arrow'), self.path('out'), output_format='arrow')
+
+
+class TestTrainModel(TrainingDataTestCase):
+    def test_arrow_and_jsonl_input(self) -> None:
+        jsonl = self.write_jsonl('data.jsonl', RECORDS)
+        convert_jsonl_to_arrow(jsonl, self.path('data.arrow'))
+
+        for input_file in (jsonl, self.path('data.arrow')):
+            with self.subTest(input_file=os.path.basename(input_file)):
+                output = self.path('model/model.json')
+                train_model(input_file, output)
+                with open(output, encoding='utf-8') as file:
+                    self.assertEqual(json.load(file)['example'], RECORDS[0])
+
+    def test_empty_input(self) -> None:
+        write_records([], self.path('data.arrow'))
+        train_model(self.path('data.arrow'), self.path('model/model.json'))
+        with open(self.path('model/model.json'), encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['example'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
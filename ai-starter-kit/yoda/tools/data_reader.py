@@ -1,4 +1,5 @@
 # data_reader.py
+import json
 import os
 import re
 from typing import Any, Dict, List
@@ -9,7 +10,8 @@ def read_jsonl_data(file_path: str) -> List[Any]:
     data = []
     with open(file_path) as reader:
         for obj in reader:
-            data.append(eval(obj))
+            if obj.strip():
+                data.append(json.loads(obj))
     return data
 
 
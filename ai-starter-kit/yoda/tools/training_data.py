@@ -0,0 +1,182 @@
+# training_data.py
+import argparse
+import json
+from itertools import islice
+from types import TracebackType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Type, Union
+
+import pyarrow as pa
+
+ARROW_SUFFIX = '.arrow'
+# schema metadata key listing the columns that hold JSON-encoded values
+JSON_COLUMNS_KEY = b'yoda.json_columns'
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def _batch_schema(batch: List[Dict[str, Any]]) -> pa.Schema:
+    """
+    Derives the schema from the first batch: columns whose values are all strings are stored as
+    Arrow strings, every other column is stored JSON-encoded.
+    """
+    columns: Dict[str, bool] = {}
+    for record in batch:
+        for key, value in record.items():
+            is_text = value is None or isinstance(value, str)
+            columns[key] = columns.get(key, True) and is_text
+    json_columns = [name for name, is_text in columns.items() if not is_text]
+    return pa.schema(
+        [pa.field(name, pa.string()) for name in columns],
+        metadata={JSON_COLUMNS_KEY: json.dumps(json_columns).encode()},
+    )
+
+
+def _to_record_batch(batch: List[Dict[str, Any]], schema: pa.Schema, json_columns: Set[str]) -> pa.RecordBatch:
+    arrays = []
+    for name in schema.names:
+        if name in json_columns:
+            values = [json.dumps(record[name], ensure_ascii=False) if name in record else None for record in batch]
+        else:
+            values = [record.get(name) for record in batch]
+        try:
+            arrays.append(pa.array(values, type=pa.string()))
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f'column {name} mixes text and non-text values: {e}') from e
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_records(records: Iterable[Dict[str, Any]], output_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Writes records to an Arrow IPC file in batches of `batch_size` records.
+
+    The columns are taken from the first batch. Text columns are stored as Arrow strings so that
+    they can be sliced without copying; nested values (e.g. labels) are stored JSON-encoded and
+    decoded by `TrainingDataReader` on access.
+
+    Args:
+        records (iterable): Records to write, e.g. `{'text': ..., 'label': {...}}`.
+        output_path (str): Path of the Arrow file.
+        batch_size (int): Number of records per record batch.
+
+    Returns:
+        int: Number of records written.
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+    iterator = iter(records)
+    first_batch = list(islice(iterator, batch_size))
+    schema = _batch_schema(first_batch)
+    json_columns = set(json.loads(schema.metadata[JSON_COLUMNS_KEY]))
+
+    count = 0
+    with pa.OSFile(output_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        batch = first_batch
+        while batch:
+            unknown = {key for record in batch for key in record} - set(schema.names)
+            if unknown:
+                raise ValueError(f'records contain columns missing from the first batch: {sorted(unknown)}')
+            writer.write_batch(_to_record_batch(batch, schema, json_columns))
+            count += len(batch)
+            batch = list(islice(iterator, batch_size))
+    return count
+
+
+def iter_jsonl_records(file_path: str) -> Iterator[Dict[str, Any]]:
+    with open(file_path, encoding='utf-8') as reader:
+        for line in reader:
+            if line.strip():
+                yield json.loads(line)
+
+
+def convert_jsonl_to_arrow(jsonl_path: str, arrow_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Converts an existing JSONL training file to the Arrow format.
+
+    Returns:
+        int: Number of records converted.
+    """
+    return write_records(iter_jsonl_records(jsonl_path), arrow_path, batch_size)
+
+
+class TrainingDataReader:
+    """
+    Random-access reader for Arrow training files written by `write_records`.
+
+    The file is memory-mapped, so opening it does not parse any records and `slice` / `column`
+    return zero-copy views. Only records accessed via indexing or `iter_batches` are converted to
+    Python objects.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self._source = pa.memory_map(file_path, 'r')
+        self.table = pa.ipc.open_file(self._source).read_all()
+        metadata = self.table.schema.metadata or {}
+        self.json_columns: Set[str] = set(json.loads(metadata.get(JSON_COLUMNS_KEY, b'[]')))
+
+    def __len__(self) -> int:
+        return int(self.table.num_rows)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('only contiguous slices are supported')
+            return self._decode(self.slice(start, stop).to_pylist())
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f'record index {index} out of range')
+        return self._decode(self.table.slice(index, 1).to_pylist())[0]
+
+    def slice(self, start: int, stop: Optional[int] = None) -> pa.Table:
+        """
+        Zero-copy view of the records `start` to `stop` (exclusive).
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        return self.table.slice(start, max(stop - start, 0))
+
+    def column(self, name: str) -> pa.ChunkedArray:
+        """
+        Zero-copy view of a column; JSON-encoded columns are returned as strings.
+        """
+        return self.table.column(name)
+
+    def iter_batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        for start in range(0, len(self), batch_size):
+            yield self._decode(self.slice(start, start + batch_size).to_pylist())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for batch in self.iter_batches():
+            yield from batch
+
+    def _decode(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for record in records:
+            for name in self.json_columns:
+                if record.get(name) is not None:
+                    record[name] = json.loads(record[name])
+        return records
+
+    def close(self) -> None:
+        # slices that are still referenced keep the mapping alive
+        self._source.close()
+
+    def __enter__(self) -> 'TrainingDataReader':
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a JSONL training file to the Arrow format.')
+    parser.add_argument('jsonl_path', type=str, help='path to the JSONL input file')
+    parser.add_argument('arrow_path', type=str, help='path to the Arrow output file')
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE, help='records per record batch')
+    args = parser.parse_args()
+    count = convert_jsonl_to_arrow(args.jsonl_path, args.arrow_path, args.batch_size)
+    print(f'Converted {count} records to {args.arrow_path}')
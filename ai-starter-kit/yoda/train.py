@@ -1,9 +1,17 @@
 import json
 import os
+from typing import Any, Dict, List, Union
 
-def train_model(input_data, output_model):
-    with open(input_data, "r", encoding="utf-8") as infile:
-        data = [json.loads(line) for line in infile]
+from tools.training_data import ARROW_SUFFIX, TrainingDataReader
+
+def train_model(input_data: str, output_model: str) -> None:
+    data: Union[TrainingDataReader, List[Dict[str, Any]]]
+    if input_data.endswith(ARROW_SUFFIX):
+        # Memory-mapped: Einträge werden erst beim Zugriff gelesen
+        data = TrainingDataReader(input_data)
+    else:
+        with open(input_data, "r", encoding="utf-8") as infile:
+            data = [json.loads(line) for line in infile]
     
     print("Trainingsdaten geladen:", len(data), "Einträge")
 
@@ -12,7 +20,7 @@ def train_model(input_data, output_model):
         "model_name": "dummy_yoda_model",
         "status": "training_complete",
         "fields": ["name", "address", "phone", "email", "products", "total_amount", "payment_due"],
-        "example": data[0] if data else {}  # Beispiel aus den Trainingsdaten
+        "example": data[0] if len(data) else {}  # Beispiel aus den Trainingsdaten
     }
 
     # Verzeichnis erstellen, falls nicht vorhanden
@@ -23,11 +31,15 @@ def train_model(input_data, output_model):
         json.dump(model, outfile, indent=4, ensure_ascii=False)
         print(f"Modell gespeichert unter: {output_model}")
 
-# Pfade anpassen
-input_data_path = "./data/output/preprocessed/preprocessed_data.jsonl"
-output_model_path = "./output/trained_model/model.json"
+if __name__ == "__main__":
+    # Pfade anpassen
+    input_data_path = "./data/output/preprocessed/preprocessed_data" + ARROW_SUFFIX
+    if not os.path.exists(input_data_path):
+        # Vorverarbeitung im JSONL-Format
+        input_data_path = "./data/output/preprocessed/preprocessed_data.jsonl"
+    output_model_path = "./output/trained_model/model.json"
 
-if os.path.exists(input_data_path):
-    train_model(input_data_path, output_model_path)
-else:
-    print(f"Fehler: Eingabedatei {input_data_path} nicht gefunden.")
+    if os.path.exists(input_data_path):
+        train_model(input_data_path, output_model_path)
+    else:
+        print(f"Fehler: Eingabedatei {input_data_path} nicht gefunden.")
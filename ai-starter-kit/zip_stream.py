@@ -0,0 +1,226 @@
+import struct
+import time
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+# Blockgröße beim Lesen der Dateien
+READ_CHUNK_SIZE = 64 * 1024
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_ZIP64_EXTRA = struct.Struct("<HHQ")
+_ZIP64_END = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+_END = struct.Struct("<IHHHHIIH")
+
+_UTF8_FLAG = 0x0800
+_MAX_32 = 0xFFFFFFFF
+_MAX_16 = 0xFFFF
+
+
+class ZipEntry(NamedTuple):
+    name: str
+    path: str
+    size: int
+    crc32: int
+
+
+class StoredZipStream:
+    """
+    Erzeugt ein unkomprimiertes ZIP-Archiv (Methode STORED) beim Streamen.
+
+    Da Größe und CRC32 aller Dateien vorab bekannt sind, ist das Archiv bytegenau festgelegt:
+    die Gesamtlänge steht vor dem ersten Byte fest und beliebige Byte-Bereiche (HTTP Range)
+    können erzeugt werden, ohne das Archiv oder die Dateiliste im Speicher zu halten.
+    `entries` wird bei jedem Durchlauf neu aufgerufen und muss die Einträge stets in derselben
+    Reihenfolge liefern. Ab 65535 Einträgen oder 4 GiB wird ZIP64 verwendet.
+    """
+
+    def __init__(
+        self,
+        entries: Callable[[], Iterable[ZipEntry]],
+        count: int,
+        total_name_bytes: int,
+        total_data_bytes: int,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        self.entries = entries
+        self.count = count
+        self._dos_time, self._dos_date = _dos_datetime(timestamp if timestamp is not None else time.time())
+
+        self.central_offset = _LOCAL_HEADER.size * count + total_name_bytes + total_data_bytes
+        plain_central_size = _CENTRAL_HEADER.size * count + total_name_bytes
+        self.zip64 = count >= _MAX_16 or self.central_offset + plain_central_size >= _MAX_32
+        self.central_size = plain_central_size + (_ZIP64_EXTRA.size * count if self.zip64 else 0)
+
+        end_size = _END.size + (_ZIP64_END.size + _ZIP64_LOCATOR.size if self.zip64 else 0)
+        self.total_size = self.central_offset + self.central_size + end_size
+
+    @property
+    def _version(self) -> int:
+        return 45 if self.zip64 else 20
+
+    def iter_bytes(
+        self, start: int = 0, end: Optional[int] = None, chunk_size: int = READ_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Liefert die Bytes `start` bis einschließlich `end` des Archivs.
+        """
+        end = self.total_size - 1 if end is None else min(end, self.total_size - 1)
+        if start > end:
+            return
+
+        # Lokale Header und Dateidaten
+        offset = 0
+        if start < self.central_offset:
+            for entry in self.entries():
+                name = entry.name.encode("utf-8")
+                header = self._local_header(entry, name)
+                entry_end = offset + len(header) + entry.size
+                if entry_end > start:
+                    yield from _slice(header, offset, start, end)
+                    yield from _file_slice(entry, offset + len(header), start, end, chunk_size)
+                offset = entry_end
+                if offset > end:
+                    return
+            if offset != self.central_offset:
+                raise ValueError("Einträge passen nicht zur angegebenen Archivgröße.")
+
+        # Zentralverzeichnis
+        offset = self.central_offset
+        local_offset = 0
+        for entry in self.entries():
+            name = entry.name.encode("utf-8")
+            record = self._central_header(entry, name, local_offset)
+            local_offset += _LOCAL_HEADER.size + len(name) + entry.size
+            if offset + len(record) > start:
+                yield from _slice(record, offset, start, end)
+            offset += len(record)
+            if offset > end:
+                return
+
+        yield from _slice(self._end_records(), offset, start, end)
+
+    def _local_header(self, entry: ZipEntry, name: bytes) -> bytes:
+        if entry.size >= _MAX_32:
+            raise ValueError(f"Datei zu groß für das Archiv: {entry.name}")
+        header = _LOCAL_HEADER.pack(
+            0x04034B50,
+            self._version,
+            _UTF8_FLAG,
+            0,
+            self._dos_time,
+            self._dos_date,
+            entry.crc32,
+            entry.size,
+            entry.size,
+            len(name),
+            0,
+        )
+        return header + name
+
+    def _central_header(self, entry: ZipEntry, name: bytes, local_offset: int) -> bytes:
+        extra = _ZIP64_EXTRA.pack(0x0001, 8, local_offset) if self.zip64 else b""
+        record = _CENTRAL_HEADER.pack(
+            0x02014B50,
+            self._version,
+            self._version,
+            _UTF8_FLAG,
+            0,
+            self._dos_time,
+            self._dos_date,
+            entry.crc32,
+            entry.size,
+            entry.size,
+            len(name),
+            len(extra),
+            0,
+            0,
+            0,
+            0,
+            _MAX_32 if self.zip64 else local_offset,
+        )
+        return record + name + extra
+
+    def _end_records(self) -> bytes:
+        records = b""
+        if self.zip64:
+            zip64_end_offset = self.central_offset + self.central_size
+            records += _ZIP64_END.pack(
+                0x06064B50,
+                _ZIP64_END.size - 12,
+                45,
+                45,
+                0,
+                0,
+                self.count,
+                self.count,
+                self.central_size,
+                self.central_offset,
+            )
+            records += _ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_end_offset, 1)
+        records += _END.pack(
+            0x06054B50,
+            0,
+            0,
+            min(self.count, _MAX_16),
+            min(self.count, _MAX_16),
+            min(self.central_size, _MAX_32),
+            _MAX_32 if self.zip64 else self.central_offset,
+            0,
+        )
+        return records
+
+
+def parse_range(header: Optional[str], total_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Wertet einen HTTP-Range-Header mit einem Bereich aus (`bytes=a-b`, `bytes=a-`, `bytes=-n`).
+
+    Gibt None zurück, wenn kein (unterstützter) Bereich angefragt wurde, und löst ValueError aus,
+    wenn der Bereich nicht erfüllbar ist.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                raise ValueError("Leerer Bereich")
+            start, end = max(total_size - length, 0), total_size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else total_size - 1
+    except ValueError:
+        raise ValueError(f"Ungültiger Bereich: {header}")
+    if start >= total_size or start > end:
+        raise ValueError(f"Bereich nicht erfüllbar: {header}")
+    return start, min(end, total_size - 1)
+
+
+def _slice(data: bytes, offset: int, start: int, end: int) -> Iterator[bytes]:
+    lower = max(start - offset, 0)
+    upper = min(end - offset + 1, len(data))
+    if lower < upper:
+        yield data[lower:upper]
+
+
+def _file_slice(entry: ZipEntry, offset: int, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    lower = max(start - offset, 0)
+    upper = min(end - offset + 1, entry.size)
+    if lower >= upper:
+        return
+    with open(entry.path, "rb") as file:
+        file.seek(lower)
+        remaining = upper - lower
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                raise ValueError(f"Datei ist kürzer als im Index angegeben: {entry.name}")
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday